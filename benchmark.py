@@ -0,0 +1,2497 @@
+# -*- coding: utf-8 -*-
+"""
+Bancs d'essai de performance (base SQLite temporaire, jamais la base réelle)
+
+Usage:
+    python benchmark.py checkout [--sales 200]
+    python benchmark.py contention [--readers 4] [--seconds 5]
+    python benchmark.py scan [--scans 2000]
+    python benchmark.py cache-sync [--products 10000]   (échoue si une écriture d'une autre connexion n'est pas vue)
+    python benchmark.py history [--sales 50000]
+    python benchmark.py history-query [--sales 200000]
+    python benchmark.py reports [--sales 200000]   (échoue si un rapport n'utilise pas l'index)
+    python benchmark.py rollup [--sales 200000]    (échoue si l'agrégat incrémental diverge)
+    python benchmark.py search [--products 100000]   (échoue si le compte FTS5 est bien plus lent que LIKE)
+    python benchmark.py ui-stall [--sales 200000]
+    python benchmark.py signals [--sales 20]
+    python benchmark.py startup [--products 100000]
+    python benchmark.py dbinfo [--sales 200000]
+    python benchmark.py backup [--size-mb 1024]
+    python benchmark.py backup-store [--sales 50000] [--hours 720] [--sales-per-hour 30]
+    python benchmark.py excel-export [--sales 1000000]
+    python benchmark.py data-export [--sales 1000000]
+    python benchmark.py product-import [--rows 50000]
+    python benchmark.py restore [--products 50000] [--customers 10000]
+    python benchmark.py profiler [--calls 100000]   (échoue si la requête lente n'est pas capturée)
+    python benchmark.py transactions [--ops 300]
+    python benchmark.py crash      (échoue si un crash laisse une opération à moitié écrite)
+    python benchmark.py cart [--lines 500]
+    python benchmark.py cart-ui [--lines 500]
+    python benchmark.py held-carts [--carts 200] [--lines 40]
+    python benchmark.py numbers [--threads 8] [--sales 5000]   (échoue au moindre numéro en double)
+    python benchmark.py registers [--registers 4] [--sales 500]   (échoue si une mise à jour de stock est perdue)
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Ajouter le dossier du projet au chemin Python
+sys.path.insert(0, str(Path(__file__).parent))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import config
+
+# Rediriger la base vers un fichier temporaire AVANT d'importer db_manager
+_BENCH_DIR = Path(tempfile.mkdtemp(prefix="pos_bench_"))
+config.DATABASE_PATH = _BENCH_DIR / "bench.db"
+
+from database.db_manager import db  # noqa: E402
+from core.logger import logger  # noqa: E402
+
+# Les journaux INFO par vente fausseraient les mesures
+logger.logger.setLevel(logging.WARNING)
+
+
+def seed_products(count: int, stock: int = 10_000_000) -> list:
+    """Créer `count` produits de test et retourner leurs IDs"""
+    db.execute_many(
+        """
+        INSERT INTO products (barcode, name, purchase_price, selling_price, stock_quantity, category_id)
+        VALUES (?, ?, ?, ?, ?, 1)
+        """,
+        [(f"BENCH-{i:07d}", f"Produit test {i}", 50.0, 80.0, stock) for i in range(count)]
+    )
+    rows = db.execute_query("SELECT id FROM products WHERE barcode LIKE 'BENCH-%' ORDER BY id")
+    return [row['id'] for row in rows]
+
+
+def seed_sales(product_ids: list, count: int, lines: int = 5, days: int = 365):
+    """Générer un historique de `count` ventes réparties sur `days` jours"""
+    from datetime import datetime, timedelta
+    start = datetime.now() - timedelta(days=days)
+    conn = db.get_connection()
+    sales = []
+    for i in range(count):
+        sale_date = (start + timedelta(seconds=i * days * 86400 // max(count, 1))).strftime("%Y-%m-%d %H:%M:%S")
+        sales.append((i + 1, f"SEED-{i:08d}", 1, 80.0 * lines, 80.0 * lines, sale_date))
+    conn.executemany(
+        "INSERT INTO sales (id, sale_number, cashier_id, subtotal, total_amount, sale_date) "
+        "VALUES (?, ?, ?, ?, ?, ?)", sales
+    )
+    conn.executemany(
+        "INSERT INTO sale_items (sale_id, product_id, product_name, quantity, unit_price, subtotal, purchase_price, category_id) "
+        "VALUES (?, ?, 'Produit test', 1, 80.0, 80.0, 50.0, 1)",
+        ((i + 1, product_ids[(i * lines + j) % len(product_ids)]) for i in range(count) for j in range(lines))
+    )
+    conn.commit()
+
+
+def _reset_database(journal_mode: str):
+    """Repartir d'une base vierge avec le mode de journal demandé"""
+    db.close()
+    config.DATABASE_CONFIG['journal_mode'] = journal_mode
+    config.DATABASE_PATH = _BENCH_DIR / f"bench_{journal_mode.lower()}.db"
+    db.db_path = config.DATABASE_PATH
+    db.initialize_database()
+
+
+def _make_pos_manager(register_number: int = 1):
+    """POSManager d'une caisse (numéros de ticket tirés de document_sequences)"""
+    from modules.sales.pos import POSManager
+
+    pos = POSManager()
+    pos.set_register_number(register_number)
+    return pos
+
+
+def _fill_cart(cart, products: list):
+    """Remplir un panier sans passer par la vérification de stock (hors mesure)"""
+    from modules.sales.cart import CartItem
+    cart.items = [CartItem(p, 1.0) for p in products]
+
+
+def _legacy_checkout(cart, cashier_id: int) -> None:
+    """
+    Reproduit le schéma d'accès de l'ancien complete_sale :
+    un commit par instruction et une lecture de stock par ligne.
+    """
+    sale_id = db.execute_insert(
+        "INSERT INTO sales (sale_number, cashier_id, subtotal, total_amount, payment_method, status) "
+        "VALUES (?, ?, ?, ?, 'cash', 'completed')",
+        (f"LEGACY-{time.perf_counter_ns()}", cashier_id, cart.get_total(), cart.get_total())
+    )
+    for item in cart.items:
+        db.execute_insert(
+            "INSERT INTO sale_items (sale_id, product_id, product_name, barcode, quantity, unit_price, "
+            "discount_percentage, subtotal, purchase_price, category_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (sale_id, item.product_id, item.product_name, item.barcode, item.quantity, item.unit_price,
+             item.discount_percentage, item.get_subtotal(), item.purchase_price, item.category_id)
+        )
+        row = db.fetch_one(
+            "SELECT id, stock_quantity, parent_product_id, packing_quantity FROM products WHERE id = ?",
+            (item.product_id,)
+        )
+        db.execute_update("UPDATE products SET stock_quantity = ? WHERE id = ?",
+                          (row['stock_quantity'] - item.quantity, item.product_id))
+    cart.items = []
+
+
+def bench_checkout(sales: int):
+    """Ventes/seconde : ancien schéma vs transaction unique, paniers de 1, 10 et 100 lignes"""
+    from modules.products.product_manager import product_manager
+
+    ids = seed_products(100)
+    products = [product_manager.get_product(pid) for pid in ids]
+    pos = _make_pos_manager()
+
+    print(f"Base: {config.DATABASE_PATH}")
+    print(f"{'lignes':>6} | {'ancien (ventes/s)':>18} | {'nouveau (ventes/s)':>18} | {'gain':>6} | phases (ms, moyenne)")
+    for lines in (1, 10, 100):
+        basket = products[:lines]
+
+        started = time.perf_counter()
+        for _ in range(sales):
+            _fill_cart(pos.current_cart, basket)
+            _legacy_checkout(pos.current_cart, cashier_id=1)
+        legacy_rate = sales / (time.perf_counter() - started)
+
+        phases = {}
+        started = time.perf_counter()
+        for _ in range(sales):
+            _fill_cart(pos.current_cart, basket)
+            total = pos.current_cart.get_total()
+            success, message, _ = pos.complete_sale(1, 'cash', total)
+            if not success:
+                raise RuntimeError(message)
+            for key, value in pos.last_checkout_metrics.items():
+                if key.endswith('_ms'):
+                    phases[key] = phases.get(key, 0.0) + value
+        new_rate = sales / (time.perf_counter() - started)
+
+        detail = ", ".join(f"{k[:-3]}={v / sales:.2f}" for k, v in phases.items())
+        print(f"{lines:>6} | {legacy_rate:>18.1f} | {new_rate:>18.1f} | {new_rate / legacy_rate:>5.1f}x | {detail}")
+    # Comparaison à travail inégal : l'ancien schéma n'écrit ni daily_rollup ni
+    # le compteur de tickets, qui coûtent ~30 % d'une vente d'un article
+    print("Ticket d'un article : l'ancien chemin n'écrit ni daily_rollup ni document_sequences "
+          "(compteur de tickets) ; le gain n'apparaît qu'à partir de quelques lignes.")
+
+
+def bench_contention(readers: int, seconds: float):
+    """Une caisse qui vend pendant que N threads exécutent des rapports de bénéfices"""
+    from datetime import datetime, timedelta
+    from modules.products.product_manager import product_manager
+    from modules.reports.profit_report import profit_report_manager
+
+    end_date = datetime.now().strftime("%Y-%m-%d")
+    start_date = (datetime.now() - timedelta(days=365)).strftime("%Y-%m-%d")
+
+    print(f"{'journal':>8} | {'ventes/s':>9} | {'attente max (ms)':>16} | {'échecs':>6} | {'rapports/s':>10}")
+    for journal_mode in ("DELETE", "WAL"):
+        _reset_database(journal_mode)
+        ids = seed_products(200)
+        seed_sales(ids, 20_000)
+        basket = [product_manager.get_product(pid) for pid in ids[:10]]
+
+        stop = threading.Event()
+        counters = {'sales': 0, 'failures': 0, 'reports': 0, 'max_ms': 0.0}
+        lock = threading.Lock()
+
+        def writer():
+            pos = _make_pos_manager()
+            while not stop.is_set():
+                _fill_cart(pos.current_cart, basket)
+                started = time.perf_counter()
+                success, _, _ = pos.complete_sale(1, 'cash', pos.current_cart.get_total())
+                elapsed = (time.perf_counter() - started) * 1000
+                counters['max_ms'] = max(counters['max_ms'], elapsed)
+                counters['sales' if success else 'failures'] += 1
+            db.close()
+
+        def reader():
+            while not stop.is_set():
+                profit_report_manager.get_profit_by_period(start_date, end_date)
+                profit_report_manager.get_daily_profit_trend(start_date, end_date)
+                with lock:
+                    counters['reports'] += 1
+            db.close()
+
+        threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader) for _ in range(readers)]
+        for t in threads:
+            t.start()
+        time.sleep(seconds)
+        stop.set()
+        for t in threads:
+            t.join()
+
+        print(f"{journal_mode:>8} | {counters['sales'] / seconds:>9.1f} | {counters['max_ms']:>16.1f} | "
+              f"{counters['failures']:>6} | {counters['reports'] / seconds:>10.1f}")
+
+
+def bench_scan(scans: int):
+    """Latence scan -> panier selon la taille du catalogue (base vs cache)"""
+    import random
+    from modules.products.product_cache import product_cache
+    from modules.products.product_manager import product_manager
+    from modules.sales.cart import Cart
+
+    print(f"{'catalogue':>9} | {'base (µs/scan)':>14} | {'cache (µs/scan)':>15} | {'chargement (ms)':>15} | hit rate")
+    seeded = 0
+    for size in (1_000, 10_000, 100_000):
+        db.execute_many(
+            "INSERT INTO products (barcode, name, purchase_price, selling_price, stock_quantity, category_id) "
+            "VALUES (?, ?, 50.0, 80.0, 1000, 1)",
+            [(f"SCAN-{i:07d}", f"Article {i}") for i in range(seeded, size)]
+        )
+        seeded = size
+        barcodes = [f"SCAN-{random.randrange(size):07d}" for _ in range(scans)]
+
+        timings = {}
+        for mode in ("base", "cache"):
+            if mode == "cache":
+                product_cache.warm()
+            else:
+                product_cache.disable()
+            cart = Cart()
+            started = time.perf_counter()
+            for i, barcode in enumerate(barcodes):
+                if i % 50 == 0:
+                    cart = Cart()
+                cart.add_item(product_manager.get_product_by_barcode(barcode), 1)
+            timings[mode] = (time.perf_counter() - started) / scans * 1e6
+
+        stats = product_cache.get_stats()
+        print(f"{size:>9} | {timings['base']:>14.1f} | {timings['cache']:>15.1f} | "
+              f"{stats['last_warm_ms']:>15.0f} | {stats['hit_rate']}%")
+
+
+def bench_cache_sync(products: int):
+    """Cache catalogue et écritures d'une autre connexion (autre caisse ou processus)"""
+    import sqlite3
+    from modules.products.product_cache import product_cache
+    from modules.products.product_manager import product_manager
+
+    seed_products(products, stock=1000)
+    product_cache.warm()
+    other = sqlite3.connect(str(config.DATABASE_PATH), timeout=10)
+    failures = []
+
+    def price(barcode: str):
+        product = product_manager.get_product_by_barcode(barcode)
+        return product['selling_price'] if product else None
+
+    # 1. Prix modifié et validé par une autre connexion
+    other.execute("UPDATE products SET selling_price = 99 WHERE barcode = 'BENCH-0000001'")
+    other.commit()
+    if price("BENCH-0000001") != 99:
+        failures.append("prix modifié par une autre connexion non vu")
+
+    # 2. Transaction validée longtemps après son UPDATE, une synchronisation
+    #    locale (signal) ayant eu lieu entre les deux
+    other.execute("BEGIN IMMEDIATE")
+    other.execute("UPDATE products SET selling_price = 77 WHERE barcode = 'BENCH-0000002'")
+    time.sleep(3)
+    product_cache.sync()
+    other.commit()
+    if price("BENCH-0000002") != 77:
+        failures.append("transaction validée 3 s après son UPDATE non vue")
+
+    # 3. Produit créé ailleurs
+    other.execute("INSERT INTO products (barcode, name, purchase_price, selling_price, stock_quantity, category_id) "
+                  "VALUES ('REMOTE-1', 'Produit distant', 10, 15, 5, 1)")
+    other.commit()
+    if price("REMOTE-1") != 15:
+        failures.append("produit créé par une autre connexion non vu")
+    other.close()
+
+    # Coût de la vérification data_version sur le chemin de scan
+    barcodes = [f"BENCH-{i % products:07d}" for i in range(20_000)]
+    started = time.perf_counter()
+    for barcode in barcodes:
+        product_manager.get_product_by_barcode(barcode)
+    per_scan = (time.perf_counter() - started) / len(barcodes) * 1e6
+    print(f"Lecture par code-barres (cache, base inchangée): {per_scan:.1f} µs/scan")
+
+    if failures:
+        print(f"ÉCHEC: {'; '.join(failures)}")
+        sys.exit(1)
+    print("OK: prix, transaction tardive et création d'une autre connexion vus à la lecture suivante")
+
+
+def bench_history(sales: int):
+    """Premier écran des pages de liste sur un gros historique (QTableView + modèle paginé)"""
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtCore import QDate
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    ids = seed_products(5_000)
+    seed_sales(ids, sales)
+    db.execute_many(
+        "INSERT INTO customers (code, full_name, phone) VALUES (?, ?, ?)",
+        [(f"BENCH-{i:06d}", f"Client {i}", f"0550{i:06d}") for i in range(5_000)]
+    )
+
+    from ui.sales_history_page import SalesHistoryPage
+    from ui.products_page import ProductsPage
+    from ui.customers_page import CustomersPage
+
+    print(f"{'page':>16} | {'lignes':>7} | {'chargées':>8} | {'premier écran (ms)':>18}")
+    for name, factory in (("historique", SalesHistoryPage), ("produits", ProductsPage), ("clients", CustomersPage)):
+        page = factory()
+        page.resize(1280, 800)
+        page.show()
+        app.processEvents()
+
+        started = time.perf_counter()
+        if name == "historique":
+            page.start_date.blockSignals(True)
+            page.start_date.setDate(QDate.currentDate().addDays(-400))
+            page.start_date.blockSignals(False)
+            page.load_sales()
+            model, total = page.sales_model, sales
+        elif name == "produits":
+            page.load_products()
+            model, total = page.model, len(ids)
+        else:
+            from core.db_executor import db_executor
+            page.load_customers()
+            db_executor.wait_for_done()
+            app.processEvents()
+            model, total = page.model, 5_000
+        page.repaint()
+        app.processEvents()
+        elapsed = (time.perf_counter() - started) * 1000
+
+        print(f"{name:>16} | {total:>7} | {model.rowCount():>8} | {elapsed:>18.1f}")
+        page.close()
+
+
+def bench_history_query(sales: int):
+    """Historique des ventes avec bénéfice : une requête par vente vs requête agrégée paginée"""
+    from datetime import datetime, timedelta
+    from modules.reports.sales_report import sales_report_manager
+
+    ids = seed_products(1_000)
+    seed_sales(ids, sales)
+    end = datetime.now().strftime("%Y-%m-%d")
+    start = (datetime.now() - timedelta(days=366)).strftime("%Y-%m-%d")
+    print(f"Base: {config.DATABASE_PATH} ({sales} ventes)")
+
+    # Ancien schéma : liste complète puis un SUM(sale_items) par vente
+    started = time.perf_counter()
+    rows = db.execute_query("""
+        SELECT s.*, u.full_name as cashier_name, c.full_name as customer_name
+        FROM sales s
+        LEFT JOIN users u ON s.cashier_id = u.id
+        LEFT JOIN customers c ON s.customer_id = c.id
+        WHERE DATE(s.sale_date) BETWEEN ? AND ?
+        ORDER BY s.sale_date DESC
+    """, (start, end))
+    legacy_profit = 0
+    for sale in rows:
+        p_res = db.fetch_one("SELECT SUM((unit_price - purchase_price) * quantity) as profit "
+                             "FROM sale_items WHERE sale_id = ?", (sale['id'],))
+        legacy_profit += p_res['profit'] or 0
+    legacy_ms = (time.perf_counter() - started) * 1000
+    legacy_queries = len(rows) + 1
+
+    def timed(func, repeat=3):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = func()
+            elapsed = (time.perf_counter() - started) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+        return best, result
+
+    first_ms, page = timed(lambda: sales_report_manager.get_sales_history(start, end, with_profit=True))
+    deep_ms, _ = timed(lambda: sales_report_manager.get_sales_history(start, end, with_profit=True,
+                                                                       offset=sales // 2))
+    sorted_ms, _ = timed(lambda: sales_report_manager.get_sales_history(start, end, with_profit=True,
+                                                                         sort_by='customer_name', descending=False))
+    totals_ms, totals = timed(lambda: sales_report_manager.get_sales_history_totals(start, end, with_profit=True))
+    full_ms, full = timed(lambda: sales_report_manager.get_sales_history(start, end, with_profit=True,
+                                                                         limit=sales), repeat=1)
+
+    assert abs(totals['total_profit'] - legacy_profit) < 1e-6 * max(1, legacy_profit)
+    assert sum(r['profit'] for r in full) == totals['total_profit']
+
+    print(f"{'chemin':>34} | {'requêtes':>8} | {'ms':>9}")
+    print(f"{'ancien (liste + profit/vente)':>34} | {legacy_queries:>8} | {legacy_ms:>9.1f}")
+    print(f"{'nouveau, liste complète':>34} | {1:>8} | {full_ms:>9.1f}")
+    print(f"{'nouveau, 1re page (200)':>34} | {1:>8} | {first_ms:>9.1f}")
+    print(f"{'nouveau, page au milieu':>34} | {1:>8} | {deep_ms:>9.1f}")
+    print(f"{'nouveau, 1re page triée client':>34} | {1:>8} | {sorted_ms:>9.1f}")
+    print(f"{'nouveau, totaux CA/bénéfice':>34} | {1:>8} | {totals_ms:>9.1f}")
+
+
+def _sales_plan(sql: str, params: tuple) -> list:
+    """Lignes EXPLAIN QUERY PLAN qui concernent les tables sales et daily_rollup"""
+    plan = db.get_connection().execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+    return [row[3] for row in plan if row[3].split()[1:2] in (["s"], ["sales"], ["r"], ["daily_rollup"])]
+
+
+def check_report_plans() -> list:
+    """
+    Exécuter chaque rapport en capturant ses requêtes, et vérifier via
+    EXPLAIN QUERY PLAN que tout filtre de date sur sales (ou sur daily_rollup)
+    passe par un index.
+    Retourne la liste des échecs (requête, plan).
+    """
+    from datetime import datetime, timedelta
+    from modules.reports.sales_report import sales_report_manager
+    from modules.reports.profit_report import profit_report_manager
+
+    end = datetime.now().strftime("%Y-%m-%d")
+    start = (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d")
+    now = datetime.now()
+    reports = {
+        'get_sales_history': lambda: sales_report_manager.get_sales_history(start, end, with_profit=True),
+        'get_sales_history_totals': lambda: sales_report_manager.get_sales_history_totals(start, end, with_profit=True),
+        'get_sales_by_period': lambda: sales_report_manager.get_sales_by_period(start, end),
+        'get_daily_sales': lambda: sales_report_manager.get_daily_sales(),
+        'get_monthly_sales': lambda: sales_report_manager.get_monthly_sales(now.year, now.month),
+        'get_sales_by_cashier': lambda: sales_report_manager.get_sales_by_cashier(start, end),
+        'get_sales_by_payment_method': lambda: sales_report_manager.get_sales_by_payment_method(start, end),
+        'get_top_selling_products': lambda: sales_report_manager.get_top_selling_products(start, end),
+        'get_sales_by_category': lambda: sales_report_manager.get_sales_by_category(start, end),
+        'get_hourly_sales': lambda: sales_report_manager.get_hourly_sales(),
+        'get_profit_by_period': lambda: profit_report_manager.get_profit_by_period(start, end),
+        'get_profit_by_product': lambda: profit_report_manager.get_profit_by_product(start, end),
+        'get_profit_by_category': lambda: profit_report_manager.get_profit_by_category(start, end),
+        'get_daily_profit_trend': lambda: profit_report_manager.get_daily_profit_trend(start, end),
+        'get_daily_profit_trend(cat)': lambda: profit_report_manager.get_daily_profit_trend(start, end, 1),
+        'get_loss_making_products': lambda: profit_report_manager.get_loss_making_products(start, end),
+        'get_category_performance_report': lambda: profit_report_manager.get_category_performance_report(start, end),
+        'today_sales (vue)': lambda: db.execute_query("SELECT * FROM today_sales"),
+    }
+
+    captured = []
+    originals = (db.execute_query, db.fetch_one)
+
+    def capture(func):
+        def wrapper(query, params=()):
+            captured.append((query, tuple(params)))
+            return func(query, params)
+        return wrapper
+
+    failures = []
+    db.execute_query, db.fetch_one = capture(originals[0]), capture(originals[1])
+    try:
+        for name, run in reports.items():
+            captured.clear()
+            run()
+            plans = [(q, _sales_plan(q, p)) for q, p in captured
+                     if "sale_date" in q or "today_sales" in q or "daily_rollup" in q]
+            if not plans:
+                failures.append((name, "aucune requête filtrée par date"))
+            for query, plan in plans:
+                ok = plan and all("idx_sales_date" in line or "idx_sales_status_date" in line
+                                  or "sqlite_autoindex_daily_rollup" in line
+                                  or "PRIMARY KEY" in line for line in plan)
+                print(f"{'OK ' if ok else 'ÉCHEC'} {name:<32} {' | '.join(plan)}")
+                if not ok:
+                    failures.append((name, plan))
+    finally:
+        db.execute_query, db.fetch_one = originals
+    return failures
+
+
+def bench_reports(sales: int):
+    """Plan d'exécution de tous les rapports + durée d'un rapport mensuel/annuel"""
+    from datetime import datetime, timedelta
+    from modules.reports.profit_report import profit_report_manager
+
+    from modules.reports.daily_rollup import daily_rollup
+
+    ids = seed_products(1_000)
+    seed_sales(ids, sales)
+    daily_rollup.rebuild()
+    print(f"Base: {config.DATABASE_PATH} ({sales} ventes)")
+
+    failures = check_report_plans()
+
+    # Ancien filtre date(s.sale_date) BETWEEN ? AND ? (parcours complet de sales)
+    legacy_sql = """
+        SELECT SUM(si.quantity * si.unit_price * (1 - si.discount_percentage / 100.0)) as total_revenue,
+               SUM(si.quantity * si.purchase_price) as total_cost,
+               COUNT(DISTINCT s.id) as sale_count, SUM(si.quantity) as total_items_sold
+        FROM sale_items si
+        JOIN sales s ON si.sale_id = s.id
+        WHERE date(s.sale_date) BETWEEN ? AND ?
+          AND s.status = 'completed'
+    """
+    print(f"\n{'période':>8} | {'date() BETWEEN (ms)':>19} | {'rapport actuel (ms)':>19}")
+    for label, days in (("jour", 0), ("mois", 30), ("année", 365)):
+        end = datetime.now().strftime("%Y-%m-%d")
+        start = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
+        started = time.perf_counter()
+        db.fetch_one(legacy_sql, (start, end))
+        legacy_ms = (time.perf_counter() - started) * 1000
+        started = time.perf_counter()
+        profit_report_manager.get_profit_by_period(start, end)
+        new_ms = (time.perf_counter() - started) * 1000
+        print(f"{label:>8} | {legacy_ms:>19.1f} | {new_ms:>19.1f}")
+
+    if failures:
+        print(f"\n{len(failures)} requête(s) de rapport sans index sur sales")
+        sys.exit(1)
+
+
+def _rollup_snapshot() -> list:
+    """Contenu de daily_rollup, arrondi pour comparer deux calculs"""
+    rows = db.execute_query("""
+        SELECT day, category_id, cashier_id, payment_method, sale_count, order_count,
+               ROUND(quantity, 6), ROUND(revenue, 6), ROUND(subtotal, 6), ROUND(cost, 6)
+        FROM daily_rollup ORDER BY day, category_id, cashier_id, payment_method
+    """)
+    return [tuple(row) for row in rows]
+
+
+def bench_rollup(sales: int):
+    """Rapports annuels : sale_items bruts vs daily_rollup, et cohérence de la tenue incrémentale"""
+    from datetime import datetime, timedelta
+    from database.db_manager import day_range
+    from modules.products.product_manager import product_manager
+    from modules.reports.daily_rollup import daily_rollup
+    from modules.reports.profit_report import profit_report_manager
+    from modules.reports.sales_report import sales_report_manager
+
+    ids = seed_products(1_000)
+    seed_sales(ids, sales)
+    started = time.perf_counter()
+    rows = daily_rollup.rebuild()
+    print(f"Base: {config.DATABASE_PATH} ({sales} ventes, reconstruction {rows} lignes "
+          f"en {(time.perf_counter() - started) * 1000:.0f} ms)")
+
+    # Requêtes de la version précédente (plage indexée sur sales, sale_items bruts)
+    raw = {
+        'get_profit_by_period': """
+            SELECT SUM(si.quantity * si.unit_price * (1 - si.discount_percentage / 100.0)),
+                   SUM(si.quantity * si.purchase_price), COUNT(DISTINCT s.id), SUM(si.quantity)
+            FROM sale_items si JOIN sales s ON si.sale_id = s.id
+            WHERE s.sale_date >= ? AND s.sale_date < ? AND s.status = 'completed'
+        """,
+        'get_daily_profit_trend': """
+            SELECT date(s.sale_date), SUM(si.quantity * si.unit_price * (1 - si.discount_percentage / 100.0)),
+                   SUM(si.quantity * si.purchase_price)
+            FROM sale_items si JOIN sales s ON si.sale_id = s.id
+            WHERE s.sale_date >= ? AND s.sale_date < ? AND s.status = 'completed'
+            GROUP BY date(s.sale_date)
+        """,
+        'get_sales_by_category': """
+            SELECT c.id, SUM(si.quantity), SUM(si.subtotal), COUNT(DISTINCT s.id)
+            FROM sale_items si JOIN sales s ON si.sale_id = s.id
+            JOIN products p ON si.product_id = p.id JOIN categories c ON p.category_id = c.id
+            WHERE s.sale_date >= ? AND s.sale_date < ? AND s.status = 'completed'
+            GROUP BY c.id
+        """,
+    }
+    end = datetime.now().strftime("%Y-%m-%d")
+    start = (datetime.now() - timedelta(days=365)).strftime("%Y-%m-%d")
+    params = day_range(start, end)
+    reports = {
+        'get_profit_by_period': lambda: profit_report_manager.get_profit_by_period(start, end),
+        'get_daily_profit_trend': lambda: profit_report_manager.get_daily_profit_trend(start, end),
+        'get_sales_by_category': lambda: sales_report_manager.get_sales_by_category(start, end),
+    }
+    print(f"{'rapport (1 an)':>24} | {'sale_items (ms)':>15} | {'daily_rollup (ms)':>17}")
+    for name, run in reports.items():
+        started = time.perf_counter()
+        db.execute_query(raw[name], params)
+        raw_ms = (time.perf_counter() - started) * 1000
+        started = time.perf_counter()
+        run()
+        rollup_ms = (time.perf_counter() - started) * 1000
+        print(f"{name:>24} | {raw_ms:>15.1f} | {rollup_ms:>17.1f}")
+
+    # Tenue incrémentale : vente, retour partiel, annulation, puis comparaison à une reconstruction
+    pos = _make_pos_manager()
+    products = [product_manager.get_product(pid) for pid in ids[:3]]
+    sale_ids = []
+    for method in ('cash', 'card', 'cash'):
+        _fill_cart(pos.current_cart, products)
+        success, message, sale_id = pos.complete_sale(1, method, pos.current_cart.get_total())
+        if not success:
+            raise RuntimeError(message)
+        sale_ids.append(sale_id)
+    pos.process_return(sale_ids[0], [{'product_id': ids[0], 'quantity': 1}], processed_by=1)
+    pos.cancel_sale(sale_ids[1], "banc d'essai")
+
+    incremental = _rollup_snapshot()
+    daily_rollup.rebuild()
+    if incremental != _rollup_snapshot():
+        print("\nÉCHEC: daily_rollup incrémental différent de la reconstruction")
+        sys.exit(1)
+    print("\nOK  daily_rollup incrémental identique à la reconstruction (vente, retour, annulation)")
+
+
+def bench_search(products: int):
+    """Latence frappe -> résultats : LIKE '%terme%' vs index plein texte products_fts"""
+    from modules.products.product_manager import product_manager
+
+    words = ["Chocolat", "Lait", "Café", "Biscuit", "Fromage", "Yaourt", "Jus", "Eau", "Huile", "Sucre",
+             "Farine", "Thé", "Savon", "Shampooing", "Riz", "Pâtes", "Tomate", "Sardine", "Beurre", "Miel"]
+    words_ar = ["شوكولاتة", "حليب", "قهوة", "بسكويت", "جبن", "زبادي", "عصير", "ماء", "زيت", "سكر",
+                "دقيق", "شاي", "صابون", "شامبو", "أرز", "معكرونة", "طماطم", "سردين", "زبدة", "عسل"]
+    brands = ["Cevital", "Danone", "Soummam", "Ifri", "Bimo", "Elio", "Amor", "Hamoud", "Ngaous", "Tchina"]
+    db.execute_many(
+        "INSERT INTO products (barcode, name, name_ar, purchase_price, selling_price, stock_quantity) "
+        "VALUES (?, ?, ?, 50.0, 80.0, 100)",
+        [(f"613{i:010d}",
+          f"{words[i % 20]} {brands[(i // 20) % 10]} {100 + i % 900}g",
+          f"{words_ar[i % 20]} {brands[(i // 20) % 10]}")
+         for i in range(products)]
+    )
+    print(f"Base: {config.DATABASE_PATH} ({products} produits)")
+
+    legacy_sql = """
+        SELECT p.*, c.name as category_name
+        FROM products p
+        LEFT JOIN categories c ON p.category_id = c.id
+        WHERE (p.name LIKE ? OR p.name_ar LIKE ? OR p.barcode LIKE ?) AND p.is_active = 1
+        ORDER BY p.name, p.id LIMIT 100 OFFSET 0
+    """
+    legacy_count_sql = ("SELECT COUNT(*) FROM products p WHERE (p.name LIKE ? OR p.name_ar LIKE ? "
+                        "OR p.barcode LIKE ?) AND p.is_active = 1")
+
+    def timed(func, repeat=5):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = func()
+            elapsed = (time.perf_counter() - started) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+        return best, result
+
+    print(f"{'frappe':>16} | {'LIKE (ms)':>9} | {'FTS5 (ms)':>9} | {'compte LIKE':>11} | "
+          f"{'compte FTS5':>11} | {'résultats':>9} | 1er résultat")
+    def count_too_slow(count_ms: float, legacy_count_ms: float) -> bool:
+        # Le compte est relancé à chaque frappe. Un MATCH réévalué pour chaque
+        # produit le rend des centaines de fois plus lent que LIKE ; un terme
+        # présent dans tout le catalogue coûte ~2x LIKE (liste de rowids)
+        return count_ms > 5 * legacy_count_ms + 1.0
+
+    mismatches = 0
+    slow_counts = 0
+    words_checked = ("Chocolat", "Soummam", "حليب", "6130000042")
+    for word in words_checked:
+        for n in range(1, len(word) + 1):
+            term = word[:n]
+            like = (f"%{term}%",) * 3
+            legacy_ms, _ = timed(lambda: db.execute_query(legacy_sql, like))
+            new_ms, rows = timed(lambda: product_manager.search_products(term))
+            legacy_count_ms, expected = timed(lambda: db.fetch_one(legacy_count_sql, like)[0])
+            count_ms, count = timed(lambda: product_manager.count_products(term))
+            if count != expected:
+                mismatches += 1
+            if count_too_slow(count_ms, legacy_count_ms):
+                slow_counts += 1
+            first = rows[0]['name'] if rows else "-"
+            print(f"{term:>16} | {legacy_ms:>9.1f} | {new_ms:>9.1f} | {legacy_count_ms:>11.1f} | "
+                  f"{count_ms:>11.1f} | {expected:>9} | {first}")
+
+    # Le plan du compte dépend des statistiques : même contrôle après ANALYZE
+    db.update_statistics()
+    worst = 0.0
+    for word in words_checked:
+        for n in range(1, len(word) + 1):
+            term = word[:n]
+            like = (f"%{term}%",) * 3
+            legacy_count_ms, _ = timed(lambda: db.fetch_one(legacy_count_sql, like)[0])
+            count_ms, _ = timed(lambda: product_manager.count_products(term))
+            worst = max(worst, count_ms - legacy_count_ms)
+            if count_too_slow(count_ms, legacy_count_ms):
+                slow_counts += 1
+    print(f"Avec statistiques : compte FTS5 au pire {worst:+.1f} ms par rapport au COUNT LIKE")
+
+    if mismatches or slow_counts:
+        if mismatches:
+            print(f"\nÉCHEC: {mismatches} terme(s) avec un nombre de résultats différent de LIKE")
+        if slow_counts:
+            print(f"\nÉCHEC: {slow_counts} compte(s) plus de 5x plus lent(s) que le COUNT LIKE")
+        sys.exit(1)
+
+
+def bench_ui_stall(sales: int):
+    """Blocage de la boucle d'événements Qt pendant le chargement des pages (direct vs db_executor)"""
+    from datetime import datetime, timedelta
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtCore import QTimer, QDate
+    from core.db_executor import db_executor
+    from modules.customers.customer_manager import customer_manager
+    from modules.reports.daily_rollup import daily_rollup
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    ids = seed_products(5_000)
+    seed_sales(ids, sales)
+    daily_rollup.rebuild()
+    db.execute_many(
+        "INSERT INTO customers (code, full_name, phone) VALUES (?, ?, ?)",
+        [(f"BENCH-{i:06d}", f"Client {i}", f"0550{i:06d}") for i in range(5_000)]
+    )
+    print(f"Base: {config.DATABASE_PATH} ({sales} ventes)")
+
+    from ui.reports_page import ReportsPage
+    from ui.customers_page import CustomersPage
+    from ui.home_page import HomePage
+    from ui.returns_page import ReturnsPage
+
+    start = (datetime.now() - timedelta(days=365)).strftime("%Y-%m-%d")
+    end = datetime.now().strftime("%Y-%m-%d")
+    all_customers = lambda offset, limit: customer_manager.get_all_customers(limit=limit, offset=offset)
+    pages = {
+        'rapports (1 an)': (ReportsPage, "reports_page",
+                            lambda p: p._apply_report_data(p._fetch_report_data(start, end)),
+                            lambda p: p.refresh_data()),
+        'clients': (CustomersPage, "customers_page",
+                    lambda p: p._apply_customers(p._fetch_customers(all_customers, p.model.page_size())),
+                    lambda p: p.load_customers()),
+        'accueil': (HomePage, "home_stats",
+                    lambda p: p._apply_stats(p._fetch_stats()),
+                    lambda p: p.load_stats()),
+        'retours': (ReturnsPage, "returns_history",
+                    lambda p: p._apply_history_data(p._fetch_history_data()),
+                    lambda p: p.load_history_data()),
+    }
+
+    # Un tic toutes les 5 ms : le plus grand écart = le plus long gel de la fenêtre
+    gaps = []
+    last = [time.perf_counter()]
+
+    def tick():
+        now = time.perf_counter()
+        gaps.append(now - last[0])
+        last[0] = now
+
+    timer = QTimer()
+    timer.setInterval(5)
+    timer.timeout.connect(tick)
+
+    def measure(run, key=None):
+        db_executor.wait_for_done()
+        app.processEvents()
+        gaps.clear()
+        last[0] = time.perf_counter()
+        timer.start()
+        started = time.perf_counter()
+        run()
+        while key and db_executor.is_pending(key):
+            app.processEvents()
+            time.sleep(0.001)
+        app.processEvents()
+        elapsed = (time.perf_counter() - started) * 1000
+        timer.stop()
+        return max(gaps, default=elapsed / 1000) * 1000, elapsed
+
+    print(f"{'page':>16} | {'gel direct (ms)':>15} | {'gel executor (ms)':>17} | {'données affichées (ms)':>22}")
+    for name, (factory, key, sync, background) in pages.items():
+        page = factory()
+        if isinstance(page, ReportsPage):
+            for edit in (page.start_date, page.end_date):
+                edit.blockSignals(True)
+            page.start_date.setDate(QDate.fromString(start, "yyyy-MM-dd"))
+            for edit in (page.start_date, page.end_date):
+                edit.blockSignals(False)
+        page.resize(1280, 800)
+        page.show()
+        sync_stall, _ = measure(lambda: sync(page))
+        async_stall, shown = measure(lambda: background(page), key)
+        print(f"{name:>16} | {sync_stall:>15.1f} | {async_stall:>17.1f} | {shown:>22.1f}")
+        page.close()
+
+
+def bench_signals(sales: int):
+    """Rechargements de pages par vente : connexions directes vs lots de data_signals"""
+    from PyQt5.QtWidgets import QApplication, QStackedWidget
+    from core.data_signals import data_signals
+    from core.db_executor import db_executor
+    from modules.products.product_manager import product_manager
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    ids = seed_products(2_000)
+    products = [product_manager.get_product(pid) for pid in ids[:5]]
+    pos = _make_pos_manager()
+
+    from ui.home_page import HomePage
+    from ui.products_page import ProductsPage
+    from ui.reports_page import ReportsPage
+    from ui.returns_page import ReturnsPage
+    from ui.sales_history_page import SalesHistoryPage
+    from ui.customers_page import CustomersPage
+
+    # Connexions de la version précédente (une recharge par signal reçu)
+    legacy_wiring = {
+        HomePage: ('products_changed', 'sales_changed'),
+        ProductsPage: ('inventory_changed', 'product_changed', 'products_changed'),
+        ReportsPage: ('sales_changed', 'finance_changed', 'returns_changed'),
+        ReturnsPage: ('returns_changed', 'sales_changed'),
+        SalesHistoryPage: ('sales_changed',),
+        CustomersPage: ('customers_changed',),
+    }
+    stack = QStackedWidget()
+    pages = {cls: cls() for cls in legacy_wiring}
+    for page in pages.values():
+        stack.addWidget(page)
+    stack.setCurrentWidget(pages[HomePage])
+    stack.resize(1280, 800)
+    stack.show()
+    db_executor.wait_for_done()
+    app.processEvents()
+
+    legacy_reloads = [0]
+    for signals in legacy_wiring.values():
+        for name in signals:
+            getattr(data_signals, name).connect(lambda: legacy_reloads.__setitem__(0, legacy_reloads[0] + 1))
+
+    batches = []
+    data_signals.changes_committed.connect(batches.append)
+    data_signals.reload_counts.clear()
+
+    for _ in range(sales):
+        _fill_cart(pos.current_cart, products)
+        success, message, _ = pos.complete_sale(1, 'cash', pos.current_cart.get_total())
+        if not success:
+            raise RuntimeError(message)
+        app.processEvents()
+    db_executor.wait_for_done()
+    app.processEvents()
+    visible_reloads = sum(data_signals.reload_counts.values())
+
+    # Afficher les pages masquées : chacune se recharge une fois
+    for cls, page in pages.items():
+        stack.setCurrentWidget(page)
+        app.processEvents()
+    db_executor.wait_for_done()
+    app.processEvents()
+
+    print(f"{sales} ventes, {len(batches)} lot(s) publiés ; dernier lot : {batches[-1] if batches else '-'}")
+    print(f"{'connexions directes':>28} : {legacy_reloads[0]:>5} rechargements")
+    print(f"{'lots, page visible':>28} : {visible_reloads:>5} rechargements")
+    print(f"{'lots, + pages affichées':>28} : {sum(data_signals.reload_counts.values()):>5} rechargements")
+    print(f"par signal : {data_signals.reload_report()}")
+
+
+def _legacy_startup(conn):
+    """Ouverture avant le versionnage : schema.sql complet puis vérifications à chaque lancement"""
+    import sqlite3
+    from database.migrations import SCHEMA_PATH
+    conn.executescript(SCHEMA_PATH.read_text(encoding="utf-8"))
+    for table in ("suppliers", "customers", "products", "pos_shortcuts", "sale_items"):
+        conn.execute(f"PRAGMA table_info({table})").fetchall()
+    for name in ("user_permissions", "license", "pos_shortcuts", "idx_pos_shortcuts_position", "today_sales"):
+        conn.execute("SELECT sql FROM sqlite_master WHERE name = ?", (name,)).fetchone()
+    conn.execute("SELECT id FROM products WHERE id = 0").fetchone()
+    try:
+        conn.execute("SELECT COUNT(*) FROM products_fts_docsize").fetchone()
+        conn.execute("SELECT COUNT(*) FROM products").fetchone()
+    except sqlite3.OperationalError:
+        pass
+    conn.commit()
+
+
+def bench_startup(products: int):
+    """Ouverture d'une base déjà à jour : ancien chemin (schéma + vérifications) vs user_version"""
+    import sqlite3
+    from database.migrations import migrate, get_version, LATEST_VERSION
+
+    seed_products(products)
+    db.close()
+    print(f"Base: {config.DATABASE_PATH} ({products} produits, user_version {LATEST_VERSION})")
+
+    def timed(open_db, repeat=20):
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            conn = sqlite3.connect(config.DATABASE_PATH)
+            conn.execute("PRAGMA foreign_keys = ON")
+            open_db(conn)
+            samples.append((time.perf_counter() - started) * 1000)
+            conn.close()
+        samples.sort()
+        return samples[len(samples) // 2], samples[-1]
+
+    legacy_median, legacy_max = timed(_legacy_startup)
+    new_median, new_max = timed(migrate)
+
+    print(f"{'chemin':>26} | {'médiane (ms)':>12} | {'max (ms)':>8}")
+    print(f"{'schema.sql + vérifications':>26} | {legacy_median:>12.2f} | {legacy_max:>8.2f}")
+    print(f"{'PRAGMA user_version':>26} | {new_median:>12.2f} | {new_max:>8.2f}")
+
+    conn = sqlite3.connect(config.DATABASE_PATH)
+    if get_version(conn) != LATEST_VERSION or migrate(conn):
+        print("\nÉCHEC: une base à jour ne doit appliquer aucune migration")
+        sys.exit(1)
+    conn.close()
+
+
+def bench_dbinfo(sales: int):
+    """Compteurs de get_database_info au démarrage : COUNT(*) par table vs sqlite_stat1"""
+    product_ids = seed_products(2000)
+    seed_sales(product_ids, sales)
+    db.close()
+    print(f"Base: {config.DATABASE_PATH} ({sales} ventes, {sales * 5} lignes)")
+
+    started = time.perf_counter()
+    db.update_statistics()
+    print(f"ANALYZE initial (arrière-plan): {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    def timed(exact, repeat=5):
+        best = None
+        for _ in range(repeat):
+            db.close()
+            started = time.perf_counter()
+            info = db.get_database_info(exact=exact)
+            elapsed = (time.perf_counter() - started) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+        return best, info['table_counts']
+
+    exact_ms, exact = timed(True)
+    approx_ms, approx = timed(False)
+    print(f"{'COUNT(*) par table':>20} : {exact_ms:>8.1f} ms")
+    print(f"{'sqlite_stat1':>20} : {approx_ms:>8.1f} ms")
+    for table in ("products", "sales", "sale_items"):
+        print(f"{table:>20} : exact {exact[table]:>8}  estimé {approx[table]}")
+
+
+def _legacy_backup(backup_path: Path):
+    """Ancienne sauvegarde : checkpoint TRUNCATE puis copie du fichier vivant"""
+    import shutil
+    conn = db.get_connection()
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    shutil.copy2(db.db_path, backup_path)
+
+
+def bench_backup(size_mb: int):
+    """Latence des ventes pendant une sauvegarde : copie du fichier vs API de sauvegarde par lots"""
+    from modules.products.product_manager import product_manager
+
+    products = [product_manager.get_product(pid) for pid in seed_products(50)]
+    # Historique de remplissage jusqu'à la taille demandée
+    conn = db.get_connection()
+    conn.execute("CREATE TABLE IF NOT EXISTS bench_padding (id INTEGER PRIMARY KEY, payload BLOB)")
+    chunk = 10_000
+    for _ in range(max(1, size_mb * 1024 * 1024 // (chunk * 1024))):
+        conn.executemany("INSERT INTO bench_padding (payload) VALUES (randomblob(1000))", ([] for _ in range(chunk)))
+        conn.commit()
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    print(f"Base: {config.DATABASE_PATH} ({db.get_database_size() / 1024 / 1024:.0f} Mo)")
+
+    pos = _make_pos_manager()
+    basket = products[:5]
+
+    def sell_during(backup, label):
+        done = threading.Event()
+        result = {}
+
+        def run():
+            started = time.perf_counter()
+            result['ok'] = backup()
+            result['seconds'] = time.perf_counter() - started
+            done.set()
+
+        latencies = []
+        worker = threading.Thread(target=run)
+        worker.start()
+        while not done.is_set():
+            _fill_cart(pos.current_cart, basket)
+            started = time.perf_counter()
+            success, message, _ = pos.complete_sale(1, 'cash', pos.current_cart.get_total())
+            if not success:
+                raise RuntimeError(message)
+            latencies.append((time.perf_counter() - started) * 1000)
+            time.sleep(0.01)
+        worker.join()
+        latencies.sort()
+        p99 = latencies[int(len(latencies) * 0.99) - 1] if len(latencies) >= 100 else latencies[-1]
+        print(f"{label:>22} | {result['seconds']:>9.1f} | {len(latencies):>6} | "
+              f"{latencies[len(latencies) // 2]:>8.1f} | {p99:>7.1f} | {latencies[-1]:>7.1f}")
+        return result['ok']
+
+    print(f"{'sauvegarde':>22} | {'durée (s)':>9} | {'ventes':>6} | {'méd. (ms)':>8} | {'p99':>7} | {'max':>7}")
+    sell_during(lambda: time.sleep(2) or True, "aucune (référence)")
+    sell_during(lambda: _legacy_backup(_BENCH_DIR / "legacy.db") or True, "checkpoint + copie")
+    new_path = _BENCH_DIR / "online.db"
+    ok = sell_during(lambda: db.backup_database(new_path), "API de sauvegarde")
+    if not ok:
+        print("\nÉCHEC: sauvegarde non vérifiée")
+        sys.exit(1)
+
+
+def bench_backup_store(sales: int, hours: int, sales_per_hour: int):
+    """Sauvegardes horaires sur `hours` heures : copies .db brutes vs archive dédupliquée et compressée"""
+    import sqlite3
+    from core.backup_store import BackupStore, DEFAULT_CODEC
+
+    product_ids = seed_products(2000)
+    seed_sales(product_ids, sales)
+    store = BackupStore(_BENCH_DIR / "store")
+    conn = db.get_connection()
+    next_id = sales + 1
+    raw_total = 0
+    timings = []
+
+    for hour in range(hours):
+        # Une heure de caisse : ventes, lignes et mouvements de stock
+        for _ in range(sales_per_hour):
+            conn.execute(
+                "INSERT INTO sales (id, sale_number, cashier_id, subtotal, total_amount) VALUES (?, ?, 1, 400, 400)",
+                (next_id, f"HOUR-{next_id:08d}"))
+            picked = [product_ids[(next_id * 7 + j * 13) % len(product_ids)] for j in range(5)]
+            conn.executemany(
+                "INSERT INTO sale_items (sale_id, product_id, product_name, quantity, unit_price, subtotal, purchase_price) "
+                "VALUES (?, ?, 'Produit test', 1, 80.0, 80.0, 50.0)", [(next_id, pid) for pid in picked])
+            conn.executemany("UPDATE products SET stock_quantity = stock_quantity - 1 WHERE id = ?",
+                             [(pid,) for pid in picked])
+            next_id += 1
+        conn.commit()
+
+        started = time.perf_counter()
+        store.snapshot(name=f"hour_{hour:04d}")
+        timings.append(time.perf_counter() - started)
+        raw_total += store.read_manifest(store.snapshots_dir / f"hour_{hour:04d}.json")['size']
+
+    first, last = store.snapshots_dir / "hour_0000.json", store.list_snapshots()[0]
+    restore_ms = []
+    for manifest_path in (first, last):
+        started = time.perf_counter()
+        restored = store.rebuild(manifest_path, _BENCH_DIR / "restored.db")
+        restore_ms.append((time.perf_counter() - started) * 1000)
+        check = sqlite3.connect(restored)
+        count = check.execute("SELECT COUNT(*) FROM sales").fetchone()[0]
+        ok = check.execute("PRAGMA integrity_check").fetchone()[0]
+        check.close()
+        restored.unlink()
+        expected = sales + sales_per_hour * (1 if manifest_path == first else hours)
+        if ok != 'ok' or count != expected:
+            print(f"ÉCHEC: {manifest_path.stem} restauré avec {count} ventes (attendu {expected}), {ok}")
+            sys.exit(1)
+
+    mb = 1024 * 1024
+    stored = store.total_size()
+    timings.sort()
+    print(f"Base: {db.get_database_size() / mb:.1f} Mo, {hours} sauvegardes horaires, compresseur {DEFAULT_CODEC}")
+    print(f"{'copies .db brutes':>22} : {raw_total / mb:>9.1f} Mo")
+    print(f"{'archive dédupliquée':>22} : {stored / mb:>9.1f} Mo  ({raw_total / max(stored, 1):.0f}x moins)")
+    print(f"{'instantané':>22} : médiane {timings[len(timings) // 2] * 1000:.0f} ms, max {timings[-1] * 1000:.0f} ms")
+    print(f"{'restauration':>22} : première {restore_ms[0]:.0f} ms, dernière {restore_ms[1]:.0f} ms (vérifiées)")
+
+
+def _legacy_excel_backup(excel_path: Path):
+    """Ancien export Excel automatique : tout en mémoire, classeur normal, thread de l'interface"""
+    import openpyxl
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "Produits"
+    for title, query in (("Produits", "SELECT * FROM products WHERE is_active = 1"),
+                         ("Ventes", "SELECT * FROM sales"),
+                         ("Clients", "SELECT * FROM customers WHERE is_active = 1")):
+        if title != "Produits":
+            ws = wb.create_sheet(title)
+        rows = db.execute_query(query)
+        if rows:
+            ws.append(list(dict(rows[0]).keys()))
+            for row in rows:
+                ws.append(list(dict(row).values()))
+    wb.save(excel_path)
+
+
+def bench_excel_export(sales: int):
+    """Export Excel automatique : gel de la caisse, mémoire de pointe et fermeture pendant l'export"""
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtCore import QTimer
+    from core.backup import backup_manager
+    from core.db_executor import background_jobs
+    from modules.products.product_cache import product_cache
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    product_ids = seed_products(2000)
+    seed_sales(product_ids, sales, lines=1)
+    product_cache.warm()
+    backup_manager.backup_dir = _BENCH_DIR
+    print(f"Base: {config.DATABASE_PATH} ({sales} ventes)")
+
+    # La caisse scanne un article toutes les 5 ms : le plus grand écart = le plus long gel
+    gaps, last = [], [time.perf_counter()]
+
+    def scan():
+        now = time.perf_counter()
+        gaps.append(now - last[0])
+        last[0] = now
+        product_cache.get_by_barcode("BENCH-0000042")
+
+    timer = QTimer()
+    timer.setInterval(5)
+    timer.timeout.connect(scan)
+
+    # Mémoire résidente échantillonnée toutes les 10 ms (aussi pendant l'ancien export, qui bloque Qt)
+    page_size = os.sysconf("SC_PAGE_SIZE")
+
+    def rss() -> int:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * page_size
+
+    def run(start, wait):
+        gaps.clear()
+        baseline = rss()
+        peak = [baseline]
+        sampling = threading.Event()
+
+        def sample():
+            while not sampling.is_set():
+                peak[0] = max(peak[0], rss())
+                time.sleep(0.01)
+
+        sampler = threading.Thread(target=sample)
+        sampler.start()
+        last[0] = time.perf_counter()
+        timer.start()
+        started = time.perf_counter()
+        start()
+        while wait():
+            app.processEvents()
+            time.sleep(0.001)
+        app.processEvents()
+        timer.stop()
+        seconds = time.perf_counter() - started
+        sampling.set()
+        sampler.join()
+        return seconds, max(gaps, default=0) * 1000, peak[0] - baseline
+
+    def legacy():
+        _legacy_excel_backup(_BENCH_DIR / "legacy.xlsx")
+
+    def pending():
+        return background_jobs.is_pending("auto_backup_excel")
+
+    def cancel_during_export():
+        # Fermeture pendant un export : annulation au lot suivant
+        backup_manager.export_excel_async()
+        time.sleep(1.0)
+        started = time.perf_counter()
+        backup_manager.cancel_excel_export()
+        background_jobs.wait_for_done()
+        return (time.perf_counter() - started) * 1000
+
+    print(f"{'export':>26} | {'durée (s)':>9} | {'gel max (ms)':>12} | {'mémoire (Mo)':>12}")
+    seconds, stall, grown = run(backup_manager.export_excel_async, pending)
+    print(f"{'write_only (arrière-plan)':>26} | {seconds:>9.1f} | {stall:>12.1f} | {grown / 1024 / 1024:>12.1f}")
+    print(f"{'fermeture pendant export':>26} : {cancel_during_export():.0f} ms d'attente", flush=True)
+    # En dernier : la libération de son classeur (ramasse-miettes) fausserait les mesures suivantes
+    seconds, stall, grown = run(legacy, lambda: False)
+    print(f"{'ancien (interface)':>26} | {seconds:>9.1f} | {stall:>12.1f} | {grown / 1024 / 1024:>12.1f}")
+
+
+def _legacy_data_export(excel_path: Path):
+    """Ancienne sauvegarde complète (Paramètres > Données) : tables entières en mémoire, classeur normal"""
+    import openpyxl
+    from core.exporter import FULL_EXPORT
+    wb = openpyxl.Workbook()
+    wb.remove(wb.active)
+    for table in FULL_EXPORT:
+        ws = wb.create_sheet(table.name)
+        ws.append(list(table.headers))
+        for row in db.execute_query(table.query):
+            ws.append(list(row))
+    wb.save(excel_path)
+
+
+def bench_data_export(sales: int):
+    """Sauvegarde complète par format : mémoire de pointe selon la taille de l'historique"""
+    import csv
+    import io
+    import zipfile
+    import openpyxl
+    from core.exporter import FULL_EXPORT, PYARROW_AVAILABLE, data_exporter
+
+    page_size = os.sysconf("SC_PAGE_SIZE")
+
+    def rss() -> int:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * page_size
+
+    def measure(func) -> tuple:
+        # Thread dédié sans mmap : la projection de la base ne compte pas dans la mémoire de l'export
+        baseline = rss()
+        peak, result = [baseline], []
+        done = threading.Event()
+
+        def work():
+            db.get_connection().execute("PRAGMA mmap_size = 0")
+            result.append(func())
+            db.close()
+            done.set()
+
+        worker = threading.Thread(target=work)
+        started = time.perf_counter()
+        worker.start()
+        while not done.wait(0.01):
+            peak[0] = max(peak[0], rss())
+        worker.join()
+        return time.perf_counter() - started, peak[0] - baseline, result[0]
+
+    def exported_rows(path: Path, fmt: str) -> int:
+        if fmt == 'xlsx':
+            wb = openpyxl.load_workbook(path, read_only=True)
+            rows = sum(sum(1 for _ in ws.iter_rows(values_only=True)) - 1 for ws in wb.worksheets)
+            wb.close()
+            return rows
+        with zipfile.ZipFile(path) as zf:
+            if fmt == 'csv':
+                return sum(sum(1 for _ in csv.reader(io.TextIOWrapper(zf.open(name), encoding='utf-8-sig'))) - 1
+                           for name in zf.namelist())
+            import pyarrow.parquet as pq
+            return sum(pq.ParquetFile(zf.open(name)).metadata.num_rows for name in zf.namelist())
+
+    steps = [sales // 10, sales]
+    formats = data_exporter.available_formats()
+    if not PYARROW_AVAILABLE:
+        print("pyarrow absent : format parquet ignoré")
+    mb = 1024 * 1024
+    print(f"{'ventes':>9} | {'format':>12} | {'lignes':>9} | {'durée (s)':>9} | {'mémoire (Mo)':>12} | {'fichier (Mo)':>12}")
+    for step in steps:
+        # Une base par taille d'historique
+        db.close()
+        db.db_path = _BENCH_DIR / f"export_{step}.db"
+        db.initialize_database()
+        seed_sales(seed_products(2000), step, lines=3)
+        expected = sum(db.fetch_one(f"SELECT COUNT(*) AS n FROM ({t.query})")['n'] for t in FULL_EXPORT)
+        for fmt in formats:
+            path = _BENCH_DIR / f"export_{step}.{fmt}"
+            seconds, grown, _ = measure(lambda: data_exporter.export(path, fmt))
+            rows = exported_rows(path, fmt)
+            if rows != expected:
+                raise SystemExit(f"{fmt}: {rows} lignes exportées, {expected} attendues")
+            print(f"{step:>9} | {fmt:>12} | {rows:>9} | {seconds:>9.1f} | {grown / mb:>12.1f} | "
+                  f"{path.stat().st_size / mb:>12.1f}", flush=True)
+            path.unlink()
+        legacy_path = _BENCH_DIR / f"legacy_{step}.xlsx"
+        seconds, grown, _ = measure(lambda: _legacy_data_export(legacy_path))
+        print(f"{step:>9} | {'ancien xlsx':>12} | {expected:>9} | {seconds:>9.1f} | {grown / mb:>12.1f} | "
+              f"{legacy_path.stat().st_size / mb:>12.1f}", flush=True)
+        legacy_path.unlink()
+
+
+def _legacy_product_import(file_path: Path, created_by: int) -> dict:
+    """Ancien import : classeur complet en mémoire, create_product (SELECT + INSERT + commit + signaux) par ligne"""
+    import openpyxl
+    from modules.products.product_import import map_columns
+    from modules.products.product_manager import product_manager
+    wb = openpyxl.load_workbook(file_path)
+    ws = wb.active
+    col_map = map_columns([cell.value for cell in ws[1]])
+    stats = {'total': 0, 'success': 0, 'duplicates': 0, 'errors': 0}
+    db.begin_transaction()
+    for row in ws.iter_rows(min_row=2, values_only=True):
+        if not row[col_map['name']]:
+            continue
+        stats['total'] += 1
+        success, msg, _ = product_manager.create_product(
+            name=str(row[col_map['name']]), selling_price=float(row[col_map['selling']]),
+            purchase_price=float(row[col_map['purchase']] or 0), barcode=str(row[col_map['barcode']]),
+            stock_quantity=int(row[col_map['stock']] or 0), min_stock_level=int(row[col_map['min']] or 10),
+            created_by=created_by)
+        if success:
+            stats['success'] += 1
+        elif "existe déjà" in msg:
+            stats['duplicates'] += 1
+        else:
+            stats['errors'] += 1
+    db.commit()
+    return stats
+
+
+def bench_product_import(rows: int):
+    """Import Excel du catalogue : ligne à ligne vs par lots"""
+    import openpyxl
+    from modules.products.product_cache import product_cache
+    from modules.products.product_import import product_importer
+
+    # Catalogue : 10 % de codes-barres déjà en base, 1 % de doublons dans le fichier
+    file_path = _BENCH_DIR / "catalogue.xlsx"
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("Produits")
+    ws.append(["Code", "Nom", "Prix Achat", "Prix Vente", "Stock", "Min Stock"])
+    distinct = rows - rows // 100
+    for i in range(rows):
+        ws.append([f"IMP-{i % distinct:07d}", f"Produit importé {i}", 50, 80, i % 40, 10])
+    wb.save(file_path)
+    existing = [(f"IMP-{i:07d}",) for i in range(0, distinct, 10)]
+    expected = distinct - len(existing)
+    print(f"Fichier: {rows} lignes ({len(existing)} déjà en base, {rows - distinct} doublons)")
+
+    print(f"{'import':>12} | {'durée (s)':>9} | {'importés':>8} | {'doublons':>8} | {'erreurs':>7}")
+    for label, func in (("par lots", product_importer.import_excel), ("ancien", _legacy_product_import)):
+        db.execute_update("DELETE FROM products WHERE barcode LIKE 'IMP-%'")
+        db.execute_many("INSERT INTO products (barcode, name, selling_price) VALUES (?, 'Existant', 80)", existing)
+        product_cache.warm()
+        started = time.perf_counter()
+        result = func(file_path, 1)
+        stats = result[1] if isinstance(result, tuple) else result
+        seconds = time.perf_counter() - started
+        if stats['success'] != expected:
+            raise SystemExit(f"{label}: {stats['success']} produits importés, {expected} attendus")
+        print(f"{label:>12} | {seconds:>9.1f} | {stats['success']:>8} | {stats['duplicates']:>8} | "
+              f"{stats['errors']:>7}", flush=True)
+
+
+def _legacy_restore(file_path: Path) -> dict:
+    """Ancienne restauration (SettingsPage.import_data) : requêtes unitaires, un commit par ligne"""
+    import openpyxl
+    wb = openpyxl.load_workbook(file_path)
+    counts = {}
+    count = 0
+    for row in wb["Produits"].iter_rows(min_row=2, values_only=True):
+        if row[0]:
+            cat_id = None
+            if row[2]:
+                cat_res = db.fetch_one("SELECT id FROM categories WHERE name = ?", (row[2],))
+                if not cat_res:
+                    db.execute_update("INSERT INTO categories (name) VALUES (?)", (row[2],))
+                    cat_res = db.fetch_one("SELECT id FROM categories WHERE name = ?", (row[2],))
+                cat_id = cat_res['id']
+            db.execute_update("""
+                INSERT OR REPLACE INTO products (barcode, name, category_id, purchase_price, selling_price, stock_quantity, min_stock_level)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (row[0], row[1], cat_id, row[3] or 0, row[4] or 0, row[5] or 0, row[6] or 0))
+            count += 1
+    counts["Produits"] = count
+    count = 0
+    for row in wb["Clients"].iter_rows(min_row=2, values_only=True):
+        if row[1]:
+            db.execute_update("""
+                INSERT OR IGNORE INTO customers (code, full_name, phone, email, address, credit_limit, current_credit, total_purchases)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (row[0] or '', row[1], row[2] or '', row[3] or '', row[4] or '', row[5] or 0, row[6] or 0, row[7] or 0))
+            count += 1
+    counts["Clients"] = count
+    count = 0
+    for row in wb["Fournisseurs"].iter_rows(min_row=2, values_only=True):
+        if row[1]:
+            db.execute_update("""
+                INSERT OR IGNORE INTO suppliers (code, company_name, contact_person, phone, email, address, total_debt, total_purchases)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (row[0] or '', row[1], row[2] or '', row[3] or '', row[4] or '', row[5] or '', row[6] or 0, row[7] or 0))
+            count += 1
+    counts["Fournisseurs"] = count
+    count = 0
+    for row in wb["Categories"].iter_rows(min_row=2, values_only=True):
+        if row[1]:
+            db.execute_update("INSERT OR IGNORE INTO categories (name, name_ar, description) VALUES (?, ?, ?)",
+                              (row[1], row[2] or '', row[3] or ''))
+            count += 1
+    counts["Categories"] = count
+    return counts
+
+
+def bench_restore(products: int, customers: int):
+    """Restauration d'une sauvegarde complète : requêtes unitaires vs préparation + fusion ensembliste"""
+    from core.exporter import data_exporter
+    from core.importer import data_importer
+
+    conn = db.get_connection()
+    conn.executemany("INSERT INTO categories (name) VALUES (?)", [(f"Rayon {i}",) for i in range(200)])
+    conn.executemany(
+        "INSERT INTO products (barcode, name, category_id, purchase_price, selling_price, stock_quantity) "
+        "SELECT ?, ?, id, 50, 80, ? FROM categories WHERE name = ?",
+        [(f"R-{i:07d}", f"Produit {i}", i % 500, f"Rayon {i % 200}") for i in range(products)])
+    conn.executemany("INSERT INTO customers (code, full_name, phone) VALUES (?, ?, ?)",
+                     [(f"CL{i:06d}", f"Client {i}", f"0550{i:06d}") for i in range(customers)])
+    conn.executemany("INSERT INTO suppliers (code, company_name) VALUES (?, ?)",
+                     [(f"FR{i:04d}", f"Fournisseur {i}") for i in range(customers // 100)])
+    conn.commit()
+    backup_path = _BENCH_DIR / "complete.xlsx"
+    data_exporter.export(backup_path, 'xlsx')
+    # Même sauvegarde en CSV : débit de la fusion sans l'analyse XML d'openpyxl
+    csv_path = _BENCH_DIR / "complete.zip"
+    data_exporter.export(csv_path, 'csv')
+    rows = products + customers + customers // 100 + 200
+    print(f"Sauvegarde: {products} produits, {customers} clients ({backup_path.stat().st_size / 1024 / 1024:.1f} Mo)")
+
+    def fresh_database(name: str):
+        db.close()
+        db.db_path = _BENCH_DIR / f"restore_{name}.db"
+        db.initialize_database()
+
+    def restored() -> list:
+        return [db.fetch_one(f"SELECT COUNT(*) AS n FROM {table}")['n']
+                for table in ("products", "customers", "suppliers", "categories")]
+
+    print(f"{'restauration':>14} | {'durée (s)':>9} | {'lignes/s':>9} | produits, clients, fournisseurs, catégories")
+    results = {}
+    for label, func, path in (("ensembliste", data_importer.restore, backup_path),
+                              ("ensemb. csv", data_importer.restore, csv_path),
+                              ("ancienne", _legacy_restore, backup_path)):
+        fresh_database(label.replace(" ", "_").replace(".", ""))
+        started = time.perf_counter()
+        func(path)
+        seconds = time.perf_counter() - started
+        results[label] = restored()
+        print(f"{label:>14} | {seconds:>9.1f} | {rows / seconds:>9.0f} | {results[label]}", flush=True)
+    if not results["ensembliste"] == results["ensemb. csv"] == results["ancienne"]:
+        raise SystemExit("Les deux restaurations divergent")
+
+    # Annulation au milieu : la transaction est annulée, la base reste intacte
+    fresh_database("annulee")
+    before = restored()
+    result = data_importer.restore(backup_path, progress=lambda done, total: done >= 1 and data_importer.cancel())
+    if result is not None or restored() != before:
+        raise SystemExit("Restauration annulée mais base modifiée")
+    print(f"{'annulation':>14} : base inchangée {before}")
+
+
+def bench_profiler(calls: int):
+    """Coût du profilage par requête, puis détection d'une requête lente avec son plan"""
+    product_ids = seed_products(50_000)
+    barcodes = [f"BENCH-{i:07d}" for i in range(len(product_ids))]
+    query = "SELECT id, name, selling_price FROM products WHERE barcode = ?"
+
+    def timed():
+        started = time.perf_counter()
+        for i in range(calls):
+            db.fetch_one(query, (barcodes[i % len(barcodes)],))
+        return (time.perf_counter() - started) / calls * 1e6
+
+    print(f"{'profilage':>10} | {'µs / fetch_one':>14}")
+    results = {}
+    for enabled in (False, True, False, True):
+        db.profiler.enabled = enabled
+        db.profiler.reset()
+        results[enabled] = min(results.get(enabled, float("inf")), timed())
+    for enabled in (False, True):
+        print(f"{'actif' if enabled else 'inactif':>10} | {results[enabled]:>14.2f}")
+    print(f"Surcoût: {results[True] - results[False]:.2f} µs par requête")
+
+    stats = db.profiler.snapshot()
+    key = next(iter(stats))
+    assert stats[key]['calls'] == calls, stats
+
+    # Requête sans index (LIKE en milieu de chaîne) : seuil abaissé pour la forcer « lente »
+    db.profiler.slow_seconds = 0.0
+    db.execute_query("SELECT COUNT(*) FROM products WHERE name LIKE ? AND purchase_price > 10", ("%test 4%",))
+    db.execute_query("SELECT COUNT(*) FROM products WHERE name LIKE ? AND purchase_price > 20", ("%test 5%",))
+    db.profiler.slow_seconds = config.DATABASE_CONFIG.get('slow_query_ms', 200) / 1000.0
+
+    from database.query_profiler import format_report
+    print(format_report(db.profiler.top(3)))
+    slow = [row for row in db.profiler.top(10) if 'LIKE' in row['sql']]
+    assert len(slow) == 1 and slow[0]['calls'] == 2, "littéraux non normalisés"
+    assert 'SCAN' in slow[0]['plan'], f"plan non capturé: {slow[0]['plan']!r}"
+
+    profile_path = _BENCH_DIR / "query_profile.json"
+    db.profiler.save(profile_path)
+    db.profiler.save(profile_path)
+    from database.query_profiler import load_profile
+    assert load_profile(profile_path)[key]['calls'] == 2 * calls, "profil non cumulé"
+    print("OK: requête lente journalisée avec son plan, profil cumulé entre sessions")
+
+
+def _legacy_add_credit(customer_id: int, amount: float, processed_by: int):
+    """Ancien add_credit : begin_transaction, mais chaque instruction validait seule"""
+    db.fetch_one("SELECT * FROM customers WHERE id = ?", (customer_id,))
+    db.begin_transaction()
+    try:
+        db.execute_update("UPDATE customers SET current_credit = current_credit + ? WHERE id = ?",
+                          (amount, customer_id))
+        db.execute_insert(
+            "INSERT INTO customer_credit_transactions (customer_id, transaction_type, amount, processed_by, notes) "
+            "VALUES (?, 'credit_sale', ?, ?, '')", (customer_id, amount, processed_by))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+
+def _legacy_add_purchase(supplier_id: int, amount: float, processed_by: int):
+    """Ancien add_purchase (même schéma que _legacy_add_credit)"""
+    db.fetch_one("SELECT * FROM suppliers WHERE id = ?", (supplier_id,))
+    db.begin_transaction()
+    try:
+        db.execute_update("UPDATE suppliers SET total_purchases = total_purchases + ?, "
+                          "total_debt = total_debt + ? WHERE id = ?", (amount, amount, supplier_id))
+        db.execute_insert(
+            "INSERT INTO supplier_transactions (supplier_id, transaction_type, amount, description, processed_by) "
+            "VALUES (?, 'purchase', ?, '', ?)", (supplier_id, amount, processed_by))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+
+def _legacy_process_return(sale_id: int, items: list, return_number: str):
+    """Ancien process_return : un commit par instruction, stock relu puis réécrit par article"""
+    from modules.products.product_manager import product_manager
+    from modules.reports.daily_rollup import daily_rollup
+
+    sale = db.fetch_one("SELECT * FROM sales WHERE id = ?", (sale_id,))
+    db.begin_transaction()
+    try:
+        daily_rollup.apply_sale(db.get_connection().cursor(), sale_id, -1)
+        return_id = db.execute_insert(
+            "INSERT INTO returns (return_number, original_sale_id, return_amount, refund_method, processed_by, reason) "
+            "VALUES (?, ?, 0.0, ?, 1, '')", (return_number, sale_id, sale['payment_method']))
+        return_amount = 0.0
+        for item in items:
+            sale_item = db.fetch_one("SELECT * FROM sale_items WHERE sale_id = ? AND product_id = ?",
+                                     (sale_id, item['product_id']))
+            unit_price = sale_item['unit_price'] * (1 - sale_item['discount_percentage'] / 100.0)
+            return_amount += unit_price * item['quantity']
+            db.execute_insert(
+                "INSERT INTO return_items (return_id, sale_item_id, product_id, quantity_returned, unit_price, subtotal) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (return_id, sale_item['id'], item['product_id'], item['quantity'], unit_price,
+                 unit_price * item['quantity']))
+            product_manager.increase_stock(item['product_id'], item['quantity'])
+            new_qty = sale_item['quantity'] - item['quantity']
+            db.execute_update("UPDATE sale_items SET quantity = ?, subtotal = ? WHERE id = ?",
+                              (new_qty, new_qty * unit_price, sale_item['id']))
+        db.execute_update("UPDATE sales SET total_amount = total_amount - ?, subtotal = subtotal - ? WHERE id = ?",
+                          (return_amount, return_amount, sale_id))
+        daily_rollup.apply_sale(db.get_connection().cursor(), sale_id)
+        db.execute_update("UPDATE returns SET return_amount = ? WHERE id = ?", (return_amount, return_id))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+
+def _seed_accounts() -> tuple:
+    """Un client (limite de crédit illimitée) et un fournisseur de test : (customer_id, supplier_id)"""
+    from modules.customers.customer_manager import customer_manager
+    from modules.suppliers.supplier_manager import supplier_manager
+
+    _, _, customer_id = customer_manager.create_customer("Client banc d'essai", credit_limit=1e12)
+    _, _, supplier_id = supplier_manager.create_supplier("Fournisseur banc d'essai")
+    return customer_id, supplier_id
+
+
+def _return_items(sale_id: int, count: int = 2) -> list:
+    """Articles à retourner (une unité des `count` premières lignes de la vente)"""
+    rows = db.execute_query("SELECT product_id FROM sale_items WHERE sale_id = ? ORDER BY id LIMIT ?",
+                            (sale_id, count))
+    return [{'product_id': row['product_id'], 'quantity': 1} for row in rows]
+
+
+def bench_transactions(ops: int):
+    """Opérations multi-instructions : un commit par instruction vs une unité de travail"""
+    from modules.customers.customer_manager import customer_manager
+    from modules.suppliers.supplier_manager import supplier_manager
+
+    print(f"{'synchronous':>11} | {'opération':>14} | {'ancien (ms/op)':>14} | {'transaction (ms/op)':>19} | {'gain':>6}")
+    for synchronous in ("NORMAL", "FULL"):
+        db.close()
+        config.DATABASE_CONFIG['synchronous'] = synchronous
+        config.DATABASE_PATH = _BENCH_DIR / f"tx_{synchronous.lower()}.db"
+        db.db_path = config.DATABASE_PATH
+        db.initialize_database()
+        product_ids = seed_products(200)
+        seed_sales(product_ids, 2 * ops, lines=3)
+        customer_id, supplier_id = _seed_accounts()
+        pos = _make_pos_manager()
+        returns = {sale_id: _return_items(sale_id) for sale_id in range(1, 2 * ops + 1)}
+
+        def timed(func, values):
+            started = time.perf_counter()
+            for value in values:
+                func(value)
+            return (time.perf_counter() - started) * 1000 / len(values)
+
+        def checked(result):
+            if not result[0]:
+                raise RuntimeError(result[1])
+
+        cases = [
+            ("add_credit",
+             lambda _: _legacy_add_credit(customer_id, 10.0, 1),
+             lambda _: checked(customer_manager.add_credit(customer_id, 10.0, 1)), range(ops), range(ops)),
+            ("add_purchase",
+             lambda _: _legacy_add_purchase(supplier_id, 10.0, 1),
+             lambda _: checked(supplier_manager.add_purchase(supplier_id, 10.0, 10.0, 1)), range(ops), range(ops)),
+            ("process_return",
+             lambda sale_id: _legacy_process_return(sale_id, returns[sale_id], f"RET-LEGACY-{sale_id}"),
+             lambda sale_id: checked(pos.process_return(sale_id, returns[sale_id], 1)),
+             range(1, ops + 1), range(ops + 1, 2 * ops + 1)),
+        ]
+        for name, legacy, unit_of_work, legacy_values, new_values in cases:
+            legacy_ms = timed(legacy, legacy_values)
+            new_ms = timed(unit_of_work, new_values)
+            print(f"{synchronous:>11} | {name:>14} | {legacy_ms:>14.3f} | {new_ms:>19.3f} | {legacy_ms / new_ms:>5.1f}x")
+    config.DATABASE_CONFIG['synchronous'] = "NORMAL"
+
+
+# Opération -> implémentation -> fonction(numéro de vente), exécutées dans le processus « crash-child »
+def _crash_operations() -> dict:
+    from modules.customers.customer_manager import customer_manager
+    from modules.suppliers.supplier_manager import supplier_manager
+
+    customer_id = db.fetch_one("SELECT id FROM customers WHERE full_name = ?", ("Client banc d'essai",))['id']
+    supplier_id = db.fetch_one("SELECT id FROM suppliers WHERE company_name = ?", ("Fournisseur banc d'essai",))['id']
+    pos = _make_pos_manager()
+    return {
+        "add_credit": {
+            "ancien": lambda _: _legacy_add_credit(customer_id, 100.0, 1),
+            "transaction": lambda _: customer_manager.add_credit(customer_id, 100.0, 1),
+        },
+        "pay_credit": {
+            "transaction": lambda _: customer_manager.pay_credit(customer_id, 10.0, 1),
+        },
+        "add_purchase": {
+            "ancien": lambda _: _legacy_add_purchase(supplier_id, 100.0, 1),
+            "transaction": lambda _: supplier_manager.add_purchase(supplier_id, 100.0, 100.0, 1),
+        },
+        "pay_debt": {
+            "transaction": lambda _: supplier_manager.pay_debt(supplier_id, 10.0, 1),
+        },
+        "process_return": {
+            "ancien": lambda sale_id: _legacy_process_return(sale_id, _return_items(sale_id),
+                                                             f"RET-LEGACY-{os.getpid()}"),
+            "transaction": lambda sale_id: pos.process_return(sale_id, _return_items(sale_id), 1),
+        },
+        "cancel_sale": {
+            "transaction": lambda sale_id: pos.cancel_sale(sale_id, "crash"),
+        },
+    }
+
+
+CRASH_EXIT = 99
+
+
+def crash_child(db_path: str, operation: str, implementation: str, crash_after: int, sale_id: int):
+    """Exécuter une opération et tuer le processus juste après sa N-ième écriture"""
+    import shutil
+
+    db.close()
+    db.db_path = Path(db_path)
+    shutil.rmtree(_BENCH_DIR, ignore_errors=True)
+    func = _crash_operations()[operation][implementation]
+
+    writes = [0]
+
+    def crashing(method):
+        def wrapper(*args, **kwargs):
+            result = method(*args, **kwargs)
+            writes[0] += 1
+            if writes[0] >= crash_after:
+                os._exit(CRASH_EXIT)  # Comme un processus tué : ni commit, ni rollback, ni finally
+            return result
+        return wrapper
+
+    for name in ("execute_update", "execute_insert", "execute_many"):
+        setattr(db, name, crashing(getattr(db, name)))
+    result = func(sale_id)
+    if isinstance(result, tuple) and not result[0]:
+        print(result[1], file=sys.stderr)
+        sys.exit(1)
+
+
+def _consistency_residuals() -> dict:
+    """Écarts aux invariants comptables (tous nuls sur une base cohérente)"""
+    checks = {
+        "crédit client": """
+            SELECT COALESCE(SUM(c.current_credit), 0) - COALESCE((
+                SELECT SUM(CASE transaction_type WHEN 'payment' THEN -amount ELSE amount END)
+                FROM customer_credit_transactions), 0)
+            FROM customers c""",
+        "achats fournisseur": """
+            SELECT COALESCE(SUM(total_purchases), 0) - COALESCE((
+                SELECT SUM(amount) FROM supplier_transactions WHERE transaction_type = 'purchase'), 0)
+            FROM suppliers""",
+        "dette fournisseur": """
+            SELECT COALESCE(SUM(total_debt), 0) - COALESCE((
+                SELECT SUM(CASE transaction_type WHEN 'payment' THEN -amount ELSE amount END)
+                FROM supplier_transactions), 0)
+            FROM suppliers""",
+        "montant des ventes": """
+            SELECT (SELECT SUM(total_amount) FROM bench_original_sales)
+                 - (SELECT SUM(total_amount) FROM sales WHERE sale_number LIKE 'SEED-%')
+                 - COALESCE((SELECT SUM(return_amount) FROM returns), 0)""",
+        "montant des retours": """
+            SELECT COALESCE((SELECT SUM(return_amount) FROM returns), 0)
+                 - COALESCE((SELECT SUM(subtotal) FROM return_items), 0)""",
+        "quantités vendues": """
+            SELECT (SELECT SUM(quantity) FROM bench_original_items)
+                 - (SELECT SUM(si.quantity) FROM sale_items si JOIN sales s ON s.id = si.sale_id
+                    WHERE s.sale_number LIKE 'SEED-%')
+                 - COALESCE((SELECT SUM(quantity_returned) FROM return_items), 0)""",
+        "stock": """
+            SELECT (SELECT SUM(p.stock_quantity - o.stock_quantity)
+                    FROM products p JOIN bench_original_stock o ON o.id = p.id)
+                 - COALESCE((SELECT SUM(quantity_returned) FROM return_items), 0)
+                 - COALESCE((SELECT SUM(si.quantity) FROM sale_items si JOIN sales s ON s.id = si.sale_id
+                             WHERE s.status = 'cancelled'), 0)""",
+    }
+    return {name: round(db.fetch_one(query)[0] or 0, 6) for name, query in checks.items()}
+
+
+def bench_crash():
+    """Tuer une opération après chacune de ses écritures et vérifier qu'aucun état à moitié écrit ne subsiste"""
+    import subprocess
+    from modules.customers.customer_manager import customer_manager
+    from modules.suppliers.supplier_manager import supplier_manager
+
+    product_ids = seed_products(50)
+    seed_sales(product_ids, 200, lines=3)
+    customer_id, supplier_id = _seed_accounts()
+    # Solde initial pour que pay_credit / pay_debt soient acceptés
+    customer_manager.add_credit(customer_id, 100_000.0, 1)
+    supplier_manager.add_purchase(supplier_id, 100_000.0, 100_000.0, 1)
+    conn = db.get_connection()
+    conn.executescript("""
+        CREATE TABLE bench_original_sales AS SELECT id, total_amount FROM sales;
+        CREATE TABLE bench_original_items AS SELECT id, quantity FROM sale_items;
+        CREATE TABLE bench_original_stock AS SELECT id, stock_quantity FROM products;
+    """)
+    baseline = _consistency_residuals()
+    assert not any(baseline.values()), baseline
+    db.close()
+
+    operations = {op: list(impls) for op, impls in _crash_operations().items()}
+    db.close()
+    sales = iter(range(1, 201))
+    failures = 0
+    print(f"{'opération':>14} | {'implémentation':>14} | {'crashs':>6} | {'états incohérents':>17} | invariants rompus")
+    for operation, implementations in operations.items():
+        for implementation in implementations:
+            residuals = _consistency_residuals()
+            crashes = broken = 0
+            broken_names = set()
+            for crash_after in range(1, 50):
+                sale_id = next(sales) if operation in ("process_return", "cancel_sale") else 0
+                completed = subprocess.run(
+                    [sys.executable, __file__, "crash-child", "--db", str(config.DATABASE_PATH),
+                     "--op", operation, "--impl", implementation,
+                     "--after", str(crash_after), "--sale", str(sale_id)],
+                    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+                ).returncode
+                db.close()
+                after = _consistency_residuals()
+                if after != residuals:
+                    broken += 1
+                    broken_names |= {name for name in after if after[name] != residuals[name]}
+                    residuals = after
+                if completed != CRASH_EXIT:
+                    # Opération terminée avant la N-ième écriture : elle doit avoir réussi
+                    failures += completed != 0
+                    break
+                crashes += 1
+            if implementation == "transaction" and broken:
+                failures += 1
+            print(f"{operation:>14} | {implementation:>14} | {crashes:>6} | {broken:>17} | "
+                  f"{', '.join(sorted(broken_names)) or '-'}")
+
+    if failures:
+        print(f"ÉCHEC: {failures} opération(s) en échec ou laissant un état incohérent après un crash")
+        sys.exit(1)
+    print("OK: aucune opération en transaction n'est visible à moitié après un crash")
+
+
+class _LegacyCartItem:
+    """Ancien CartItem : attributs libres, sous-total recalculé à chaque appel"""
+
+    def __init__(self, product: dict, quantity: float = 1.0):
+        self.product_id = product['id']
+        self.unit_price = product['selling_price']
+        self.purchase_price = product['purchase_price']
+        self.discount_percentage = product.get('discount_percentage', 0.0)
+        self.quantity = quantity
+
+    def get_subtotal(self) -> float:
+        price = self.unit_price * (1 - self.discount_percentage / 100.0)
+        return round(price * self.quantity, 2)
+
+    def get_profit(self) -> float:
+        selling = self.unit_price * (1 - self.discount_percentage / 100.0)
+        return round((selling - self.purchase_price) * self.quantity, 2)
+
+
+class _LegacyCart:
+    """Ancien Cart : recherche linéaire des lignes, totaux resommés à chaque appel"""
+
+    def __init__(self):
+        self.items = []
+        self.discount_percentage = 0.0
+
+    def add_item(self, product: dict, quantity: float = 1.0):
+        for item in self.items:
+            if item.product_id == product['id']:
+                item.quantity += quantity
+                return
+        self.items.append(_LegacyCartItem(product, quantity))
+
+    def remove_item(self, product_id: int):
+        for i, item in enumerate(self.items):
+            if item.product_id == product_id:
+                self.items.pop(i)
+                return
+
+    def get_subtotal(self) -> float:
+        return round(sum(item.get_subtotal() for item in self.items), 2)
+
+    def get_total(self) -> float:
+        subtotal = self.get_subtotal()
+        return round(subtotal - round(subtotal * self.discount_percentage / 100.0, 2), 2)
+
+    def get_total_profit(self) -> float:
+        return round(sum(item.get_profit() for item in self.items), 2)
+
+    def get_total_quantity(self) -> float:
+        return sum(item.quantity for item in self.items)
+
+
+def bench_cart(lines: int):
+    """Panier de gros : scan (ajout ou fusion + totaux affichés) et retrait, ancien vs indexé"""
+    import random
+    from modules.sales.cart import Cart
+
+    # Stock large : _check_stock ne consulte jamais la base
+    products = [{'id': i, 'name': f"Produit {i}", 'barcode': f"B{i}", 'selling_price': 80.0 + i % 7 * 0.35,
+                 'purchase_price': 50.0, 'stock_quantity': 1e9} for i in range(1, lines + 1)]
+    rescans = [random.Random(i).choice(products) for i in range(5 * lines)]
+
+    def run(cart_class):
+        cart = cart_class()
+        per_size = {}
+        started = time.perf_counter()
+        for count, product in enumerate(products, start=1):
+            cart.add_item(product, 1.0)
+            # Ce que l'affichage relit après chaque scan
+            cart.get_total(), cart.get_total_profit(), cart.get_total_quantity()
+            if count in (50, lines):
+                per_size[count] = (time.perf_counter() - started) / count * 1e6
+        started = time.perf_counter()
+        for product in rescans:
+            cart.add_item(product, 1.0)
+            cart.get_total(), cart.get_total_profit(), cart.get_total_quantity()
+        rescan_us = (time.perf_counter() - started) / len(rescans) * 1e6
+        totals = (cart.get_total(), cart.get_total_profit(), cart.get_total_quantity())
+        started = time.perf_counter()
+        for product in reversed(products[::2]):
+            cart.remove_item(product['id'])
+        remove_us = (time.perf_counter() - started) / len(products[::2]) * 1e6
+        return per_size, rescan_us, remove_us, totals
+
+    print(f"Panier de {lines} lignes, {len(rescans)} scans d'articles déjà présents")
+    print(f"{'panier':>8} | {'scan (50 l.) µs':>15} | {'scan ({} l.) µs'.format(lines):>15} | "
+          f"{'re-scan µs':>10} | {'retrait µs':>10}")
+    results = {}
+    for name, cart_class in (("ancien", _LegacyCart), ("indexé", Cart)):
+        per_size, rescan_us, remove_us, totals = run(cart_class)
+        results[name] = totals
+        print(f"{name:>8} | {per_size[50]:>15.2f} | {per_size[lines]:>15.2f} | {rescan_us:>10.2f} | {remove_us:>10.2f}")
+    legacy, indexed = results["ancien"], results["indexé"]
+    assert abs(legacy[0] - indexed[0]) < 0.005 and abs(legacy[1] - indexed[1]) < 0.005 \
+        and legacy[2] == indexed[2], f"totaux divergents: {legacy} vs {indexed}"
+    print(f"Totaux identiques: {indexed[0]:.2f} DA, bénéfice {indexed[1]:.2f} DA, {indexed[2]:.0f} unités")
+
+
+def _legacy_cart_rows(table, cart):
+    """Ancien POSPage.update_cart_display : tableau reconstruit, un QPushButton par ligne"""
+    from PyQt5.QtWidgets import QTableWidgetItem, QPushButton
+    from PyQt5.QtCore import Qt
+
+    table.blockSignals(True)
+    table.setRowCount(0)
+    for item in cart.items:
+        row = table.rowCount()
+        table.insertRow(row)
+        table.setItem(row, 0, QTableWidgetItem(item.product_name))
+        table.setItem(row, 1, QTableWidgetItem(f"{item.unit_price:.2f}"))
+        table.setItem(row, 2, QTableWidgetItem(str(item.quantity)))
+        table.setItem(row, 3, QTableWidgetItem(f"{item.get_subtotal():.2f}"))
+        remove_btn = QPushButton("X")
+        remove_btn.setFixedSize(28, 28)
+        remove_btn.setCursor(Qt.PointingHandCursor)
+        remove_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #fef2f2;
+                color: #dc2626;
+                border: 1px solid #fecaca;
+                border-radius: 6px;
+                font-weight: bold;
+                font-size: 12px;
+            }
+            QPushButton:hover { background-color: #fee2e2; }
+        """)
+        remove_btn.clicked.connect(lambda checked, pid=item.product_id: cart.remove_item(pid))
+        table.setCellWidget(row, 4, remove_btn)
+    table.blockSignals(False)
+    if table.rowCount() > 0:
+        table.selectRow(table.rowCount() - 1)
+
+
+def bench_cart_ui(lines: int):
+    """Latence scan -> panier redessiné : tableau reconstruit vs modèle mis à jour ligne par ligne"""
+    import random
+    import statistics
+    from PyQt5.QtWidgets import QApplication, QTableWidget
+    from PyQt5.QtCore import pyqtSignal
+    from modules.sales.cart import Cart
+    from modules.sales.pos import pos_manager
+    from modules.products.product_manager import product_manager
+    from ui.pos_page import POSPage
+
+    class LegacyCartTable(QTableWidget):
+        painted = pyqtSignal()
+
+        def paintEvent(self, event):
+            super().paintEvent(event)
+            self.painted.emit()
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    seed_products(lines)
+    barcodes = [f"BENCH-{i:07d}" for i in range(lines)]
+    rescans = [random.Random(i).choice(barcodes) for i in range(50)]
+    checkpoints = [count for count in (50, 200, lines) if count <= lines]
+    window = 10  # Scans moyennés autour de chaque taille de panier
+
+    def run(scan, view):
+        """Latences (ms) de chaque scan, jusqu'au dessin du tableau"""
+        painted = [False]
+        view.painted.connect(lambda: painted.__setitem__(0, True))
+        app.processEvents()
+
+        def timed(barcode):
+            painted[0] = False
+            started = time.perf_counter()
+            scan(barcode)
+            deadline = started + 5
+            while not painted[0] and time.perf_counter() < deadline:
+                app.processEvents()
+            return (time.perf_counter() - started) * 1000
+
+        growth = [timed(barcode) for barcode in barcodes]
+        rescan = [timed(barcode) for barcode in rescans]
+        sizes = {count: statistics.median(growth[max(0, count - window):count]) for count in checkpoints}
+        return sizes, statistics.median(rescan)
+
+    legacy_cart = Cart()
+    legacy_table = LegacyCartTable()
+    legacy_table.setColumnCount(5)
+    legacy_table.resize(900, 700)
+    legacy_table.show()
+
+    def legacy_scan(barcode):
+        legacy_cart.add_item(product_manager.get_product_by_barcode(barcode), 1)
+        _legacy_cart_rows(legacy_table, legacy_cart)
+
+    page = POSPage()
+    page.resize(1280, 800)
+    page.show()
+
+    def model_scan(barcode):
+        page.barcode_input.setText(barcode)
+        page.scan_product()
+
+    print(f"Panier rempli jusqu'à {lines} lignes, puis {len(rescans)} scans d'articles déjà présents "
+          f"(médiane des {window} derniers scans)")
+    header = " | ".join(f"{f'{count} l. (ms)':>12}" for count in checkpoints)
+    print(f"{'affichage':>14} | {header} | {'re-scan (ms)':>12}")
+    results = {}
+    for name, scan, view in (("reconstruit", legacy_scan, legacy_table),
+                             ("modèle", model_scan, page.cart_table)):
+        sizes, rescan = run(scan, view)
+        results[name] = sizes[checkpoints[-1]]
+        cells = " | ".join(f"{sizes[count]:>12.2f}" for count in checkpoints)
+        print(f"{name:>14} | {cells} | {rescan:>12.2f}")
+        view.hide()
+
+    assert page.cart_model.rowCount() == legacy_table.rowCount() == lines, "paniers divergents"
+    assert abs(pos_manager.get_cart().get_total() - legacy_cart.get_total()) < 0.005, "totaux divergents"
+    print(f"Latence affichée par le POS au dernier scan: {page.last_scan_latency_ms:.2f} ms "
+          f"(gain à {checkpoints[-1]} lignes: x{results['reconstruit'] / results['modèle']:.1f})")
+    page.close()
+
+
+def bench_held_carts(carts: int, lines: int):
+    """Paniers en attente en base : mise en attente, liste, reprise (lignes enregistrées vs produits relus)"""
+    import json
+    from modules.sales.cart import Cart
+    from modules.sales.pos import POSManager
+    from modules.sales.held_carts import held_cart_store
+
+    ids = seed_products(max(lines * 5, 1000))
+    registers = [POSManager() for _ in range(2)]
+    for number, pos in enumerate(registers, start=1):
+        pos.register_number = number
+
+    def sql_calls() -> int:
+        return sum(stats['calls'] for stats in db.profiler.snapshot().values())
+
+    started = time.perf_counter()
+    held = []
+    for n in range(carts):
+        pos = registers[n % 2]
+        for j in range(lines):
+            pos.add_product_by_id(ids[(n * 7 + j) % len(ids)], 1 + j % 3)
+        held.append((pos.current_cart.get_total(), pos.current_cart.get_item_count()))
+        ok, message = pos.hold_cart(customer_name=f"Client {n}")
+        assert ok, message
+    hold_ms = (time.perf_counter() - started) * 1000 / carts
+
+    # « Redémarrage » : nouvelles connexions, nouveau POSManager
+    db.close()
+    restarted = POSManager()
+    started = time.perf_counter()
+    listed = restarted.get_held_carts()
+    list_ms = (time.perf_counter() - started) * 1000
+    assert len(listed) == carts, f"{len(listed)} panier(s) repris sur {carts}"
+
+    # Reprise par re-lecture des produits (ce qu'un journal (produit, quantité) imposerait),
+    # hors cache produits comme au premier accès après un redémarrage
+    rows = db.execute_query("SELECT id, items FROM held_carts ORDER BY id LIMIT ?", (max(carts // 2, 1),))
+    calls = sql_calls()
+    started = time.perf_counter()
+    for row in rows:
+        cart = Cart()
+        for values in json.loads(row['items']):
+            product = dict(db.fetch_one("SELECT * FROM products WHERE id = ?", (values[0],)))
+            cart.add_item(product, values[6])
+    requery_ms = (time.perf_counter() - started) * 1000 / len(rows)
+    requery_sql = (sql_calls() - calls) / len(rows)
+
+    calls = sql_calls()
+    started = time.perf_counter()
+    resumed = []
+    for summary in listed:
+        ok, message, _ = restarted.retrieve_cart(summary['id'])
+        assert ok, message
+        resumed.append((restarted.current_cart.get_total(), restarted.current_cart.get_item_count()))
+        restarted.new_sale()
+    resume_ms = (time.perf_counter() - started) * 1000 / len(listed)
+    resume_sql = (sql_calls() - calls) / len(listed)
+
+    assert resumed == held, "paniers repris différents des paniers mis en attente"
+    assert held_cart_store.count() == 0, "paniers non retirés après reprise"
+    print(f"{carts} paniers de {lines} lignes, 2 caisses, relus après fermeture des connexions")
+    print(f"  {'mise en attente':<26} {hold_ms:>8.2f} ms/panier")
+    print(f"  {'liste (résumé)':<26} {list_ms:>8.2f} ms pour {carts} paniers")
+    print(f"  {'reprise, produits relus':<26} {requery_ms:>8.2f} ms/panier ({requery_sql:.0f} requêtes)")
+    print(f"  {'reprise, lignes stockées':<26} {resume_ms:>8.2f} ms/panier ({resume_sql:.0f} requêtes)")
+    print("Totaux et nombres de lignes identiques après reprise")
+
+
+def bench_numbers(threads: int, sales: int):
+    """Numéros de vente et de retour sous charge : horodatage (ancien) vs compteur par caisse"""
+    from datetime import datetime
+    from modules.sales.pos import POSManager
+
+    class LegacyNumbersPOSManager(POSManager):
+        def _generate_sale_code(self) -> str:
+            return f"SLE-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+
+        def _generate_return_number(self) -> str:
+            return f"RET-{datetime.now().strftime('%Y%m%d%H%M%S')}"
+
+    product_ids = seed_products(200)
+    products = [dict(row) for row in db.execute_query(
+        "SELECT * FROM products WHERE id IN (%s)" % ",".join("?" * len(product_ids)), product_ids)]
+    per_thread = max(sales // threads, 1)
+
+    def run(make_pos) -> dict:
+        counters = {'sales': 0, 'failures': 0, 'returns': 0, 'return_failures': 0}
+        lock = threading.Lock()
+        barrier = threading.Barrier(threads)
+
+        def till(index: int):
+            # Deux threads par numéro de caisse : même compteur partagé
+            pos = make_pos(index // 2 + 1)
+            done = {'sales': 0, 'failures': 0, 'returns': 0, 'return_failures': 0}
+            barrier.wait()
+            for n in range(per_thread):
+                product = products[(index * per_thread + n) % len(products)]
+                _fill_cart(pos.current_cart, [product])
+                success, _, sale_id = pos.complete_sale(1, 'cash', pos.current_cart.get_total())
+                done['sales' if success else 'failures'] += 1
+                pos.new_sale()
+                if success and n % 10 == 0:
+                    ok, _, _ = pos.process_return(sale_id, [{'product_id': product['id'], 'quantity': 1}], 1)
+                    done['returns' if ok else 'return_failures'] += 1
+            with lock:
+                for key, value in done.items():
+                    counters[key] += value
+            db.close()
+
+        workers = [threading.Thread(target=till, args=(i,)) for i in range(threads)]
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        counters['seconds'] = time.perf_counter() - started
+        return counters
+
+    print(f"{threads} threads (2 par caisse), {per_thread} ventes chacun, un retour toutes les 10 ventes")
+    print(f"{'numéros':>10} | {'ventes/s':>9} | {'ventes':>7} | {'échecs':>7} | {'retours':>7} | {'échecs retour':>13}")
+    results = {}
+    for name, make_pos in (("horodatés", lambda register: _registered(LegacyNumbersPOSManager(), register)),
+                           ("compteur", _make_pos_manager)):
+        # Les collisions de l'ancien format sont attendues : pas une erreur par vente
+        logger.logger.setLevel(logging.CRITICAL)
+        counters = run(make_pos)
+        logger.logger.setLevel(logging.WARNING)
+        results[name] = counters
+        print(f"{name:>10} | {counters['sales'] / counters['seconds']:>9.0f} | {counters['sales']:>7} | "
+              f"{counters['failures']:>7} | {counters['returns']:>7} | {counters['return_failures']:>13}")
+
+    counters = results["compteur"]
+    duplicates = db.fetch_one(
+        "SELECT (SELECT COUNT(*) - COUNT(DISTINCT sale_number) FROM sales) "
+        "     + (SELECT COUNT(*) - COUNT(DISTINCT return_number) FROM returns) AS count"
+    )['count']
+    assert counters['failures'] == 0 and counters['return_failures'] == 0, "ventes ou retours refusés"
+    assert duplicates == 0, f"{duplicates} numéro(s) en double"
+    gaps = db.fetch_one("""
+        SELECT COUNT(*) AS count FROM document_sequences q
+        WHERE q.last_value != (SELECT COUNT(*) FROM sales WHERE sale_number LIKE q.prefix || '-%')
+                            + (SELECT COUNT(*) FROM returns WHERE return_number LIKE q.prefix || '-%')
+    """)['count']
+    assert gaps == 0, f"{gaps} compteur(s) décalé(s) par rapport aux documents écrits"
+    print(f"Aucun numéro en double, compteurs égaux au nombre de documents ({counters['sales']} ventes, "
+          f"{counters['returns']} retours)")
+
+
+def _registered(pos, register_number: int):
+    pos.set_register_number(register_number)
+    return pos
+
+
+# Paquets de la logique tabac : unités presque épuisées, paquets parents en réserve
+REGISTER_PACK_SIZE = 20
+
+
+def _seed_pack_pairs(count: int) -> list:
+    """Créer `count` couples paquet/unité et retourner les IDs des unités"""
+    db.execute_many(
+        "INSERT INTO products (barcode, name, purchase_price, selling_price, stock_quantity, category_id) "
+        "VALUES (?, ?, 800.0, 1200.0, 1000000, 1)",
+        [(f"BENCHPACK-{i:05d}", f"Paquet test {i}") for i in range(count)]
+    )
+    db.execute_update(
+        """
+        INSERT INTO products (barcode, name, purchase_price, selling_price, stock_quantity, category_id,
+                              parent_product_id, packing_quantity)
+        SELECT 'BENCHUNIT-' || substr(barcode, 11), 'Unité ' || substr(name, 13), 40.0, 60.0, 3, 1,
+               id, ?
+        FROM products WHERE barcode LIKE 'BENCHPACK-%'
+        """,
+        (REGISTER_PACK_SIZE,)
+    )
+    rows = db.execute_query("SELECT id FROM products WHERE barcode LIKE 'BENCHUNIT-%' ORDER BY id")
+    return [row['id'] for row in rows]
+
+
+def register_child(db_path: str, implementation: str, sales: int, start_at: float):
+    """Une caisse : `sales` paniers aléatoires sur la base partagée, compteurs en JSON sur stdout"""
+    import json
+    import random
+    import shutil
+    from modules.sales.cart import CartItem
+    from modules.sales.pos import POSManager
+
+    db.close()
+    db.db_path = Path(db_path)
+    shutil.rmtree(_BENCH_DIR, ignore_errors=True)
+    # Les attentes du verrou d'écriture sont attendues ici : pas de journal « requête lente »
+    logger.logger.setLevel(logging.ERROR)
+
+    pos = POSManager()  # Numéro de caisse : POS_REGISTER_NUMBER
+    rng = random.Random(pos.register_number)
+    products = [dict(row) for row in db.execute_query(
+        "SELECT * FROM products WHERE barcode LIKE 'BENCH-%' ORDER BY id")]
+    units = [dict(row) for row in db.execute_query(
+        "SELECT * FROM products WHERE barcode LIKE 'BENCHUNIT-%' ORDER BY id")]
+    counters = {'sales': 0, 'failures': 0, 'returns': 0, 'return_failures': 0}
+
+    time.sleep(max(start_at - time.time(), 0))  # Départ simultané de toutes les caisses
+    started = time.perf_counter()
+    for n in range(sales):
+        basket = rng.sample(products, rng.randint(1, 4))
+        pos.current_cart.items = [CartItem(product, 1.0) for product in basket]
+        if implementation == "legacy":
+            try:
+                _legacy_checkout(pos.current_cart, 1)
+                counters['sales'] += 1
+            except Exception:
+                counters['failures'] += 1
+            continue
+
+        if units and n % 2 == 0:
+            # Unités au détail ou paquets complets : ouverture de paquets concurrente
+            pos.current_cart.items.append(CartItem(rng.choice(units), float(rng.randint(1, 25))))
+        success, _, sale_id = pos.complete_sale(1, 'cash', pos.current_cart.get_total())
+        counters['sales' if success else 'failures'] += 1
+        if success and n % 10 == 0:
+            ok, _, _ = pos.process_return(sale_id, [{'product_id': basket[0]['id'], 'quantity': 1}], 1)
+            counters['returns' if ok else 'return_failures'] += 1
+        pos.new_sale()
+    counters['seconds'] = time.perf_counter() - started
+    print(json.dumps(counters))
+
+
+def _register_residuals() -> dict:
+    """Écarts entre le stock final et stock initial - ventes nettes (tous nuls sans mise à jour perdue)"""
+    # Un retour diminue la quantité de la ligne de vente : sale_items est déjà net des retours
+    movements = """
+        SELECT o.id, o.stock_quantity AS initial, p.stock_quantity AS final,
+               COALESCE((SELECT SUM(quantity) FROM sale_items WHERE product_id = o.id), 0) AS sold
+        FROM bench_initial_stock o JOIN products p ON p.id = o.id
+    """
+    plain = db.fetch_one(f"""
+        SELECT COUNT(CASE WHEN final != initial - sold THEN 1 END) AS products,
+               COALESCE(SUM(final - (initial - sold)), 0) AS units
+        FROM ({movements}) m
+        WHERE m.id NOT IN (SELECT id FROM products WHERE parent_product_id IS NOT NULL
+                           UNION SELECT parent_product_id FROM products WHERE parent_product_id IS NOT NULL)
+    """)
+    # Paquet + unités : seul le total en unités est conservé (ouverture de paquets)
+    packs = db.fetch_one(f"""
+        SELECT COUNT(CASE WHEN drift != 0 THEN 1 END) AS products, COALESCE(SUM(drift), 0) AS units
+        FROM (
+            SELECT (u.final + pk.final * ?) - (u.initial + pk.initial * ?) + u.sold AS drift
+            FROM ({movements}) u
+            JOIN products p ON p.id = u.id
+            JOIN ({movements}) pk ON pk.id = p.parent_product_id
+        )
+    """, (REGISTER_PACK_SIZE, REGISTER_PACK_SIZE))
+    negative = db.fetch_one("SELECT COUNT(*) AS count FROM products WHERE stock_quantity < 0")['count']
+    duplicates = db.fetch_one("SELECT COUNT(*) - COUNT(DISTINCT sale_number) AS count FROM sales")['count']
+    return {
+        'produits faux': plain['products'], 'écart (unités)': plain['units'],
+        'paquets faux': packs['products'], 'écart paquets (unités)': packs['units'],
+        'stocks négatifs': negative, 'numéros en double': duplicates,
+    }
+
+
+def bench_registers(registers: int, sales: int):
+    """N caisses (processus) sur une même base : mises à jour de stock perdues, ancien vs relatif"""
+    import json
+    import subprocess
+
+    print(f"{registers} caisses (processus), {sales} paniers chacune, 20 produits disputés, "
+          f"ouverture de paquets et un retour toutes les 10 ventes (relatif)")
+    print(f"{'stock':>9} | {'ventes/s':>9} | {'ventes':>7} | {'échecs':>6} | {'retours':>7} | "
+          f"{'produits faux':>13} | {'écart (unités)':>14} | {'paquets faux':>12} | "
+          f"{'stocks < 0':>10} | {'doublons':>8}")
+    failures = []
+    for implementation in ("legacy", "relative"):
+        db.close()
+        config.DATABASE_PATH = _BENCH_DIR / f"registers_{implementation}.db"
+        db.db_path = config.DATABASE_PATH
+        db.initialize_database()
+        seed_products(20, stock=1_000_000)
+        _seed_pack_pairs(10)
+        db.get_connection().executescript(
+            "CREATE TABLE bench_initial_stock AS SELECT id, stock_quantity FROM products;")
+        db.close()
+
+        start_at = time.time() + 3.0
+        children = [
+            subprocess.Popen(
+                [sys.executable, __file__, "register-child", "--db", str(config.DATABASE_PATH),
+                 "--impl", implementation, "--sales", str(sales), "--start", str(start_at)],
+                env=dict(os.environ, POS_REGISTER_NUMBER=str(register)),
+                stdout=subprocess.PIPE, text=True
+            )
+            for register in range(1, registers + 1)
+        ]
+        counters = {'sales': 0, 'failures': 0, 'returns': 0, 'seconds': 0.0}
+        for child in children:
+            output, _ = child.communicate()
+            if child.returncode != 0:
+                raise RuntimeError(f"caisse en échec (code {child.returncode})")
+            result = json.loads(output.strip().splitlines()[-1])
+            for key in counters:
+                counters[key] = max(counters[key], result[key]) if key == 'seconds' else counters[key] + result[key]
+
+        written = db.fetch_one("SELECT COUNT(*) AS count FROM sales")['count']
+        residuals = _register_residuals()
+        name = "ancien" if implementation == "legacy" else "relatif"
+        print(f"{name:>9} | {counters['sales'] / counters['seconds']:>9.0f} | {counters['sales']:>7} | "
+              f"{counters['failures']:>6} | {counters['returns']:>7} | {residuals['produits faux']:>13} | "
+              f"{residuals['écart (unités)']:>+14.0f} | {residuals['paquets faux']:>12} | "
+              f"{residuals['stocks négatifs']:>10} | {residuals['numéros en double']:>8}")
+        if implementation == "relative":
+            if counters['failures'] or written != counters['sales']:
+                failures.append(f"{counters['failures']} vente(s) refusée(s), {written} écrite(s) "
+                                f"pour {counters['sales']} annoncée(s)")
+            failures += [f"{key}: {value}" for key, value in residuals.items() if value]
+
+    if failures:
+        print(f"ÉCHEC: {'; '.join(failures)}")
+        sys.exit(1)
+    print("OK: stock final = initial - ventes nettes des retours pour chaque produit, paquets compris")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bancs d'essai de performance du POS")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_checkout = sub.add_parser("checkout", help="Débit de finalisation des ventes")
+    p_checkout.add_argument("--sales", type=int, default=200)
+
+    p_contention = sub.add_parser("contention", help="Caisse vs rapports concurrents (DELETE vs WAL)")
+    p_contention.add_argument("--readers", type=int, default=4)
+    p_contention.add_argument("--seconds", type=float, default=5.0)
+
+    p_scan = sub.add_parser("scan", help="Latence de scan selon la taille du catalogue")
+    p_scan.add_argument("--scans", type=int, default=2000)
+
+    p_cache_sync = sub.add_parser("cache-sync", help="Cache catalogue et écritures d'une autre caisse (data_version)")
+    p_cache_sync.add_argument("--products", type=int, default=10000)
+
+    p_history = sub.add_parser("history", help="Premier écran des pages produits/clients/historique")
+    p_history.add_argument("--sales", type=int, default=50_000)
+
+    p_history_query = sub.add_parser("history-query", help="Requêtes de l'historique des ventes (N+1 vs agrégée)")
+    p_history_query.add_argument("--sales", type=int, default=200_000)
+
+    p_reports = sub.add_parser("reports", help="Vérifier l'usage de l'index de date par les rapports")
+    p_reports.add_argument("--sales", type=int, default=200_000)
+
+    p_rollup = sub.add_parser("rollup", help="Rapports sur daily_rollup vs sale_items bruts")
+    p_rollup.add_argument("--sales", type=int, default=200_000)
+
+    p_search = sub.add_parser("search", help="Recherche produits : LIKE vs FTS5 trigram")
+    p_search.add_argument("--products", type=int, default=100_000)
+
+    p_ui_stall = sub.add_parser("ui-stall", help="Gel de l'interface pendant le chargement des pages")
+    p_ui_stall.add_argument("--sales", type=int, default=200_000)
+
+    p_signals = sub.add_parser("signals", help="Rechargements de pages déclenchés par les ventes")
+    p_signals.add_argument("--sales", type=int, default=20)
+
+    p_startup = sub.add_parser("startup", help="Ouverture d'une base à jour (schéma complet vs user_version)")
+    p_startup.add_argument("--products", type=int, default=100_000)
+
+    p_dbinfo = sub.add_parser("dbinfo", help="Compteurs de tables au démarrage (exacts vs estimés)")
+    p_dbinfo.add_argument("--sales", type=int, default=200_000)
+
+    p_backup = sub.add_parser("backup", help="Ventes pendant une sauvegarde (copie vs API de sauvegarde)")
+    p_backup.add_argument("--size-mb", type=int, default=1024)
+
+    p_backup_store = sub.add_parser("backup-store", help="Espace et temps de l'archive de sauvegardes dédupliquée")
+    p_backup_store.add_argument("--sales", type=int, default=50_000)
+    p_backup_store.add_argument("--hours", type=int, default=720)
+    p_backup_store.add_argument("--sales-per-hour", type=int, default=30)
+
+    p_excel_export = sub.add_parser("excel-export", help="Export Excel automatique (interface vs arrière-plan)")
+    p_excel_export.add_argument("--sales", type=int, default=1_000_000)
+
+    p_data_export = sub.add_parser("data-export", help="Sauvegarde complète par lots (xlsx, csv, parquet)")
+    p_data_export.add_argument("--sales", type=int, default=1_000_000)
+
+    p_product_import = sub.add_parser("product-import", help="Import Excel du catalogue (ligne à ligne vs par lots)")
+    p_product_import.add_argument("--rows", type=int, default=50_000)
+
+    p_restore = sub.add_parser("restore", help="Restauration complète (requêtes unitaires vs fusion ensembliste)")
+    p_restore.add_argument("--products", type=int, default=50_000)
+    p_restore.add_argument("--customers", type=int, default=10_000)
+
+    p_profiler = sub.add_parser("profiler", help="Surcoût du profilage des requêtes et journal des requêtes lentes")
+    p_profiler.add_argument("--calls", type=int, default=100_000)
+
+    p_transactions = sub.add_parser("transactions", help="Opérations multi-instructions (commit par instruction vs unité de travail)")
+    p_transactions.add_argument("--ops", type=int, default=300)
+
+    sub.add_parser("crash", help="Cohérence après un crash au milieu des opérations de vente, retour, crédit et dette")
+
+    p_cart = sub.add_parser("cart", help="Panier de gros : recherche linéaire et totaux resommés vs index et totaux tenus")
+    p_cart.add_argument("--lines", type=int, default=500)
+
+    p_cart_ui = sub.add_parser("cart-ui", help="Latence scan -> panier affiché (tableau reconstruit vs modèle ligne à ligne)")
+    p_cart_ui.add_argument("--lines", type=int, default=500)
+
+    p_held_carts = sub.add_parser("held-carts", help="Paniers en attente persistants : liste et reprise sans relire les produits")
+    p_held_carts.add_argument("--carts", type=int, default=200)
+    p_held_carts.add_argument("--lines", type=int, default=40)
+
+    p_numbers = sub.add_parser("numbers", help="Numéros de vente/retour sous charge multi-threads (collisions)")
+    p_numbers.add_argument("--threads", type=int, default=8)
+    p_numbers.add_argument("--sales", type=int, default=5000)
+
+    p_registers = sub.add_parser("registers", help="Plusieurs caisses (processus) sur une même base : stock perdu")
+    p_registers.add_argument("--registers", type=int, default=4)
+    p_registers.add_argument("--sales", type=int, default=500)
+
+    # Processus sacrifié lancé par « crash »
+    p_crash_child = sub.add_parser("crash-child")
+    p_crash_child.add_argument("--db", required=True)
+    p_crash_child.add_argument("--op", required=True)
+    p_crash_child.add_argument("--impl", required=True)
+    p_crash_child.add_argument("--after", type=int, required=True)
+    p_crash_child.add_argument("--sale", type=int, default=0)
+
+    # Caisse lancée par « registers » (numéro dans POS_REGISTER_NUMBER)
+    p_register_child = sub.add_parser("register-child")
+    p_register_child.add_argument("--db", required=True)
+    p_register_child.add_argument("--impl", required=True)
+    p_register_child.add_argument("--sales", type=int, required=True)
+    p_register_child.add_argument("--start", type=float, required=True)
+
+    args = parser.parse_args()
+    if args.command == "checkout":
+        bench_checkout(args.sales)
+    elif args.command == "contention":
+        bench_contention(args.readers, args.seconds)
+    elif args.command == "scan":
+        bench_scan(args.scans)
+    elif args.command == "cache-sync":
+        bench_cache_sync(args.products)
+    elif args.command == "history":
+        bench_history(args.sales)
+    elif args.command == "history-query":
+        bench_history_query(args.sales)
+    elif args.command == "reports":
+        bench_reports(args.sales)
+    elif args.command == "rollup":
+        bench_rollup(args.sales)
+    elif args.command == "search":
+        bench_search(args.products)
+    elif args.command == "ui-stall":
+        bench_ui_stall(args.sales)
+    elif args.command == "signals":
+        bench_signals(args.sales)
+    elif args.command == "startup":
+        bench_startup(args.products)
+    elif args.command == "dbinfo":
+        bench_dbinfo(args.sales)
+    elif args.command == "backup":
+        bench_backup(args.size_mb)
+    elif args.command == "backup-store":
+        bench_backup_store(args.sales, args.hours, args.sales_per_hour)
+    elif args.command == "excel-export":
+        bench_excel_export(args.sales)
+    elif args.command == "data-export":
+        bench_data_export(args.sales)
+    elif args.command == "product-import":
+        bench_product_import(args.rows)
+    elif args.command == "restore":
+        bench_restore(args.products, args.customers)
+    elif args.command == "profiler":
+        bench_profiler(args.calls)
+    elif args.command == "transactions":
+        bench_transactions(args.ops)
+    elif args.command == "crash":
+        bench_crash()
+    elif args.command == "cart":
+        bench_cart(args.lines)
+    elif args.command == "cart-ui":
+        bench_cart_ui(args.lines)
+    elif args.command == "held-carts":
+        bench_held_carts(args.carts, args.lines)
+    elif args.command == "numbers":
+        bench_numbers(args.threads, args.sales)
+    elif args.command == "registers":
+        bench_registers(args.registers, args.sales)
+    elif args.command == "crash-child":
+        crash_child(args.db, args.op, args.impl, args.after, args.sale)
+    elif args.command == "register-child":
+        register_child(args.db, args.impl, args.sales, args.start)
+
+
+if __name__ == "__main__":
+    main()
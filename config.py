@@ -27,6 +27,19 @@ for directory in [DATA_DIR, LOGS_DIR, RESOURCES_DIR, BACKUP_DIR]:
 # Base de données
 DATABASE_PATH = DATA_DIR / "minimarket.db"
 
+# Profil de connexion SQLite (appliqué à chaque connexion par thread)
+DATABASE_CONFIG = {
+    "journal_mode": "WAL",  # WAL: les lectures (rapports) ne bloquent plus la caisse
+    "synchronous": "NORMAL",  # NORMAL est sûr en WAL (FULL si mode DELETE)
+    "cache_size_kb": 20000,  # Cache de pages par connexion (~20 Mo)
+    "mmap_size_mb": 128,  # Lecture mappée en mémoire (0 = désactivé)
+    "temp_store": "MEMORY",  # Tables temporaires et tris en mémoire
+    "busy_timeout_ms": 10000,  # Attente maximale sur un verrou
+    "profile_queries": True,  # Chronométrer les requêtes (rapport: python -m database.query_report)
+    "slow_query_ms": 200,  # Requête journalisée comme lente au-delà de ce seuil
+    "explain_slow_queries": True,  # Joindre le plan (EXPLAIN QUERY PLAN) à la première requête lente
+}
+
 # Paramètres de l'application
 APP_NAME = "DamDev POS"
 APP_VERSION = "1.0.0"
@@ -61,6 +74,11 @@ STOCK_CONFIG = {
     "auto_decrease_stock": True,  # Décrémenter automatiquement lors de vente
 }
 
+# Paramètres de caisse (plusieurs caisses peuvent partager la même base)
+POS_CONFIG = {
+    "register_number": int(os.environ.get("POS_REGISTER_NUMBER", "1")),  # Numéro de ce poste (tickets, paniers en attente)
+}
+
 # Paramètres d'impression
 PRINTER_CONFIG = {
     "default_printer": "PDF",  # "PDF", "THERMAL", "STANDARD"
@@ -76,7 +94,10 @@ BACKUP_CONFIG = {
     "backup_time": "23:00",  # Heure de sauvegarde automatique
     "backup_interval_hours": 5, # Intervalle en heures
     "keep_backups_days": 30,  # Garder les sauvegardes pendant 30 jours
-    "compress_backups": True,
+    "compress_backups": True,  # Archive dédupliquée et compressée (core/backup_store.py)
+    "dedup_chunk_kb": 16,  # Taille des blocs de déduplication (multiple de la taille de page)
+    "excel_backups_kept": 3,  # Exports Excel automatiques conservés
+    "pages_per_step": 1024,  # Pages copiées par lot de sauvegarde (~4 Mo en pages de 4 Ko)
 }
 
 # Paramètres multi-langue
@@ -186,11 +207,13 @@ def get_config(section):
         "store": STORE_CONFIG,
         "security": SECURITY_CONFIG,
         "stock": STOCK_CONFIG,
+        "pos": POS_CONFIG,
         "printer": PRINTER_CONFIG,
         "backup": BACKUP_CONFIG,
         "language": LANGUAGE_CONFIG,
         "log": LOG_CONFIG,
         "ui": UI_CONFIG,
+        "database": DATABASE_CONFIG,
     }
     return configs.get(section, {})
 
@@ -200,10 +223,12 @@ def update_config(section, key, value):
         "store": STORE_CONFIG,
         "security": SECURITY_CONFIG,
         "stock": STOCK_CONFIG,
+        "pos": POS_CONFIG,
         "printer": PRINTER_CONFIG,
         "backup": BACKUP_CONFIG,
         "language": LANGUAGE_CONFIG,
         "ui": UI_CONFIG,
+        "database": DATABASE_CONFIG,
     }
     if section in configs and key in configs[section]:
         configs[section][key] = value
@@ -2,33 +2,57 @@
 """
 Système de sauvegarde automatique et manuelle
 """
-import shutil
+import threading
+import time
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import List, Optional, Dict
+from typing import Callable, Dict, List, Optional
 import config
 from database.db_manager import db
+from .backup_store import backup_store
+from .data_signals import data_signals
+from .exporter import ExportTable, data_exporter
 from .logger import logger
 
 
 class BackupManager:
     """Gestionnaire de sauvegardes"""
     
+    # Export Excel automatique (moteur core.exporter, lu par lots)
+    EXCEL_SHEETS = [
+        ExportTable("Produits", "SELECT * FROM products WHERE is_active = 1"),
+        ExportTable("Ventes", "SELECT * FROM sales"),
+        ExportTable("Clients", "SELECT * FROM customers WHERE is_active = 1"),
+    ]
+    
     def __init__(self):
         self.backup_dir = config.BACKUP_DIR
         self.backup_dir.mkdir(exist_ok=True)
+        self._excel_cancel = threading.Event()
     
-    def create_backup(self, destination: Optional[Path] = None) -> tuple[bool, str, Optional[Path]]:
+    def create_backup(self, destination: Optional[Path] = None,
+                      progress: Optional[Callable[[int, int], None]] = None) -> tuple[bool, str, Optional[Path]]:
         """
         Créer une sauvegarde de la base de données
         
+        Copie par lots via l'API de sauvegarde SQLite : préférer
+        create_backup_async depuis l'interface. Dans le dossier par défaut,
+        avec BACKUP_CONFIG['compress_backups'], la sauvegarde est un
+        instantané de l'archive dédupliquée (manifeste .json) ; sinon un .db.
+        
         Args:
-            destination: Dossier de destination (None = dossier par défaut)
+            destination: Dossier de destination (None = dossier par défaut ; .db autonome sinon)
+            progress: Appelée avec (pages copiées, pages totales)
             
         Returns:
             (success, message, backup_path)
         """
         try:
+            if destination is None and config.BACKUP_CONFIG.get('compress_backups'):
+                manifest_path = backup_store.snapshot(progress=progress)
+                logger.log_backup(str(manifest_path), True)
+                return True, f"Sauvegarde créée: {manifest_path.stem}", manifest_path
+            
             # Générer le nom du fichier de sauvegarde
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             backup_name = f"minimarket_backup_{timestamp}"
@@ -43,11 +67,13 @@ class BackupManager:
             # Copier la base de données
             db_backup_path = destination / f"{backup_name}.db"
             
-            # Utiliser la méthode de backup de SQLite pour éviter les corruptions
-            success = db.backup_database(db_backup_path)
+            # API de sauvegarde SQLite : instantané cohérent, vérifié avant d'être gardé
+            started = time.perf_counter()
+            success = db.backup_database(db_backup_path, progress=progress)
             
             if not success:
                 return False, "Erreur lors de la copie de la base de données", None
+            logger.info(f"Sauvegarde copiée et vérifiée en {time.perf_counter() - started:.1f} s")
             
             logger.log_backup(str(db_backup_path), True)
             return True, f"Sauvegarde créée: {db_backup_path.name}", db_backup_path
@@ -57,30 +83,103 @@ class BackupManager:
             logger.error(error_msg)
             return False, error_msg, None
     
+    def create_backup_async(self, on_done: Optional[Callable[[tuple], None]] = None,
+                            destination: Optional[Path] = None):
+        """
+        Lancer create_backup sur le pool des travaux longs (la caisse reste utilisable)
+        
+        Args:
+            on_done: Appelée sur le thread de l'interface avec (success, message, backup_path)
+            destination: Dossier de destination (None = dossier par défaut)
+        """
+        from .db_executor import background_jobs
+        
+        def on_error(error):
+            if on_done:
+                on_done((False, f"Erreur lors de la sauvegarde: {error}", None))
+        
+        background_jobs.submit("backup", self.create_backup, destination,
+                           on_result=on_done, on_error=on_error)
+    
+    def export_excel(self, progress: Optional[Callable[[int, int], None]] = None) -> Optional[Path]:
+        """
+        Export Excel automatique (produits, ventes, clients)
+        
+        À lancer hors du thread de l'interface (voir export_excel_async).
+        Les lignes sont lues par lots et écrites dans un classeur write_only :
+        la mémoire reste bornée quelle que soit la taille de l'historique.
+        
+        Args:
+            progress: Appelée avec (lignes écrites, lignes totales)
+            
+        Returns:
+            Chemin du fichier, ou None si l'export a été annulé
+        """
+        self._excel_cancel.clear()
+        self.backup_dir.mkdir(exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        excel_path = self.backup_dir / f"auto_backup_{timestamp}.xlsx"
+        return data_exporter.export(excel_path, 'xlsx', self.EXCEL_SHEETS,
+                                    progress=progress or self._log_excel_progress,
+                                    cancel=self._excel_cancel)
+    
+    def export_excel_async(self):
+        """Lancer export_excel sur le pool des travaux longs"""
+        from .db_executor import background_jobs
+        background_jobs.submit("auto_backup_excel", self.export_excel)
+    
+    def cancel_excel_export(self):
+        """Abandonner l'export Excel en cours ou en attente (fermeture de l'application)"""
+        from .db_executor import background_jobs
+        background_jobs.cancel("auto_backup_excel")
+        self._excel_cancel.set()
+    
+    def _log_excel_progress(self, done: int, total: int):
+        # Une ligne de journal par tranche de 10 %
+        step = max(total // 10, 1)
+        if done // step != (done - data_exporter.BATCH_ROWS) // step or done == total:
+            logger.info(f"Export Excel automatique: {done}/{total} lignes")
+    
     def restore_backup(self, backup_path: Path) -> tuple[bool, str]:
         """
         Restaurer une sauvegarde
         
         Args:
-            backup_path: Chemin de la sauvegarde (.db)
+            backup_path: Chemin de la sauvegarde (.db ou manifeste .json de l'archive)
             
         Returns:
             (success, message)
         """
+        rebuilt_path = None
         try:
             if not backup_path.exists():
                 return False, "Fichier de sauvegarde introuvable"
             
+            # Instantané de l'archive : reconstituer le .db avant de le restaurer
+            if backup_path.suffix == '.json':
+                rebuilt_path = backup_store.rebuild(
+                    backup_path, config.DATA_DIR / f"{backup_path.stem}.restore.db")
+            
             # Créer une sauvegarde de la base actuelle avant restauration
             current_backup = config.DATA_DIR / f"before_restore_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
-            if config.DATABASE_PATH.exists():
-                shutil.copy2(config.DATABASE_PATH, current_backup)
+            if config.DATABASE_PATH.exists() and not db.backup_database(current_backup):
+                return False, "Impossible de sauvegarder la base actuelle avant restauration"
             
             # Restaurer
-            success = db.restore_database(backup_path)
+            success = db.restore_database(rebuilt_path or backup_path)
             
             if success:
                 logger.info(f"Base de données restaurée depuis: {backup_path}")
+                # Lignes plus anciennes que le repère updated_at du cache : rechargement complet
+                from modules.products.product_cache import product_cache
+                product_cache.invalidate_all()
+                data_signals.products_changed.emit()
+                # Sauvegarde antérieure à daily_rollup : table créée vide par la migration
+                from modules.reports.daily_rollup import daily_rollup
+                if daily_rollup.needs_backfill():
+                    logger.info("Calcul des agrégats journaliers de la base restaurée (daily_rollup)...")
+                    daily_rollup.rebuild()
+                data_signals.sales_changed.emit()
                 return True, "Restauration réussie"
             else:
                 return False, "Erreur lors de la restauration"
@@ -89,6 +188,9 @@ class BackupManager:
             error_msg = f"Erreur lors de la restauration: {str(e)}"
             logger.error(error_msg)
             return False, error_msg
+        finally:
+            if rebuilt_path is not None and rebuilt_path.exists():
+                rebuilt_path.unlink()
     
     def auto_backup(self) -> tuple[bool, str]:
         """
@@ -126,6 +228,16 @@ class BackupManager:
                     backup_file.unlink()
                     deleted_count += 1
             
+            # Exports Excel automatiques : seuls les plus récents sont gardés
+            excel_kept = config.BACKUP_CONFIG.get('excel_backups_kept', 3)
+            excel_files = sorted(self.backup_dir.glob("auto_backup_*.xlsx"),
+                                 key=lambda f: f.stat().st_mtime, reverse=True)
+            for excel_file in excel_files[excel_kept:]:
+                excel_file.unlink()
+                deleted_count += 1
+            
+            deleted_count += backup_store.prune(keep_days)
+            
             if deleted_count > 0:
                 logger.info(f"{deleted_count} ancienne(s) sauvegarde(s) supprimée(s)")
                 
@@ -134,7 +246,7 @@ class BackupManager:
     
     def list_backups(self) -> List[Dict]:
         """
-        Lister toutes les sauvegardes disponibles (.xlsx et .db)
+        Lister toutes les sauvegardes disponibles (.xlsx, .db et instantanés de l'archive)
         
         Returns:
             Liste de dictionnaires avec infos sur les sauvegardes
@@ -145,6 +257,7 @@ class BackupManager:
         all_files = []
         all_files.extend(self.backup_dir.glob("auto_backup_*.xlsx"))
         all_files.extend(self.backup_dir.glob("minimarket_backup_*.db"))
+        all_files.extend(backup_store.list_snapshots())
         
         for backup_file in sorted(all_files, key=lambda f: f.stat().st_mtime, reverse=True):
             stat = backup_file.stat()
@@ -152,21 +265,23 @@ class BackupManager:
             # Determine type
             if backup_file.suffix == '.xlsx':
                 backup_type = 'Excel'
+            elif backup_file.suffix == '.json':
+                backup_type = 'Archive'
             else:
                 backup_type = 'Base de données'
             
-            # Format size
-            size_bytes = stat.st_size
-            if size_bytes < 1024:
-                size_str = f"{size_bytes} o"
-            elif size_bytes < 1024 * 1024:
-                size_str = f"{size_bytes / 1024:.1f} Ko"
+            # Format size (archive : octets réellement écrits / taille de la base)
+            if backup_type == 'Archive':
+                manifest = backup_store.read_manifest(backup_file)
+                size_bytes = manifest['stored_bytes']
+                size_str = f"{self._format_size(size_bytes)} / {self._format_size(manifest['size'])}"
             else:
-                size_str = f"{size_bytes / (1024 * 1024):.2f} Mo"
+                size_bytes = stat.st_size
+                size_str = self._format_size(size_bytes)
             
             backups.append({
                 'path': backup_file,
-                'name': backup_file.name,
+                'name': backup_file.stem if backup_type == 'Archive' else backup_file.name,
                 'type': backup_type,
                 'size': size_bytes,
                 'size_str': size_str,
@@ -190,7 +305,11 @@ class BackupManager:
             if not backup_path.exists():
                 return False, "Fichier introuvable"
             
-            backup_path.unlink()
+            if backup_path.suffix == '.json':
+                # Les blocs encore utilisés par d'autres instantanés sont gardés
+                backup_store.delete(backup_path)
+            else:
+                backup_path.unlink()
             logger.info(f"Sauvegarde supprimée: {backup_path.name}")
             return True, f"Sauvegarde supprimée: {backup_path.name}"
             
@@ -207,16 +326,19 @@ class BackupManager:
             Taille formatée (ex: '15.3 Mo')
         """
         total = 0
-        for f in self.backup_dir.iterdir():
+        for f in self.backup_dir.rglob("*"):
             if f.is_file():
                 total += f.stat().st_size
-        
-        if total < 1024:
-            return f"{total} o"
-        elif total < 1024 * 1024:
-            return f"{total / 1024:.1f} Ko"
+        return self._format_size(total)
+    
+    @staticmethod
+    def _format_size(size_bytes: int) -> str:
+        if size_bytes < 1024:
+            return f"{size_bytes} o"
+        elif size_bytes < 1024 * 1024:
+            return f"{size_bytes / 1024:.1f} Ko"
         else:
-            return f"{total / (1024 * 1024):.1f} Mo"
+            return f"{size_bytes / (1024 * 1024):.2f} Mo"
     
     def export_to_usb(self, usb_path: Path) -> tuple[bool, str]:
         """
@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+"""
+Archive de sauvegardes compressée et dédupliquée
+
+Chaque instantané est une copie cohérente de la base (API de sauvegarde
+SQLite) découpée en blocs alignés sur les pages. Un bloc est stocké une
+seule fois, compressé, sous le nom de son empreinte SHA-256 ; l'instantané
+n'est qu'un manifeste JSON listant ses blocs. D'une heure à l'autre seuls
+les blocs modifiés par les ventes sont écrits.
+
+Arborescence (config.BACKUP_DIR / "store") :
+    chunks/ab/abcdef...       blocs compressés
+    snapshots/<nom>.json      manifestes
+"""
+import hashlib
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+import config
+from database.db_manager import db
+from .logger import logger
+
+
+def _load_codecs() -> Dict[str, tuple]:
+    """Compresseurs de la bibliothèque standard disponibles : nom -> (compress, decompress)"""
+    codecs = {}
+    try:
+        from compression import zstd  # Python 3.14+
+        codecs['zstd'] = (zstd.compress, zstd.decompress)
+    except ImportError:
+        pass
+    try:
+        import zlib
+        codecs['zlib'] = (lambda data: zlib.compress(data, 6), zlib.decompress)
+    except ImportError:
+        pass
+    try:
+        import lzma
+        codecs['lzma'] = (lzma.compress, lzma.decompress)
+    except ImportError:
+        pass
+    return codecs
+
+
+_CODECS = _load_codecs()
+
+# Par ordre de préférence : zstd (rapide et compact), zlib, lzma (compact mais lent)
+DEFAULT_CODEC = next((name for name in ('zstd', 'zlib', 'lzma') if name in _CODECS), None)
+
+
+class BackupStore:
+    """Instantanés de la base par blocs dédupliqués"""
+
+    def __init__(self, root: Optional[Path] = None):
+        self.root = Path(root) if root else config.BACKUP_DIR / "store"
+        self.chunks_dir = self.root / "chunks"
+        self.snapshots_dir = self.root / "snapshots"
+
+    # ----- Instantanés -----
+
+    def snapshot(self, name: Optional[str] = None,
+                 progress: Optional[Callable[[int, int], None]] = None) -> Path:
+        """
+        Créer un instantané de la base courante
+
+        Args:
+            name: Nom du manifeste (par défaut minimarket_backup_AAAAMMJJ_HHMMSS)
+            progress: Transmise à la copie SQLite (pages copiées, pages totales)
+
+        Returns:
+            Chemin du manifeste
+        """
+        if DEFAULT_CODEC is None:
+            raise RuntimeError("Aucun compresseur disponible (zstd, zlib, lzma)")
+        name = name or f"minimarket_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        self.chunks_dir.mkdir(parents=True, exist_ok=True)
+        self.snapshots_dir.mkdir(parents=True, exist_ok=True)
+
+        started = time.perf_counter()
+        # Copie cohérente et vérifiée, découpée ensuite en blocs
+        copy_path = self.root / f"{name}.db"
+        if not db.backup_database(copy_path, progress=progress):
+            raise RuntimeError("Copie de la base impossible")
+
+        compress = _CODECS[DEFAULT_CODEC][0]
+        chunk_size = self._chunk_size(copy_path)
+        chunks, written, file_hash = [], 0, hashlib.sha256()
+        try:
+            with open(copy_path, 'rb') as f:
+                while True:
+                    block = f.read(chunk_size)
+                    if not block:
+                        break
+                    file_hash.update(block)
+                    digest = hashlib.sha256(block).hexdigest()
+                    chunks.append(digest)
+                    chunk_path = self._chunk_path(digest)
+                    if not chunk_path.exists():
+                        written += self._write_atomic(chunk_path, compress(block))
+            size = copy_path.stat().st_size
+        finally:
+            copy_path.unlink()
+
+        manifest = {
+            'name': name,
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'size': size,
+            'sha256': file_hash.hexdigest(),
+            'chunk_size': chunk_size,
+            'codec': DEFAULT_CODEC,
+            'stored_bytes': written,
+            'chunks': chunks,
+        }
+        manifest_path = self.snapshots_dir / f"{name}.json"
+        self._write_atomic(manifest_path, json.dumps(manifest).encode('utf-8'))
+        logger.info(f"Instantané {name}: {size / 1024 / 1024:.1f} Mo, "
+                    f"{written / 1024:.0f} Ko nouveaux ({DEFAULT_CODEC}) "
+                    f"en {time.perf_counter() - started:.1f} s")
+        return manifest_path
+
+    def rebuild(self, manifest_path: Path, target_path: Path) -> Path:
+        """
+        Reconstituer le fichier .db d'un instantané
+
+        Chaque bloc est contrôlé par son empreinte, puis le fichier complet.
+
+        Returns:
+            target_path
+        """
+        manifest = self.read_manifest(manifest_path)
+        if manifest['codec'] not in _CODECS:
+            raise RuntimeError(f"Compresseur {manifest['codec']} indisponible sur cette installation")
+        decompress = _CODECS[manifest['codec']][1]
+
+        partial_path = target_path.with_name(target_path.name + ".partial")
+        file_hash = hashlib.sha256()
+        try:
+            with open(partial_path, 'wb') as f:
+                for digest in manifest['chunks']:
+                    block = decompress(self._chunk_path(digest).read_bytes())
+                    if hashlib.sha256(block).hexdigest() != digest:
+                        raise ValueError(f"Bloc corrompu: {digest}")
+                    file_hash.update(block)
+                    f.write(block)
+            if file_hash.hexdigest() != manifest['sha256']:
+                raise ValueError(f"Empreinte de {manifest['name']} invalide")
+            partial_path.replace(target_path)
+        finally:
+            if partial_path.exists():
+                partial_path.unlink()
+        return target_path
+
+    def list_snapshots(self) -> List[Path]:
+        """Manifestes, du plus récent au plus ancien"""
+        if not self.snapshots_dir.exists():
+            return []
+        return sorted(self.snapshots_dir.glob("*.json"), reverse=True)
+
+    def read_manifest(self, manifest_path: Path) -> Dict:
+        return json.loads(Path(manifest_path).read_text(encoding='utf-8'))
+
+    def delete(self, manifest_path: Path) -> int:
+        """
+        Supprimer un instantané et les blocs qu'il était seul à utiliser
+
+        Returns:
+            Nombre de blocs libérés
+        """
+        Path(manifest_path).unlink()
+        return self.collect_garbage()
+
+    def prune(self, keep_days: int) -> int:
+        """
+        Supprimer les instantanés plus anciens que keep_days (le plus récent est toujours gardé)
+
+        Returns:
+            Nombre d'instantanés supprimés
+        """
+        cutoff = datetime.now() - timedelta(days=keep_days)
+        deleted = 0
+        for manifest_path in self.list_snapshots()[1:]:
+            if datetime.fromtimestamp(manifest_path.stat().st_mtime) < cutoff:
+                manifest_path.unlink()
+                deleted += 1
+        if deleted:
+            self.collect_garbage()
+        return deleted
+
+    def collect_garbage(self) -> int:
+        """Supprimer les blocs qu'aucun manifeste ne référence"""
+        if not self.chunks_dir.exists():
+            return 0
+        referenced = set()
+        for manifest_path in self.list_snapshots():
+            referenced.update(self.read_manifest(manifest_path)['chunks'])
+        freed = 0
+        for chunk_path in self.chunks_dir.glob("*/*"):
+            if chunk_path.name not in referenced:
+                chunk_path.unlink()
+                freed += 1
+        return freed
+
+    def total_size(self) -> int:
+        """Espace disque occupé par l'archive (octets)"""
+        if not self.root.exists():
+            return 0
+        return sum(f.stat().st_size for f in self.root.rglob("*") if f.is_file())
+
+    # ----- Interne -----
+
+    def _chunk_size(self, db_path: Path) -> int:
+        """Taille de bloc : multiple de la taille de page, pour que les pages inchangées donnent les mêmes blocs"""
+        with open(db_path, 'rb') as f:
+            header = f.read(18)
+        page_size = int.from_bytes(header[16:18], 'big') if len(header) == 18 else 4096
+        page_size = 65536 if page_size == 1 else (page_size or 4096)
+        wanted = config.BACKUP_CONFIG.get('dedup_chunk_kb', 16) * 1024
+        return max(page_size, wanted // page_size * page_size)
+
+    def _chunk_path(self, digest: str) -> Path:
+        return self.chunks_dir / digest[:2] / digest
+
+    @staticmethod
+    def _write_atomic(path: Path, data: bytes) -> int:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(path.name + ".tmp")
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+        return len(data)
+
+
+# Instance globale
+backup_store = BackupStore()
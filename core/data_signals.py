@@ -1,8 +1,59 @@
 # -*- coding: utf-8 -*-
 """
 Centralized data change signals for real-time UI updates
+
+The individual signals below still fire immediately. On top of them, every
+emit (and every `notify()` call) is collected into one ChangeSet per
+event-loop tick, published once through `changes_committed`.
+
+Pages should use `subscribe()` rather than connecting their reload slot to
+several signals: the reload runs once per batch, and only when the page is
+visible. A hidden page is reloaded when it is shown again.
 """
-from PyQt5.QtCore import QObject, pyqtSignal
+import threading
+from collections import Counter
+from functools import partial
+from typing import Callable, Dict, Iterable, Optional, Set
+from PyQt5 import sip
+from PyQt5.QtCore import QObject, QEvent, QTimer, Qt, pyqtSignal
+
+
+class ChangeSet:
+    """Signals emitted during one event-loop tick, plus the entity IDs reported"""
+
+    def __init__(self):
+        self.signals: Set[str] = set()
+        self._ids: Dict[str, Set[int]] = {}
+
+    def add_signal(self, name: str):
+        self.signals.add(name)
+
+    def add_ids(self, entity: str, ids: Iterable[int]):
+        self._ids.setdefault(entity, set()).update(i for i in ids if i is not None)
+
+    def ids(self, entity: str) -> Set[int]:
+        """IDs reported for `entity` ('product', 'sale', 'customer'...); empty if unknown"""
+        return set(self._ids.get(entity, ()))
+
+    def entities(self) -> Set[str]:
+        return set(self._ids)
+
+    def __bool__(self):
+        return bool(self.signals or self._ids)
+
+    def __repr__(self):
+        ids = ", ".join(f"{k}={sorted(v)}" for k, v in sorted(self._ids.items()))
+        return f"ChangeSet(signals={sorted(self.signals)}{', ' + ids if ids else ''})"
+
+
+class _Subscription:
+    """One page reload bound to a set of signal names"""
+
+    def __init__(self, widget, signals: Set[str], callback: Callable[[], None]):
+        self.widget = widget
+        self.signals = signals
+        self.callback = callback
+        self.pending: Set[str] = set()  # Signals received while hidden
 
 
 class DataSignals(QObject):
@@ -51,6 +102,134 @@ class DataSignals(QObject):
     
     # Shortcut signals
     shortcuts_changed = pyqtSignal()
+    
+    # One batch per event-loop tick (ChangeSet)
+    changes_committed = pyqtSignal(object)
+    
+    # Internal: queued to the GUI thread, whichever thread emitted
+    _flush_requested = pyqtSignal()
+    
+    # Signals collected into change sets (all of the above)
+    TRACKED_SIGNALS = (
+        'product_added', 'product_updated', 'product_deleted', 'products_changed',
+        'product_changed', 'inventory_changed',
+        'customer_added', 'customer_updated', 'customer_deleted', 'customers_changed',
+        'supplier_added', 'supplier_updated', 'supplier_deleted', 'suppliers_changed',
+        'sale_completed', 'sale_cancelled', 'sales_changed',
+        'session_opened', 'session_closed', 'safe_transaction', 'finance_changed',
+        'category_added', 'category_updated', 'category_deleted', 'categories_changed',
+        'return_processed', 'returns_changed',
+        'shortcuts_changed',
+    )
+    
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+        self._pending = ChangeSet()
+        self._flush_scheduled = False
+        self._subscriptions = []
+        # Signal name -> number of page reloads it triggered
+        self.reload_counts = Counter()
+        
+        self._flush_requested.connect(self._flush, Qt.QueuedConnection)
+        for name in self.TRACKED_SIGNALS:
+            getattr(self, name).connect(partial(self._record_signal, name))
+    
+    # ----- Collecting -----
+    
+    def notify(self, entity: str, ids: Iterable[int]):
+        """
+        Report which entities changed, alongside the usual signals
+        
+        Args:
+            entity: 'product', 'sale', 'customer', 'supplier', 'category', 'return'
+            ids: IDs of the changed rows
+        """
+        with self._lock:
+            self._pending.add_ids(entity, ids)
+        self._schedule_flush()
+    
+    def _record_signal(self, name: str):
+        with self._lock:
+            self._pending.add_signal(name)
+        self._schedule_flush()
+    
+    def _schedule_flush(self):
+        with self._lock:
+            if self._flush_scheduled:
+                return
+            self._flush_scheduled = True
+        self._flush_requested.emit()
+    
+    def _flush(self):
+        with self._lock:
+            changes, self._pending = self._pending, ChangeSet()
+            self._flush_scheduled = False
+        if not changes:
+            return
+        
+        self.changes_committed.emit(changes)
+        for sub in list(self._subscriptions):
+            hit = changes.signals & sub.signals
+            if not hit:
+                continue
+            if sip.isdeleted(sub.widget):
+                self._subscriptions.remove(sub)
+            elif sub.widget.isVisible():
+                self._reload(sub, hit)
+            else:
+                sub.pending |= hit
+    
+    # ----- Page reloads -----
+    
+    def subscribe(self, widget, signals: Iterable[str], callback: Callable[[], None]):
+        """
+        Reload `widget` with `callback()` once per batch touching `signals`
+        
+        While `widget` is hidden, the reload is held back and runs when
+        the widget is shown.
+        
+        Args:
+            widget: Page (QWidget) whose visibility gates the reload
+            signals: Signal names, e.g. ('products_changed', 'inventory_changed')
+            callback: Reload method, called without arguments
+        """
+        signals = set(signals)
+        unknown = signals.difference(self.TRACKED_SIGNALS)
+        if unknown:
+            raise ValueError(f"Unknown data signals: {sorted(unknown)}")
+        if not any(sub.widget is widget for sub in self._subscriptions):
+            widget.installEventFilter(self)
+        self._subscriptions.append(_Subscription(widget, signals, callback))
+    
+    def mark_refreshed(self, widget):
+        """The page was just reloaded by other means: drop its held-back reloads"""
+        for sub in self._subscriptions:
+            if sub.widget is widget:
+                sub.pending.clear()
+    
+    def _reload(self, sub: _Subscription, signals: Set[str]):
+        sub.pending.clear()
+        self.reload_counts.update(signals)
+        sub.callback()
+    
+    def _run_held_back(self, sub: _Subscription):
+        if sub.pending and not sip.isdeleted(sub.widget) and sub.widget.isVisible():
+            self._reload(sub, set(sub.pending))
+    
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Show:
+            for sub in self._subscriptions:
+                if sub.widget is obj and sub.pending:
+                    # After the caller's own refresh on navigation (see mark_refreshed)
+                    QTimer.singleShot(0, partial(self._run_held_back, sub))
+        return False
+    
+    def reload_report(self) -> str:
+        """Reload count per signal, most frequent first"""
+        if not self.reload_counts:
+            return "no page reloads"
+        return ", ".join(f"{name}={count}" for name, count in self.reload_counts.most_common())
 
 
 # Global instance
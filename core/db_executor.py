@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+Exécution des requêtes de lecture hors du thread de l'interface
+
+Les pages soumettent une fonction de lecture (rapport, statistiques, liste)
+qui s'exécute dans un QThreadPool. Chaque thread du pool utilise sa propre
+connexion SQLite (DatabaseManager.get_connection est par thread) ; le
+résultat revient sur le thread de l'interface via un signal Qt.
+
+Les requêtes sont identifiées par une clé : une nouvelle soumission sur la
+même clé rend les précédentes obsolètes. Une requête obsolète encore en
+file n'est pas exécutée, et son résultat n'est jamais livré.
+
+Usage:
+    db_executor.submit("reports", fetch_report, start, end,
+                       on_result=self.apply_report, on_error=self.on_load_error)
+"""
+import itertools
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+from PyQt5 import sip
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from core.logger import logger
+
+
+class _QueryTask(QRunnable):
+    """Exécute une fonction de lecture dans le pool"""
+
+    def __init__(self, executor: 'DbExecutor', key: str, request_id: int,
+                 func: Callable, args: tuple, kwargs: dict):
+        super().__init__()
+        self.executor = executor
+        self.key = key
+        self.request_id = request_id
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+
+    def run(self):
+        # Remplacée pendant l'attente dans la file : ne pas toucher la base
+        if not self.executor.is_current(self.key, self.request_id):
+            return
+        try:
+            result = self.func(*self.args, **self.kwargs)
+        except Exception as e:
+            logger.error(f"Requête en arrière-plan '{self.key}' échouée: {e}")
+            self.executor._failed.emit(self.key, self.request_id, e)
+        else:
+            self.executor._finished.emit(self.key, self.request_id, result)
+
+
+class DbExecutor(QObject):
+    """Pool de lecture en arrière-plan avec annulation des requêtes obsolètes"""
+
+    # Émis depuis les threads du pool, reçus (en file) sur le thread de l'interface
+    _finished = pyqtSignal(str, int, object)
+    _failed = pyqtSignal(str, int, object)
+
+    def __init__(self, max_threads: int = 2):
+        super().__init__()
+        self._pool = QThreadPool()
+        self._pool.setMaxThreadCount(max_threads)
+        # Garder les threads : leur connexion SQLite reste ouverte et réutilisée
+        self._pool.setExpiryTimeout(-1)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._latest: Dict[str, int] = {}
+        self._callbacks: Dict[int, Tuple[Optional[Callable], Optional[Callable]]] = {}
+        self._finished.connect(self._deliver_result)
+        self._failed.connect(self._deliver_error)
+
+    def submit(self, key: str, func: Callable, *args,
+               on_result: Optional[Callable[[Any], None]] = None,
+               on_error: Optional[Callable[[Exception], None]] = None,
+               **kwargs) -> int:
+        """
+        Exécuter `func(*args, **kwargs)` en arrière-plan
+
+        Args:
+            key: Identifiant de la requête ; remplace toute requête en cours sur la même clé
+            func: Fonction de lecture (ne doit pas toucher aux widgets)
+            on_result: Appelée sur le thread de l'interface avec le résultat
+            on_error: Appelée sur le thread de l'interface avec l'exception
+
+        Returns:
+            Numéro de la requête
+        """
+        request_id = next(self._ids)
+        with self._lock:
+            stale = self._latest.get(key)
+            if stale is not None:
+                self._callbacks.pop(stale, None)
+            self._latest[key] = request_id
+            self._callbacks[request_id] = (on_result, on_error)
+        self._pool.start(_QueryTask(self, key, request_id, func, args, kwargs))
+        return request_id
+
+    def cancel(self, key: str):
+        """Abandonner la requête en cours sur `key` (aucun rappel ne sera fait)"""
+        with self._lock:
+            request_id = self._latest.pop(key, None)
+            if request_id is not None:
+                self._callbacks.pop(request_id, None)
+
+    def is_current(self, key: str, request_id: int) -> bool:
+        """La requête est-elle toujours la plus récente pour sa clé ?"""
+        with self._lock:
+            return self._latest.get(key) == request_id
+
+    def is_pending(self, key: str) -> bool:
+        """Une requête est-elle en cours sur `key` ?"""
+        with self._lock:
+            return key in self._latest
+
+    def wait_for_done(self, msecs: int = -1) -> bool:
+        """Attendre la fin des requêtes en cours (fermeture, bancs d'essai)"""
+        return self._pool.waitForDone(msecs)
+
+    def _take(self, key: str, request_id: int) -> Optional[Tuple[Optional[Callable], Optional[Callable]]]:
+        with self._lock:
+            if self._latest.get(key) != request_id:
+                return None
+            del self._latest[key]
+            return self._callbacks.pop(request_id, None)
+
+    @staticmethod
+    def _receiver_alive(callback: Callable) -> bool:
+        # Page ou dialogue détruit entre la soumission et la réponse
+        owner = getattr(callback, '__self__', None)
+        return not (isinstance(owner, sip.simplewrapper) and sip.isdeleted(owner))
+
+    def _deliver_result(self, key: str, request_id: int, result: object):
+        callbacks = self._take(key, request_id)
+        if callbacks and callbacks[0] and self._receiver_alive(callbacks[0]):
+            callbacks[0](result)
+
+    def _deliver_error(self, key: str, request_id: int, error: object):
+        callbacks = self._take(key, request_id)
+        if callbacks and callbacks[1] and self._receiver_alive(callbacks[1]):
+            callbacks[1](error)
+
+
+# Instances globales
+db_executor = DbExecutor()
+
+# Travaux longs (sauvegardes, exports) : pool séparé, pour qu'ils ne retardent
+# jamais le chargement des pages
+background_jobs = DbExecutor(max_threads=1)
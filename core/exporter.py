@@ -0,0 +1,401 @@
+# -*- coding: utf-8 -*-
+"""
+Export des données par lots vers un format au choix
+
+Chaque table est lue avec un curseur (fetchmany) et transmise lot par lot
+au writer du format choisi : la mémoire reste bornée par la taille d'un
+lot, quelle que soit la taille de l'historique. L'export tourne hors du
+thread de l'interface (background_jobs) et peut être annulé entre deux lots.
+
+Formats (EXPORT_FORMATS) :
+    xlsx     classeur openpyxl write_only, une feuille par table
+    csv      archive .zip, un fichier CSV par table
+    parquet  archive .zip, un fichier Parquet par table (colonnes ; requiert pyarrow)
+
+Usage:
+    data_exporter.export(path, 'csv', progress=callback, cancel=event)
+"""
+import csv
+import io
+import sqlite3
+import threading
+import time
+import zipfile
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence
+from database.db_manager import db
+from .logger import logger
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+
+class ExportTable(NamedTuple):
+    """Table exportée : nom de feuille / fichier, requête, en-têtes (None = noms des colonnes)"""
+    name: str
+    query: str
+    headers: Optional[Sequence[str]] = None
+
+
+# Sauvegarde complète (Paramètres > Données), relue par SettingsPage.import_data :
+# noms de feuilles, ordre des colonnes et chaînes vides conservés
+FULL_EXPORT = [
+    ExportTable("Produits", """
+        SELECT COALESCE(p.barcode, ''), p.name, COALESCE(c.name, ''),
+               p.purchase_price, p.selling_price, p.stock_quantity, COALESCE(p.min_stock_level, 0)
+        FROM products p
+        LEFT JOIN categories c ON p.category_id = c.id
+    """, ["Code-barres", "Nom", "Catégorie", "PA", "PV", "Stock", "Stock Min"]),
+    ExportTable("Ventes", """
+        SELECT sale_number, total_amount, payment_method, sale_date, COALESCE(customer_id, ''), status
+        FROM sales
+    """, ["N° Vente", "Montant Total", "Paiement", "Date", "Client ID", "Statut"]),
+    ExportTable("Details_Ventes", """
+        SELECT sale_id, COALESCE(product_id, ''), product_name, quantity, unit_price, subtotal
+        FROM sale_items
+    """, ["ID Vente", "ID Produit", "Nom Produit", "Quantité", "Prix Unitaire", "Sous-Total"]),
+    ExportTable("Clients", """
+        SELECT code, full_name, COALESCE(phone, ''), COALESCE(email, ''), COALESCE(address, ''),
+               credit_limit, current_credit, total_purchases
+        FROM customers
+    """, ["Code", "Nom", "Téléphone", "Email", "Adresse", "Limite Crédit", "Dette", "Total Achats"]),
+    ExportTable("Fournisseurs", """
+        SELECT COALESCE(code, ''), company_name, COALESCE(contact_person, ''), COALESCE(phone, ''),
+               COALESCE(email, ''), COALESCE(address, ''), total_debt, total_purchases
+        FROM suppliers
+    """, ["Code", "Entreprise", "Contact", "Téléphone", "Email", "Adresse", "Dette", "Total Achats"]),
+    ExportTable("Categories", """
+        SELECT id, name, COALESCE(name_ar, ''), COALESCE(description, '')
+        FROM categories WHERE is_active = 1
+    """, ["ID", "Nom", "Nom Arabe", "Description"]),
+    ExportTable("Retours", """
+        SELECT return_number, original_sale_id, return_amount, refund_method, return_date, COALESCE(reason, '')
+        FROM returns
+    """, ["N° Retour", "ID Vente Originale", "Montant", "Méthode Remboursement", "Date", "Raison"]),
+    ExportTable("Details_Retours", """
+        SELECT return_id, COALESCE(product_id, ''), quantity_returned, unit_price, subtotal
+        FROM return_items
+    """, ["ID Retour", "ID Produit", "Qté Retournée", "Prix Unitaire", "Sous-Total"]),
+    ExportTable("Raccourcis", """
+        SELECT id, label, COALESCE(product_id, ''), COALESCE(category_id, ''), COALESCE(unit_price, ''),
+               COALESCE(image_path, ''), position
+        FROM pos_shortcuts ORDER BY position
+    """, ["ID", "Libellé", "ID Produit", "ID Catégorie", "Prix", "Chemin Image", "Position"]),
+]
+
+
+# ============================================================================
+# WRITERS
+# ============================================================================
+
+class ExportWriter:
+    """
+    Destination d'un export : une table après l'autre, par lots de tuples
+
+    Sous-classes : begin_table, write_rows, end_table, close et discard
+    (export abandonné : libérer les ressources, le fichier est supprimé ensuite).
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    def begin_table(self, name: str, headers: Sequence[str]):
+        raise NotImplementedError
+
+    def write_rows(self, rows: List[tuple]):
+        raise NotImplementedError
+
+    def end_table(self):
+        pass
+
+    def close(self):
+        pass
+
+    def discard(self):
+        pass
+
+
+class XlsxExportWriter(ExportWriter):
+    """Classeur openpyxl write_only : les lignes sont écrites au fil de l'eau dans des fichiers temporaires"""
+
+    def __init__(self, path: Path):
+        super().__init__(path)
+        import openpyxl
+        self.wb = openpyxl.Workbook(write_only=True)
+        self.ws = None
+
+    def begin_table(self, name, headers):
+        self.ws = self.wb.create_sheet(name)
+        self.ws.append(list(headers))
+
+    def write_rows(self, rows):
+        for row in rows:
+            self.ws.append(row)
+
+    def close(self):
+        self.wb.save(self.path)
+
+    def discard(self):
+        # Fermer les feuilles et supprimer leurs fichiers temporaires
+        for ws in self.wb.worksheets:
+            if not ws.closed:
+                ws.close()
+            writer = getattr(ws, '_writer', None)
+            if writer is not None:
+                writer.cleanup()
+
+
+class CsvExportWriter(ExportWriter):
+    """Archive .zip, un CSV par table (UTF-8 avec BOM et ';' : ouverture directe dans Excel)"""
+
+    def __init__(self, path: Path):
+        super().__init__(path)
+        self.zip = zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED)
+        self.stream = None
+        self.writer = None
+
+    def begin_table(self, name, headers):
+        self.stream = io.TextIOWrapper(self.zip.open(f"{name}.csv", 'w', force_zip64=True),
+                                       encoding='utf-8-sig', newline='')
+        self.writer = csv.writer(self.stream, delimiter=';')
+        self.writer.writerow(headers)
+
+    def write_rows(self, rows):
+        self.writer.writerows(rows)
+
+    def end_table(self):
+        self.stream.close()
+        self.stream = self.writer = None
+
+    def close(self):
+        self.zip.close()
+
+    def discard(self):
+        if self.stream is not None:
+            self.stream.close()
+        self.zip.close()
+
+
+class ParquetExportWriter(ExportWriter):
+    """
+    Archive .zip, un fichier Parquet par table
+
+    Les lots sont regroupés en groupes de ROW_GROUP_ROWS lignes (lecture
+    colonne par colonne efficace, mémoire toujours bornée). Le type de chaque
+    colonne est déduit du premier lot (entier, réel, texte) ; une valeur d'un
+    autre type dans un lot suivant est convertie vers ce type.
+    """
+
+    ROW_GROUP_ROWS = 65536
+
+    def __init__(self, path: Path):
+        if not PYARROW_AVAILABLE:
+            raise RuntimeError("Le module 'pyarrow' est requis pour l'export Parquet.")
+        super().__init__(path)
+        # Parquet est déjà compressé (snappy) : archive sans recompression
+        self.zip = zipfile.ZipFile(path, 'w', zipfile.ZIP_STORED)
+        self.stream = None
+        self.writer = None
+        self.headers = None
+        self.schema = None
+        self.pending = []
+        self.pending_rows = 0
+
+    def begin_table(self, name, headers):
+        self.stream = self.zip.open(f"{name}.parquet", 'w', force_zip64=True)
+        self.headers = list(headers)
+
+    def write_rows(self, rows):
+        columns = list(zip(*rows))
+        if self.writer is None:
+            self.schema = pa.schema([(header, self._column_type(values))
+                                     for header, values in zip(self.headers, columns)])
+            self.writer = pq.ParquetWriter(self.stream, self.schema)
+        arrays = [self._to_array(values, field.type) for values, field in zip(columns, self.schema)]
+        self.pending.append(pa.record_batch(arrays, schema=self.schema))
+        self.pending_rows += len(rows)
+        if self.pending_rows >= self.ROW_GROUP_ROWS:
+            self._flush()
+
+    def end_table(self):
+        if self.writer is None:
+            # Table vide : fichier avec les seules colonnes (texte)
+            self.writer = pq.ParquetWriter(self.stream, pa.schema([(h, pa.string()) for h in self.headers]))
+        self._flush()
+        self.writer.close()
+        self.stream.close()
+        self.stream = self.writer = self.schema = None
+
+    def close(self):
+        self.zip.close()
+
+    def discard(self):
+        self.pending, self.pending_rows = [], 0
+        if self.writer is not None:
+            self.writer.close()
+        if self.stream is not None:
+            self.stream.close()
+        self.zip.close()
+
+    def _flush(self):
+        if self.pending:
+            self.writer.write_table(pa.Table.from_batches(self.pending), row_group_size=self.pending_rows)
+            self.pending, self.pending_rows = [], 0
+
+    @staticmethod
+    def _column_type(values):
+        kinds = {type(v) for v in values if v is not None}
+        if kinds and kinds <= {int}:
+            return pa.int64()
+        if kinds and kinds <= {int, float}:
+            return pa.float64()
+        if kinds == {bytes}:
+            return pa.binary()
+        return pa.string()
+
+    @staticmethod
+    def _to_array(values, arrow_type):
+        try:
+            return pa.array(values, type=arrow_type)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            pass
+        # SQLite ne type pas les colonnes : ramener les valeurs divergentes au type du schéma
+        if pa.types.is_string(arrow_type):
+            convert = str
+        elif pa.types.is_floating(arrow_type):
+            convert = float
+        elif pa.types.is_integer(arrow_type):
+            convert = int
+        else:
+            convert = bytes
+        if convert is str:
+            return pa.array([None if v is None else str(v) for v in values], type=arrow_type)
+        # Chaîne vide (COALESCE des sauvegardes Excel) : valeur absente
+        return pa.array([None if v is None or v == '' else convert(v) for v in values], type=arrow_type)
+
+
+# nom -> (libellé du filtre de fichier, extension, writer)
+EXPORT_FORMATS: Dict[str, tuple] = {
+    'xlsx': ("Fichiers Excel (*.xlsx)", ".xlsx", XlsxExportWriter),
+    'csv': ("Archive CSV (*.zip)", ".zip", CsvExportWriter),
+    'parquet': ("Archive Parquet (*.zip)", ".zip", ParquetExportWriter),
+}
+
+
+# ============================================================================
+# EXPORTATEUR
+# ============================================================================
+
+class DataExporter:
+    """Lecture par lots des tables et écriture vers un ExportWriter"""
+
+    BATCH_ROWS = 1000
+
+    def __init__(self):
+        self._cancel = threading.Event()
+
+    def available_formats(self) -> List[str]:
+        """Formats utilisables sur cette installation"""
+        return [name for name in EXPORT_FORMATS if name != 'parquet' or PYARROW_AVAILABLE]
+
+    def export(self, path: Path, fmt: str = 'xlsx', tables: Sequence[ExportTable] = FULL_EXPORT,
+               progress: Optional[Callable[[int, int], None]] = None,
+               cancel: Optional[threading.Event] = None) -> Optional[Path]:
+        """
+        Exporter des tables vers un fichier
+
+        À lancer hors du thread de l'interface. Le fichier est écrit sous un
+        nom temporaire (.partial) puis renommé : un export interrompu ne
+        laisse jamais de fichier incomplet. En mode WAL, toutes les tables
+        sont lues dans le même instantané sans bloquer les ventes.
+
+        Args:
+            path: Fichier de destination
+            fmt: Clé de EXPORT_FORMATS
+            tables: Tables à exporter
+            progress: Appelée avec (lignes écrites, lignes totales) après chaque lot
+            cancel: Événement d'annulation (par défaut celui de cancel())
+
+        Returns:
+            Chemin du fichier, ou None si l'export a été annulé
+        """
+        if cancel is None:
+            cancel = self._cancel
+            cancel.clear()
+        path = Path(path)
+        partial_path = path.with_name(path.name + ".partial")
+        conn = db.get_connection()
+
+        # Lecture cohérente en WAL ; en mode rollback, elle bloquerait les écritures
+        snapshot = (not conn.in_transaction
+                    and conn.execute("PRAGMA journal_mode").fetchone()[0].lower() == 'wal')
+        if snapshot:
+            conn.execute("BEGIN")
+
+        started = time.perf_counter()
+        done = 0
+        writer = None
+        try:
+            total = sum(self._count(conn, table) for table in tables)
+            writer = EXPORT_FORMATS[fmt][2](partial_path)
+            for table in tables:
+                try:
+                    cursor = conn.cursor()
+                    cursor.row_factory = None  # tuples, sans conversion en dictionnaire
+                    cursor.execute(table.query)
+                except sqlite3.OperationalError as e:
+                    logger.warning(f"Export {table.name} impossible: {e}")
+                    writer.begin_table(table.name, table.headers or [])
+                    writer.end_table()
+                    continue
+
+                writer.begin_table(table.name, table.headers or [c[0] for c in cursor.description])
+                while True:
+                    if cancel.is_set():
+                        cursor.close()
+                        writer.discard()
+                        writer = None
+                        logger.info(f"Export {path.name} annulé ({done}/{total} lignes)")
+                        return None
+                    rows = cursor.fetchmany(self.BATCH_ROWS)
+                    if not rows:
+                        break
+                    writer.write_rows(rows)
+                    done += len(rows)
+                    if progress:
+                        progress(done, total)
+                cursor.close()
+                writer.end_table()
+
+            writer.close()
+            writer = None
+            partial_path.replace(path)
+        finally:
+            if writer is not None:
+                writer.discard()
+            if snapshot:
+                conn.rollback()
+            if partial_path.exists():
+                partial_path.unlink()
+
+        logger.info(f"Export {fmt} créé: {path.name} ({done} lignes en {time.perf_counter() - started:.1f} s)")
+        return path
+
+    def cancel(self):
+        """Abandonner l'export en cours (au prochain lot)"""
+        self._cancel.set()
+
+    @staticmethod
+    def _count(conn: sqlite3.Connection, table: ExportTable) -> int:
+        try:
+            return conn.execute(f"SELECT COUNT(*) FROM ({table.query})").fetchone()[0]
+        except sqlite3.OperationalError:
+            return 0
+
+
+# Instance globale
+data_exporter = DataExporter()
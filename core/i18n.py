@@ -627,6 +627,10 @@ class I18nManager(QObject):
                 
                 'msg_config_saved': 'Configuration enregistrée !',
                 'msg_backup_success': 'Sauvegarde créée avec succès:\n{}',
+                'msg_export_progress': 'Export en cours : {}',
+                'msg_export_cancelled': 'Export annulé.',
+                'msg_import_progress': 'Restauration en cours : {}',
+                'msg_import_cancelled': 'Restauration annulée, aucune donnée modifiée.',
                 'msg_confirm_import': 'Voulez-vous vraiment écraser la base de données actuelle ?\nCette action est irréversible.',
                 'msg_import_success': 'Base de données restaurée avec succès.\n{}',
                 'msg_confirm_reset_1': 'ÊTES-VOUS SÛR ?\nCela va supprimer TOUTES les données !',
@@ -690,7 +694,7 @@ class I18nManager(QObject):
             # Returns Page
                 'returns_title': '↩️ Gestion des Retours',
                 'returns_subtitle': 'Gérer les remboursements et retours de stock',
-                'placeholder_search_return': 'Entrez le numéro de ticket (ex: VNT-...) ou l\'ID de vente',
+                'placeholder_search_return': 'Entrez le numéro de ticket (ex: SLE-...) ou l\'ID de vente',
                 'btn_search_return': '🔍 Rechercher',
                 'btn_reprint_ticket_return': '🖨️ Réimprimer Ticket',
                 'btn_cancel_sale_return': '🗑️ Annuler toute la vente',
@@ -1329,6 +1333,10 @@ class I18nManager(QObject):
 
                 'msg_config_saved': 'تم حفظ الإعدادات!',
                 'msg_backup_success': 'تم إنشاء النسخة الاحتياطية بنجاح:\n{}',
+                'msg_export_progress': 'جاري التصدير: {}',
+                'msg_export_cancelled': 'تم إلغاء التصدير.',
+                'msg_import_progress': 'جاري الاستعادة: {}',
+                'msg_import_cancelled': 'تم إلغاء الاستعادة، لم يتم تعديل أي بيانات.',
                 'msg_confirm_import': 'هل أنت متأكد من استبدال قاعدة البيانات الحالية؟\nهذا الإجراء لا رجعة فيه.',
                 'msg_import_success': 'تم استعادة قاعدة البيانات بنجاح.\n{}',
                 'msg_confirm_reset_1': 'هل أنت متأكد؟\nسيؤدي هذا إلى حذف جميع البيانات!',
@@ -1339,7 +1347,7 @@ class I18nManager(QObject):
             # Returns Page
                 'returns_title': '↩️ إدارة المرتجعات',
                 'returns_subtitle': 'إدارة المبالغ المستردة وإرجاع المخزون',
-                'placeholder_search_return': 'أدخل رقم التذكرة (مثال: VNT-...) أو معرف البيع',
+                'placeholder_search_return': 'أدخل رقم التذكرة (مثال: SLE-...) أو معرف البيع',
                 'btn_search_return': '🔍 بحث',
                 'btn_reprint_ticket_return': '🖨️ إعادة طباعة التذكرة',
                 'btn_cancel_sale_return': '🗑️ إلغاء البيع بالكامل',
@@ -1396,7 +1404,7 @@ class I18nManager(QObject):
                 # Returns Page (Missing AR)
                 'returns_title': '↩️ إدارة المرتجعات',
                 'returns_subtitle': 'إدارة المبالغ المستردة ومخزون المرتجعات',
-                'placeholder_search_return': 'أدخل رقم التذكرة (مثال: VNT-...) أو معرف البيع',
+                'placeholder_search_return': 'أدخل رقم التذكرة (مثال: SLE-...) أو معرف البيع',
                 'btn_search_return': '🔍 بحث',
                 'btn_reprint_ticket_return': '🖨️ إعادة طباعة التذكرة',
                 'btn_cancel_sale_return': '🗑️ إلغاء البيع بالكامل',
@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+"""
+Restauration d'une sauvegarde complète (Paramètres > Données)
+
+Chaque feuille est chargée par lots (executemany) dans une table
+temporaire de préparation, puis fusionnée dans les tables réelles par des
+INSERT ... SELECT ... ON CONFLICT ensemblistes. Toute la restauration
+tient dans une transaction : une annulation ou une erreur ne laisse rien
+à moitié importé.
+
+Sources : classeur .xlsx, archives .zip CSV ou Parquet de core.exporter.
+
+Règles de fusion (celles de l'ancien import ligne à ligne) :
+    Produits      mis à jour par code-barres, créés sinon (catégorie par nom, créée si absente)
+    Catégories,
+    Clients,
+    Fournisseurs  ajoutés s'ils n'existent pas (même code ou même nom), jamais écrasés
+    Raccourcis    ajoutés sur les positions libres
+"""
+import csv
+import io
+import threading
+import time
+import zipfile
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from database.db_manager import db
+from .data_signals import data_signals
+from .logger import logger
+
+
+# Feuille -> (table de préparation, colonnes typées dans l'ordre de la feuille)
+STAGING = {
+    "Categories": ("stage_categories", "id INTEGER, name TEXT, name_ar TEXT, description TEXT"),
+    "Produits": ("stage_products", "barcode TEXT, name TEXT, category TEXT, purchase_price REAL, "
+                                   "selling_price REAL, stock_quantity INTEGER, min_stock_level INTEGER"),
+    "Clients": ("stage_customers", "code TEXT, full_name TEXT, phone TEXT, email TEXT, address TEXT, "
+                                   "credit_limit REAL, current_credit REAL, total_purchases REAL"),
+    "Fournisseurs": ("stage_suppliers", "code TEXT, company_name TEXT, contact_person TEXT, phone TEXT, "
+                                        "email TEXT, address TEXT, total_debt REAL, total_purchases REAL"),
+    "Raccourcis": ("stage_shortcuts", "id INTEGER, label TEXT, product_id INTEGER, category_id INTEGER, "
+                                      "unit_price REAL, image_path TEXT, position INTEGER"),
+}
+
+# Anciennes sauvegardes : feuille Clients sur 4 colonnes (Nom, Téléphone, Dette, Total Achats)
+_LEGACY_CUSTOMER_COLUMNS = ("full_name", "phone", "current_credit", "total_purchases")
+
+# (libellé du résumé, requête) dans l'ordre d'exécution
+MERGES: List[Tuple[str, str]] = [
+    ("Categories", """
+        INSERT INTO categories (name, name_ar, description)
+        SELECT name, COALESCE(name_ar, ''), COALESCE(description, '')
+        FROM stage_categories WHERE name IS NOT NULL
+        ON CONFLICT(name) DO NOTHING
+    """),
+    # Catégories citées par les produits mais absentes de la feuille Categories
+    ("Categories", """
+        INSERT INTO categories (name)
+        SELECT DISTINCT category FROM stage_products WHERE category IS NOT NULL
+        ON CONFLICT(name) DO NOTHING
+    """),
+    ("Produits", """
+        INSERT INTO products (barcode, name, category_id, purchase_price, selling_price,
+                              stock_quantity, min_stock_level)
+        SELECT s.barcode, s.name, c.id, COALESCE(s.purchase_price, 0), COALESCE(s.selling_price, 0),
+               COALESCE(s.stock_quantity, 0), COALESCE(s.min_stock_level, 0)
+        FROM stage_products s
+        LEFT JOIN categories c ON c.name = s.category
+        WHERE s.barcode IS NOT NULL AND s.name IS NOT NULL
+        ORDER BY s.rowid
+        ON CONFLICT(barcode) DO UPDATE SET
+            name = excluded.name, category_id = excluded.category_id,
+            purchase_price = excluded.purchase_price, selling_price = excluded.selling_price,
+            stock_quantity = excluded.stock_quantity, min_stock_level = excluded.min_stock_level,
+            is_active = 1
+    """),
+    ("Clients", """
+        INSERT INTO customers (code, full_name, phone, email, address,
+                               credit_limit, current_credit, total_purchases)
+        SELECT code, full_name, COALESCE(phone, ''), COALESCE(email, ''), COALESCE(address, ''),
+               COALESCE(credit_limit, 0), COALESCE(current_credit, 0), COALESCE(total_purchases, 0)
+        FROM stage_customers s
+        WHERE s.rowid IN (SELECT MIN(rowid) FROM stage_customers
+                          WHERE full_name IS NOT NULL GROUP BY full_name)
+          AND NOT EXISTS (SELECT 1 FROM customers c WHERE c.full_name = s.full_name)
+        ON CONFLICT(code) DO NOTHING
+    """),
+    ("Fournisseurs", """
+        INSERT INTO suppliers (code, company_name, contact_person, phone, email, address,
+                               total_debt, total_purchases)
+        SELECT code, company_name, COALESCE(contact_person, ''), COALESCE(phone, ''),
+               COALESCE(email, ''), COALESCE(address, ''), COALESCE(total_debt, 0), COALESCE(total_purchases, 0)
+        FROM stage_suppliers s
+        WHERE s.rowid IN (SELECT MIN(rowid) FROM stage_suppliers
+                          WHERE company_name IS NOT NULL GROUP BY company_name)
+          AND NOT EXISTS (SELECT 1 FROM suppliers f WHERE f.company_name = s.company_name)
+        ON CONFLICT(code) DO NOTHING
+    """),
+    # Identifiants de la base d'origine : gardés seulement s'ils existent ici
+    ("Raccourcis", """
+        INSERT INTO pos_shortcuts (label, product_id, category_id, unit_price, image_path, position)
+        SELECT s.label,
+               (SELECT id FROM products WHERE id = s.product_id),
+               (SELECT id FROM categories WHERE id = s.category_id),
+               COALESCE(s.unit_price, 0), COALESCE(s.image_path, ''), s.position
+        FROM stage_shortcuts s
+        WHERE s.label IS NOT NULL AND s.position IS NOT NULL
+          AND s.rowid IN (SELECT MIN(rowid) FROM stage_shortcuts GROUP BY position)
+          AND NOT EXISTS (SELECT 1 FROM pos_shortcuts p WHERE p.position = s.position)
+    """),
+]
+
+
+class RestoreCancelled(Exception):
+    """Restauration annulée par l'utilisateur (transaction annulée)"""
+
+
+class DataImporter:
+    """Restauration ensembliste d'une sauvegarde complète"""
+
+    BATCH_ROWS = 1000
+
+    def __init__(self):
+        self._cancel = threading.Event()
+
+    def restore(self, path: Path,
+                progress: Optional[Callable[[int, int], None]] = None) -> Optional[Dict[str, int]]:
+        """
+        Restaurer une sauvegarde complète
+
+        À lancer hors du thread de l'interface : la transaction d'écriture
+        est tenue pendant toute la restauration.
+
+        Args:
+            path: Fichier .xlsx ou archive .zip (CSV / Parquet)
+            progress: Appelée avec (étapes faites, étapes totales) : une par feuille, une par fusion
+
+        Returns:
+            Lignes ajoutées ou mises à jour par table, ou None si annulée
+        """
+        self._cancel.clear()
+        path = Path(path)
+        started = time.perf_counter()
+        conn = db.get_connection()
+        steps = len(STAGING) + len(MERGES)
+        done = 0
+        staged: Dict[str, int] = {}
+        counts: Dict[str, int] = {}
+
+        try:
+            with db.transaction():
+                for sheet, (table, columns) in STAGING.items():
+                    conn.execute(f"CREATE TEMP TABLE {table} ({columns})")
+
+                for sheet, headers, rows in self._read_tables(path):
+                    if sheet not in STAGING:
+                        continue
+                    staged[sheet] = self._stage(conn, sheet, headers, rows)
+                    done += 1
+                    if progress:
+                        progress(done, steps)
+
+                done = len(STAGING)
+                for label, query in MERGES:
+                    self._check_cancel()
+                    counts[label] = counts.get(label, 0) + conn.execute(query).rowcount
+                    done += 1
+                    if progress:
+                        progress(done, steps)
+        except RestoreCancelled:
+            logger.info(f"Restauration de {path.name} annulée")
+            return None
+        finally:
+            for table, _ in STAGING.values():
+                conn.execute(f"DROP TABLE IF EXISTS temp.{table}")
+
+        logger.info(f"Restauration depuis {path.name}: {sum(staged.values())} lignes lues, "
+                    f"{counts} en {time.perf_counter() - started:.1f} s")
+        # Appelé ici (thread de la restauration) : les signaux n'arrivent au cache
+        # que plus tard, dans le thread de l'interface
+        from modules.products.product_cache import product_cache
+        product_cache.invalidate_all()
+        data_signals.categories_changed.emit()
+        data_signals.products_changed.emit()
+        data_signals.customers_changed.emit()
+        data_signals.suppliers_changed.emit()
+        data_signals.shortcuts_changed.emit()
+        return counts
+
+    def cancel(self):
+        """Abandonner la restauration en cours (au prochain lot)"""
+        self._cancel.set()
+
+    def _check_cancel(self):
+        if self._cancel.is_set():
+            raise RestoreCancelled()
+
+    def _stage(self, conn, sheet: str, headers: tuple, rows: Iterator[tuple]) -> int:
+        """Charger une feuille dans sa table de préparation, par lots"""
+        table, columns = STAGING[sheet]
+        names = [column.split()[0] for column in columns.split(", ")]
+        if sheet == "Clients" and len([h for h in headers if h]) < len(names):
+            names = list(_LEGACY_CUSTOMER_COLUMNS)
+        width = len(names)
+        insert = f"INSERT INTO {table} ({', '.join(names)}) VALUES ({', '.join('?' * width)})"
+
+        count = 0
+        batch = []
+        for row in rows:
+            # Cellules vides ('' en CSV) -> NULL ; lignes courtes complétées
+            values = tuple(None if v == '' else v for v in row[:width])
+            if any(v is not None for v in values):
+                batch.append(values + (None,) * (width - len(values)))
+            if len(batch) >= self.BATCH_ROWS:
+                self._check_cancel()
+                conn.executemany(insert, batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            conn.executemany(insert, batch)
+            count += len(batch)
+        return count
+
+    def _read_tables(self, path: Path) -> Iterator[Tuple[str, tuple, Iterator[tuple]]]:
+        """(feuille, en-têtes, lignes) pour chaque table du fichier, lues en flux"""
+        if path.suffix.lower() == '.xlsx':
+            import openpyxl
+            wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+            try:
+                for ws in wb.worksheets:
+                    rows = ws.iter_rows(values_only=True)
+                    yield ws.title, next(rows, ()), rows
+            finally:
+                wb.close()
+            return
+
+        with zipfile.ZipFile(path) as zf:
+            for member in zf.namelist():
+                sheet, _, extension = member.rpartition('.')
+                if extension == 'csv':
+                    with io.TextIOWrapper(zf.open(member), encoding='utf-8-sig', newline='') as stream:
+                        rows = csv.reader(stream, delimiter=';')
+                        yield sheet, tuple(next(rows, ())), (tuple(row) for row in rows)
+                elif extension == 'parquet':
+                    import pyarrow.parquet as pq
+                    with zf.open(member) as stream:
+                        parquet = pq.ParquetFile(stream)
+                        yield sheet, tuple(parquet.schema_arrow.names), self._parquet_rows(parquet)
+
+    def _parquet_rows(self, parquet) -> Iterator[tuple]:
+        for batch in parquet.iter_batches(batch_size=self.BATCH_ROWS):
+            yield from zip(*(column.to_pylist() for column in batch.columns))
+
+
+# Instance globale
+data_importer = DataImporter()
@@ -3,6 +3,7 @@
 Système de journalisation (logging)
 """
 import logging
+import time
 from logging.handlers import RotatingFileHandler
 from pathlib import Path
 from datetime import datetime
@@ -131,5 +132,40 @@ class Logger:
             self.error(f"Échec de la sauvegarde: {backup_path}")
 
 
+class Timeline:
+    """
+    Chronométrage par phases (démarrage, ouverture de session)
+    
+    Usage:
+        timeline = Timeline("Démarrage")
+        ...
+        timeline.mark("Base de données")
+        ...
+        timeline.finish("Fenêtre de connexion")
+    """
+    
+    def __init__(self, name: str, started: float = None):
+        self.name = name
+        self.started = started if started is not None else time.perf_counter()
+        self._last = self.started
+        self.phases = []
+    
+    def mark(self, phase: str) -> float:
+        """Clore une phase et la journaliser ; retourne sa durée en ms"""
+        now = time.perf_counter()
+        elapsed = (now - self._last) * 1000
+        self._last = now
+        self.phases.append((phase, elapsed))
+        Logger().info(f"⏱ {self.name} - {phase}: {elapsed:.0f} ms")
+        return elapsed
+    
+    def finish(self, phase: str) -> float:
+        """Clore la dernière phase et journaliser le total ; retourne le total en ms"""
+        self.mark(phase)
+        total = (self._last - self.started) * 1000
+        Logger().info(f"⏱ {self.name} - total: {total:.0f} ms")
+        return total
+
+
 # Instance globale
 logger = Logger()
@@ -5,9 +5,14 @@ Singleton pattern pour une seule instance de connexion
 """
 import sqlite3
 import threading
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 import config
+from database.migrations import migrate
+from database.query_profiler import QueryProfiler
 
 
 class DatabaseManager:
@@ -33,6 +38,8 @@ class DatabaseManager:
         self.db_path = config.DATABASE_PATH
         self.connection = None
         self._local = threading.local()
+        # Chronométrage des requêtes (voir database/query_profiler.py)
+        self.profiler = QueryProfiler()
         self._initialized = True
         
         # Initialiser la base de données
@@ -44,194 +51,85 @@ class DatabaseManager:
         Chaque thread a sa propre connexion
         """
         if not hasattr(self._local, 'connection') or self._local.connection is None:
+            profile = config.DATABASE_CONFIG
             self._local.connection = sqlite3.connect(
                 self.db_path,
                 check_same_thread=False,
-                timeout=10.0
+                timeout=profile.get('busy_timeout_ms', 10000) / 1000.0
             )
             # Activer les clés étrangères
             self._local.connection.execute("PRAGMA foreign_keys = ON")
+            self._apply_connection_profile(self._local.connection, profile)
             # Retourner les résultats comme dictionnaires
             self._local.connection.row_factory = sqlite3.Row
             
         return self._local.connection
     
-    def initialize_database(self):
-        """Initialiser la base de données avec le schéma"""
-        # Créer le dossier data s'il n'existe pas
-        config.DATA_DIR.mkdir(exist_ok=True)
+    # Valeurs acceptées pour les pragmas textuels (interpolés dans le SQL)
+    _JOURNAL_MODES = {'DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF'}
+    _SYNCHRONOUS_MODES = {'OFF', 'NORMAL', 'FULL', 'EXTRA'}
+    _TEMP_STORES = {'DEFAULT', 'FILE', 'MEMORY'}
+    
+    def _apply_connection_profile(self, conn: sqlite3.Connection, profile: Dict[str, Any]):
+        """
+        Appliquer le profil de connexion (config.DATABASE_CONFIG)
         
-        # Lire le schéma SQL
-        schema_path = Path(__file__).parent / "schema.sql"
+        Args:
+            conn: Connexion à configurer
+            profile: journal_mode, synchronous, cache_size_kb, mmap_size_mb,
+                     temp_store, busy_timeout_ms
+        """
+        journal_mode = str(profile.get('journal_mode', 'DELETE')).upper()
+        synchronous = str(profile.get('synchronous', 'FULL')).upper()
+        temp_store = str(profile.get('temp_store', 'DEFAULT')).upper()
         
-        if not schema_path.exists():
-            raise FileNotFoundError(f"Fichier de schéma introuvable: {schema_path}")
+        try:
+            if journal_mode in self._JOURNAL_MODES:
+                conn.execute(f"PRAGMA journal_mode = {journal_mode}")
+            if synchronous in self._SYNCHRONOUS_MODES:
+                conn.execute(f"PRAGMA synchronous = {synchronous}")
+            if temp_store in self._TEMP_STORES:
+                conn.execute(f"PRAGMA temp_store = {temp_store}")
+            # Valeur négative = taille en Kio (indépendante de la taille de page)
+            conn.execute(f"PRAGMA cache_size = {-int(profile.get('cache_size_kb', 2000))}")
+            conn.execute(f"PRAGMA mmap_size = {int(profile.get('mmap_size_mb', 0)) * 1024 * 1024}")
+            conn.execute(f"PRAGMA busy_timeout = {int(profile.get('busy_timeout_ms', 10000))}")
+        except sqlite3.Error as e:
+            # Un profil invalide ne doit pas empêcher l'ouverture de la base
+            print(f"⚠ Profil de connexion partiellement appliqué: {e}")
+    
+    def get_connection_profile(self) -> Dict[str, Any]:
+        """
+        Lire les pragmas effectivement actifs sur la connexion du thread courant
         
-        with open(schema_path, 'r', encoding='utf-8') as f:
-            schema_sql = f.read()
+        Returns:
+            Dictionnaire pragma -> valeur
+        """
+        conn = self.get_connection()
+        return {
+            name: conn.execute(f"PRAGMA {name}").fetchone()[0]
+            for name in ('journal_mode', 'synchronous', 'cache_size', 'mmap_size',
+                         'temp_store', 'busy_timeout', 'foreign_keys')
+        }
+    
+    def initialize_database(self):
+        """
+        Initialiser la base de données et appliquer les migrations en attente
+
+        Une base à jour ne coûte qu'une lecture de PRAGMA user_version
+        (voir database/migrations.py).
+        """
+        # Créer le dossier data s'il n'existe pas
+        config.DATA_DIR.mkdir(exist_ok=True)
         
-        # Exécuter le schéma
         conn = self.get_connection()
         try:
-            conn.executescript(schema_sql)
-            conn.commit()
-            print("✓ Base de données initialisée avec succès")
-            
-            # Run migrations for existing databases
-            self._run_migrations(conn)
+            if migrate(conn):
+                print("✓ Base de données initialisée avec succès")
         except sqlite3.Error as e:
             print(f"✗ Erreur lors de l'initialisation de la base de données: {e}")
             raise
     
-    def _run_migrations(self, conn):
-        """Run migrations for existing databases to add missing columns"""
-        try:
-            cursor = conn.cursor()
-            
-            # Check and add total_purchases to suppliers if missing
-            cursor.execute("PRAGMA table_info(suppliers)")
-            columns = [col[1] for col in cursor.fetchall()]
-            
-            if 'total_purchases' not in columns:
-                cursor.execute("ALTER TABLE suppliers ADD COLUMN total_purchases REAL DEFAULT 0.0")
-                print("✓ Migration: Ajout colonne total_purchases à suppliers")
-                
-            if 'total_debt' not in columns:
-                cursor.execute("ALTER TABLE suppliers ADD COLUMN total_debt REAL DEFAULT 0.0")
-                print("✓ Migration: Ajout colonne total_debt à suppliers")
-                
-            # Ensure placeholder product for Custom Items (ID 0)
-            # This is critical for shortcuts/custom items to avoid Foreign Key errors
-            cursor.execute("SELECT id FROM products WHERE id = 0")
-            if not cursor.fetchone():
-                try:
-                    # Insert explicit ID 0
-                    cursor.execute("""
-                        INSERT INTO products (id, name, barcode, selling_price, purchase_price, stock_quantity, is_active)
-                        VALUES (0, 'Article Divers', 'CUSTOM_ITEM', 0, 0, 999999, 1)
-                    """)
-                    print("✓ Migration: Ajout produit placeholder (ID 0)")
-                except sqlite3.Error as e:
-                    print(f"⚠ Erreur insertion placeholder product: {e}")
-            
-            # Check and add total_purchases to customers if missing
-            cursor.execute("PRAGMA table_info(customers)")
-            columns = [col[1] for col in cursor.fetchall()]
-            
-            if 'total_purchases' not in columns:
-                cursor.execute("ALTER TABLE customers ADD COLUMN total_purchases REAL DEFAULT 0.0")
-                print("✓ Migration: Ajout colonne total_purchases à customers")
-            
-            # Create user_permissions table if not exists
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS user_permissions (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER NOT NULL,
-                    permission_key TEXT NOT NULL,
-                    is_granted INTEGER DEFAULT 1,
-                    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
-                    UNIQUE(user_id, permission_key)
-                )
-            """)
-            print("✓ Migration: Vérification table user_permissions")
-
-            # Check and add supplier_id to products if missing
-            cursor.execute("PRAGMA table_info(products)")
-            columns = [col[1] for col in cursor.fetchall()]
-            
-            if 'supplier_id' not in columns:
-                cursor.execute("ALTER TABLE products ADD COLUMN supplier_id INTEGER REFERENCES suppliers(id) ON DELETE SET NULL")
-                print("✓ Migration: Ajout colonne supplier_id à products")
-            
-            # Create license table if not exists
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS license (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    license_key TEXT NOT NULL,
-                    machine_id TEXT,
-                    activation_date TEXT
-                )
-            """)
-            print("✓ Migration: Verification table license")
-            
-            # Create pos_shortcuts table if not exists with category_id
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS pos_shortcuts (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    product_id INTEGER,
-                    label TEXT NOT NULL,
-                    image_path TEXT,
-                    unit_price REAL NOT NULL,
-                    position INTEGER NOT NULL,
-                    category_id INTEGER,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (product_id) REFERENCES products(id) ON DELETE CASCADE,
-                    FOREIGN KEY (category_id) REFERENCES categories(id) ON DELETE SET NULL
-                )
-            """)
-            
-            # Migration: Ensure category_id exists in pos_shortcuts
-            cursor.execute("PRAGMA table_info(pos_shortcuts)")
-            columns = [info[1] for info in cursor.fetchall()]
-            if 'category_id' not in columns:
-                cursor.execute("ALTER TABLE pos_shortcuts ADD COLUMN category_id INTEGER REFERENCES categories(id) ON DELETE SET NULL")
-                print("✓ Migration: Added category_id to pos_shortcuts")
-
-            # Migration: Ensure category_id exists in sale_items
-            cursor.execute("PRAGMA table_info(sale_items)")
-            columns = [info[1] for info in cursor.fetchall()]
-            if 'category_id' not in columns:
-                cursor.execute("ALTER TABLE sale_items ADD COLUMN category_id INTEGER REFERENCES categories(id) ON DELETE SET NULL")
-                print("✓ Migration: Added category_id to sale_items")
-            
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_pos_shortcuts_position ON pos_shortcuts(position)
-            """)
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_pos_shortcuts_category ON pos_shortcuts(category_id)")
-             
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_pos_shortcuts_product ON pos_shortcuts(product_id)
-            """)
-            
-            cursor.execute("""
-                CREATE TRIGGER IF NOT EXISTS update_pos_shortcuts_timestamp 
-                AFTER UPDATE ON pos_shortcuts
-                BEGIN
-                    UPDATE pos_shortcuts SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
-                END
-            """)
-            print("✓ Migration: Verification table pos_shortcuts")
-            
-            # ================================================================
-            # TOBACCO CONTROL MIGRATION
-            # ================================================================
-            cursor.execute("PRAGMA table_info(products)")
-            columns = [col[1] for col in cursor.fetchall()]
-            
-            # Add is_tobacco flag for reporting separation
-            if 'is_tobacco' not in columns:
-                cursor.execute("ALTER TABLE products ADD COLUMN is_tobacco INTEGER DEFAULT 0")
-                print("✓ Migration: Added is_tobacco to products")
-            
-            # Add parent_product_id for unit conversion (Single -> Pack link)
-            if 'parent_product_id' not in columns:
-                cursor.execute("ALTER TABLE products ADD COLUMN parent_product_id INTEGER REFERENCES products(id) ON DELETE SET NULL")
-                print("✓ Migration: Added parent_product_id to products")
-            
-            # Add packing_quantity (how many singles in a pack, default 20 for cigarettes)
-            if 'packing_quantity' not in columns:
-                cursor.execute("ALTER TABLE products ADD COLUMN packing_quantity INTEGER DEFAULT 20")
-                print("✓ Migration: Added packing_quantity to products")
-            
-
-            
-            conn.commit()
-        except sqlite3.Error as e:
-            print(f"⚠ Migration warning: {e}")
-    
-
-    
     def execute_query(self, query: str, params: tuple = ()) -> List[sqlite3.Row]:
         """
         Exécuter une requête SELECT et retourner les résultats
@@ -245,9 +143,12 @@ class DatabaseManager:
         """
         conn = self.get_connection()
         try:
+            started = time.perf_counter()
             cursor = conn.cursor()
             cursor.execute(query, params)
-            return cursor.fetchall()
+            rows = cursor.fetchall()
+            self.profiler.record(conn, query, params, time.perf_counter() - started, len(rows))
+            return rows
         except sqlite3.Error as e:
             print(f"Erreur lors de l'exécution de la requête: {e}")
             print(f"Requête: {query}")
@@ -267,12 +168,17 @@ class DatabaseManager:
         """
         conn = self.get_connection()
         try:
+            started = time.perf_counter()
             cursor = conn.cursor()
             cursor.execute(query, params)
-            conn.commit()
+            if not self.in_transaction():
+                conn.commit()
+            self.profiler.record(conn, query, params, time.perf_counter() - started, cursor.rowcount)
             return cursor.rowcount
         except sqlite3.Error as e:
-            conn.rollback()
+            # Dans db.transaction(), l'annulation revient au bloc englobant
+            if not self.in_transaction():
+                conn.rollback()
             print(f"Erreur lors de l'exécution de la mise à jour: {e}")
             print(f"Requête: {query}")
             print(f"Paramètres: {params}")
@@ -291,12 +197,17 @@ class DatabaseManager:
         """
         conn = self.get_connection()
         try:
+            started = time.perf_counter()
             cursor = conn.cursor()
             cursor.execute(query, params)
-            conn.commit()
+            if not self.in_transaction():
+                conn.commit()
+            self.profiler.record(conn, query, params, time.perf_counter() - started, cursor.rowcount)
             return cursor.lastrowid
         except sqlite3.Error as e:
-            conn.rollback()
+            # Dans db.transaction(), l'annulation revient au bloc englobant
+            if not self.in_transaction():
+                conn.rollback()
             print(f"Erreur lors de l'insertion: {e}")
             print(f"Requête: {query}")
             print(f"Paramètres: {params}")
@@ -315,17 +226,74 @@ class DatabaseManager:
         """
         conn = self.get_connection()
         try:
+            started = time.perf_counter()
             cursor = conn.cursor()
             cursor.executemany(query, params_list)
-            conn.commit()
+            if not self.in_transaction():
+                conn.commit()
+            # Plan éventuel établi avec le premier jeu de paramètres
+            first = params_list[0] if isinstance(params_list, (list, tuple)) and params_list else ()
+            self.profiler.record(conn, query, first, time.perf_counter() - started, cursor.rowcount)
             return cursor.rowcount
         except sqlite3.Error as e:
-            conn.rollback()
+            # Dans db.transaction(), l'annulation revient au bloc englobant
+            if not self.in_transaction():
+                conn.rollback()
             print(f"Erreur lors de l'exécution multiple: {e}")
             raise
     
+    @contextmanager
+    def transaction(self):
+        """
+        Unité de travail : `with db.transaction():`
+        
+        À l'intérieur du bloc, execute_update / execute_insert / execute_many
+        ne valident pas : tout est validé en une fois à la sortie du bloc le
+        plus externe, ou annulé si une exception en sort. Un bloc imbriqué
+        est un SAVEPOINT : s'il échoue, seules ses écritures sont annulées et
+        l'appelant peut intercepter l'exception pour continuer.
+        
+        Le verrou d'écriture est pris dès l'entrée (BEGIN IMMEDIATE) : les
+        lectures du bloc voient l'état sur lequel les écritures s'appliquent.
+        
+        Yields:
+            Connexion du thread courant (pour les curseurs et executemany)
+        """
+        conn = self.get_connection()
+        depth = getattr(self._local, 'transaction_depth', 0)
+        # Transaction déjà ouverte hors de ce mécanisme (begin_transaction) : on s'y joint
+        savepoint = f"sp_{depth}" if depth or conn.in_transaction else None
+        conn.execute(f"SAVEPOINT {savepoint}" if savepoint else "BEGIN IMMEDIATE")
+        self._local.transaction_depth = depth + 1
+        try:
+            yield conn
+        except BaseException:
+            if savepoint:
+                conn.execute(f"ROLLBACK TO {savepoint}")
+                conn.execute(f"RELEASE {savepoint}")
+            else:
+                conn.rollback()
+            raise
+        else:
+            if savepoint:
+                conn.execute(f"RELEASE {savepoint}")
+            else:
+                started = time.perf_counter()
+                try:
+                    conn.commit()
+                except sqlite3.Error:
+                    conn.rollback()
+                    raise
+                self.profiler.record(conn, "COMMIT", (), time.perf_counter() - started, 0)
+        finally:
+            self._local.transaction_depth = depth
+    
+    def in_transaction(self) -> bool:
+        """Vrai à l'intérieur d'un bloc db.transaction() du thread courant"""
+        return getattr(self._local, 'transaction_depth', 0) > 0
+    
     def begin_transaction(self):
-        """Démarrer une transaction explicite"""
+        """Démarrer une transaction explicite (préférer `with db.transaction():`)"""
         conn = self.get_connection()
         conn.execute("BEGIN TRANSACTION")
     
@@ -352,9 +320,12 @@ class DatabaseManager:
         """
         conn = self.get_connection()
         try:
+            started = time.perf_counter()
             cursor = conn.cursor()
             cursor.execute(query, params)
-            return cursor.fetchone()
+            row = cursor.fetchone()
+            self.profiler.record(conn, query, params, time.perf_counter() - started, 0 if row is None else 1)
+            return row
         except sqlite3.Error as e:
             print(f"Erreur lors de la récupération: {e}")
             raise
@@ -413,15 +384,22 @@ class DatabaseManager:
             return self.db_path.stat().st_size
         return 0
     
-    def get_database_info(self) -> Dict[str, Any]:
+    # Borne du nombre de lignes lues par index lors d'ANALYZE (statistiques approchées)
+    ANALYSIS_LIMIT = 400
+    
+    def get_database_info(self, exact: bool = False) -> Dict[str, Any]:
         """
         Obtenir des informations sur la base de données
         
+        Par défaut les compteurs viennent de sqlite_stat1 (dernier ANALYZE) :
+        aucune table n'est parcourue. Une table jamais analysée a un compteur None.
+        
+        Args:
+            exact: Compter chaque table (COUNT(*), lent sur un gros historique)
+            
         Returns:
             Dictionnaire avec les informations
         """
-        conn = self.get_connection()
-        
         # Obtenir la liste des tables
         tables_query = """
             SELECT name FROM sqlite_master 
@@ -430,71 +408,170 @@ class DatabaseManager:
         """
         tables = [row['name'] for row in self.execute_query(tables_query)]
         
-        # Compter les enregistrements par table
-        table_counts = {}
-        for table in tables:
-            count_query = f"SELECT COUNT(*) as count FROM {table}"
-            result = self.fetch_one(count_query)
-            table_counts[table] = result['count'] if result else 0
+        if exact:
+            table_counts = self.get_table_counts(tables)
+        else:
+            estimates = self.get_approximate_counts()
+            table_counts = {table: estimates.get(table) for table in tables}
         
         return {
             'path': str(self.db_path),
             'size_bytes': self.get_database_size(),
             'tables': tables,
             'table_counts': table_counts,
+            'counts_exact': exact,
         }
     
-    def backup_database(self, backup_path: Path) -> bool:
+    def get_table_counts(self, tables: Optional[List[str]] = None) -> Dict[str, int]:
         """
-        Créer une sauvegarde de la base de données
+        Compter exactement les enregistrements (à lancer hors du thread de l'interface)
+        
+        Args:
+            tables: Tables à compter (toutes par défaut)
+            
+        Returns:
+            Dictionnaire table -> nombre de lignes
+        """
+        if tables is None:
+            tables = [row['name'] for row in self.execute_query(
+                "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+            )]
+        table_counts = {}
+        for table in tables:
+            result = self.fetch_one(f'SELECT COUNT(*) as count FROM "{table}"')
+            table_counts[table] = result['count'] if result else 0
+        return table_counts
+    
+    def get_approximate_counts(self) -> Dict[str, int]:
+        """
+        Nombre de lignes estimé par table, lu dans sqlite_stat1
+        
+        Returns:
+            Dictionnaire table -> estimation (tables analysées uniquement)
+        """
+        if not self.table_exists('sqlite_stat1'):
+            return {}
+        # stat = "N n1 n2 ..." : le premier entier est le nombre de lignes
+        rows = self.execute_query(
+            "SELECT tbl, MAX(CAST(stat AS INTEGER)) as count FROM sqlite_stat1 GROUP BY tbl"
+        )
+        return {row['tbl']: row['count'] for row in rows}
+    
+    def update_statistics(self) -> bool:
+        """
+        Rafraîchir les statistiques du planificateur (et les compteurs approchés)
+        
+        Premier passage : ANALYZE borné par ANALYSIS_LIMIT. Ensuite PRAGMA
+        optimize, qui ne réanalyse que les tables qui ont assez changé.
+        
+        Returns:
+            True si un ANALYZE complet a été lancé
+        """
+        conn = self.get_connection()
+        conn.execute(f"PRAGMA analysis_limit = {self.ANALYSIS_LIMIT}")
+        first_run = not self.table_exists('sqlite_stat1') or self.fetch_one(
+            "SELECT 1 FROM sqlite_stat1 LIMIT 1") is None
+        conn.execute("ANALYZE" if first_run else "PRAGMA optimize")
+        conn.commit()
+        return first_run
+    
+    def backup_database(self, backup_path: Path,
+                        progress: Optional[Callable[[int, int], None]] = None) -> bool:
+        """
+        Créer une sauvegarde cohérente via l'API de sauvegarde en ligne de SQLite
+        
+        La copie avance par lots de pages (BACKUP_CONFIG['pages_per_step']) sur
+        une connexion dédiée : à lancer hors du thread de l'interface. En WAL,
+        une transaction de lecture est tenue pendant toute la copie : la caisse
+        continue d'écrire dans le journal et l'instantané ne redémarre jamais.
+        La copie est écrite dans un fichier temporaire, vérifiée par
+        PRAGMA integrity_check, puis renommée.
         
         Args:
             backup_path: Chemin de la sauvegarde
+            progress: Appelée après chaque lot avec (pages copiées, pages totales)
             
         Returns:
             True si succès
         """
+        partial_path = backup_path.with_name(backup_path.name + ".partial")
+        source = target = None
         try:
-            import shutil
-            
             # Créer le dossier de sauvegarde s'il n'existe pas
             backup_path.parent.mkdir(parents=True, exist_ok=True)
             
-            # Copier la base de données
-            shutil.copy2(self.db_path, backup_path)
-            
+            source = sqlite3.connect(
+                self.db_path, isolation_level=None,
+                timeout=config.DATABASE_CONFIG.get('busy_timeout_ms', 10000) / 1000.0
+            )
+            target = sqlite3.connect(partial_path)
+            
+            # En mode rollback, une lecture tenue bloquerait les écritures pendant
+            # toute la copie : les lots sont alors copiés entre deux ventes
+            wal = source.execute("PRAGMA journal_mode").fetchone()[0].lower() == 'wal'
+            if wal:
+                source.execute("BEGIN")
+                source.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchone()
+            
+            def on_step(status, remaining, total):
+                if progress:
+                    progress(total - remaining, total)
+            
+            source.backup(target, pages=config.BACKUP_CONFIG.get('pages_per_step', 1024),
+                          progress=on_step, sleep=0.001)
+            if wal:
+                source.execute("COMMIT")
+            source.close()
+            source = None
+            
+            check = target.execute("PRAGMA integrity_check").fetchone()[0]
+            target.close()
+            target = None
+            if check != 'ok':
+                raise sqlite3.DatabaseError(f"sauvegarde corrompue ({check})")
+            
+            partial_path.replace(backup_path)
             print(f"✓ Sauvegarde créée: {backup_path}")
             return True
             
         except Exception as e:
             print(f"✗ Erreur lors de la sauvegarde: {e}")
             return False
+        finally:
+            for conn in (source, target):
+                if conn is not None:
+                    conn.close()
+            if partial_path.exists():
+                partial_path.unlink()
     
     def restore_database(self, backup_path: Path) -> bool:
         """
         Restaurer la base de données depuis une sauvegarde
         
+        La sauvegarde est recopiée page à page dans la connexion ouverte
+        (API de sauvegarde en ligne), sans toucher aux fichiers : les
+        connexions des autres threads (db_executor, background_jobs) restent
+        valides et lisent la base restaurée dès leur prochaine requête.
+        
         Args:
             backup_path: Chemin de la sauvegarde
             
         Returns:
             True si succès
         """
+        source = None
         try:
-            import shutil
-            
             if not backup_path.exists():
                 print(f"✗ Fichier de sauvegarde introuvable: {backup_path}")
                 return False
             
-            # Fermer la connexion actuelle
-            self.close()
+            source = sqlite3.connect(f"file:{backup_path}?mode=ro", uri=True)
+            source.backup(self.get_connection())
+            source.close()
+            source = None
             
-            # Restaurer la base de données
-            shutil.copy2(backup_path, self.db_path)
-            
-            # Réinitialiser la connexion
-            self._local.connection = None
+            # Une sauvegarde d'une version antérieure est mise à niveau
+            self.initialize_database()
             
             print(f"✓ Base de données restaurée depuis: {backup_path}")
             return True
@@ -502,6 +579,35 @@ class DatabaseManager:
         except Exception as e:
             print(f"✗ Erreur lors de la restauration: {e}")
             return False
+        finally:
+            if source is not None:
+                source.close()
+
+def day_range(start_date, end_date=None) -> Tuple[str, str]:
+    """
+    Bornes semi-ouvertes [début, lendemain de la fin) d'une plage de jours
+    
+    À utiliser sous la forme `sale_date >= ? AND sale_date < ?` : le filtre
+    reste sur la colonne brute et peut utiliser idx_sales_date, contrairement
+    à `date(sale_date) BETWEEN ? AND ?`.
+    
+    Args:
+        start_date: Premier jour (YYYY-MM-DD ou date)
+        end_date: Dernier jour inclus (None = même jour)
+        
+    Returns:
+        (début, lendemain de la fin) au format YYYY-MM-DD
+    """
+    def as_date(value):
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, date):
+            return value
+        return datetime.strptime(str(value)[:10], "%Y-%m-%d").date()
+    
+    start = as_date(start_date)
+    end = as_date(end_date) if end_date is not None else start
+    return start.isoformat(), (end + timedelta(days=1)).isoformat()
 
 
 # Instance globale
@@ -0,0 +1,287 @@
+# -*- coding: utf-8 -*-
+"""
+Migrations versionnées du schéma (PRAGMA user_version)
+
+Chaque migration est une fonction `(conn)` numérotée, exécutée une seule
+fois, dans sa propre transaction, qui porte aussi la mise à jour de
+user_version. Une base à jour s'ouvre donc avec une seule lecture de
+pragma. Les migrations restent idempotentes (vérification avant
+modification) : une base créée par une ancienne version du programme,
+avec user_version = 0, les traverse toutes sans erreur.
+
+Ajouter une migration : écrire la fonction et l'ajouter à la fin de
+MIGRATIONS avec le numéro suivant. Ne jamais renuméroter.
+"""
+import sqlite3
+import time
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+SCHEMA_PATH = Path(__file__).parent / "schema.sql"
+
+
+def _split_statements(script: str) -> List[str]:
+    """Découper un script SQL en instructions complètes (triggers BEGIN...END compris)"""
+    statements, buffer = [], ""
+    for line in script.splitlines(keepends=True):
+        if not buffer and (not line.strip() or line.lstrip().startswith("--")):
+            continue
+        buffer += line
+        if sqlite3.complete_statement(buffer):
+            statements.append(buffer.strip())
+            buffer = ""
+    if buffer.strip():
+        statements.append(buffer.strip())
+    return statements
+
+
+def _columns(conn: sqlite3.Connection, table: str) -> List[str]:
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def _add_column(conn: sqlite3.Connection, table: str, column: str, definition: str):
+    """Ajouter une colonne si la table existe et ne l'a pas encore"""
+    columns = _columns(conn, table)
+    if columns and column not in columns:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+# ============================================================================
+# MIGRATIONS
+# ============================================================================
+
+# Colonnes ajoutées par l'ancien _run_migrations, absentes de schema.sql pour certaines
+_LEGACY_COLUMNS = [
+    ("suppliers", "total_purchases", "REAL DEFAULT 0.0"),
+    ("suppliers", "total_debt", "REAL DEFAULT 0.0"),
+    ("customers", "total_purchases", "REAL DEFAULT 0.0"),
+    ("products", "supplier_id", "INTEGER REFERENCES suppliers(id) ON DELETE SET NULL"),
+    ("products", "is_tobacco", "INTEGER DEFAULT 0"),
+    ("products", "parent_product_id", "INTEGER REFERENCES products(id) ON DELETE SET NULL"),
+    ("products", "packing_quantity", "INTEGER DEFAULT 20"),
+    ("pos_shortcuts", "category_id", "INTEGER REFERENCES categories(id) ON DELETE SET NULL"),
+    ("sale_items", "category_id", "INTEGER REFERENCES categories(id) ON DELETE SET NULL"),
+]
+
+
+def _m001_base_schema(conn: sqlite3.Connection):
+    """Schéma de base (schema.sql) et colonnes ajoutées avant le versionnage"""
+    # Avant schema.sql pour les anciennes bases (idx_products_supplier lit supplier_id),
+    # après pour les tables que schema.sql vient de créer
+    for table, column, definition in _LEGACY_COLUMNS:
+        _add_column(conn, table, column, definition)
+    for statement in _split_statements(SCHEMA_PATH.read_text(encoding="utf-8")):
+        conn.execute(statement)
+    for table, column, definition in _LEGACY_COLUMNS:
+        _add_column(conn, table, column, definition)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_pos_shortcuts_category ON pos_shortcuts(category_id)")
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS user_permissions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            permission_key TEXT NOT NULL,
+            is_granted INTEGER DEFAULT 1,
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+            UNIQUE(user_id, permission_key)
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS license (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            license_key TEXT NOT NULL,
+            machine_id TEXT,
+            activation_date TEXT
+        )
+    """)
+
+    # Produit placeholder pour les articles divers (ID 0), cible des clés étrangères
+    conn.execute("""
+        INSERT OR IGNORE INTO products (id, name, barcode, selling_price, purchase_price, stock_quantity, is_active)
+        VALUES (0, 'Article Divers', 'CUSTOM_ITEM', 0, 0, 999999, 1)
+    """)
+
+
+def _m002_sales_payment_mixed(conn: sqlite3.Connection):
+    """Paiement 'mixed' autorisé par la contrainte de sales (ex migrate_sales_constraint*.py)"""
+    row = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'sales'").fetchone()
+    if not row or "'mixed'" in row[0]:
+        return
+
+    # Procédure SQLite de modification de table : nouvelle table, copie, échange.
+    # Les vues qui lisent sales sont recréées depuis schema.sql.
+    views = {name: sql for name, sql in conn.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'view' AND sql LIKE '%sales%'")}
+    for name in views:
+        conn.execute(f"DROP VIEW {name}")
+
+    create_sales = next(s for s in _split_statements(SCHEMA_PATH.read_text(encoding="utf-8"))
+                        if s.startswith("CREATE TABLE IF NOT EXISTS sales ("))
+    conn.execute(create_sales.replace("CREATE TABLE IF NOT EXISTS sales (", "CREATE TABLE sales_new (", 1))
+    columns = ", ".join(c for c in _columns(conn, "sales") if c in _columns(conn, "sales_new"))
+    conn.execute(f"INSERT INTO sales_new ({columns}) SELECT {columns} FROM sales")
+    conn.execute("DROP TABLE sales")
+    conn.execute("ALTER TABLE sales_new RENAME TO sales")
+
+    for statement in _split_statements(SCHEMA_PATH.read_text(encoding="utf-8")):
+        if statement.startswith("CREATE INDEX IF NOT EXISTS idx_sales_"):
+            conn.execute(statement)
+    for sql in views.values():
+        conn.execute(sql)
+
+
+def _m003_today_sales_range(conn: sqlite3.Connection):
+    """today_sales filtre sur une plage indexée au lieu de date(s.sale_date)"""
+    row = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'view' AND name = 'today_sales'").fetchone()
+    if row and 'date(s.sale_date)' in row[0]:
+        conn.execute("DROP VIEW today_sales")
+        conn.execute(next(s for s in _split_statements(SCHEMA_PATH.read_text(encoding="utf-8"))
+                          if s.startswith("CREATE VIEW IF NOT EXISTS today_sales")))
+
+
+def _m004_products_fts(conn: sqlite3.Connection):
+    """Index plein texte des produits (FTS5, tokenizer trigram)"""
+    # Hors de schema.sql : sans FTS5/trigram (SQLite < 3.34), la recherche
+    # retombe sur LIKE au lieu de bloquer l'ouverture de la base.
+    try:
+        conn.execute("SAVEPOINT products_fts")
+        conn.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+                name, name_ar, barcode,
+                content='products', content_rowid='id',
+                tokenize='trigram'
+            )
+        """)
+        conn.execute("RELEASE products_fts")
+    except sqlite3.OperationalError as e:
+        conn.execute("ROLLBACK TO products_fts")
+        conn.execute("RELEASE products_fts")
+        print(f"⚠ Recherche plein texte indisponible, repli sur LIKE: {e}")
+        return
+
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS products_fts_insert
+        AFTER INSERT ON products
+        BEGIN
+            INSERT INTO products_fts(rowid, name, name_ar, barcode)
+            VALUES (NEW.id, NEW.name, NEW.name_ar, NEW.barcode);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS products_fts_delete
+        AFTER DELETE ON products
+        BEGIN
+            INSERT INTO products_fts(products_fts, rowid, name, name_ar, barcode)
+            VALUES ('delete', OLD.id, OLD.name, OLD.name_ar, OLD.barcode);
+        END
+    """)
+    # Uniquement sur les colonnes indexées : les mouvements de stock ne touchent pas l'index
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS products_fts_update
+        AFTER UPDATE OF name, name_ar, barcode ON products
+        BEGIN
+            INSERT INTO products_fts(products_fts, rowid, name, name_ar, barcode)
+            VALUES ('delete', OLD.id, OLD.name, OLD.name_ar, OLD.barcode);
+            INSERT INTO products_fts(rowid, name, name_ar, barcode)
+            VALUES (NEW.id, NEW.name, NEW.name_ar, NEW.barcode);
+        END
+    """)
+    conn.execute("INSERT INTO products_fts(products_fts) VALUES ('rebuild')")
+
+
+
+def _m005_held_carts(conn: sqlite3.Connection):
+    """Paniers en attente enregistrés en base (repris au démarrage, partagés entre caisses)"""
+    # Lignes en JSON compact (Cart.snapshot) : reprise sans relire les produits
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS held_carts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            register_number INTEGER NOT NULL DEFAULT 1,
+            customer_id INTEGER REFERENCES customers(id) ON DELETE SET NULL,
+            customer_name TEXT NOT NULL DEFAULT '',
+            customer_data TEXT,
+            items TEXT NOT NULL,
+            discount_percentage REAL NOT NULL DEFAULT 0,
+            discount_amount REAL NOT NULL DEFAULT 0,
+            item_count INTEGER NOT NULL DEFAULT 0,
+            total REAL NOT NULL DEFAULT 0,
+            held_at TEXT NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_held_carts_customer ON held_carts(customer_id)")
+
+
+
+def _m006_document_sequences(conn: sqlite3.Connection):
+    """Compteurs des numéros de vente et de retour (par type, jour et caisse)"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS document_sequences (
+            prefix TEXT PRIMARY KEY,
+            last_value INTEGER NOT NULL
+        )
+    """)
+
+
+# (version, fonction) dans l'ordre d'application
+MIGRATIONS: List[Tuple[int, Callable[[sqlite3.Connection], None]]] = [
+    (1, _m001_base_schema),
+    (2, _m002_sales_payment_mixed),
+    (3, _m003_today_sales_range),
+    (4, _m004_products_fts),
+    (5, _m005_held_carts),
+    (6, _m006_document_sequences),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """
+    Amener la base à LATEST_VERSION
+
+    Chemin rapide : une base à jour ne coûte qu'un PRAGMA user_version.
+    Sinon, chaque migration manquante s'exécute dans sa transaction, clés
+    étrangères désactivées (procédure SQLite de modification de table)
+    puis vérifiées avant le commit.
+
+    Returns:
+        Nombre de migrations appliquées
+    """
+    current = get_version(conn)
+    if current >= LATEST_VERSION:
+        return 0
+
+    conn.commit()
+    foreign_keys = conn.execute("PRAGMA foreign_keys").fetchone()[0]
+    conn.execute("PRAGMA foreign_keys = OFF")
+    applied = 0
+    try:
+        for version, apply in MIGRATIONS:
+            if version <= current:
+                continue
+            started = time.perf_counter()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Les anciennes bases peuvent déjà contenir des orphelins :
+                # seules les violations introduites par la migration l'annulent
+                before = len(conn.execute("PRAGMA foreign_key_check").fetchall())
+                apply(conn)
+                after = len(conn.execute("PRAGMA foreign_key_check").fetchall())
+                if after > before:
+                    raise sqlite3.IntegrityError(f"{after - before} violation(s) de clé étrangère")
+                conn.execute(f"PRAGMA user_version = {version}")
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            applied += 1
+            description = (apply.__doc__ or apply.__name__).strip().splitlines()[0]
+            print(f"✓ Migration {version}: {description} "
+                  f"({(time.perf_counter() - started) * 1000:.0f} ms)")
+    finally:
+        conn.execute(f"PRAGMA foreign_keys = {'ON' if foreign_keys else 'OFF'}")
+    return applied
@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+"""
+Profilage des requêtes SQL passant par DatabaseManager
+
+Chaque appel de execute_query / execute_update / execute_insert /
+execute_many / fetch_one est chronométré et agrégé par requête normalisée
+(espaces réduits, littéraux et listes IN (?, ?, ...) remplacés) : nombre
+d'appels, durée totale et maximale, lignes lues ou modifiées.
+
+Une requête plus lente que DATABASE_CONFIG['slow_query_ms'] est écrite
+dans le journal, avec son plan (EXPLAIN QUERY PLAN) capturé une seule fois
+si DATABASE_CONFIG['explain_slow_queries'] est actif.
+
+Le profil est cumulé de session en session dans logs/query_profile.json
+(enregistré à la fermeture de l'application).
+
+Rapport : python -m database.query_report
+"""
+import json
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import config
+
+
+PROFILE_PATH = config.LOGS_DIR / "query_profile.json"
+
+# Clés de tri du rapport
+SORT_KEYS = ('total', 'avg', 'max', 'calls', 'rows')
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(query: str) -> str:
+    """
+    Réduire une requête à sa forme type (clé du profil)
+
+    Deux requêtes qui ne diffèrent que par leurs valeurs ou par la longueur
+    d'une liste IN (...) partagent la même clé.
+    """
+    sql = _WHITESPACE.sub(" ", query).strip()
+    sql = _STRING_LITERAL.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    return _IN_LIST.sub("IN (...)", sql)
+
+
+class QueryProfiler:
+    """Statistiques des requêtes, partagées par toutes les connexions"""
+
+    # Taille maximale du cache requête brute -> requête normalisée
+    NORMALIZE_CACHE_SIZE = 4096
+    PLAN_MAX_LINES = 20
+
+    def __init__(self, profile: Optional[Dict[str, Any]] = None):
+        profile = config.DATABASE_CONFIG if profile is None else profile
+        self.enabled = bool(profile.get('profile_queries', True))
+        self.slow_seconds = float(profile.get('slow_query_ms', 200)) / 1000.0
+        self.explain_slow = bool(profile.get('explain_slow_queries', True))
+        self._lock = threading.Lock()
+        self._normalized: Dict[str, str] = {}
+        # requête normalisée -> [appels, durée totale (s), durée max (s), lignes]
+        self._stats: Dict[str, list] = {}
+        self._plans: Dict[str, str] = {}
+        self._slow_count = 0
+
+    def record(self, conn: sqlite3.Connection, query: str, params, elapsed: float, rows: int):
+        """
+        Comptabiliser une exécution
+
+        Args:
+            conn: Connexion utilisée (pour EXPLAIN QUERY PLAN)
+            query: Requête SQL telle qu'exécutée
+            params: Paramètres de la requête
+            elapsed: Durée en secondes
+            rows: Lignes retournées (lecture) ou affectées (écriture)
+        """
+        if not self.enabled:
+            return
+        sql = self._normalized.get(query)
+        if sql is None:
+            if len(self._normalized) >= self.NORMALIZE_CACHE_SIZE:
+                self._normalized.clear()
+            sql = self._normalized[query] = normalize_sql(query)
+
+        with self._lock:
+            entry = self._stats.get(sql)
+            if entry is None:
+                self._stats[sql] = [1, elapsed, elapsed, rows]
+            else:
+                entry[0] += 1
+                entry[1] += elapsed
+                if elapsed > entry[2]:
+                    entry[2] = elapsed
+                entry[3] += rows
+
+        if elapsed >= self.slow_seconds:
+            self._log_slow(conn, query, sql, params, elapsed, rows)
+
+    def _log_slow(self, conn, query: str, sql: str, params, elapsed: float, rows: int):
+        """Journaliser une requête lente (plan capturé à la première occurrence)"""
+        # Import local : core importe db_manager
+        from core.logger import logger
+
+        plan = None
+        with self._lock:
+            self._slow_count += 1
+            capture = self.explain_slow and sql not in self._plans
+            if capture:
+                self._plans[sql] = ""  # Réservé : une seule capture par requête
+        if capture:
+            plan = self.explain(conn, query, params)
+            with self._lock:
+                self._plans[sql] = plan
+
+        logger.warning(f"Requête lente ({elapsed * 1000:.0f} ms, {rows} ligne(s)): {sql[:300]}")
+        if plan:
+            logger.warning(f"  Plan: {plan}")
+
+    def explain(self, conn: sqlite3.Connection, query: str, params=()) -> str:
+        """
+        Plan d'exécution d'une requête (EXPLAIN QUERY PLAN, n'exécute pas la requête)
+
+        Returns:
+            Étapes du plan séparées par ' | ', ou '' si indisponible
+        """
+        try:
+            steps = conn.execute(f"EXPLAIN QUERY PLAN {query}", params).fetchall()
+        except (sqlite3.Error, ValueError):
+            return ""
+        return " | ".join(str(step[-1]) for step in steps[:self.PLAN_MAX_LINES])
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Copie des statistiques de la session : requête -> calls, total_ms, max_ms, rows, plan"""
+        with self._lock:
+            return {
+                sql: {
+                    'calls': calls,
+                    'total_ms': total * 1000,
+                    'max_ms': peak * 1000,
+                    'rows': rows,
+                    'plan': self._plans.get(sql, ""),
+                }
+                for sql, (calls, total, peak, rows) in self._stats.items()
+            }
+
+    def top(self, limit: int = 20, sort: str = 'total') -> List[Dict[str, Any]]:
+        """Requêtes les plus coûteuses de la session"""
+        return top_statements(self.snapshot(), limit, sort)
+
+    @property
+    def slow_count(self) -> int:
+        """Nombre d'exécutions au-dessus du seuil depuis le démarrage"""
+        return self._slow_count
+
+    def reset(self):
+        """Vider les statistiques de la session"""
+        with self._lock:
+            self._stats.clear()
+            self._plans.clear()
+            self._slow_count = 0
+
+    def save(self, path: Path = PROFILE_PATH) -> bool:
+        """
+        Cumuler les statistiques de la session dans le profil enregistré
+
+        Returns:
+            True si le fichier a été écrit
+        """
+        statements = load_profile(path)
+        for sql, stats in self.snapshot().items():
+            saved = statements.get(sql)
+            if saved is None:
+                statements[sql] = stats
+                continue
+            saved['calls'] += stats['calls']
+            saved['total_ms'] += stats['total_ms']
+            saved['max_ms'] = max(saved['max_ms'], stats['max_ms'])
+            saved['rows'] += stats['rows']
+            saved['plan'] = stats['plan'] or saved.get('plan', "")
+
+        partial = path.with_suffix(".partial")
+        try:
+            with open(partial, "w", encoding="utf-8") as f:
+                json.dump({'saved_at': datetime.now().isoformat(timespec='seconds'),
+                           'statements': statements}, f, ensure_ascii=False, indent=1)
+            partial.replace(path)
+            return True
+        except OSError as e:
+            print(f"⚠ Profil des requêtes non enregistré: {e}")
+            return False
+
+
+def load_profile(path: Path = PROFILE_PATH) -> Dict[str, Dict[str, Any]]:
+    """Statistiques cumulées enregistrées (vide si absentes ou illisibles)"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f).get('statements', {})
+    except (OSError, ValueError):
+        return {}
+
+
+def top_statements(statements: Dict[str, Dict[str, Any]], limit: int = 20,
+                   sort: str = 'total') -> List[Dict[str, Any]]:
+    """
+    Trier les requêtes du profil
+
+    Args:
+        statements: requête -> calls, total_ms, max_ms, rows, plan
+        limit: Nombre de requêtes retournées
+        sort: total, avg, max, calls ou rows
+
+    Returns:
+        Liste de dictionnaires (sql, calls, total_ms, avg_ms, max_ms, rows, plan)
+    """
+    rows = [
+        dict(stats, sql=sql, avg_ms=stats['total_ms'] / stats['calls'] if stats['calls'] else 0.0)
+        for sql, stats in statements.items()
+    ]
+    key = {'total': 'total_ms', 'avg': 'avg_ms', 'max': 'max_ms'}.get(sort, sort)
+    rows.sort(key=lambda row: row[key], reverse=True)
+    return rows[:limit]
+
+
+def format_report(rows: List[Dict[str, Any]], sql_width: int = 100) -> str:
+    """Tableau texte des requêtes (journal, ligne de commande)"""
+    lines = [f"{'appels':>9} | {'total (ms)':>11} | {'moy. (ms)':>9} | {'max (ms)':>9} | "
+             f"{'lignes':>9} | requête"]
+    for row in rows:
+        sql = row['sql'] if len(row['sql']) <= sql_width else row['sql'][:sql_width - 3] + "..."
+        lines.append(f"{row['calls']:>9} | {row['total_ms']:>11.1f} | {row['avg_ms']:>9.2f} | "
+                     f"{row['max_ms']:>9.1f} | {row['rows']:>9} | {sql}")
+        if row.get('plan'):
+            lines.append(f"{'':>9}   plan: {row['plan']}")
+    return "\n".join(lines)
+
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""
+Rapport des requêtes SQL les plus coûteuses (profil cumulé par query_profiler)
+
+Usage:
+    python -m database.query_report [--top 20] [--sort total|avg|max|calls|rows]
+    python -m database.query_report --reset
+"""
+import argparse
+from pathlib import Path
+from database.query_profiler import PROFILE_PATH, SORT_KEYS, format_report, load_profile, top_statements
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Requêtes SQL les plus coûteuses (profil cumulé)")
+    parser.add_argument("--file", type=Path, default=PROFILE_PATH)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--sort", choices=SORT_KEYS, default='total')
+    parser.add_argument("--width", type=int, default=100, help="Largeur maximale du texte SQL")
+    parser.add_argument("--reset", action="store_true", help="Effacer le profil enregistré")
+    args = parser.parse_args()
+
+    if args.reset:
+        args.file.unlink(missing_ok=True)
+        print(f"Profil effacé: {args.file}")
+        return
+
+    statements = load_profile(args.file)
+    if not statements:
+        print(f"Aucun profil enregistré ({args.file})")
+        return
+    total_ms = sum(stats['total_ms'] for stats in statements.values())
+    total_calls = sum(stats['calls'] for stats in statements.values())
+    print(f"{len(statements)} requête(s) distincte(s), {total_calls} appel(s), {total_ms / 1000:.1f} s au total")
+    print(format_report(top_statements(statements, args.top, args.sort), args.width))
+
+
+if __name__ == "__main__":
+    main()
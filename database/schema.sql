@@ -88,6 +88,7 @@ CREATE INDEX IF NOT EXISTS idx_products_name ON products(name);
 CREATE INDEX IF NOT EXISTS idx_products_category ON products(category_id);
 CREATE INDEX IF NOT EXISTS idx_products_supplier ON products(supplier_id);
 CREATE INDEX IF NOT EXISTS idx_products_active ON products(is_active);
+CREATE INDEX IF NOT EXISTS idx_products_updated ON products(updated_at);  -- Synchro du cache catalogue
 
 -- ============================================================================
 -- TABLE: price_history (Historique des prix)
@@ -208,6 +209,7 @@ CREATE INDEX IF NOT EXISTS idx_sales_customer ON sales(customer_id);
 CREATE INDEX IF NOT EXISTS idx_sales_cashier ON sales(cashier_id);
 CREATE INDEX IF NOT EXISTS idx_sales_date ON sales(sale_date);
 CREATE INDEX IF NOT EXISTS idx_sales_status ON sales(status);
+CREATE INDEX IF NOT EXISTS idx_sales_status_date ON sales(status, sale_date);  -- Rapports: status = ? AND sale_date >= ? AND sale_date < ?
 
 -- ============================================================================
 -- TABLE: sale_items (Détails des ventes - Lignes)
@@ -235,6 +237,27 @@ CREATE TABLE IF NOT EXISTS sale_items (
 CREATE INDEX IF NOT EXISTS idx_sale_items_sale ON sale_items(sale_id);
 CREATE INDEX IF NOT EXISTS idx_sale_items_product ON sale_items(product_id);
 
+-- ============================================================================
+-- TABLE: daily_rollup (Agrégats journaliers des ventes complétées)
+-- Tenue à jour par complete_sale / process_return / cancel_sale,
+-- reconstruite par `python -m modules.reports.daily_rollup`
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS daily_rollup (
+    day TEXT NOT NULL,  -- YYYY-MM-DD (date(sale_date))
+    category_id INTEGER NOT NULL DEFAULT 0,  -- COALESCE(sale_items, produit), 0 = sans catégorie
+    cashier_id INTEGER NOT NULL DEFAULT 0,
+    payment_method TEXT NOT NULL DEFAULT 'cash',
+    
+    sale_count INTEGER NOT NULL DEFAULT 0,  -- Ventes ayant au moins une ligne dans cette catégorie
+    order_count INTEGER NOT NULL DEFAULT 0,  -- Chaque vente comptée sur une seule ligne (total distinct)
+    quantity REAL NOT NULL DEFAULT 0.0,
+    revenue REAL NOT NULL DEFAULT 0.0,  -- quantity * unit_price * (1 - discount)
+    subtotal REAL NOT NULL DEFAULT 0.0,  -- SUM(sale_items.subtotal)
+    cost REAL NOT NULL DEFAULT 0.0,  -- quantity * purchase_price
+    
+    PRIMARY KEY (day, category_id, cashier_id, payment_method)
+);
+
 -- ============================================================================
 -- TABLE: returns (Retours/Annulations)
 -- ============================================================================
@@ -494,7 +517,7 @@ SELECT
 FROM sales s
 LEFT JOIN users u ON s.cashier_id = u.id
 LEFT JOIN customers c ON s.customer_id = c.id
-WHERE date(s.sale_date) = date('now')
+WHERE s.sale_date >= date('now') AND s.sale_date < date('now', '+1 day')  -- Plage sur idx_sales_status_date
   AND s.status = 'completed';
 
 -- Vue: Top produits vendus
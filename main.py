@@ -3,14 +3,19 @@
 Application de Gestion de Mini-Market
 Point d'entrée principal avec interface PyQt5
 """
+import logging
 import sys
+import time
 from pathlib import Path
 
+# Origine de la chronologie de démarrage (avant l'ouverture de la base à l'import)
+_STARTED = time.perf_counter()
+
 # Ajouter le dossier parent au chemin Python
 sys.path.append(str(Path(__file__).parent))
 
 import config
-from core.logger import logger
+from core.logger import logger, Timeline
 from database.db_manager import db
 
 # Import PyQt5
@@ -19,14 +24,15 @@ from PyQt5.QtCore import Qt
 from ui.login_dialog import LoginDialog
 from ui.main_window import MainWindow
 
-def initialize_application():
+def initialize_application(timeline: Timeline):
     """Initialiser l'application"""
     try:
         logger.info("=" * 60)
         logger.info(f"Démarrage de {config.APP_NAME} v{config.APP_VERSION}")
         logger.info("=" * 60)
+        timeline.mark("Modules et ouverture de la base")
         
-        # Vérifier la base de données
+        # Vérifier la base de données (compteurs estimés : aucun parcours de table)
         logger.info("Vérification de la base de données...")
         db_info = db.get_database_info()
         logger.info(f"Base de données: {db_info['path']}")
@@ -35,8 +41,29 @@ def initialize_application():
         
         # Afficher les compteurs de tables
         for table, count in db_info['table_counts'].items():
-            logger.info(f"  - {table}: {count} enregistrement(s)")
-            
+            if count is None:
+                logger.info(f"  - {table}: non analysée")
+            else:
+                logger.info(f"  - {table}: ~{count} enregistrement(s)")
+        timeline.mark("Informations base de données")
+        
+        # Précharger le catalogue pour le chemin de scan du POS
+        from modules.products.product_cache import product_cache
+        product_cache.warm()
+        timeline.mark("Cache produits")
+        
+        # Bases antérieures à daily_rollup : calculer les agrégats une fois
+        from modules.reports.daily_rollup import daily_rollup
+        if daily_rollup.needs_backfill():
+            logger.info("Calcul initial des agrégats journaliers (daily_rollup)...")
+            daily_rollup.rebuild()
+        timeline.mark("Agrégats journaliers")
+        
+        # Paniers en attente laissés par une session précédente (ou une autre caisse)
+        from modules.sales.held_carts import held_cart_store
+        held = held_cart_store.count()
+        if held:
+            logger.info(f"{held} panier(s) en attente repris")
 
         logger.info("Application initialisée avec succès")
         return True
@@ -79,19 +106,40 @@ def load_settings_from_db():
     except Exception as e:
         logger.error(f"Erreur chargement configuration: {e}")
 
+def refresh_database_statistics():
+    """
+    Rafraîchir en arrière-plan les statistiques (compteurs du prochain démarrage)
+    
+    Les compteurs exacts ne sont calculés qu'en niveau DEBUG.
+    """
+    from core.db_executor import db_executor
+    
+    def log_exact_counts(counts):
+        for table, count in counts.items():
+            logger.debug(f"  - {table}: {count} enregistrement(s)")
+    
+    def log_error(error):
+        logger.warning(f"Statistiques de la base non rafraîchies: {error}")
+    
+    db_executor.submit("db_statistics", db.update_statistics, on_error=log_error)
+    if logger.logger.isEnabledFor(logging.DEBUG):
+        db_executor.submit("db_table_counts", db.get_table_counts, on_result=log_exact_counts)
+
 def main():
     """Fonction principale avec interface PyQt5"""
+    timeline = Timeline("Démarrage", _STARTED)
     # Initialiser l'application
     # Enable High DPI Scaling
     QApplication.setAttribute(Qt.AA_EnableHighDpiScaling, True)
     QApplication.setAttribute(Qt.AA_UseHighDpiPixmaps, True)
     
-    if not initialize_application():
+    if not initialize_application(timeline):
         print("Erreur lors de l'initialisation de l'application")
         sys.exit(1)
     
     # Charger la configuration depuis la base de données
     load_settings_from_db()
+    timeline.mark("Paramètres")
     
     # Créer l'application Qt
     app = QApplication(sys.argv)
@@ -121,6 +169,8 @@ def main():
         app_icon = QIcon(icon_path)
         app.setWindowIcon(app_icon)
     
+    timeline.mark("Application Qt")
+    
     # Vérification de la licence
     from core.license import license_manager
     is_licensed, license_msg = license_manager.is_licensed()
@@ -135,11 +185,15 @@ def main():
         logger.info("Licence activée avec succès")
     else:
         logger.info(f"Licence valide: {license_msg}")
+    timeline.mark("Licence")
     
     # Boucle principale de l'application
     while True:
         # Afficher le dialogue de connexion
         login_dialog = LoginDialog()
+        if timeline is not None:
+            timeline.finish("Fenêtre de connexion")
+            timeline = None
         
         if login_dialog.exec_() == LoginDialog.Accepted:
             # Connexion réussie, obtenir les données utilisateur
@@ -148,12 +202,18 @@ def main():
             
             if user_data:
                 # Créer et afficher la fenêtre principale
+                session_timeline = Timeline("Ouverture de session")
                 main_window = MainWindow(user_data)
+                session_timeline.mark("Fenêtre principale")
                 main_window.showMaximized()
+                session_timeline.finish("Affichage")
+                
+                refresh_database_statistics()
                 
                 # Configurer la sauvegarde automatique
                 from PyQt5.QtCore import QTimer
                 from core.backup import backup_manager
+                from core.db_executor import background_jobs
                 
                 # Fetch backup configuration from DB
                 try:
@@ -168,52 +228,15 @@ def main():
                     backup_interval_hours = 5
 
                 def perform_auto_backup():
-                    """Effectuer une sauvegarde automatique"""
-                    try:
-                        # Sauvegarde SQL (base de données)
-                        backup_manager.auto_backup()
-                        
-                        # Sauvegarde Excel
-                        import openpyxl
-                        from datetime import datetime
-                        backup_dir = config.BACKUP_DIR
-                        backup_dir.mkdir(exist_ok=True)
-                        
-                        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                        excel_path = backup_dir / f"auto_backup_{timestamp}.xlsx"
-                        
-                        wb = openpyxl.Workbook()
-                        
-                        # Produits
-                        ws = wb.active
-                        ws.title = "Produits"
-                        products = db.execute_query("SELECT * FROM products WHERE is_active = 1")
-                        if products:
-                            ws.append(list(dict(products[0]).keys()))
-                            for p in products:
-                                ws.append(list(dict(p).values()))
-                        
-                        # Ventes
-                        ws_sales = wb.create_sheet("Ventes")
-                        sales = db.execute_query("SELECT * FROM sales")
-                        if sales:
-                            ws_sales.append(list(dict(sales[0]).keys()))
-                            for s in sales:
-                                ws_sales.append(list(dict(s).values()))
-                        
-                        # Clients
-                        ws_cust = wb.create_sheet("Clients")
-                        customers = db.execute_query("SELECT * FROM customers WHERE is_active = 1")
-                        if customers:
-                            ws_cust.append(list(dict(customers[0]).keys()))
-                            for c in customers:
-                                ws_cust.append(list(dict(c).values()))
-                        
-                        wb.save(excel_path)
-                        logger.info(f"Sauvegarde automatique créée: {excel_path.name}")
-                        
-                    except Exception as e:
-                        logger.error(f"Erreur sauvegarde automatique: {e}")
+                    """Effectuer une sauvegarde automatique (base + Excel), hors du thread de l'interface"""
+                    background_jobs.submit("auto_backup", backup_manager.auto_backup)
+                    backup_manager.export_excel_async()
+                
+                def backup_on_quit():
+                    """À la fermeture : instantané de la base seulement, l'export Excel est abandonné"""
+                    backup_manager.cancel_excel_export()
+                    if not background_jobs.is_pending("auto_backup"):
+                        background_jobs.submit("auto_backup", backup_manager.auto_backup)
                 
                 # Timer start if enabled
                 if backup_enabled:
@@ -226,11 +249,24 @@ def main():
                     logger.info("Auto-backup is disabled.")
                 
                 # Sauvegarde à la fermeture de l'application
-                app.aboutToQuit.connect(perform_auto_backup)
+                app.aboutToQuit.connect(backup_on_quit)
                 
                 # Lancer la boucle d'événements
                 app.exec_()
                 
+                # Laisser finir la sauvegarde lancée à la fermeture
+                background_jobs.wait_for_done()
+                
+                from core.data_signals import data_signals
+                logger.info(f"Rechargements de pages par signal: {data_signals.reload_report()}")
+
+                # Profil des requêtes : cumulé dans logs/query_profile.json
+                from database.query_profiler import format_report
+                if db.profiler.enabled:
+                    logger.info(f"Requêtes les plus coûteuses ({db.profiler.slow_count} lente(s)):\n"
+                                f"{format_report(db.profiler.top(5))}")
+                    db.profiler.save()
+                
                 # Si on arrive ici, c'est que la fenêtre principale a été fermée
                 # Si l'utilisateur est toujours connecté, c'est une fermeture normale -> Quitter
                 # Si l'utilisateur est déconnecté, c'est un logout -> Boucler
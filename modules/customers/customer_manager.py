@@ -182,12 +182,14 @@ class CustomerManager:
         result = db.fetch_one(query, (code,))
         return dict(result) if result else None
     
-    def search_customers(self, search_term: str) -> List[Dict]:
+    def search_customers(self, search_term: str, limit: int = 50, offset: int = 0) -> List[Dict]:
         """
         Rechercher des clients
         
         Args:
             search_term: Terme de recherche (nom, téléphone, code)
+            limit: Taille de la page
+            offset: Début de la page
             
         Returns:
             Liste de clients correspondants
@@ -196,19 +198,22 @@ class CustomerManager:
             SELECT * FROM customers
             WHERE (full_name LIKE ? OR phone LIKE ? OR code LIKE ?)
               AND is_active = 1
-            ORDER BY full_name
-            LIMIT 50
+            ORDER BY full_name, id
+            LIMIT ? OFFSET ?
         """
         search_pattern = f"%{search_term}%"
-        results = db.execute_query(query, (search_pattern, search_pattern, search_pattern))
+        results = db.execute_query(query, (search_pattern, search_pattern, search_pattern, limit, offset))
         return [dict(row) for row in results]
     
-    def get_all_customers(self, include_inactive: bool = False) -> List[Dict]:
+    def get_all_customers(self, include_inactive: bool = False,
+                          limit: int = None, offset: int = 0) -> List[Dict]:
         """
         Obtenir tous les clients
         
         Args:
             include_inactive: Inclure les clients désactivés
+            limit: Limiter le nombre de résultats
+            offset: Début de la page (avec limit)
             
         Returns:
             Liste de clients
@@ -218,9 +223,14 @@ class CustomerManager:
         if not include_inactive:
             query += " WHERE is_active = 1"
         
-        query += " ORDER BY full_name"
+        query += " ORDER BY full_name, id"
         
-        results = db.execute_query(query)
+        params = ()
+        if limit:
+            query += " LIMIT ? OFFSET ?"
+            params = (limit, offset)
+        
+        results = db.execute_query(query, params)
         return [dict(row) for row in results]
     
     def add_credit(self, customer_id: int, amount: float, 
@@ -238,18 +248,16 @@ class CustomerManager:
             (success, message)
         """
         try:
-            customer = self.get_customer(customer_id)
-            if not customer:
-                return False, "Client introuvable"
-            
-            # Vérifier la limite de crédit
-            new_credit = customer['current_credit'] + amount
-            if new_credit > customer['credit_limit']:
-                return False, f"Limite de crédit dépassée. Limite: {customer['credit_limit']} DA"
-            
-            db.begin_transaction()
-            
-            try:
+            with db.transaction():
+                customer = self.get_customer(customer_id)
+                if not customer:
+                    return False, "Client introuvable"
+                
+                # Vérifier la limite de crédit
+                new_credit = customer['current_credit'] + amount
+                if new_credit > customer['credit_limit']:
+                    return False, f"Limite de crédit dépassée. Limite: {customer['credit_limit']} DA"
+                
                 # Mettre à jour le crédit
                 update_query = """
                     UPDATE customers 
@@ -265,17 +273,11 @@ class CustomerManager:
                     ) VALUES (?, 'credit_sale', ?, ?, ?)
                 """
                 db.execute_insert(transaction_query, (customer_id, amount, processed_by, notes))
-                
-                db.commit()
-                
-                logger.info(f"Crédit ajouté: Client {customer_id} - {amount} DA")
-                data_signals.customer_updated.emit()
-                data_signals.customers_changed.emit()
-                return True, f"Crédit ajouté: {amount} DA"
-                
-            except Exception as e:
-                db.rollback()
-                raise e
+            
+            logger.info(f"Crédit ajouté: Client {customer_id} - {amount} DA")
+            data_signals.customer_updated.emit()
+            data_signals.customers_changed.emit()
+            return True, f"Crédit ajouté: {amount} DA"
                 
         except Exception as e:
             error_msg = f"Erreur lors de l'ajout du crédit: {str(e)}"
@@ -297,16 +299,14 @@ class CustomerManager:
             (success, message)
         """
         try:
-            customer = self.get_customer(customer_id)
-            if not customer:
-                return False, "Client introuvable"
-            
-            if amount > customer['current_credit']:
-                return False, f"Montant trop élevé. Crédit actuel: {customer['current_credit']} DA"
-            
-            db.begin_transaction()
-            
-            try:
+            with db.transaction():
+                customer = self.get_customer(customer_id)
+                if not customer:
+                    return False, "Client introuvable"
+                
+                if amount > customer['current_credit']:
+                    return False, f"Montant trop élevé. Crédit actuel: {customer['current_credit']} DA"
+                
                 # Réduire le crédit
                 update_query = """
                     UPDATE customers 
@@ -322,17 +322,11 @@ class CustomerManager:
                     ) VALUES (?, 'payment', ?, ?, ?)
                 """
                 db.execute_insert(transaction_query, (customer_id, amount, processed_by, notes))
-                
-                db.commit()
-                
-                logger.info(f"Paiement crédit: Client {customer_id} - {amount} DA")
-                data_signals.customer_updated.emit()
-                data_signals.customers_changed.emit()
-                return True, f"Paiement enregistré: {amount} DA"
-                
-            except Exception as e:
-                db.rollback()
-                raise e
+            
+            logger.info(f"Paiement crédit: Client {customer_id} - {amount} DA")
+            data_signals.customer_updated.emit()
+            data_signals.customers_changed.emit()
+            return True, f"Paiement enregistré: {amount} DA"
                 
         except Exception as e:
             error_msg = f"Erreur lors du paiement: {str(e)}"
@@ -396,6 +390,49 @@ class CustomerManager:
         results = db.execute_query(query)
         return [dict(row) for row in results]
     
+    def get_top_customers(self, limit: int = 50, offset: int = 0) -> List[Dict]:
+        """
+        Obtenir les meilleurs clients (total des achats décroissant)
+        
+        Args:
+            limit: Taille de la page
+            offset: Début de la page
+            
+        Returns:
+            Liste de clients
+        """
+        query = """
+            SELECT * FROM customers
+            WHERE is_active = 1
+            ORDER BY total_purchases DESC, id
+            LIMIT ? OFFSET ?
+        """
+        results = db.execute_query(query, (limit, offset))
+        return [dict(row) for row in results]
+    
+    def get_customers_summary(self) -> Dict[str, Any]:
+        """
+        Statistiques globales des clients actifs (une seule requête)
+        
+        Returns:
+            Dict avec total_clients, clients_with_debt, total_debt
+        """
+        query = """
+            SELECT COUNT(*) as total_clients,
+                   COALESCE(SUM(CASE WHEN current_credit > 0 THEN 1 ELSE 0 END), 0) as clients_with_debt,
+                   COALESCE(SUM(current_credit), 0) as total_debt
+            FROM customers
+            WHERE is_active = 1
+        """
+        result = db.fetch_one(query)
+        if not result:
+            return {'total_clients': 0, 'clients_with_debt': 0, 'total_debt': 0.0}
+        return {
+            'total_clients': result['total_clients'],
+            'clients_with_debt': result['clients_with_debt'],
+            'total_debt': float(result['total_debt']),
+        }
+    
     def get_customer_stats(self, customer_id: int) -> Dict[str, Any]:
         """
         Obtenir les statistiques d'un client
@@ -4,5 +4,6 @@ Package products - Gestion des produits
 """
 from .product_manager import ProductManager
 from .category_manager import CategoryManager
+from .product_cache import ProductCatalogCache
 
-__all__ = ['ProductManager', 'CategoryManager']
+__all__ = ['ProductManager', 'CategoryManager', 'ProductCatalogCache']
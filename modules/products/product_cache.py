@@ -0,0 +1,272 @@
+# -*- coding: utf-8 -*-
+"""
+Cache mémoire du catalogue produits (chemin de scan du POS)
+
+Index par ID, code-barres et nom normalisé. Les lignes sont stockées en
+tuples (colonnes partagées) et un dictionnaire neuf est construit à chaque
+lecture : l'appelant peut le modifier sans altérer le cache.
+
+Écritures d'autres caisses ou processus sur la même base : chaque lecture
+compare PRAGMA data_version (modifié par tout commit d'une autre connexion)
+à la dernière valeur vue, et synchronise le cache s'il a bougé.
+"""
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+from database.db_manager import db
+from core.logger import logger
+from core.data_signals import data_signals
+
+
+# Même projection que ProductManager.get_product
+_PRODUCT_SELECT = """
+    SELECT p.*, c.name as category_name, s.company_name as supplier_name
+    FROM products p
+    LEFT JOIN categories c ON p.category_id = c.id
+    LEFT JOIN suppliers s ON p.supplier_id = s.id
+"""
+
+
+def normalize_name(name: str) -> str:
+    """Clé de recherche par nom (espaces et casse ignorés)"""
+    return " ".join(str(name).split()).casefold()
+
+
+class ProductCatalogCache:
+    """Cache du catalogue produits, invalidé incrémentalement"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._columns: List[str] = []
+        self._pos: Dict[str, int] = {}  # Colonne -> position dans le tuple
+        self._by_id: Dict[int, tuple] = {}
+        self._by_barcode: Dict[str, int] = {}  # Produits actifs uniquement
+        self._by_name: Dict[str, List[int]] = {}  # Produits actifs uniquement
+        self._enabled = False  # Activé par warm()
+        self._stale = False  # Rechargement complet requis à la prochaine lecture
+        self._sync_mark = ""  # Plus grand updated_at déjà chargé
+        self._seen = threading.local()  # Connexion et data_version vus par thread
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self.last_warm_ms = 0.0
+
+        # Les écritures produits déclenchent une synchronisation différentielle ;
+        # catégories/fournisseurs changent les noms joints -> rechargement complet
+        for signal in (data_signals.product_added, data_signals.product_updated,
+                       data_signals.product_deleted, data_signals.products_changed,
+                       data_signals.product_changed, data_signals.inventory_changed):
+            signal.connect(self.sync)
+        data_signals.categories_changed.connect(self.invalidate_all)
+        data_signals.suppliers_changed.connect(self.invalidate_all)
+
+    # ------------------------------------------------------------------
+    # Chargement
+    # ------------------------------------------------------------------
+    def warm(self) -> int:
+        """
+        Charger tout le catalogue en mémoire et activer le cache
+
+        Returns:
+            Nombre de produits chargés
+        """
+        started = time.perf_counter()
+        with self._lock:
+            self._remember_data_version()
+            cursor = db.get_connection().execute(_PRODUCT_SELECT)
+            self._columns = [col[0] for col in cursor.description]
+            self._pos = {name: i for i, name in enumerate(self._columns)}
+            self._by_id = {}
+            self._by_barcode = {}
+            self._by_name = {}
+            for row in cursor:
+                self._index(tuple(row))
+            self._sync_mark = self._max_updated_at(self._by_id.values(), "")
+            self._enabled = True
+            self._stale = False
+            self.reloads += 1
+            count = len(self._by_id)
+        self.last_warm_ms = (time.perf_counter() - started) * 1000
+        logger.info(f"Cache catalogue chargé: {count} produit(s) en {self.last_warm_ms:.0f} ms")
+        return count
+
+    def disable(self):
+        """Désactiver le cache et libérer la mémoire (lectures en base)"""
+        with self._lock:
+            self._enabled = False
+            self._by_id = {}
+            self._by_barcode = {}
+            self._by_name = {}
+
+    def invalidate_all(self):
+        """Marquer le cache comme périmé (rechargé à la prochaine lecture)"""
+        with self._lock:
+            self._stale = True
+
+    def invalidate(self, product_ids: Iterable[int]):
+        """
+        Recharger immédiatement quelques produits depuis la base
+
+        Args:
+            product_ids: IDs des produits modifiés
+        """
+        ids = [pid for pid in set(product_ids) if pid is not None]
+        if not ids:
+            return
+        with self._lock:
+            if not self._enabled or self._stale:
+                return
+            placeholders = ",".join("?" * len(ids))
+            rows = db.execute_query(f"{_PRODUCT_SELECT} WHERE p.id IN ({placeholders})", tuple(ids))
+            found = set()
+            for row in rows:
+                found.add(row['id'])
+                self._replace(tuple(row))
+            for pid in set(ids) - found:
+                self._remove(pid)
+
+    def sync(self):
+        """
+        Synchronisation différentielle : recharger les produits dont
+        updated_at a changé depuis le dernier passage (ventes d'autres caisses
+        comprises, le trigger update_products_timestamp les horodatant)
+        
+        Le repère est le plus grand updated_at déjà lu, pas l'heure de la
+        synchronisation : SQLite n'admet qu'un écrivain à la fois, donc une
+        transaction encore en cours horodate ses lignes après le dernier
+        commit visible, même si elle valide longtemps après son UPDATE.
+        """
+        with self._lock:
+            if not self._enabled or self._stale:
+                return
+            try:
+                rows = [tuple(row) for row in db.execute_query(
+                    f"{_PRODUCT_SELECT} WHERE p.updated_at >= ?", (self._sync_mark,)
+                )]
+                for row in rows:
+                    self._replace(row)
+                self._sync_mark = self._max_updated_at(rows, self._sync_mark)
+
+                # Suppressions physiques (réinitialisation) : invisibles via updated_at
+                count = db.fetch_one("SELECT COUNT(*) as count FROM products")['count']
+                if count != len(self._by_id):
+                    self._stale = True
+            except Exception as e:
+                logger.error(f"Erreur synchronisation cache catalogue: {e}")
+                self._stale = True
+
+    # ------------------------------------------------------------------
+    # Lectures
+    # ------------------------------------------------------------------
+    @property
+    def is_enabled(self) -> bool:
+        """Le cache répond-il aux lectures ?"""
+        return self._enabled
+
+    def get_by_id(self, product_id: int) -> Optional[Dict]:
+        """Produit par ID (actif ou non), None si absent du cache"""
+        with self._lock:
+            self._ensure_fresh()
+            return self._lookup(self._by_id.get(product_id))
+
+    def get_by_barcode(self, barcode: str) -> Optional[Dict]:
+        """Produit actif par code-barres, None si absent du cache"""
+        with self._lock:
+            self._ensure_fresh()
+            product_id = self._by_barcode.get(barcode)
+            return self._lookup(self._by_id.get(product_id) if product_id is not None else None)
+
+    def get_by_name(self, name: str, exact: bool = True) -> Optional[Dict]:
+        """
+        Produit actif par nom
+
+        Args:
+            name: Nom recherché
+            exact: Si True, le nom doit correspondre exactement (comme en SQL) ;
+                   sinon la casse et les espaces sont ignorés
+        """
+        with self._lock:
+            self._ensure_fresh()
+            name_idx = self._pos['name']
+            for product_id in self._by_name.get(normalize_name(name), ()):
+                row = self._by_id[product_id]
+                if not exact or row[name_idx] == name:
+                    return self._lookup(row)
+            return self._lookup(None)
+
+    def get_stats(self) -> Dict:
+        """Compteurs du cache"""
+        total = self.hits + self.misses
+        return {
+            'enabled': self._enabled,
+            'size': len(self._by_id),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total * 100, 2) if total else 0.0,
+            'reloads': self.reloads,
+            'last_warm_ms': round(self.last_warm_ms, 2),
+        }
+
+    # ------------------------------------------------------------------
+    # Index internes (appelés sous verrou)
+    # ------------------------------------------------------------------
+    def _lookup(self, row: Optional[tuple]) -> Optional[Dict]:
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return dict(zip(self._columns, row))
+
+    def _ensure_fresh(self):
+        if self._stale:
+            self.warm()
+        elif self._remember_data_version():
+            self.sync()
+
+    def _remember_data_version(self) -> bool:
+        """Noter data_version pour la connexion du thread ; True s'il a changé depuis"""
+        conn = db.get_connection()
+        version = conn.execute("PRAGMA data_version").fetchone()[0]
+        seen = self._seen
+        if getattr(seen, 'conn', None) is conn and seen.version == version:
+            return False
+        seen.conn, seen.version = conn, version
+        return True
+
+    def _max_updated_at(self, rows: Iterable[tuple], mark: str) -> str:
+        idx = self._pos['updated_at']
+        return max((row[idx] for row in rows if row[idx]), default=mark)
+
+    def _index(self, row: tuple):
+        pos = self._pos
+        product_id = row[pos['id']]
+        self._by_id[product_id] = row
+        if row[pos['is_active']]:
+            barcode = row[pos['barcode']]
+            if barcode:
+                self._by_barcode[barcode] = product_id
+            ids = self._by_name.setdefault(normalize_name(row[pos['name']]), [])
+            ids.append(product_id)
+            ids.sort()
+
+    def _remove(self, product_id: int):
+        row = self._by_id.pop(product_id, None)
+        if row is None:
+            return
+        barcode = row[self._pos['barcode']]
+        if barcode and self._by_barcode.get(barcode) == product_id:
+            del self._by_barcode[barcode]
+        key = normalize_name(row[self._pos['name']])
+        ids = self._by_name.get(key)
+        if ids and product_id in ids:
+            ids.remove(product_id)
+            if not ids:
+                del self._by_name[key]
+
+    def _replace(self, row: tuple):
+        self._remove(row[self._pos['id']])
+        self._index(row)
+
+
+# Instance globale
+product_cache = ProductCatalogCache()
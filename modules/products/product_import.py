@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+"""
+Import en masse du catalogue produits depuis Excel
+
+Le classeur est lu en flux (openpyxl read_only) et traité par lots de
+BATCH_ROWS lignes : validation des valeurs, une requête IN pour retrouver
+les codes-barres déjà en base, puis executemany. Tout l'import tient dans
+une seule transaction et ne déclenche qu'un signal de changement à la fin.
+
+Mêmes règles que create_product ligne à ligne : code-barres généré s'il
+manque, doublon (actif ou déjà présent dans le fichier) ignoré, produit
+désactivé réactivé avec les valeurs importées.
+"""
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from database.db_manager import db
+from core.logger import logger
+from core.data_signals import data_signals
+
+
+# Colonnes lues dans le classeur, dans l'ordre d'insertion
+_INSERT = """
+    INSERT INTO products (barcode, name, purchase_price, selling_price,
+                          stock_quantity, min_stock_level, created_by)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Réactivation : mêmes valeurs que create_product (champs absents du fichier remis à leur défaut)
+_REACTIVATE = """
+    UPDATE products
+    SET name = ?, name_ar = NULL, description = NULL, category_id = NULL,
+        purchase_price = ?, selling_price = ?, stock_quantity = ?, min_stock_level = ?,
+        unit = 'pièce', expiry_date = NULL, manufacturing_date = NULL, supplier_id = NULL,
+        is_active = 1, created_by = ?, is_tobacco = 0, parent_product_id = NULL, packing_quantity = 20
+    WHERE id = ?
+"""
+
+
+def map_columns(headers) -> Dict[str, int]:
+    """Associer les en-têtes du fichier aux champs (correspondance souple, comme l'ancien import)"""
+    col_map = {}
+    for i, h in enumerate(headers):
+        if not h:
+            continue
+        h = str(h).lower().strip()
+        if 'code' in h or 'barcode' in h: col_map['barcode'] = i
+        elif 'nom' in h or 'product' in h: col_map['name'] = i
+        elif 'achat' in h or 'purchase' in h: col_map['purchase'] = i
+        elif 'vente' in h or 'price' in h or 'selling' in h: col_map['selling'] = i
+        elif 'stock' in h and 'min' not in h: col_map['stock'] = i
+        elif 'min' in h: col_map['min'] = i
+    return col_map
+
+
+class ProductImporter:
+    """Import de produits par lots"""
+
+    BATCH_ROWS = 500
+
+    def import_excel(self, file_path: str, created_by: int) -> Tuple[bool, Dict]:
+        """
+        Importer des produits depuis un fichier Excel
+
+        Args:
+            file_path: Chemin du fichier Excel (première feuille)
+            created_by: ID de l'utilisateur
+
+        Returns:
+            (success, stats) ; stats : total, success, errors, duplicates, error_details
+        """
+        import openpyxl
+
+        started = time.perf_counter()
+        stats = {
+            'total': 0,
+            'success': 0,
+            'errors': 0,
+            'duplicates': 0,
+            'error_details': []
+        }
+        try:
+            wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+        except Exception as e:
+            logger.error(f"Erreur import Excel: {e}")
+            return False, {'error': str(e)}
+
+        try:
+            rows = wb.active.iter_rows(values_only=True)
+            col_map = map_columns(next(rows, ()))
+            if 'name' not in col_map or 'selling' not in col_map:
+                return False, {'error': "Colonnes requises manquantes: 'Nom' et 'Prix Vente'"}
+
+            conn = db.get_connection()
+            job = {
+                'created_by': created_by,
+                'auto_prefix': f"AUTO-{datetime.now().strftime('%Y%m%d%H%M%S')}",
+                'seen': set(),  # Codes-barres déjà traités dans ce fichier
+                'product_ids': [],
+            }
+            low_stock = 0
+
+            with db.transaction():
+                batch = []
+                for row_idx, row in enumerate(rows, start=2):
+                    batch.append((row_idx, row))
+                    if len(batch) >= self.BATCH_ROWS:
+                        low_stock += self._import_batch(conn, batch, col_map, job, stats)
+                        batch = []
+                if batch:
+                    low_stock += self._import_batch(conn, batch, col_map, job, stats)
+        except Exception as e:
+            logger.error(f"Erreur import Excel: {e}")
+            return False, {'error': str(e)}
+        finally:
+            wb.close()
+
+        logger.info(f"Import produits: {stats['success']}/{stats['total']} importé(s), "
+                    f"{stats['duplicates']} doublon(s), {stats['errors']} erreur(s) "
+                    f"en {time.perf_counter() - started:.1f} s")
+        if low_stock:
+            logger.warning(f"ALERTE STOCK - {low_stock} produit(s) importé(s) sous le stock minimum")
+        if job['product_ids']:
+            data_signals.notify('product', job['product_ids'])
+            data_signals.product_added.emit()
+            data_signals.products_changed.emit()
+        return True, stats
+
+    def _import_batch(self, conn, batch: List[tuple], col_map: Dict[str, int],
+                      job: Dict, stats: Dict) -> int:
+        """
+        Valider et écrire un lot de lignes
+
+        Args:
+            job: État de l'import (created_by, auto_prefix, seen, product_ids)
+
+        Returns:
+            Nombre de produits importés sous leur stock minimum
+        """
+        valid = []
+        for row_idx, row in batch:
+            values = self._parse_row(row_idx, row, col_map, job['auto_prefix'], stats)
+            if values is not None:
+                valid.append(values)
+        if not valid:
+            return 0
+
+        # Codes-barres du lot déjà en base : une seule requête
+        barcodes = list({values[0] for values in valid})
+        placeholders = ",".join("?" * len(barcodes))
+        existing = {row['barcode']: (row['id'], row['is_active']) for row in conn.execute(
+            f"SELECT id, barcode, is_active FROM products WHERE barcode IN ({placeholders})", barcodes)}
+
+        created_by, seen, product_ids = job['created_by'], job['seen'], job['product_ids']
+        inserts, reactivations = [], []
+        low_stock = 0
+        for barcode, name, purchase, selling, stock, min_stock in valid:
+            if barcode in seen:
+                stats['duplicates'] += 1
+                continue
+            seen.add(barcode)
+            match = existing.get(barcode)
+            if match and match[1]:
+                stats['duplicates'] += 1
+                continue
+            if match:
+                reactivations.append((name, purchase, selling, stock, min_stock, created_by, match[0]))
+                product_ids.append(match[0])
+            else:
+                inserts.append((barcode, name, purchase, selling, stock, min_stock, created_by))
+            if stock <= min_stock:
+                low_stock += 1
+
+        if reactivations:
+            conn.executemany(_REACTIVATE, reactivations)
+        if inserts:
+            conn.executemany(_INSERT, inserts)
+            new_barcodes = [values[0] for values in inserts]
+            placeholders = ",".join("?" * len(new_barcodes))
+            product_ids.extend(row['id'] for row in conn.execute(
+                f"SELECT id FROM products WHERE barcode IN ({placeholders})", new_barcodes))
+        stats['success'] += len(inserts) + len(reactivations)
+        return low_stock
+
+    def _parse_row(self, row_idx: int, row: tuple, col_map: Dict[str, int],
+                   auto_prefix: str, stats: Dict) -> Optional[tuple]:
+        """(barcode, name, purchase, selling, stock, min_stock), ou None si ligne vide / invalide"""
+        def cell(key):
+            index = col_map.get(key)
+            return row[index] if index is not None and index < len(row) else None
+
+        if not cell('name'):
+            return None  # Ignorer lignes vides
+        stats['total'] += 1
+        try:
+            name = str(cell('name'))
+            selling_price = float(cell('selling'))
+            barcode = str(cell('barcode')) if cell('barcode') else None
+            purchase_price = float(cell('purchase')) if cell('purchase') else 0.0
+            stock = int(cell('stock')) if cell('stock') else 0
+            min_stock = int(cell('min')) if cell('min') else 10
+        except Exception as e:
+            stats['errors'] += 1
+            stats['error_details'].append(f"Ligne {row_idx}: {str(e)}")
+            return None
+
+        if not barcode or barcode.strip() == '':
+            barcode = f"{auto_prefix}-{row_idx}"
+        return barcode, name, purchase_price, selling_price, stock, min_stock
+
+
+# Instance globale
+product_importer = ProductImporter()
@@ -7,12 +7,16 @@ from datetime import datetime, timedelta
 from database.db_manager import db
 from core.logger import logger
 from core.data_signals import data_signals
+from .product_cache import product_cache
 import config
 
 
 class ProductManager:
     """Gestionnaire de produits"""
     
+    def __init__(self):
+        self._fts_available = None
+    
     def create_product(self, name: str, selling_price: float, 
                       purchase_price: float = 0.0, barcode: str = None,
                       name_ar: str = None, description: str = None,
@@ -82,6 +86,8 @@ class ProductManager:
                     ))
                     
                     logger.info(f"Produit réactivé: {name} (ID: {product_id})")
+                    product_cache.invalidate([product_id])
+                    data_signals.notify('product', [product_id])
                     data_signals.product_added.emit()
                     data_signals.products_changed.emit()
                     return True, "Produit réactivé avec succès", product_id
@@ -104,11 +110,13 @@ class ProductManager:
             ))
             
             logger.info(f"Produit créé: {name} (ID: {product_id})")
+            product_cache.invalidate([product_id])
             
             # Vérifier le stock minimum
             if stock_quantity <= min_stock_level:
                 logger.log_stock_alert(name, stock_quantity)
             
+            data_signals.notify('product', [product_id])
             data_signals.product_added.emit()
             data_signals.products_changed.emit()
             return True, "Produit créé avec succès", product_id
@@ -159,6 +167,7 @@ class ProductManager:
             
             if rows_affected > 0:
                 logger.info(f"Produit mis à jour: ID {product_id}")
+                product_cache.invalidate([product_id])
                 
                 # Vérifier le stock si modifié
                 if 'stock_quantity' in kwargs:
@@ -166,6 +175,7 @@ class ProductManager:
                     if product and product['stock_quantity'] <= product['min_stock_level']:
                         logger.log_stock_alert(product['name'], product['stock_quantity'])
                 
+                data_signals.notify('product', [product_id])
                 data_signals.product_updated.emit()
                 data_signals.products_changed.emit()
                 return True, "Produit mis à jour avec succès"
@@ -193,6 +203,8 @@ class ProductManager:
             
             if rows_affected > 0:
                 logger.info(f"Produit supprimé: ID {product_id}")
+                product_cache.invalidate([product_id])
+                data_signals.notify('product', [product_id])
                 data_signals.product_deleted.emit()
                 data_signals.products_changed.emit()
                 return True, "Produit supprimé avec succès"
@@ -214,6 +226,11 @@ class ProductManager:
         Returns:
             Dictionnaire avec les données du produit ou None
         """
+        if product_cache.is_enabled:
+            product = product_cache.get_by_id(product_id)
+            if product:
+                return product
+        
         query = """
             SELECT p.*, c.name as category_name, s.company_name as supplier_name
             FROM products p
@@ -222,7 +239,7 @@ class ProductManager:
             WHERE p.id = ?
         """
         result = db.fetch_one(query, (product_id,))
-        return dict(result) if result else None
+        return self._cache_result(result)
     
     def get_product_by_barcode(self, barcode: str) -> Optional[Dict]:
         """
@@ -234,6 +251,11 @@ class ProductManager:
         Returns:
             Dictionnaire avec les données du produit ou None
         """
+        if product_cache.is_enabled:
+            product = product_cache.get_by_barcode(barcode)
+            if product:
+                return product
+        
         query = """
             SELECT p.*, c.name as category_name, s.company_name as supplier_name
             FROM products p
@@ -242,7 +264,7 @@ class ProductManager:
             WHERE p.barcode = ? AND p.is_active = 1
         """
         result = db.fetch_one(query, (barcode,))
-        return dict(result) if result else None
+        return self._cache_result(result)
     
     def get_product_by_name(self, name: str) -> Optional[Dict]:
         """
@@ -254,6 +276,11 @@ class ProductManager:
         Returns:
             Dictionnaire avec les données du produit ou None
         """
+        if product_cache.is_enabled:
+            product = product_cache.get_by_name(name)
+            if product:
+                return product
+        
         query = """
             SELECT p.*, c.name as category_name, s.company_name as supplier_name
             FROM products p
@@ -262,30 +289,76 @@ class ProductManager:
             WHERE p.name = ? AND p.is_active = 1
         """
         result = db.fetch_one(query, (name,))
-        return dict(result) if result else None
+        return self._cache_result(result)
+    
+    @staticmethod
+    def _cache_result(result) -> Optional[Dict]:
+        """Convertir une ligne lue en base ; si le cache l'ignorait, l'y ajouter"""
+        if not result:
+            return None
+        if product_cache.is_enabled:
+            product_cache.invalidate([result['id']])
+        return dict(result)
+    
+    # Le tokenizer trigram n'indexe que des séquences de 3 caractères
+    FTS_MIN_TERM_LENGTH = 3
+    
+    def _has_fts(self) -> bool:
+        """Index plein texte products_fts disponible (créé par les migrations)"""
+        if self._fts_available is None:
+            self._fts_available = db.table_exists('products_fts')
+        return self._fts_available
+    
+    def _search_condition(self, search_term: str) -> tuple[str, list]:
+        """
+        Condition SQL de recherche sur nom, nom arabe et code-barres (table p)
+        
+        Dès 3 caractères, les IDs viennent de products_fts dans une
+        sous-requête : le MATCH n'est évalué qu'une fois. En jointure,
+        l'optimiseur peut parcourir products (idx_products_active) et
+        relancer le MATCH pour chaque produit.
+        
+        Returns:
+            (condition, paramètres)
+        """
+        term = search_term.strip()
+        if len(term) >= self.FTS_MIN_TERM_LENGTH and self._has_fts():
+            # Le terme entier comme phrase : même sémantique que LIKE '%terme%'
+            phrase = '"' + term.replace('"', '""') + '"'
+            return "p.id IN (SELECT rowid FROM products_fts WHERE products_fts MATCH ?)", [phrase]
+        
+        return "(p.name LIKE ? OR p.name_ar LIKE ? OR p.barcode LIKE ?)", [f"%{term}%"] * 3
     
     def search_products(self, search_term: str, category_id: int = None,
-                       include_inactive: bool = False) -> List[Dict]:
+                       include_inactive: bool = False,
+                       limit: int = 100, offset: int = 0) -> List[Dict]:
         """
         Rechercher des produits
         
+        Passe par l'index plein texte products_fts dès 3 caractères. Les
+        résultats sont classés : code-barres exact, puis nom commençant par
+        le terme, puis ordre alphabétique.
+        
         Args:
-            search_term: Terme de recherche (nom, code-barres)
+            search_term: Terme de recherche (nom, nom arabe, code-barres)
             category_id: Filtrer par catégorie
             include_inactive: Inclure les produits désactivés
+            limit: Taille de la page
+            offset: Début de la page
             
         Returns:
             Liste de produits correspondants
         """
-        query = """
+        condition, params = self._search_condition(search_term)
+        term = search_term.strip()
+        
+        query = f"""
             SELECT p.*, c.name as category_name
             FROM products p
             LEFT JOIN categories c ON p.category_id = c.id
-            WHERE (p.name LIKE ? OR p.name_ar LIKE ? OR p.barcode LIKE ?)
+            WHERE {condition}
         """
         
-        params = [f"%{search_term}%", f"%{search_term}%", f"%{search_term}%"]
-        
         if category_id:
             query += " AND p.category_id = ?"
             params.append(category_id)
@@ -293,14 +366,20 @@ class ProductManager:
         if not include_inactive:
             query += " AND p.is_active = 1"
         
-        query += " ORDER BY p.name LIMIT 100"
+        query += """
+            ORDER BY p.barcode = ? DESC,
+                     (p.name LIKE ? OR p.name_ar LIKE ?) DESC,
+                     p.name, p.id
+            LIMIT ? OFFSET ?
+        """
+        params.extend([term, f"{term}%", f"{term}%", limit, offset])
         
         results = db.execute_query(query, tuple(params))
         return [dict(row) for row in results]
     
     def get_all_products(self, category_id: int = None, 
                         include_inactive: bool = False,
-                        limit: int = None) -> List[Dict]:
+                        limit: int = None, offset: int = 0) -> List[Dict]:
         """
         Obtenir tous les produits
         
@@ -308,6 +387,7 @@ class ProductManager:
             category_id: Filtrer par catégorie
             include_inactive: Inclure les produits désactivés
             limit: Limiter le nombre de résultats
+            offset: Début de la page (avec limit)
             
         Returns:
             Liste de produits
@@ -328,14 +408,40 @@ class ProductManager:
         if not include_inactive:
             query += " AND p.is_active = 1"
         
-        query += " ORDER BY p.name"
+        query += " ORDER BY p.name, p.id"
         
         if limit:
-            query += f" LIMIT {limit}"
+            query += " LIMIT ? OFFSET ?"
+            params.extend([limit, offset])
         
         results = db.execute_query(query, tuple(params) if params else ())
         return [dict(row) for row in results]
     
+    def count_products(self, search_term: str = None, include_inactive: bool = False) -> int:
+        """
+        Compter les produits (même filtre que search_products / get_all_products)
+        
+        Args:
+            search_term: Terme de recherche (nom, code-barres)
+            include_inactive: Inclure les produits désactivés
+            
+        Returns:
+            Nombre de produits
+        """
+        query = "SELECT COUNT(*) as total FROM products p WHERE 1=1"
+        params = []
+        
+        if search_term:
+            condition, search_params = self._search_condition(search_term)
+            query += f" AND {condition}"
+            params.extend(search_params)
+        
+        if not include_inactive:
+            query += " AND p.is_active = 1"
+        
+        result = db.fetch_one(query, tuple(params))
+        return result['total'] if result else 0
+    
     def update_stock(self, product_id: int, quantity_change: int, 
                     reason: str = "adjustment") -> tuple[bool, str]:
         """
@@ -350,19 +456,24 @@ class ProductManager:
             (success, message)
         """
         try:
-            # Obtenir le stock actuel
-            product = self.get_product(product_id)
+            # Mise à jour relative et gardée : pas de lecture-écriture qu'une
+            # autre caisse pourrait écraser entre les deux
+            with db.transaction():
+                changed = db.execute_update(
+                    "UPDATE products SET stock_quantity = stock_quantity + ? "
+                    "WHERE id = ? AND stock_quantity + ? >= 0",
+                    (quantity_change, product_id, quantity_change)
+                )
+                product = db.fetch_one(
+                    "SELECT name, stock_quantity, min_stock_level FROM products WHERE id = ?", (product_id,)
+                )
             if not product:
                 return False, "Produit introuvable"
-            
-            new_quantity = product['stock_quantity'] + quantity_change
-            
-            if new_quantity < 0:
+            if not changed:
                 return False, "Stock insuffisant"
             
-            # Mettre à jour le stock
-            query = "UPDATE products SET stock_quantity = ? WHERE id = ?"
-            db.execute_update(query, (new_quantity, product_id))
+            new_quantity = product['stock_quantity']
+            product_cache.invalidate([product_id])
             
             logger.info(f"Stock mis à jour: {product['name']} - {quantity_change:+d} ({reason})")
             
@@ -370,6 +481,7 @@ class ProductManager:
             if new_quantity <= product['min_stock_level']:
                 logger.log_stock_alert(product['name'], new_quantity)
             
+            data_signals.notify('product', [product_id])
             data_signals.product_updated.emit()
             data_signals.products_changed.emit()
             return True, f"Stock mis à jour: {new_quantity}"
@@ -499,6 +611,7 @@ class ProductManager:
             rows_affected = db.execute_update(query, (discount_percentage, is_on_promotion, product_id))
             
             if rows_affected > 0:
+                product_cache.invalidate([product_id])
                 logger.info(f"Promotion appliquée: Produit ID {product_id} - {discount_percentage}%")
                 return True, "Promotion appliquée avec succès"
             else:
@@ -585,6 +698,9 @@ class ProductManager:
         """
         Importer des produits depuis un fichier Excel
         
+        Lecture en flux et écriture par lots en une transaction
+        (voir modules.products.product_import).
+        
         Args:
             file_path: Chemin du fichier Excel
             created_by: ID de l'utilisateur
@@ -592,90 +708,8 @@ class ProductManager:
         Returns:
             (success, stats)
         """
-        try:
-            import openpyxl
-            wb = openpyxl.load_workbook(file_path)
-            ws = wb.active
-            
-            stats = {
-                'total': 0,
-                'success': 0,
-                'errors': 0,
-                'duplicates': 0,
-                'error_details': []
-            }
-            
-            # En-têtes attendues (flexibles)
-            # colonnes: code, nom, prix_achat, prix_vente, stock, min_stock
-            
-            headers = [cell.value for cell in ws[1]]
-            
-            # Mapping basique des colonnes
-            col_map = {}
-            for i, h in enumerate(headers):
-                if not h: continue
-                h = str(h).lower().strip()
-                if 'code' in h or 'barcode' in h: col_map['barcode'] = i
-                elif 'nom' in h or 'product' in h: col_map['name'] = i
-                elif 'achat' in h or 'purchase' in h: col_map['purchase'] = i
-                elif 'vente' in h or 'price' in h or 'selling' in h: col_map['selling'] = i
-                elif 'stock' in h and 'min' not in h: col_map['stock'] = i
-                elif 'min' in h: col_map['min'] = i
-            
-            if 'name' not in col_map or 'selling' not in col_map:
-                return False, {'error': "Colonnes requises manquantes: 'Nom' et 'Prix Vente'"}
-                
-            db.begin_transaction()
-            
-            try:
-                for row_idx, row in enumerate(ws.iter_rows(min_row=2, values_only=True), start=2):
-                    if not row[col_map['name']]: continue # Ignorer lignes vides
-                    
-                    stats['total'] += 1
-                    
-                    try:
-                        name = str(row[col_map['name']])
-                        selling_price = float(row[col_map['selling']])
-                        
-                        barcode = str(row[col_map['barcode']]) if 'barcode' in col_map and row[col_map['barcode']] else None
-                        purchase_price = float(row[col_map['purchase']]) if 'purchase' in col_map and row[col_map['purchase']] else 0.0
-                        stock = int(row[col_map['stock']]) if 'stock' in col_map and row[col_map['stock']] else 0
-                        min_stock = int(row[col_map['min']]) if 'min' in col_map and row[col_map['min']] else 10
-                        
-                        # Créer le produit
-                        success, msg, _ = self.create_product(
-                            name=name,
-                            selling_price=selling_price,
-                            purchase_price=purchase_price,
-                            barcode=barcode,
-                            stock_quantity=stock,
-                            min_stock_level=min_stock,
-                            created_by=created_by
-                        )
-                        
-                        if success:
-                            stats['success'] += 1
-                        else:
-                            if "existe déjà" in msg:
-                                stats['duplicates'] += 1
-                            else:
-                                stats['errors'] += 1
-                                stats['error_details'].append(f"Ligne {row_idx}: {msg}")
-                                
-                    except Exception as e:
-                        stats['errors'] += 1
-                        stats['error_details'].append(f"Ligne {row_idx}: {str(e)}")
-                
-                db.commit()
-                return True, stats
-                
-            except Exception as e:
-                db.rollback()
-                raise e
-                
-        except Exception as e:
-            logger.error(f"Erreur import Excel: {e}")
-            return False, {'error': str(e)}
+        from .product_import import product_importer
+        return product_importer.import_excel(file_path, created_by)
 
 
 # Instance globale
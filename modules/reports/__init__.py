@@ -4,5 +4,6 @@ Package reports - Génération de rapports
 """
 from .sales_report import SalesReportManager
 from .profit_report import ProfitReportManager
+from .daily_rollup import DailyRollupManager
 
-__all__ = ['SalesReportManager', 'ProfitReportManager']
+__all__ = ['SalesReportManager', 'ProfitReportManager', 'DailyRollupManager']
@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+"""
+Agrégats journaliers des ventes (table daily_rollup)
+
+Une ligne par (jour, catégorie, caissier, mode de paiement) pour les ventes
+complétées. La table est tenue à jour dans la transaction de chaque
+écriture (vente, retour, annulation) : les rapports de période lisent au
+plus quelques lignes par jour au lieu de tous les sale_items.
+
+Reconstruction complète ou partielle :
+    python -m modules.reports.daily_rollup [--from AAAA-MM-JJ] [--to AAAA-MM-JJ]
+"""
+import sqlite3
+from typing import Optional
+from database.db_manager import db, day_range
+from core.logger import logger
+
+
+# Contribution de ventes complétées, regroupée à la granularité de la table
+_CONTRIBUTION_SELECT = """
+    SELECT
+        date(s.sale_date) as day,
+        COALESCE(si.category_id, p.category_id, 0) as category_id,
+        COALESCE(s.cashier_id, 0) as cashier_id,
+        COALESCE(s.payment_method, 'cash') as payment_method,
+        COUNT(DISTINCT s.id) as sale_count,
+        SUM(si.quantity) as quantity,
+        SUM(si.quantity * si.unit_price * (1 - COALESCE(si.discount_percentage, 0) / 100.0)) as revenue,
+        SUM(si.subtotal) as subtotal,
+        SUM(si.quantity * COALESCE(si.purchase_price, 0)) as cost
+    FROM sale_items si
+    JOIN sales s ON si.sale_id = s.id
+    LEFT JOIN products p ON si.product_id = p.id
+"""
+
+_UPSERT = """
+    INSERT INTO daily_rollup (day, category_id, cashier_id, payment_method,
+                              sale_count, order_count, quantity, revenue, subtotal, cost)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(day, category_id, cashier_id, payment_method) DO UPDATE SET
+        sale_count = sale_count + excluded.sale_count,
+        order_count = order_count + excluded.order_count,
+        quantity = quantity + excluded.quantity,
+        revenue = revenue + excluded.revenue,
+        subtotal = subtotal + excluded.subtotal,
+        cost = cost + excluded.cost
+"""
+
+
+class DailyRollupManager:
+    """Maintenance de la table daily_rollup"""
+
+    def apply_sale(self, cursor: sqlite3.Cursor, sale_id: int, sign: int = 1):
+        """
+        Ajouter (sign=1) ou retirer (sign=-1) la contribution d'une vente.
+
+        N'effectue pas de commit : à appeler dans la transaction qui modifie
+        la vente. Les ventes non complétées ne contribuent pas.
+
+        Args:
+            cursor: Curseur de la transaction en cours
+            sale_id: ID de la vente
+            sign: 1 pour ajouter, -1 pour retirer
+        """
+        rows = cursor.execute(
+            _CONTRIBUTION_SELECT + """
+            WHERE s.id = ? AND s.status = 'completed'
+            GROUP BY 1, 2, 3, 4
+            ORDER BY 2
+            """,
+            (sale_id,)
+        ).fetchall()
+        if not rows:
+            return
+
+        # order_count : la vente n'est comptée qu'une fois, sur sa première catégorie
+        cursor.executemany(_UPSERT, [
+            (row[0], row[1], row[2], row[3],
+             sign * row[4], sign * (1 if i == 0 else 0),
+             sign * (row[5] or 0), sign * (row[6] or 0), sign * (row[7] or 0), sign * (row[8] or 0))
+            for i, row in enumerate(rows)
+        ])
+
+        if sign < 0:
+            cursor.execute("DELETE FROM daily_rollup WHERE day = ? AND sale_count <= 0", (rows[0][0],))
+
+    def rebuild(self, start_date: Optional[str] = None, end_date: Optional[str] = None) -> int:
+        """
+        Recalculer la table depuis sales/sale_items (tout l'historique par défaut)
+
+        Args:
+            start_date: Premier jour à recalculer (YYYY-MM-DD)
+            end_date: Dernier jour inclus (YYYY-MM-DD)
+
+        Returns:
+            Nombre de lignes d'agrégat écrites
+        """
+        where = "WHERE s.status = 'completed'"
+        params = ()
+        if start_date or end_date:
+            start, end = day_range(start_date or "1970-01-01", end_date or "9999-12-30")
+            where += " AND s.sale_date >= ? AND s.sale_date < ?"
+            params = (start, end)
+
+        conn = db.get_connection()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            if params:
+                conn.execute("DELETE FROM daily_rollup WHERE day >= ? AND day < ?", params)
+            else:
+                conn.execute("DELETE FROM daily_rollup")
+
+            # order_count = 1 sur la plus petite catégorie de chaque vente
+            conn.execute(f"""
+                WITH lines AS (
+                    SELECT s.id as sale_id,
+                           date(s.sale_date) as day,
+                           COALESCE(si.category_id, p.category_id, 0) as category_id,
+                           COALESCE(s.cashier_id, 0) as cashier_id,
+                           COALESCE(s.payment_method, 'cash') as payment_method,
+                           si.quantity,
+                           si.quantity * si.unit_price * (1 - COALESCE(si.discount_percentage, 0) / 100.0) as revenue,
+                           si.subtotal,
+                           si.quantity * COALESCE(si.purchase_price, 0) as cost
+                    FROM sale_items si
+                    JOIN sales s ON si.sale_id = s.id
+                    LEFT JOIN products p ON si.product_id = p.id
+                    {where}
+                ),
+                first_category AS (
+                    SELECT sale_id, MIN(category_id) as category_id FROM lines GROUP BY sale_id
+                )
+                INSERT INTO daily_rollup (day, category_id, cashier_id, payment_method,
+                                          sale_count, order_count, quantity, revenue, subtotal, cost)
+                SELECT l.day, l.category_id, l.cashier_id, l.payment_method,
+                       COUNT(DISTINCT l.sale_id),
+                       COUNT(DISTINCT CASE WHEN f.sale_id IS NOT NULL THEN l.sale_id END),
+                       SUM(l.quantity), SUM(l.revenue), SUM(l.subtotal), SUM(l.cost)
+                FROM lines l
+                LEFT JOIN first_category f ON f.sale_id = l.sale_id AND f.category_id = l.category_id
+                GROUP BY l.day, l.category_id, l.cashier_id, l.payment_method
+            """, params)
+            count = conn.execute("SELECT changes()").fetchone()[0]
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            logger.error(f"Erreur reconstruction daily_rollup: {e}")
+            raise
+
+        logger.info(f"daily_rollup reconstruit: {count} lignes")
+        return count
+
+    def needs_backfill(self) -> bool:
+        """Table vide alors que des ventes complétées existent (base antérieure)"""
+        conn = db.get_connection()
+        if conn.execute("SELECT 1 FROM daily_rollup LIMIT 1").fetchone():
+            return False
+        return conn.execute("SELECT 1 FROM sales WHERE status = 'completed' LIMIT 1").fetchone() is not None
+
+
+# Instance globale
+daily_rollup = DailyRollupManager()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Reconstruire la table daily_rollup")
+    parser.add_argument("--from", dest="start_date", help="Premier jour (AAAA-MM-JJ)")
+    parser.add_argument("--to", dest="end_date", help="Dernier jour inclus (AAAA-MM-JJ)")
+    args = parser.parse_args()
+
+    db.initialize_database()
+    rows = daily_rollup.rebuild(args.start_date, args.end_date)
+    print(f"✓ daily_rollup: {rows} lignes recalculées")
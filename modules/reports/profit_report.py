@@ -4,7 +4,7 @@ Gestionnaire de rapports de bénéfices
 """
 from typing import List, Dict, Any
 from datetime import datetime
-from database.db_manager import db
+from database.db_manager import db, day_range
 from core.logger import logger
 
 
@@ -13,7 +13,7 @@ class ProfitReportManager:
     
     def get_profit_by_period(self, start_date: str, end_date: str) -> Dict[str, Any]:
         """
-        Calculer le bénéfice par période
+        Calculer le bénéfice par période (lu depuis daily_rollup)
         
         Args:
             start_date: Date de début (YYYY-MM-DD)
@@ -24,17 +24,15 @@ class ProfitReportManager:
         """
         query = """
             SELECT 
-                SUM(si.quantity * si.unit_price * (1 - si.discount_percentage / 100.0)) as total_revenue,
-                SUM(si.quantity * si.purchase_price) as total_cost,
-                COUNT(DISTINCT s.id) as sale_count,
-                SUM(si.quantity) as total_items_sold
-            FROM sale_items si
-            JOIN sales s ON si.sale_id = s.id
-            WHERE date(s.sale_date) BETWEEN ? AND ?
-              AND s.status = 'completed'
+                SUM(revenue) as total_revenue,
+                SUM(cost) as total_cost,
+                COALESCE(SUM(order_count), 0) as sale_count,
+                SUM(quantity) as total_items_sold
+            FROM daily_rollup
+            WHERE day >= ? AND day < ?
         """
         
-        result = db.fetch_one(query, (start_date, end_date))
+        result = db.fetch_one(query, day_range(start_date, end_date))
         
         if result and result['total_revenue']:
             total_revenue = round(result['total_revenue'], 2)
@@ -125,14 +123,14 @@ class ProfitReportManager:
             FROM sale_items si
             JOIN products p ON si.product_id = p.id
             JOIN sales s ON si.sale_id = s.id
-            WHERE date(s.sale_date) BETWEEN ? AND ?
+            WHERE s.sale_date >= ? AND s.sale_date < ?
               AND s.status = 'completed'
             GROUP BY p.id, p.name, p.name_ar
             ORDER BY profit DESC
             LIMIT ?
         """
         
-        results = db.execute_query(query, (start_date, end_date, limit))
+        results = db.execute_query(query, day_range(start_date, end_date) + (limit,))
         
         products = []
         for row in results:
@@ -152,7 +150,7 @@ class ProfitReportManager:
     
     def get_profit_by_category(self, start_date: str, end_date: str) -> List[Dict]:
         """
-        Obtenir le bénéfice par catégorie
+        Obtenir le bénéfice par catégorie (lu depuis daily_rollup)
         
         Args:
             start_date: Date de début
@@ -166,21 +164,19 @@ class ProfitReportManager:
                 c.id,
                 c.name as category_name,
                 c.name_ar as category_name_ar,
-                SUM(si.quantity) as quantity_sold,
-                SUM(si.quantity * si.unit_price * (1 - si.discount_percentage / 100.0)) as revenue,
-                SUM(si.quantity * si.purchase_price) as cost,
-                SUM(si.quantity * (si.unit_price * (1 - si.discount_percentage / 100.0) - si.purchase_price)) as profit
-            FROM sale_items si
-            LEFT JOIN products p ON si.product_id = p.id
-            JOIN categories c ON COALESCE(si.category_id, p.category_id) = c.id
-            JOIN sales s ON si.sale_id = s.id
-            WHERE date(s.sale_date) BETWEEN ? AND ?
-              AND s.status = 'completed'
+                SUM(r.quantity) as quantity_sold,
+                SUM(r.revenue) as revenue,
+                SUM(r.cost) as cost,
+                SUM(r.revenue - r.cost) as profit
+            FROM daily_rollup r
+            JOIN categories c ON r.category_id = c.id
+            WHERE r.day >= ? AND r.day < ?
             GROUP BY c.id, c.name, c.name_ar
+            HAVING SUM(r.sale_count) > 0
             ORDER BY profit DESC
         """
         
-        results = db.execute_query(query, (start_date, end_date))
+        results = db.execute_query(query, day_range(start_date, end_date))
         
         categories = []
         for row in results:
@@ -202,6 +198,9 @@ class ProfitReportManager:
         """
         Obtenir la tendance des bénéfices jour par jour (optionnel: filtrer par catégorie)
         
+        Lu depuis daily_rollup : quelques lignes par jour, quel que soit le
+        nombre de ventes.
+        
         Args:
             start_date: Date de début
             end_date: Date de fin
@@ -210,31 +209,26 @@ class ProfitReportManager:
         Returns:
             Liste des bénéfices par jour
         """
-        params = [start_date, end_date]
-        
-        # Base query setup
-        join_clause = "JOIN sales s ON si.sale_id = s.id"
-        where_clause = "WHERE date(s.sale_date) BETWEEN ? AND ? AND s.status = 'completed'"
+        params = list(day_range(start_date, end_date))
+        where_clause = "WHERE day >= ? AND day < ?"
         
         if category_id is not None:
-             join_clause += " LEFT JOIN products p ON si.product_id = p.id"
-             where_clause += " AND COALESCE(si.category_id, p.category_id) = ?"
+             where_clause += " AND category_id = ?"
              params.append(category_id)
         
         query = f"""
             SELECT 
-                date(s.sale_date) as date,
-                SUM(si.quantity * si.unit_price * (1 - si.discount_percentage / 100.0)) as revenue,
-                SUM(CASE WHEN s.payment_method = 'credit' OR s.payment_method = 'dette' THEN 
-                    si.quantity * si.unit_price * (1 - si.discount_percentage / 100.0) 
-                    ELSE 0 END) as credit_revenue,
-                SUM(si.quantity * si.purchase_price) as cost,
-                SUM(si.quantity * (si.unit_price * (1 - si.discount_percentage / 100.0) - si.purchase_price)) as profit
-            FROM sale_items si
-            {join_clause}
+                day as date,
+                SUM(revenue) as revenue,
+                SUM(CASE WHEN payment_method = 'credit' OR payment_method = 'dette' THEN 
+                    revenue ELSE 0 END) as credit_revenue,
+                SUM(cost) as cost,
+                SUM(revenue - cost) as profit
+            FROM daily_rollup
             {where_clause}
-            GROUP BY date(s.sale_date)
-            ORDER BY date(s.sale_date)
+            GROUP BY day
+            HAVING SUM(sale_count) > 0
+            ORDER BY day
         """
         
         results = db.execute_query(query, tuple(params))
@@ -279,14 +273,14 @@ class ProfitReportManager:
             FROM sale_items si
             JOIN products p ON si.product_id = p.id
             JOIN sales s ON si.sale_id = s.id
-            WHERE date(s.sale_date) BETWEEN ? AND ?
+            WHERE s.sale_date >= ? AND s.sale_date < ?
               AND s.status = 'completed'
             GROUP BY p.id, p.name, p.name_ar
             HAVING profit < 0
             ORDER BY profit ASC
         """
         
-        results = db.execute_query(query, (start_date, end_date))
+        results = db.execute_query(query, day_range(start_date, end_date))
         
         products = []
         for row in results:
@@ -351,13 +345,13 @@ class ProfitReportManager:
                 JOIN products p ON si.product_id = p.id
                 JOIN sales s ON si.sale_id = s.id
                 WHERE p.category_id = ?
-                  AND date(s.sale_date) BETWEEN ? AND ?
+                  AND s.sale_date >= ? AND s.sale_date < ?
                   AND s.status = 'completed'
                 GROUP BY p.id, p.name
                 ORDER BY qty DESC
                 LIMIT 1
             """
-            top_prod = db.fetch_one(query, (cat_id, start_date, end_date))
+            top_prod = db.fetch_one(query, (cat_id,) + day_range(start_date, end_date))
             if top_prod:
                 cat['top_product'] = top_prod['name']
                 cat['top_product_qty'] = top_prod['qty']
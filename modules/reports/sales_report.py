@@ -4,13 +4,130 @@ Gestionnaire de rapports de ventes
 """
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
-from database.db_manager import db
+from database.db_manager import db, day_range
 from core.logger import logger
 
 
+# Bénéfice d'une vente (index idx_sale_items_sale)
+_SALE_PROFIT_SQL = """
+    (SELECT COALESCE(SUM((si.unit_price - si.purchase_price) * si.quantity), 0)
+     FROM sale_items si WHERE si.sale_id = s.id)
+"""
+
+# Colonnes triables de l'historique -> expression SQL
+HISTORY_SORT_COLUMNS = {
+    'id': "s.id",
+    'sale_number': "s.sale_number",
+    'sale_date': "s.sale_date",
+    'customer_name': "c.full_name",
+    'cashier_name': "u.full_name",
+    'total_amount': "s.total_amount",
+    'status': "s.status",
+    'profit': f"CASE WHEN s.status = 'completed' THEN {_SALE_PROFIT_SQL} ELSE 0 END",
+}
+
+
 class SalesReportManager:
     """Gestionnaire de rapports de ventes"""
     
+    @staticmethod
+    def _history_filter(start_date: str, end_date: str, search: str = None,
+                        status: str = None) -> tuple:
+        """Clause FROM/WHERE commune à la liste et aux totaux de l'historique"""
+        clause = """
+            FROM sales s
+            LEFT JOIN users u ON s.cashier_id = u.id
+            LEFT JOIN customers c ON s.customer_id = c.id
+            WHERE s.sale_date >= ? AND s.sale_date < ?
+        """
+        params = list(day_range(start_date, end_date))
+        
+        if search:
+            clause += " AND (s.sale_number LIKE ? OR c.full_name LIKE ?)"
+            params.extend([f"%{search}%", f"%{search}%"])
+        
+        if status:
+            clause += " AND s.status = ?"
+            params.append(status)
+        
+        return clause, params
+    
+    def get_sales_history(self, start_date: str, end_date: str, search: str = None,
+                          status: str = None, sort_by: str = 'sale_date',
+                          descending: bool = True, limit: int = 200, offset: int = 0,
+                          with_profit: bool = False) -> List[Dict]:
+        """
+        Obtenir une page de l'historique des ventes (une seule requête)
+        
+        La page est d'abord découpée sur les seules colonnes de tri
+        (LIMIT/OFFSET), puis les colonnes complètes et le bénéfice ne sont
+        calculés que pour les ventes de cette page.
+        
+        Args:
+            start_date: Date de début (YYYY-MM-DD)
+            end_date: Date de fin (YYYY-MM-DD)
+            search: Numéro de vente ou nom du client
+            status: Filtrer par statut
+            sort_by: Clé de HISTORY_SORT_COLUMNS
+            descending: Ordre décroissant
+            limit: Taille de la page
+            offset: Début de la page
+            with_profit: Ajouter la colonne profit (0 hors ventes complétées)
+            
+        Returns:
+            Liste des ventes avec cashier_name, customer_name (et profit)
+        """
+        clause, params = self._history_filter(start_date, end_date, search, status)
+        direction = "DESC" if descending else "ASC"
+        order = f"{HISTORY_SORT_COLUMNS.get(sort_by, 's.sale_date')} {direction}, s.id {direction}"
+        
+        profit_select = ""
+        if with_profit:
+            profit_select = f", CASE WHEN s.status = 'completed' THEN {_SALE_PROFIT_SQL} ELSE 0 END as profit"
+        
+        query = f"""
+            WITH page AS (
+                SELECT s.id
+                {clause}
+                ORDER BY {order}
+                LIMIT ? OFFSET ?
+            )
+            SELECT s.*, u.full_name as cashier_name, c.full_name as customer_name{profit_select}
+            FROM page
+            JOIN sales s ON s.id = page.id
+            LEFT JOIN users u ON s.cashier_id = u.id
+            LEFT JOIN customers c ON s.customer_id = c.id
+            ORDER BY {order}
+        """
+        
+        results = db.execute_query(query, tuple(params) + (limit, offset))
+        return [dict(row) for row in results]
+    
+    def get_sales_history_totals(self, start_date: str, end_date: str, search: str = None,
+                                 status: str = None, with_profit: bool = False) -> Dict[str, Any]:
+        """
+        Totaux de l'historique pour le filtre complet (une seule requête)
+        
+        Returns:
+            Dict avec sale_count, total_ca et total_profit (ventes complétées)
+        """
+        clause, params = self._history_filter(start_date, end_date, search, status)
+        profit_sum = f"SUM(CASE WHEN s.status = 'completed' THEN {_SALE_PROFIT_SQL} ELSE 0 END)" if with_profit else "0"
+        
+        query = f"""
+            SELECT COUNT(*) as sale_count,
+                   COALESCE(SUM(CASE WHEN s.status = 'completed' THEN s.total_amount ELSE 0 END), 0) as total_ca,
+                   COALESCE({profit_sum}, 0) as total_profit
+            {clause}
+        """
+        result = db.fetch_one(query, tuple(params))
+        
+        return {
+            'sale_count': result['sale_count'] if result else 0,
+            'total_ca': result['total_ca'] if result else 0.0,
+            'total_profit': result['total_profit'] if result else 0.0,
+        }
+    
     def get_sales_by_period(self, start_date: str, end_date: str,
                            cashier_id: int = None, 
                            customer_id: int = None) -> List[Dict]:
@@ -31,11 +148,11 @@ class SalesReportManager:
             FROM sales s
             LEFT JOIN users u ON s.cashier_id = u.id
             LEFT JOIN customers c ON s.customer_id = c.id
-            WHERE date(s.sale_date) BETWEEN ? AND ?
+            WHERE s.sale_date >= ? AND s.sale_date < ?
               AND s.status = 'completed'
         """
         
-        params = [start_date, end_date]
+        params = list(day_range(start_date, end_date))
         
         if cashier_id:
             query += " AND s.cashier_id = ?"
@@ -70,10 +187,10 @@ class SalesReportManager:
                 SUM(discount_amount) as total_discount,
                 AVG(total_amount) as average_sale
             FROM sales
-            WHERE date(sale_date) = ? AND status = 'completed'
+            WHERE sale_date >= ? AND sale_date < ? AND status = 'completed'
         """
         
-        result = db.fetch_one(query, (date,))
+        result = db.fetch_one(query, day_range(date))
         
         stats = {
             'date': date,
@@ -113,11 +230,11 @@ class SalesReportManager:
                 SUM(discount_amount) as total_discount,
                 AVG(total_amount) as average_sale
             FROM sales
-            WHERE date(sale_date) BETWEEN ? AND ?
+            WHERE sale_date >= ? AND sale_date < ?
               AND status = 'completed'
         """
         
-        result = db.fetch_one(query, (start_date, end_date))
+        result = db.fetch_one(query, day_range(start_date, end_date))
         
         stats = {
             'year': year,
@@ -150,13 +267,13 @@ class SalesReportManager:
                 AVG(s.total_amount) as average_sale
             FROM sales s
             JOIN users u ON s.cashier_id = u.id
-            WHERE date(s.sale_date) BETWEEN ? AND ?
+            WHERE s.sale_date >= ? AND s.sale_date < ?
               AND s.status = 'completed'
             GROUP BY u.id, u.full_name
             ORDER BY total_revenue DESC
         """
         
-        results = db.execute_query(query, (start_date, end_date))
+        results = db.execute_query(query, day_range(start_date, end_date))
         return [dict(row) for row in results]
     
     def get_sales_by_payment_method(self, start_date: str, end_date: str) -> List[Dict]:
@@ -176,13 +293,13 @@ class SalesReportManager:
                 COUNT(*) as sale_count,
                 SUM(total_amount) as total_amount
             FROM sales
-            WHERE date(sale_date) BETWEEN ? AND ?
+            WHERE sale_date >= ? AND sale_date < ?
               AND status = 'completed'
             GROUP BY payment_method
             ORDER BY total_amount DESC
         """
         
-        results = db.execute_query(query, (start_date, end_date))
+        results = db.execute_query(query, day_range(start_date, end_date))
         return [dict(row) for row in results]
     
     def get_top_selling_products(self, start_date: str, end_date: str, 
@@ -209,19 +326,19 @@ class SalesReportManager:
             FROM sale_items si
             JOIN products p ON si.product_id = p.id
             JOIN sales s ON si.sale_id = s.id
-            WHERE date(s.sale_date) BETWEEN ? AND ?
+            WHERE s.sale_date >= ? AND s.sale_date < ?
               AND s.status = 'completed'
             GROUP BY p.id, p.name, p.name_ar
             ORDER BY total_quantity DESC
             LIMIT ?
         """
         
-        results = db.execute_query(query, (start_date, end_date, limit))
+        results = db.execute_query(query, day_range(start_date, end_date) + (limit,))
         return [dict(row) for row in results]
     
     def get_sales_by_category(self, start_date: str, end_date: str) -> List[Dict]:
         """
-        Obtenir les ventes par catégorie
+        Obtenir les ventes par catégorie (lu depuis daily_rollup)
         
         Args:
             start_date: Date de début
@@ -235,20 +352,18 @@ class SalesReportManager:
                 c.id,
                 c.name as category_name,
                 c.name_ar as category_name_ar,
-                SUM(si.quantity) as total_quantity,
-                SUM(si.subtotal) as total_revenue,
-                COUNT(DISTINCT si.sale_id) as sale_count
-            FROM sale_items si
-            JOIN products p ON si.product_id = p.id
-            JOIN categories c ON p.category_id = c.id
-            JOIN sales s ON si.sale_id = s.id
-            WHERE date(s.sale_date) BETWEEN ? AND ?
-              AND s.status = 'completed'
+                SUM(r.quantity) as total_quantity,
+                SUM(r.subtotal) as total_revenue,
+                SUM(r.sale_count) as sale_count
+            FROM daily_rollup r
+            JOIN categories c ON r.category_id = c.id
+            WHERE r.day >= ? AND r.day < ?
             GROUP BY c.id, c.name, c.name_ar
+            HAVING SUM(r.sale_count) > 0
             ORDER BY total_revenue DESC
         """
         
-        results = db.execute_query(query, (start_date, end_date))
+        results = db.execute_query(query, day_range(start_date, end_date))
         return [dict(row) for row in results]
     
     def get_hourly_sales(self, date: str = None) -> List[Dict]:
@@ -270,12 +385,12 @@ class SalesReportManager:
                 COUNT(*) as sale_count,
                 SUM(total_amount) as total_revenue
             FROM sales
-            WHERE date(sale_date) = ? AND status = 'completed'
+            WHERE sale_date >= ? AND sale_date < ? AND status = 'completed'
             GROUP BY hour
             ORDER BY hour
         """
         
-        results = db.execute_query(query, (date,))
+        results = db.execute_query(query, day_range(date))
         return [dict(row) for row in results]
     
     def export_to_dict(self, start_date: str, end_date: str) -> Dict[str, Any]:
@@ -7,7 +7,16 @@ from modules.products.product_manager import product_manager
 
 
 class CartItem:
-    """Article dans le panier"""
+    """
+    Article dans le panier
+    
+    Sous-total et bénéfice sont calculés une fois, à la création et à chaque
+    changement de quantité ; le panier propriétaire ajuste alors ses totaux.
+    """
+    
+    __slots__ = ('product_id', 'product_name', 'product_name_ar', 'barcode', 'unit_price',
+                 'purchase_price', '_quantity', 'discount_percentage', 'is_on_promotion',
+                 'prevent_merge', 'category_id', '_subtotal', '_profit', '_cart', '_row')
     
     def __init__(self, product: Dict, quantity: float = 1.0, prevent_merge: bool = False):
         self.product_id = product['id']
@@ -16,22 +25,69 @@ class CartItem:
         self.barcode = product.get('barcode', '')
         self.unit_price = product['selling_price']
         self.purchase_price = product['purchase_price']
-        self.quantity = quantity
         self.discount_percentage = product.get('discount_percentage', 0.0)
         self.is_on_promotion = product.get('is_on_promotion', 0)
         self.prevent_merge = prevent_merge
         self.category_id = product.get('category_id') # Handle category for custom items
+        self._cart: Optional['Cart'] = None  # Panier propriétaire (totaux à tenir à jour)
+        self._row = -1  # Ligne dans le panier
+        self._quantity = quantity
+        self._compute()
+    
+    @property
+    def quantity(self) -> float:
+        return self._quantity
+    
+    @quantity.setter
+    def quantity(self, value: float):
+        cart = self._cart
+        if cart is not None:
+            cart._account(self, -1)
+        self._quantity = value
+        self._compute()
+        if cart is not None:
+            cart._account(self, 1)
+            if cart._observer is not None:
+                cart._observer.line_changed(self._row)
+    
+    def _compute(self):
+        selling = self.unit_price * (1 - self.discount_percentage / 100.0)
+        self._subtotal = round(selling * self._quantity, 2)
+        self._profit = round((selling - self.purchase_price) * self._quantity, 2)
         
     def get_subtotal(self) -> float:
         """Calculer le sous-total (avec réduction produit)"""
-        price = self.unit_price * (1 - self.discount_percentage / 100.0)
-        return round(price * self.quantity, 2)
+        return self._subtotal
     
     def get_profit(self) -> float:
         """Calculer le bénéfice sur cet article"""
-        selling = self.unit_price * (1 - self.discount_percentage / 100.0)
-        profit_per_unit = selling - self.purchase_price
-        return round(profit_per_unit * self.quantity, 2)
+        return self._profit
+    
+    # Ordre des valeurs de snapshot() (paniers en attente)
+    SNAPSHOT_FIELDS = ('product_id', 'product_name', 'product_name_ar', 'barcode', 'unit_price',
+                       'purchase_price', 'quantity', 'discount_percentage', 'is_on_promotion',
+                       'prevent_merge', 'category_id')
+    
+    def snapshot(self) -> list:
+        """Valeurs de la ligne dans l'ordre de SNAPSHOT_FIELDS (JSON compact)"""
+        return [getattr(self, field) for field in self.SNAPSHOT_FIELDS]
+    
+    @classmethod
+    def from_snapshot(cls, values: list) -> 'CartItem':
+        """Reconstruire une ligne enregistrée, sans relire le produit en base"""
+        line = dict(zip(cls.SNAPSHOT_FIELDS, values))
+        product = {
+            'id': line['product_id'],
+            'name': line['product_name'],
+            'name_ar': line['product_name_ar'],
+            'barcode': line['barcode'],
+            'selling_price': line['unit_price'],
+            'purchase_price': line['purchase_price'],
+            'discount_percentage': line['discount_percentage'],
+            'is_on_promotion': line['is_on_promotion'],
+            'category_id': line['category_id'],
+        }
+        return cls(product, line['quantity'], bool(line['prevent_merge']))
     
     def to_dict(self) -> Dict:
         """Convertir en dictionnaire"""
@@ -52,13 +108,105 @@ class CartItem:
 
 
 class Cart:
-    """Panier d'achat"""
+    """
+    Panier d'achat
+    
+    Les lignes sont indexées par produit et les totaux (en centimes, donc
+    exacts) sont tenus à jour à chaque ajout, retrait ou changement de
+    quantité : recherche d'une ligne et totaux en O(1), quelle que soit la
+    taille du panier. Seul le retrait renumérote les lignes qui suivent.
+    
+    Un observateur (set_observer) est prévenu ligne par ligne, avant et
+    après chaque insertion ou retrait, et après chaque changement de
+    quantité : l'affichage ne redessine que la ligne touchée.
+    """
     
     def __init__(self):
-        self.items: List[CartItem] = []
+        self._items: List[CartItem] = []
+        self._index: Dict[int, List[CartItem]] = {}  # product_id -> lignes, dans l'ordre du panier
+        self._subtotal_cents = 0
+        self._profit_cents = 0
+        self._quantity = 0.0
+        self._observer = None  # Voir set_observer
         self.discount_percentage = 0.0  # Réduction globale
         self.discount_amount = 0.0  # Réduction en montant fixe
     
+    @property
+    def items(self) -> List[CartItem]:
+        """Lignes dans l'ordre d'ajout (ne pas modifier la liste : passer par les méthodes du panier)"""
+        return self._items
+    
+    @items.setter
+    def items(self, items: List[CartItem]):
+        observer = self._observer
+        if observer is not None:
+            observer.lines_resetting()
+        for item in self._items:
+            item._cart = None
+        self._items = []
+        self._index = {}
+        self._subtotal_cents = 0
+        self._profit_cents = 0
+        self._quantity = 0.0
+        self._observer = None  # Une seule notification pour tout le lot
+        for item in items:
+            self._append(item)
+        self._observer = observer
+        if observer is not None:
+            observer.lines_reset()
+    
+    def set_observer(self, observer):
+        """
+        Brancher (ou débrancher avec None) l'observateur des lignes
+        
+        L'observateur fournit lines_inserting(row) / lines_inserted(),
+        lines_removing(row) / lines_removed(), line_changed(row) et
+        lines_resetting() / lines_reset() (voir ui/table_models.CartTableModel).
+        """
+        self._observer = observer
+    
+    def _account(self, item: CartItem, sign: int):
+        """Ajouter (sign=1) ou retirer (sign=-1) la contribution d'une ligne aux totaux"""
+        self._subtotal_cents += sign * round(item._subtotal * 100)
+        self._profit_cents += sign * round(item._profit * 100)
+        self._quantity += sign * item._quantity
+    
+    def _append(self, item: CartItem):
+        observer = self._observer
+        if observer is not None:
+            observer.lines_inserting(len(self._items))
+        item._cart = self
+        item._row = len(self._items)
+        self._items.append(item)
+        self._index.setdefault(item.product_id, []).append(item)
+        self._account(item, 1)
+        if observer is not None:
+            observer.lines_inserted()
+    
+    def _remove(self, item: CartItem) -> int:
+        """Retirer une ligne ; retourne son ancienne position"""
+        row = item._row
+        observer = self._observer
+        if observer is not None:
+            observer.lines_removing(row)
+        del self._items[row]
+        for later in self._items[row:]:
+            later._row -= 1
+        lines = self._index[item.product_id]
+        lines.remove(item)
+        if not lines:
+            del self._index[item.product_id]
+        self._account(item, -1)
+        item._cart = None
+        if observer is not None:
+            observer.lines_removed()
+        return row
+    
+    def find_item(self, product_id: int) -> Optional[CartItem]:
+        """Première ligne du produit, ou None"""
+        lines = self._index.get(product_id)
+        return lines[0] if lines else None
+    
     def _check_stock(self, product: Dict, quantity: float) -> tuple[bool, str]:
         """Check if stock (including parent packs) is sufficient"""
         current_stock = product['stock_quantity']
@@ -109,24 +257,21 @@ class Cart:
 
         
         # Vérifier si le produit est déjà dans le panier (sauf si prevent_merge)
-        if not prevent_merge:
-            for item in self.items:
-                if item.product_id == product['id']:
-                    # Vérifier le stock total
-                    # Vérifier le stock total
-                    new_quantity = item.quantity + quantity
-                    
-                    # Smart Stock Check
-                    is_valid, msg = self._check_stock(product, new_quantity)
-                    if not is_valid:
-                        return False, msg
-                    
-                    item.quantity = new_quantity
-                    return True, f"Quantité mise à jour: {new_quantity}"
+        item = None if prevent_merge else self.find_item(product['id'])
+        if item is not None:
+            # Vérifier le stock total
+            new_quantity = item.quantity + quantity
+            
+            # Smart Stock Check
+            is_valid, msg = self._check_stock(product, new_quantity)
+            if not is_valid:
+                return False, msg
+            
+            item.quantity = new_quantity
+            return True, f"Quantité mise à jour: {new_quantity}"
         
         # Ajouter un nouvel article
-        cart_item = CartItem(product, quantity, prevent_merge)
-        self.items.append(cart_item)
+        self._append(CartItem(product, quantity, prevent_merge))
         return True, "Article ajouté au panier"
     
     def remove_item(self, product_id: int) -> tuple[bool, str]:
@@ -139,12 +284,12 @@ class Cart:
         Returns:
             (success, message)
         """
-        for i, item in enumerate(self.items):
-            if item.product_id == product_id:
-                self.items.pop(i)
-                return True, "Article retiré du panier"
+        item = self.find_item(product_id)
+        if item is None:
+            return False, "Article introuvable dans le panier"
         
-        return False, "Article introuvable dans le panier"
+        self._remove(item)
+        return True, "Article retiré du panier"
     
     def update_quantity(self, product_id: int, quantity: float) -> tuple[bool, str]:
         """
@@ -160,20 +305,19 @@ class Cart:
         if quantity <= 0:
             return self.remove_item(product_id)
         
-        for item in self.items:
-            if item.product_id == product_id:
-                # Vérifier le stock
-                # Vérifier le stock
-                product = product_manager.get_product(product_id)
-                if product:
-                    is_valid, msg = self._check_stock(product, quantity)
-                    if not is_valid:
-                        return False, msg
-                
-                item.quantity = quantity
-                return True, f"Quantité mise à jour: {quantity}"
+        item = self.find_item(product_id)
+        if item is None:
+            return False, "Article introuvable dans le panier"
         
-        return False, "Article introuvable dans le panier"
+        # Vérifier le stock
+        product = product_manager.get_product(product_id)
+        if product:
+            is_valid, msg = self._check_stock(product, quantity)
+            if not is_valid:
+                return False, msg
+        
+        item.quantity = quantity
+        return True, f"Quantité mise à jour: {quantity}"
     
     def clear(self):
         """Vider le panier"""
@@ -187,11 +331,11 @@ class Cart:
     
     def get_total_quantity(self) -> float:
         """Obtenir la quantité totale d'articles"""
-        return sum(item.quantity for item in self.items)
+        return self._quantity
     
     def get_subtotal(self) -> float:
         """Calculer le sous-total (avant réduction globale)"""
-        return round(sum(item.get_subtotal() for item in self.items), 2)
+        return self._subtotal_cents / 100
     
     def set_discount_percentage(self, percentage: float) -> tuple[bool, str]:
         """
@@ -248,7 +392,7 @@ class Cart:
     
     def get_total_profit(self) -> float:
         """Calculer le bénéfice total"""
-        return round(sum(item.get_profit() for item in self.items), 2)
+        return self._profit_cents / 100
     
     def to_dict(self) -> Dict:
         """Convertir le panier en dictionnaire"""
@@ -263,6 +407,20 @@ class Cart:
             'profit': self.get_total_profit(),
         }
     
+    def snapshot(self) -> List[list]:
+        """Lignes du panier pour l'enregistrement (voir CartItem.SNAPSHOT_FIELDS)"""
+        return [item.snapshot() for item in self._items]
+    
+    @classmethod
+    def from_snapshot(cls, lines: List[list], discount_percentage: float = 0.0,
+                      discount_amount: float = 0.0) -> 'Cart':
+        """Reconstruire un panier enregistré (réductions globales comprises)"""
+        cart = cls()
+        cart.items = [CartItem.from_snapshot(values) for values in lines]
+        cart.discount_percentage = discount_percentage
+        cart.discount_amount = discount_amount
+        return cart
+    
     def is_empty(self) -> bool:
         """Vérifier si le panier est vide"""
         return len(self.items) == 0
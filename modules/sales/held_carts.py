@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+Paniers en attente enregistrés en base (table held_carts)
+
+Chaque mise en attente est écrite aussitôt : un crash ou une déconnexion
+ne perd plus les paniers suspendus, qui sont repris au démarrage et
+visibles de toutes les caisses partageant la base. Les lignes sont
+stockées en JSON compact (Cart.snapshot) avec leurs prix : la reprise
+reconstruit le panier sans relire les produits.
+
+La liste (get_all) ne lit que les colonnes de résumé ; la reprise (claim)
+lit et supprime la ligne dans une même transaction, si bien que deux
+caisses ne peuvent pas reprendre le même panier.
+"""
+import json
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from database.db_manager import db
+from .cart import Cart
+
+
+_SUMMARY_COLUMNS = "id, register_number, customer_id, customer_name, item_count, total, held_at"
+
+
+class HeldCartStore:
+    """Paniers en attente partagés entre caisses"""
+
+    def hold(self, cart: Cart, register_number: int, customer_name: str = "",
+             customer_data: Optional[Dict] = None) -> int:
+        """
+        Enregistrer un panier en attente
+
+        Args:
+            cart: Panier à suspendre
+            register_number: Caisse qui le met en attente
+            customer_name: Nom affiché ("Client #id" si vide)
+            customer_data: Client associé (restauré à la reprise)
+
+        Returns:
+            ID du panier en attente
+        """
+        return db.execute_insert(
+            """
+            INSERT INTO held_carts (register_number, customer_id, customer_name, customer_data, items,
+                                    discount_percentage, discount_amount, item_count, total, held_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (register_number,
+             customer_data.get('id') if customer_data else None,
+             customer_name or "",
+             json.dumps(customer_data, ensure_ascii=False, default=str) if customer_data else None,
+             json.dumps(cart.snapshot(), ensure_ascii=False, separators=(',', ':')),
+             cart.discount_percentage,
+             cart.discount_amount,
+             cart.get_item_count(),
+             cart.get_total(),
+             datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+        )
+
+    def get_all(self, customer_id: Optional[int] = None) -> List[Dict]:
+        """
+        Résumé des paniers en attente, du plus ancien au plus récent
+
+        Args:
+            customer_id: Seulement les paniers de ce client (index customer_id)
+
+        Returns:
+            Liste de dicts : id, register_number, customer_id, customer_name,
+            item_count, total, timestamp (datetime)
+        """
+        if customer_id is None:
+            rows = db.execute_query(f"SELECT {_SUMMARY_COLUMNS} FROM held_carts ORDER BY id")
+        else:
+            rows = db.execute_query(
+                f"SELECT {_SUMMARY_COLUMNS} FROM held_carts WHERE customer_id = ? ORDER BY id",
+                (customer_id,)
+            )
+        return [self._summary(row) for row in rows]
+
+    def count(self) -> int:
+        """Nombre de paniers en attente (toutes caisses)"""
+        row = db.fetch_one("SELECT COUNT(*) AS count FROM held_carts")
+        return row['count'] if row else 0
+
+    def claim(self, held_cart_id: int) -> Optional[Tuple[Cart, Optional[Dict]]]:
+        """
+        Reprendre un panier : le lire et le retirer de la liste
+
+        Returns:
+            (panier, données client), ou None si introuvable (déjà repris
+            ou supprimé par une autre caisse)
+        """
+        with db.transaction():
+            row = db.fetch_one(
+                "SELECT items, customer_data, discount_percentage, discount_amount "
+                "FROM held_carts WHERE id = ?", (held_cart_id,)
+            )
+            if row is None:
+                return None
+            db.execute_update("DELETE FROM held_carts WHERE id = ?", (held_cart_id,))
+
+        cart = Cart.from_snapshot(json.loads(row['items']),
+                                  row['discount_percentage'], row['discount_amount'])
+        customer_data = json.loads(row['customer_data']) if row['customer_data'] else None
+        return cart, customer_data
+
+    def delete(self, held_cart_id: int) -> bool:
+        """Supprimer un panier en attente ; False s'il n'existe plus"""
+        return db.execute_update("DELETE FROM held_carts WHERE id = ?", (held_cart_id,)) > 0
+
+    @staticmethod
+    def _summary(row) -> Dict:
+        held = dict(row)
+        held['customer_name'] = held['customer_name'] or f"Client #{held['id']}"
+        held['timestamp'] = datetime.strptime(held.pop('held_at'), "%Y-%m-%d %H:%M:%S")
+        return held
+
+
+# Instance globale
+held_cart_store = HeldCartStore()
@@ -2,13 +2,19 @@
 """
 Gestionnaire de point de vente (POS - Point Of Sale)
 """
+import sqlite3
+import time
 from typing import Dict, Optional, List
 from datetime import datetime
 from database.db_manager import db
 from core.logger import logger
 from core.data_signals import data_signals
 from modules.products.product_manager import product_manager
+from modules.products.product_cache import product_cache
+from modules.reports.daily_rollup import daily_rollup
 from .cart import Cart
+from .held_carts import held_cart_store
+from .sequences import document_sequences
 import config
 
 
@@ -17,9 +23,8 @@ class POSManager:
     
     def __init__(self):
         self.current_cart = Cart()
-        self.held_carts = []  # List of held carts: [{id, cart, customer_name, timestamp}]
-        self.held_cart_counter = 0
-        self.register_number = 1  # Numéro de caisse
+        self.register_number = config.POS_CONFIG['register_number']  # Numéro de caisse
+        self.last_checkout_metrics: Dict[str, float] = {}  # Durées (ms) de la dernière vente
     
     def set_register_number(self, register_number: int):
         """Définir le numéro de caisse"""
@@ -37,6 +42,9 @@ class POSManager:
         """
         Mettre le panier en attente (hold)
         
+        Le panier est enregistré en base (held_carts) : il survit à un crash
+        ou à une déconnexion et peut être repris depuis une autre caisse.
+        
         Args:
             customer_name: Nom du client (optionnel)
             customer_data: Données du client (pour restauration)
@@ -47,27 +55,22 @@ class POSManager:
         if self.current_cart.is_empty():
             return False, "Le panier est vide"
         
-        self.held_cart_counter += 1
-        held_cart = {
-            'id': self.held_cart_counter,
-            'cart': self.current_cart,
-            'customer_name': customer_name or f"Client #{self.held_cart_counter}",
-            'customer_data': customer_data,
-            'timestamp': datetime.now(),
-            'total': self.current_cart.get_total(),
-            'item_count': self.current_cart.get_item_count()
-        }
-        self.held_carts.append(held_cart)
+        try:
+            held_cart_id = held_cart_store.hold(self.current_cart, self.register_number,
+                                                customer_name, customer_data)
+        except sqlite3.Error as e:
+            logger.error(f"Erreur mise en attente du panier: {e}")
+            return False, f"Erreur: {str(e)}"
         
         # Start a new cart
         self.current_cart = Cart()
         
-        logger.info(f"Panier mis en attente: #{held_cart['id']}")
-        return True, f"Panier #{held_cart['id']} mis en attente"
+        logger.info(f"Panier mis en attente: #{held_cart_id}")
+        return True, f"Panier #{held_cart_id} mis en attente"
     
-    def get_held_carts(self) -> list:
-        """Obtenir la liste des paniers en attente"""
-        return self.held_carts
+    def get_held_carts(self, customer_id: Optional[int] = None) -> list:
+        """Obtenir la liste des paniers en attente (toutes caisses, résumé sans les lignes)"""
+        return held_cart_store.get_all(customer_id)
     
     def retrieve_cart(self, held_cart_id: int, current_customer_data: Optional[Dict] = None) -> tuple[bool, str, Optional[Dict]]:
         """
@@ -80,44 +83,28 @@ class POSManager:
         Returns:
             (success, message, retrieved_customer_data)
         """
-        # Check if current cart has items
-        if not self.current_cart.is_empty():
-            # Put current cart on hold first
-            self.held_cart_counter += 1
-            
-            # Determine name for current cart being auto-held
-            cust_name = f"Client #{self.held_cart_counter}"
-            if current_customer_data:
-                cust_name = current_customer_data.get('full_name', cust_name)
-            
-            held_current = {
-                'id': self.held_cart_counter,
-                'cart': self.current_cart,
-                'customer_name': cust_name,
-                'customer_data': current_customer_data,
-                'timestamp': datetime.now(),
-                'total': self.current_cart.get_total(),
-                'item_count': self.current_cart.get_item_count()
-            }
-            self.held_carts.append(held_current)
-        
-        # Find and retrieve the requested cart
-        for i, held in enumerate(self.held_carts):
-            if held['id'] == held_cart_id:
-                self.current_cart = held['cart']
-                customer_data = held.get('customer_data')
-                self.held_carts.pop(i)
-                logger.info(f"Panier récupéré: #{held_cart_id}")
-                return True, f"Panier #{held_cart_id} récupéré", customer_data
-        
-        return False, "Panier en attente introuvable", None
+        try:
+            # Échange : le panier actuel est mis en attente dans la même transaction
+            with db.transaction():
+                claimed = held_cart_store.claim(held_cart_id)
+                if claimed is None:
+                    return False, "Panier en attente introuvable", None
+                if not self.current_cart.is_empty():
+                    cust_name = current_customer_data.get('full_name', "") if current_customer_data else ""
+                    held_cart_store.hold(self.current_cart, self.register_number,
+                                         cust_name, current_customer_data)
+        except sqlite3.Error as e:
+            logger.error(f"Erreur reprise du panier #{held_cart_id}: {e}")
+            return False, f"Erreur: {str(e)}", None
+        
+        self.current_cart, customer_data = claimed
+        logger.info(f"Panier récupéré: #{held_cart_id}")
+        return True, f"Panier #{held_cart_id} récupéré", customer_data
     
     def delete_held_cart(self, held_cart_id: int) -> tuple[bool, str]:
         """Supprimer un panier en attente"""
-        for i, held in enumerate(self.held_carts):
-            if held['id'] == held_cart_id:
-                self.held_carts.pop(i)
-                return True, "Panier supprimé"
+        if held_cart_store.delete(held_cart_id):
+            return True, "Panier supprimé"
         return False, "Panier introuvable"
     
     def add_product_by_barcode(self, barcode: str, quantity: float = 1.0) -> tuple[bool, str]:
@@ -227,6 +214,16 @@ class POSManager:
         """
         Finaliser la vente
         
+        Toute la vente est écrite dans une seule transaction : en-tête, lignes
+        (un seul executemany), stock (une lecture groupée des produits et de
+        leurs paquets parents, une mise à jour groupée) et crédit client.
+        Les durées de chaque phase sont disponibles dans last_checkout_metrics.
+        
+        Plusieurs caisses peuvent partager la base : la transaction prend le
+        verrou d'écriture avant de lire le stock (ouverture de paquets décidée
+        sur un état que personne d'autre ne modifie), et le stock est écrit
+        en relatif (stock_quantity + delta), jamais en valeur absolue.
+        
         Args:
             cashier_id: ID du vendeur
             payment_method: Méthode de paiement ('cash', 'credit', 'partial')
@@ -239,158 +236,138 @@ class POSManager:
         """
         if not self.current_cart.items:
             return False, "Panier vide", 0
-            
+        
+        metrics = {}
+        started = time.perf_counter()
+        conn = db.get_connection()
+        
         try:
-            # 1. Générer code de vente
-            sale_code = f"SLE-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
             sale_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             
-            # 2. Insérer la vente
-            # Use schema column names: sale_number (not code), cashier_id (not user_id)
+            # 1. Préparer les lignes (résolution unique du produit Divers)
+            items = list(self.current_cart.items)
+            divers_id = None
+            if any(not item.product_id or item.product_id <= 0 for item in items):
+                divers_id = self._get_divers_product_id()
             
-            sale_query = """
-                INSERT INTO sales (sale_number, cashier_id, customer_id, subtotal, total_amount, payment_method, sale_date, status)
-                VALUES (?, ?, ?, ?, ?, ?, ?, 'completed')
-            """
-            subtotal = total_amount  # For simplicity, subtotal = total (no tax/discount breakdown here)
-            sale_id = db.execute_insert(sale_query, (
-                sale_code, cashier_id, customer_id, subtotal, total_amount, payment_method, sale_date
-            ))
+            phase_start = time.perf_counter()
+            metrics['prepare_ms'] = (phase_start - started) * 1000
             
-            if not sale_id:
-                return False, "Erreur lors de la création de la vente", 0
-                
-            # 3. Insérer les articles de vente et mettre à jour le stock
-            for item in self.current_cart.items:
-                product_id = item.product_id
-                # Ensure we have a valid product ID to satisfy FOREIGN KEY and NOT NULL constraints
-                # If product_id is invalid (custom/shortcut), use 'Produit Divers'
-                if product_id and product_id > 0:
-                     db_product_id = product_id
-                else:
-                     # Fallback to "Produit Divers"
-                     divers = product_manager.get_product_by_name("Produit Divers")
-                     if divers:
-                         db_product_id = divers['id']
-                     else:
-                         # Emergency fallback if Divers database entry missing (should not happen)
-                         # Try to find ANY valid product to attach to or fail gracefully
-                         # For now, log error and try generic fallback if possible, else 1
-                         logger.error("Produit Divers not found for custom item sale!")
-                         db_product_id = 1 # Hope ID 1 exists
-                
-                # Double check to ensure we never have None or 0
-                if not db_product_id or db_product_id <= 0:
-                     db_product_id = 1
-                product_name = item.product_name
-                barcode = item.barcode
-                quantity = item.quantity
-                unit_price = item.unit_price  # Prix de vente unitaire
-                purchase_price = item.purchase_price
-                subtotal = item.get_subtotal()  # Calculé via méthode
-                discount_percentage = item.discount_percentage
-                discount_percentage = item.discount_percentage
-                # Handle optional category_id
-                category_id = getattr(item, 'category_id', None)
-                # Ensure category_id is valid (None if 0 or falsey to avoid FK violation)
-                if not category_id or category_id == 0:
-                    category_id = None
-                
-                # Insertion article avec tous les champs requis
+            # Verrou d'écriture dès le début : lecture du stock et écritures
+            # voient le même état, et un crash ne laisse aucune vente partielle
+            with db.transaction():
+                cursor = conn.cursor()
+                
+                # 2. Numéro de ticket : compteur de la caisse, pris dans la transaction
+                sale_code = self._generate_sale_code()
+                
+                # 3. Lecture groupée du stock (produits + paquets parents)
+                stock_rows = self._fetch_stock_rows(
+                    cursor, {item.product_id for item in items if item.product_id and item.product_id > 0}
+                )
+                parent_ids = {row['parent_product_id'] for row in stock_rows.values()
+                              if row['parent_product_id']} - set(stock_rows)
+                stock_rows.update(self._fetch_stock_rows(cursor, parent_ids))
+                
+                now = time.perf_counter()
+                metrics['stock_read_ms'] = (now - phase_start) * 1000
+                phase_start = now
+                
+                # 4. Calcul du nouveau stock (logique tabac : paquet -> unités)
+                stock = {pid: row['stock_quantity'] for pid, row in stock_rows.items()}
+                touched = set()
+                for item in items:
+                    if item.product_id and item.product_id > 0 and item.product_id in stock_rows:
+                        self._apply_stock_movement(stock_rows[item.product_id], item.quantity, stock, touched)
+                
+                now = time.perf_counter()
+                metrics['stock_compute_ms'] = (now - phase_start) * 1000
+                phase_start = now
+                
+                # 5. Insérer la vente
+                # Use schema column names: sale_number (not code), cashier_id (not user_id)
+                sale_query = """
+                    INSERT INTO sales (sale_number, cashier_id, customer_id, subtotal, total_amount, payment_method, sale_date, status)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, 'completed')
+                """
+                subtotal = total_amount  # For simplicity, subtotal = total (no tax/discount breakdown here)
+                cursor.execute(sale_query, (
+                    sale_code, cashier_id, customer_id, subtotal, total_amount, payment_method, sale_date
+                ))
+                sale_id = cursor.lastrowid
+                
+                if not sale_id:
+                    raise sqlite3.Error("Erreur lors de la création de la vente")
+                
+                # 6. Insérer toutes les lignes en une fois
                 item_query = """
                     INSERT INTO sale_items (sale_id, product_id, product_name, barcode, quantity, unit_price, discount_percentage, subtotal, purchase_price, category_id)
                     VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                 """
-                db.execute_insert(item_query, (sale_id, db_product_id, product_name, barcode, quantity, unit_price, discount_percentage, subtotal, purchase_price, category_id))
-                
-                # Mise à jour stock with SMART TOBACCO LOGIC
-                if product_id > 0: # Si ce n'est pas un produit divers
-                    # Fetch product details including parent link
-                    product_query = """
-                        SELECT id, stock_quantity, parent_product_id, packing_quantity 
-                        FROM products WHERE id = ?
-                    """
-                    product_res = db.fetch_one(product_query, (product_id,))
+                cursor.executemany(item_query, [
+                    (sale_id, self._resolve_db_product_id(item.product_id, divers_id),
+                     item.product_name, item.barcode, item.quantity, item.unit_price,
+                     item.discount_percentage, item.get_subtotal(), item.purchase_price,
+                     getattr(item, 'category_id', None) or None)
+                    for item in items
+                ])
+                
+                # 7. Mise à jour groupée du stock, relative : les autres caisses
+                # écrivent sur la même base. Les deltas viennent d'un état lu
+                # sous verrou et borné à 0 (étape 4) : pas de stock négatif.
+                deltas = [(stock[pid] - stock_rows[pid]['stock_quantity'], pid) for pid in touched]
+                deltas = [(delta, pid) for delta, pid in deltas if delta]
+                if deltas:
+                    cursor.executemany(
+                        "UPDATE products SET stock_quantity = stock_quantity + ? WHERE id = ?",
+                        deltas
+                    )
+                
+                # 8. Agrégats journaliers des rapports
+                daily_rollup.apply_sale(cursor, sale_id)
+                
+                # 9. Gérer le crédit client si nécessaire
+                # Handle partial payment: use credit_amount if provided, else full total for credit
+                actual_credit = credit_amount if credit_amount is not None else total_amount
+                
+                if (payment_method in ('credit', 'mixed')) and customer_id and actual_credit > 0:
+                    # Mettre à jour la dette du client
+                    update_credit_query = "UPDATE customers SET current_credit = current_credit + ? WHERE id = ?"
+                    cursor.execute(update_credit_query, (actual_credit, customer_id))
                     
-                    if product_res:
-                        current_stock = product_res['stock_quantity']
-                        parent_id = product_res['parent_product_id']
-                        packing_qty = product_res['packing_quantity'] or 20
-                        
-                        qty_to_deduct = quantity
-                        
-                        # SMART LOGIC: If this product has a parent (e.g., Single -> Pack)
-                        if parent_id:
-                            # Check if qty >= packing_quantity -> sell full packs directly
-                            if quantity >= packing_qty:
-                                # Sell full packs from parent
-                                full_packs = int(quantity // packing_qty)
-                                remaining_singles = quantity % packing_qty
-                                
-                                # Deduct full packs from parent
-                                parent_stock_query = "SELECT stock_quantity FROM products WHERE id = ?"
-                                parent_res = db.fetch_one(parent_stock_query, (parent_id,))
-                                if parent_res and parent_res['stock_quantity'] >= full_packs:
-                                    new_parent_stock = parent_res['stock_quantity'] - full_packs
-                                    db.execute_update("UPDATE products SET stock_quantity = ? WHERE id = ?", 
-                                                     (new_parent_stock, parent_id))
-                                    logger.info(f"Sold {full_packs} packs from parent ID {parent_id}")
-                                
-                                # Handle remaining singles
-                                qty_to_deduct = remaining_singles
-                            
-                            # If we still need singles and current stock is insufficient
-                            if qty_to_deduct > 0 and current_stock < qty_to_deduct:
-                                # Need to open packs
-                                shortage = qty_to_deduct - current_stock
-                                packs_needed = (shortage + packing_qty - 1) // packing_qty  # Ceiling division
-                                
-                                # Check parent has enough packs
-                                parent_stock_query = "SELECT stock_quantity FROM products WHERE id = ?"
-                                parent_res = db.fetch_one(parent_stock_query, (parent_id,))
-                                
-                                if parent_res and parent_res['stock_quantity'] >= packs_needed:
-                                    # Deduct packs from parent
-                                    new_parent_stock = parent_res['stock_quantity'] - packs_needed
-                                    db.execute_update("UPDATE products SET stock_quantity = ? WHERE id = ?", 
-                                                     (new_parent_stock, parent_id))
-                                    
-                                    # Add singles to this product (the opened packs)
-                                    singles_added = packs_needed * packing_qty
-                                    current_stock += singles_added
-                                    logger.info(f"Auto-opened {packs_needed} pack(s), added {singles_added} singles to product {product_id}")
-                        
-                        # Final stock update for this product
-                        new_stock = current_stock - qty_to_deduct
-                        if new_stock < 0:
-                            new_stock = 0  # Safety: never go negative
-                        db.execute_update("UPDATE products SET stock_quantity = ? WHERE id = ?", 
-                                         (new_stock, product_id))
+                    # Enregistrer la transaction de crédit
+                    credit_trans_query = """
+                        INSERT INTO customer_credit_transactions (customer_id, transaction_type, amount, transaction_date, notes, processed_by)
+                        VALUES (?, 'credit_sale', ?, ?, ?, ?)
+                    """
+                    cash_paid = total_amount - actual_credit
+                    note = f"Achat {sale_code}" if payment_method == 'credit' else f"Achat {sale_code} (Payé: {cash_paid:.2f} DA)"
+                    cursor.execute(credit_trans_query, (
+                        customer_id, actual_credit, sale_date, note, cashier_id
+                    ))
+                
+                now = time.perf_counter()
+                metrics['write_ms'] = (now - phase_start) * 1000
+                phase_start = now
             
-            # 4. Gérer le crédit client si nécessaire
-            # Handle partial payment: use credit_amount if provided, else full total for credit
-            actual_credit = credit_amount if credit_amount is not None else total_amount
+            # Validation à la sortie du bloc
+            metrics['commit_ms'] = (time.perf_counter() - phase_start) * 1000
             
-            if (payment_method in ('credit', 'mixed')) and customer_id and actual_credit > 0:
-                # Mettre à jour la dette du client
-                update_credit_query = "UPDATE customers SET current_credit = current_credit + ? WHERE id = ?"
-                db.execute_update(update_credit_query, (actual_credit, customer_id))
-                
-                # Enregistrer la transaction de crédit
-                credit_trans_query = """
-                    INSERT INTO customer_credit_transactions (customer_id, transaction_type, amount, transaction_date, notes, processed_by)
-                    VALUES (?, 'credit_sale', ?, ?, ?, ?)
-                """
-                cash_paid = total_amount - actual_credit
-                note = f"Achat {sale_code}" if payment_method == 'credit' else f"Achat {sale_code} (Payé: {cash_paid:.2f} DA)"
-                db.execute_insert(credit_trans_query, (
-                    customer_id, actual_credit, sale_date, note, cashier_id
-                ))
-
-            # 5. Vider le panier
+            # Le prochain scan doit voir le stock à jour
+            product_cache.invalidate(touched)
+            
+            metrics['total_ms'] = (time.perf_counter() - started) * 1000
+            metrics['line_count'] = len(items)
+            self.last_checkout_metrics = metrics
+            
+            # 10. Vider le panier
             self.new_sale()
             
             logger.info(f"Vente finalisée: {sale_code} (ID: {sale_id})")
+            data_signals.notify('sale', [sale_id])
+            data_signals.notify('product', touched)
+            if customer_id:
+                data_signals.notify('customer', [customer_id])
             data_signals.sale_completed.emit()
             data_signals.sales_changed.emit()
             data_signals.inventory_changed.emit()
@@ -402,6 +379,100 @@ class POSManager:
         except Exception as e:
             logger.error(f"Erreur lors de la finalisation de la vente: {e}")
             return False, f"Erreur système: {str(e)}", 0
+    
+    def _generate_sale_code(self) -> str:
+        """Générer le numéro de ticket (format SLE-AAAAMMJJ-CC-NNNN, dans la transaction de la vente)"""
+        return document_sequences.next_number(document_sequences.SALE, self.register_number)
+    
+    def _get_divers_product_id(self) -> int:
+        """Obtenir l'ID du produit 'Produit Divers' utilisé pour les articles personnalisés"""
+        divers = product_manager.get_product_by_name("Produit Divers")
+        if divers:
+            return divers['id']
+        # Emergency fallback if Divers database entry missing (should not happen)
+        logger.error("Produit Divers not found for custom item sale!")
+        return 1  # Hope ID 1 exists
+    
+    @staticmethod
+    def _resolve_db_product_id(product_id: int, divers_id: Optional[int]) -> int:
+        """
+        Ensure we have a valid product ID to satisfy FOREIGN KEY and NOT NULL constraints.
+        If product_id is invalid (custom/shortcut), use 'Produit Divers'.
+        """
+        if product_id and product_id > 0:
+            return product_id
+        return divers_id if divers_id and divers_id > 0 else 1
+    
+    @staticmethod
+    def _fetch_stock_rows(cursor, product_ids) -> Dict[int, Dict]:
+        """Lire en une requête le stock et le lien paquet de plusieurs produits"""
+        if not product_ids:
+            return {}
+        ids = list(product_ids)
+        placeholders = ",".join("?" * len(ids))
+        cursor.execute(f"""
+            SELECT id, stock_quantity, parent_product_id, packing_quantity
+            FROM products WHERE id IN ({placeholders})
+        """, ids)
+        return {row['id']: dict(row) for row in cursor.fetchall()}
+    
+    @staticmethod
+    def _apply_stock_movement(product: Dict, quantity: float, stock: Dict[int, float], touched: set):
+        """
+        Appliquer la vente d'une ligne sur l'état de stock en mémoire
+        
+        Reprend la logique tabac : vente de paquets complets depuis le parent
+        et ouverture automatique de paquets si les unités manquent.
+        
+        Args:
+            product: Ligne produit (id, parent_product_id, packing_quantity)
+            quantity: Quantité vendue
+            stock: Stock courant par ID produit (modifié sur place)
+            touched: IDs des produits dont le stock a changé (modifié sur place)
+        """
+        product_id = product['id']
+        parent_id = product['parent_product_id']
+        packing_qty = product['packing_quantity'] or 20
+        current_stock = stock[product_id]
+        qty_to_deduct = quantity
+        
+        # SMART LOGIC: If this product has a parent (e.g., Single -> Pack)
+        if parent_id:
+            # Check if qty >= packing_quantity -> sell full packs directly
+            if quantity >= packing_qty:
+                full_packs = int(quantity // packing_qty)
+                remaining_singles = quantity % packing_qty
+                
+                # Deduct full packs from parent
+                if parent_id in stock and stock[parent_id] >= full_packs:
+                    stock[parent_id] -= full_packs
+                    touched.add(parent_id)
+                    logger.info(f"Sold {full_packs} packs from parent ID {parent_id}")
+                
+                # Handle remaining singles
+                qty_to_deduct = remaining_singles
+            
+            # If we still need singles and current stock is insufficient
+            if qty_to_deduct > 0 and current_stock < qty_to_deduct:
+                # Need to open packs
+                shortage = qty_to_deduct - current_stock
+                packs_needed = (shortage + packing_qty - 1) // packing_qty  # Ceiling division
+                
+                if parent_id in stock and stock[parent_id] >= packs_needed:
+                    stock[parent_id] -= packs_needed
+                    touched.add(parent_id)
+                    
+                    # Add singles to this product (the opened packs)
+                    singles_added = packs_needed * packing_qty
+                    current_stock += singles_added
+                    logger.info(f"Auto-opened {packs_needed} pack(s), added {singles_added} singles to product {product_id}")
+        
+        # Final stock update for this product
+        new_stock = current_stock - qty_to_deduct
+        if new_stock < 0:
+            new_stock = 0  # Safety: never go negative
+        stock[product_id] = new_stock
+        touched.add(product_id)
 
     def get_sale(self, sale_id: int) -> Optional[Dict]:
         """Récupérer détails d'une vente pour reçu"""
@@ -457,29 +528,31 @@ class POSManager:
             (success, message)
         """
         try:
-            # Vérifier que la vente existe
-            sale_query = "SELECT * FROM sales WHERE id = ?"
-            sale = db.fetch_one(sale_query, (sale_id,))
-            
-            if not sale:
-                return False, "Vente introuvable"
-            
-            if sale['status'] != 'completed':
-                return False, "Cette vente est déjà annulée ou retournée"
-            
-            db.begin_transaction()
-            
-            try:
+            with db.transaction() as conn:
+                # Relue sous verrou : deux caisses ne peuvent pas annuler la même vente
+                sale_query = "SELECT * FROM sales WHERE id = ?"
+                sale = db.fetch_one(sale_query, (sale_id,))
+                
+                if not sale:
+                    return False, "Vente introuvable"
+                
+                if sale['status'] != 'completed':
+                    return False, "Cette vente est déjà annulée ou retournée"
+                
+                # Retirer la vente des agrégats avant de changer son statut
+                daily_rollup.apply_sale(conn.cursor(), sale_id, -1)
+                
                 # Marquer la vente comme annulée
                 update_query = "UPDATE sales SET status = 'cancelled' WHERE id = ?"
                 db.execute_update(update_query, (sale_id,))
                 
-                # Restaurer le stock
+                # Restaurer le stock (mise à jour relative groupée)
                 items_query = "SELECT product_id, quantity FROM sale_items WHERE sale_id = ?"
-                items = db.execute_query(items_query, (sale_id,))
-                
-                for item in items:
-                    product_manager.increase_stock(item['product_id'], item['quantity'])
+                items = [item for item in db.execute_query(items_query, (sale_id,)) if item['product_id']]
+                db.execute_many(
+                    "UPDATE products SET stock_quantity = stock_quantity + ? WHERE id = ?",
+                    [(item['quantity'], item['product_id']) for item in items]
+                )
                 
                 # Si c'était un paiement à crédit, ajuster le crédit client
                 if sale['payment_method'] == 'credit' and sale['customer_id']:
@@ -489,17 +562,18 @@ class POSManager:
                         WHERE id = ?
                     """
                     db.execute_update(credit_query, (sale['total_amount'], sale['customer_id']))
-                
-                db.commit()
-                
-                logger.info(f"Vente annulée: {sale['sale_number']} - Raison: {reason}")
-                data_signals.sale_cancelled.emit()
-                data_signals.sales_changed.emit()
-                return True, "Vente annulée avec succès"
-                
-            except Exception as e:
-                db.rollback()
-                raise e
+            
+            # Après validation : le prochain scan doit voir le stock restauré
+            product_ids = [item['product_id'] for item in items]
+            product_cache.invalidate(product_ids)
+            
+            logger.info(f"Vente annulée: {sale['sale_number']} - Raison: {reason}")
+            data_signals.notify('sale', [sale_id])
+            data_signals.notify('product', product_ids)
+            data_signals.sale_cancelled.emit()
+            data_signals.sales_changed.emit()
+            data_signals.products_changed.emit()
+            return True, "Vente annulée avec succès"
                 
         except Exception as e:
             error_msg = f"Erreur lors de l'annulation: {str(e)}"
@@ -521,16 +595,17 @@ class POSManager:
             (success, message, return_id)
         """
         try:
-            # Vérifier la vente
-            sale_query = "SELECT * FROM sales WHERE id = ?"
-            sale = db.fetch_one(sale_query, (sale_id,))
-            
-            if not sale:
-                return False, "Vente introuvable", None
-            
-            db.begin_transaction()
-            
-            try:
+            with db.transaction() as conn:
+                # Vérifier la vente (relue sous verrou)
+                sale_query = "SELECT * FROM sales WHERE id = ?"
+                sale = db.fetch_one(sale_query, (sale_id,))
+                
+                if not sale:
+                    return False, "Vente introuvable", None
+                
+                # Les lignes vont changer : retirer l'ancienne contribution aux agrégats
+                daily_rollup.apply_sale(conn.cursor(), sale_id, -1)
+                
                 # Calculer le montant du retour
                 return_amount = 0.0
                 
@@ -585,8 +660,11 @@ class POSManager:
                         quantity, unit_price, item_return_amount
                     ))
                     
-                    # Restaurer le stock
-                    product_manager.increase_stock(product_id, quantity)
+                    # Restaurer le stock (relatif : pas de lecture-écriture concurrente)
+                    db.execute_update(
+                        "UPDATE products SET stock_quantity = stock_quantity + ? WHERE id = ?",
+                        (quantity, product_id)
+                    )
 
                     # ============================================================
                     # MISE A JOUR DE LA VENTE ORIGINALE (HISTORIQUE)
@@ -615,6 +693,9 @@ class POSManager:
                 # Si TVA gérée séparément, il faudrait aussi réduire tax_amount
                 db.execute_update(update_sale_query, (return_amount, return_amount, sale_id))
                 
+                # Nouvelle contribution (quantités après retour)
+                daily_rollup.apply_sale(conn.cursor(), sale_id)
+                
                 # Mettre à jour le montant du retour
                 update_return_query = "UPDATE returns SET return_amount = ? WHERE id = ?"
                 db.execute_update(update_return_query, (return_amount, return_id))
@@ -627,18 +708,20 @@ class POSManager:
                         WHERE id = ?
                     """
                     db.execute_update(credit_query, (return_amount, sale['customer_id']))
-                
-                db.commit()
-                
-                logger.info(f"Retour traité: {return_number} - Montant: {return_amount} DA")
-                data_signals.return_processed.emit()
-                data_signals.returns_changed.emit()
-                data_signals.sales_changed.emit()
-                return True, f"Retour enregistré: {return_number}", return_id
-                
-            except Exception as e:
-                db.rollback()
-                raise e
+            
+            # Après validation : le prochain scan doit voir le stock restauré
+            product_ids = [item['product_id'] for item in items_to_return]
+            product_cache.invalidate(product_ids)
+            
+            logger.info(f"Retour traité: {return_number} - Montant: {return_amount} DA")
+            data_signals.notify('sale', [sale_id])
+            data_signals.notify('return', [return_id])
+            data_signals.notify('product', product_ids)
+            data_signals.return_processed.emit()
+            data_signals.returns_changed.emit()
+            data_signals.sales_changed.emit()
+            data_signals.products_changed.emit()
+            return True, f"Retour enregistré: {return_number}", return_id
                 
         except Exception as e:
             error_msg = f"Erreur lors du traitement du retour: {str(e)}"
@@ -714,15 +797,9 @@ class POSManager:
         
         return result
     
-    def _generate_sale_number(self) -> str:
-        """Générer un numéro de vente unique"""
-        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-        return f"VNT-{timestamp}-{self.register_number}"
-    
     def _generate_return_number(self) -> str:
-        """Générer un numéro de retour unique"""
-        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-        return f"RET-{timestamp}"
+        """Générer un numéro de retour unique (format RET-AAAAMMJJ-CC-NNNN, dans la transaction du retour)"""
+        return document_sequences.next_number(document_sequences.RETURN, self.register_number)
     
     def _update_customer_credit(self, customer_id: int, amount: float, sale_id: int):
         """Mettre à jour le crédit d'un client"""
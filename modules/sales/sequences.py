@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""
+Numéros de vente et de retour (table document_sequences)
+
+Format : TYPE-AAAAMMJJ-CC-NNNN (ex. SLE-20240315-02-0042), CC étant la
+caisse. Chaque caisse a son propre compteur par jour : deux caisses ne
+se disputent jamais un numéro, et le compteur est incrémenté dans la
+transaction qui écrit la vente ou le retour. Une annulation (rollback)
+rend le numéro, un crash ne peut pas en distribuer un deux fois.
+"""
+from datetime import datetime
+from typing import Optional
+from database.db_manager import db
+
+
+class DocumentSequences:
+    """Attribution des numéros de documents"""
+
+    SALE = "SLE"
+    RETURN = "RET"
+
+    def next_number(self, kind: str, register_number: int, when: Optional[datetime] = None) -> str:
+        """
+        Numéro suivant pour une caisse
+
+        À appeler dans la transaction qui insère le document (db.transaction()).
+
+        Args:
+            kind: Type de document (SALE, RETURN)
+            register_number: Numéro de caisse
+            when: Date du document (aujourd'hui par défaut)
+
+        Returns:
+            Numéro unique, ex. SLE-20240315-02-0042
+        """
+        prefix = f"{kind}-{(when or datetime.now()).strftime('%Y%m%d')}-{register_number:02d}"
+        db.execute_update(
+            """
+            INSERT INTO document_sequences (prefix, last_value) VALUES (?, 1)
+            ON CONFLICT(prefix) DO UPDATE SET last_value = last_value + 1
+            """,
+            (prefix,)
+        )
+        row = db.fetch_one("SELECT last_value FROM document_sequences WHERE prefix = ?", (prefix,))
+        return f"{prefix}-{row['last_value']:04d}"
+
+
+# Instance globale
+document_sequences = DocumentSequences()
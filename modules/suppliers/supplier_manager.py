@@ -245,13 +245,11 @@ class SupplierManager:
             (success, message)
         """
         try:
-            supplier = self.get_supplier(supplier_id)
-            if not supplier:
-                return False, "Fournisseur introuvable"
-            
-            db.begin_transaction()
-            
-            try:
+            with db.transaction():
+                supplier = self.get_supplier(supplier_id)
+                if not supplier:
+                    return False, "Fournisseur introuvable"
+                
                 # Mettre à jour total_purchases et total_debt
                 update_query = """
                     UPDATE suppliers 
@@ -269,17 +267,11 @@ class SupplierManager:
                         ) VALUES (?, 'purchase', ?, ?, ?)
                     """
                     db.execute_insert(transaction_query, (supplier_id, purchase_amount, description, processed_by))
-                
-                db.commit()
-                
-                logger.info(f"Achat enregistré: Fournisseur {supplier_id} - Achat: {purchase_amount} DA, Dette: {debt_amount} DA")
-                data_signals.supplier_updated.emit()
-                data_signals.suppliers_changed.emit()
-                return True, f"Achat enregistré: {purchase_amount} DA (Dette ajoutée: {debt_amount} DA)"
-                
-            except Exception as e:
-                db.rollback()
-                raise e
+            
+            logger.info(f"Achat enregistré: Fournisseur {supplier_id} - Achat: {purchase_amount} DA, Dette: {debt_amount} DA")
+            data_signals.supplier_updated.emit()
+            data_signals.suppliers_changed.emit()
+            return True, f"Achat enregistré: {purchase_amount} DA (Dette ajoutée: {debt_amount} DA)"
                 
         except Exception as e:
             error_msg = f"Erreur lors de l'enregistrement de l'achat: {str(e)}"
@@ -301,16 +293,14 @@ class SupplierManager:
             (success, message)
         """
         try:
-            supplier = self.get_supplier(supplier_id)
-            if not supplier:
-                return False, "Fournisseur introuvable"
-            
-            if amount > supplier['total_debt']:
-                return False, f"Montant trop élevé. Dette actuelle: {supplier['total_debt']} DA"
-            
-            db.begin_transaction()
-            
-            try:
+            with db.transaction():
+                supplier = self.get_supplier(supplier_id)
+                if not supplier:
+                    return False, "Fournisseur introuvable"
+                
+                if amount > supplier['total_debt']:
+                    return False, f"Montant trop élevé. Dette actuelle: {supplier['total_debt']} DA"
+                
                 # Réduire la dette
                 update_query = """
                     UPDATE suppliers 
@@ -326,17 +316,11 @@ class SupplierManager:
                     ) VALUES (?, 'payment', ?, ?, ?)
                 """
                 db.execute_insert(transaction_query, (supplier_id, amount, description, processed_by))
-                
-                db.commit()
-                
-                logger.info(f"Paiement fournisseur: Fournisseur {supplier_id} - {amount} DA")
-                data_signals.supplier_updated.emit()
-                data_signals.suppliers_changed.emit()
-                return True, f"Paiement enregistré: {amount} DA"
-                
-            except Exception as e:
-                db.rollback()
-                raise e
+            
+            logger.info(f"Paiement fournisseur: Fournisseur {supplier_id} - {amount} DA")
+            data_signals.supplier_updated.emit()
+            data_signals.suppliers_changed.emit()
+            return True, f"Paiement enregistré: {amount} DA"
                 
         except Exception as e:
             error_msg = f"Erreur lors du paiement: {str(e)}"
@@ -58,7 +58,7 @@ DIALOG_STYLE = """
 # TABLE — Clean, modern, soft alternating rows
 # ─────────────────────────────────────────────
 TABLE_STYLE = """
-    QTableWidget {
+    QTableView {
         border: 1px solid #dfe3e8;
         border-radius: 8px;
         background-color: white;
@@ -76,16 +76,16 @@ TABLE_STYLE = """
         font-size: 12px;
         text-transform: uppercase;
     }
-    QTableWidget::item {
+    QTableView::item {
         padding: 8px 10px;
         border-bottom: 1px solid #f0f2f5;
         color: #212b36;
     }
-    QTableWidget::item:selected {
+    QTableView::item:selected {
         background-color: #eef2ff;
         color: #3730a3;
     }
-    QTableWidget::item:alternate {
+    QTableView::item:alternate {
         background-color: #fafbfc;
     }
     QScrollBar:vertical {
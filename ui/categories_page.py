@@ -127,7 +127,7 @@ class CategoriesPage(QWidget):
         i18n_manager.language_changed.connect(self.update_ui_text)
         
         # Connect to data changes
-        data_signals.categories_changed.connect(self.load_categories)
+        data_signals.subscribe(self, ('categories_changed',), self.load_categories)
 
     def init_ui(self):
         _ = i18n_manager.get
@@ -3,7 +3,7 @@
 Interface de gestion des clients
 """
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
-                             QPushButton, QLineEdit, QTableWidget, QTableWidgetItem,
+                             QPushButton, QLineEdit, QTableWidget, QTableWidgetItem, QTableView,
                              QComboBox, QFrame, QMessageBox, QHeaderView, QDialog,
                              QFormLayout, QSpinBox, QDoubleSpinBox, QDateEdit,
                              QCheckBox, QTabWidget, QGroupBox, QTextEdit, QAbstractItemView)
@@ -14,6 +14,9 @@ from core.auth import auth_manager
 from core.logger import logger
 from core.i18n import i18n_manager
 from core.data_signals import data_signals
+from core.db_executor import db_executor
+from ui.table_models import PagedTableModel, ActionButtonsDelegate
+from ui.loading_overlay import LoadingOverlay
 
 class CustomerFormDialog(QDialog):
     """Dialogue d'ajout/modification de client"""
@@ -364,6 +367,34 @@ class CustomerHistoryDialog(QDialog):
         layout.addWidget(table)
         return widget
 
+class CustomerTableModel(PagedTableModel):
+    """Lignes du tableau des clients (la colonne 5 est dessinée par le délégué)"""
+    
+    @staticmethod
+    def _amount(c, key):
+        try:
+            return float(c.get(key, 0))
+        except (ValueError, TypeError):
+            return 0.0
+    
+    def display(self, c, column):
+        if column == 0:
+            return c['code']
+        if column == 1:
+            return c['full_name']
+        if column == 2:
+            return c.get('phone') or ''
+        if column == 3:
+            return f"{self._amount(c, 'current_credit'):g} DA"
+        if column == 4:
+            return f"{self._amount(c, 'total_purchases'):g} DA"
+        return ""
+    
+    def foreground(self, c, column):
+        if column == 3 and self._amount(c, 'current_credit') > 0:
+            return QColor("red")
+        return None
+
 class CustomersPage(QWidget):
     """Page de gestion des clients"""
     navigate_to = pyqtSignal(str, dict) # Pour naviguer vers l'historique avec un filtre
@@ -374,7 +405,7 @@ class CustomersPage(QWidget):
         self.load_customers()
         
         i18n_manager.language_changed.connect(self.update_ui_text)
-        data_signals.customers_changed.connect(self.load_customers)
+        data_signals.subscribe(self, ('customers_changed',), self.load_customers)
         self.update_ui_text()
         
     def init_ui(self):
@@ -471,10 +502,10 @@ class CustomersPage(QWidget):
         
         # Get stats data
         try:
-            all_customers = customer_manager.get_all_customers()
-            total_clients = len(all_customers)
-            clients_with_debt = sum(1 for c in all_customers if float(c.get('current_credit', 0) or 0) > 0)
-            total_debt = sum(float(c.get('current_credit', 0) or 0) for c in all_customers)
+            summary = customer_manager.get_customers_summary()
+            total_clients = summary['total_clients']
+            clients_with_debt = summary['clients_with_debt']
+            total_debt = summary['total_debt']
         except Exception:
             total_clients = 0
             clients_with_debt = 0
@@ -523,119 +554,95 @@ class CustomersPage(QWidget):
         
         layout.addLayout(toolbar)
         
-        # Table - Style amélioré
-        self.table = QTableWidget()
-        self.table.setColumnCount(6)
-        self.table.setHorizontalHeaderLabels(_("table_headers_customers"))
+        # Table - Modèle paginé, boutons dessinés par un délégué
+        self.table = QTableView()
+        self.model = CustomerTableModel(_("table_headers_customers"), parent=self.table)
+        self.table.setModel(self.model)
         self.table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
         self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
         self.table.setAlternatingRowColors(True)
         self.table.verticalHeader().setDefaultSectionSize(45)
         self.table.setStyleSheet(TABLE_STYLE)
+        
+        self.actions_delegate = ActionButtonsDelegate([
+            {'key': 'edit', 'text': "✏️", 'tooltip': _("tooltip_edit")},
+            {'key': 'pay', 'text': "💰", 'tooltip': _("tooltip_pay_debt")},
+            {'key': 'history', 'text': "📜", 'tooltip': _("tooltip_history")},
+            {'key': 'delete', 'text': "🗑️", 'tooltip': _("tooltip_delete")},
+        ], button_size=36, spacing=5, parent=self.table)
+        self.actions_delegate.action_triggered.connect(self.on_row_action)
+        self.table.setItemDelegateForColumn(5, self.actions_delegate)
+        self.table.setColumnWidth(5, 180)
 
         layout.addWidget(self.table)
+        self.loading = LoadingOverlay(self.table)
 
         
     def load_customers(self):
-        _ = i18n_manager.get
         search = self.search_input.text()
         # Use index instead of text for filter logic to be language independent
         filter_idx = self.filter_combo.currentIndex()
         
-        if filter_idx == 1: # With debt
-            customers = customer_manager.get_customers_with_credit()
+        if filter_idx == 1: # With debt (liste courte, chargée en entier)
+            loader = None
+        elif filter_idx == 2: # Meilleurs clients
+            loader = lambda offset, limit: customer_manager.get_top_customers(limit=limit, offset=offset)
+        elif search:
+            loader = lambda offset, limit: customer_manager.search_customers(search, limit=limit, offset=offset)
         else:
-            customers = customer_manager.search_customers(search) if search else customer_manager.get_all_customers()
-            
-        # Tri pour "Meilleurs clients" (Index 2)
-        if filter_idx == 2:
-            customers.sort(key=lambda x: x['total_purchases'], reverse=True)
-            
-        self.table.setRowCount(0)
-        for c in customers:
-            row = self.table.rowCount()
-            self.table.insertRow(row)
-            
-            self.table.setItem(row, 0, QTableWidgetItem(c['code']))
-            self.table.setItem(row, 1, QTableWidgetItem(c['full_name']))
-            self.table.setItem(row, 2, QTableWidgetItem(c.get('phone', '')))
-            
-            try:
-                current_credit = float(c.get('current_credit', 0))
-            except (ValueError, TypeError):
-                current_credit = 0.0
-                
-            try:
-                total_purchases = float(c.get('total_purchases', 0))
-            except (ValueError, TypeError):
-                total_purchases = 0.0
+            loader = lambda offset, limit: customer_manager.get_all_customers(limit=limit, offset=offset)
+        
+        # Première page et cartes en arrière-plan ; une frappe plus récente remplace la requête
+        self.loading.start()
+        db_executor.submit("customers_page", self._fetch_customers, loader, self.model.page_size(),
+                           on_result=self._apply_customers, on_error=self._on_load_error)
 
-            credit_item = QTableWidgetItem(f"{current_credit:g} DA")
-            if current_credit > 0:
-                credit_item.setForeground(QColor("red"))
-            self.table.setItem(row, 3, credit_item)
-            
-            self.table.setItem(row, 4, QTableWidgetItem(f"{total_purchases:g} DA"))
-            
-            # Actions
-            widget = QWidget()
-            hbox = QHBoxLayout(widget)
-            hbox.setContentsMargins(5, 0, 5, 0)
-            hbox.setSpacing(5)
-            
-            # Helper for styled buttons
-            def make_btn(text, tooltip, color, hover_bg):
-                btn = QPushButton(text)
-                btn.setToolTip(tooltip)
-                btn.setFixedSize(40, 40)
-                btn.setCursor(Qt.PointingHandCursor)
-                btn.setStyleSheet(f"""
-                    QPushButton {{
-                        background-color: transparent;
-                        border: 2px solid #e5e7eb;
-                        border-radius: 8px;
-                        color: {color};
-                        font-size: 18px;
-                    }}
-                    QPushButton:hover {{
-                        background-color: {hover_bg};
-                        border-color: {color};
-                    }}
-                """)
-                return btn
+    @staticmethod
+    def _fetch_customers(loader, page_size: int) -> dict:
+        """Première page + résumé (thread du pool, aucun widget)"""
+        return {
+            'loader': loader,
+            'rows': customer_manager.get_customers_with_credit() if loader is None else loader(0, page_size),
+            'summary': customer_manager.get_customers_summary(),
+        }
 
-            edit_btn = make_btn("✏️", _("tooltip_edit"), "#3b82f6", "#eff6ff")
-            edit_btn.clicked.connect(lambda checked, x=c: self.open_edit_dialog(x))
-            hbox.addWidget(edit_btn)
-            
-            pay_btn = make_btn("💰", _("tooltip_pay_debt"), "#10b981", "#ecfdf5")
-            pay_btn.clicked.connect(lambda checked, x=c: self.open_payment_dialog(x))
-            hbox.addWidget(pay_btn)
-            
-            hist_btn = make_btn("📜", _("tooltip_history"), "#6b7280", "#f3f4f6")
-            hist_btn.clicked.connect(lambda checked, x=c: self.open_history_dialog(x))
-            hbox.addWidget(hist_btn)
-            
-            del_btn = make_btn("🗑️", _("tooltip_delete"), "#ef4444", "#fef2f2")
-            del_btn.clicked.connect(lambda checked, x=c['id']: self.delete_customer(x))
-            hbox.addWidget(del_btn)
-            
-            self.table.setCellWidget(row, 5, widget)
-            
-        # Adjust column width for actions
-        self.table.setColumnWidth(5, 180)
+    def _apply_customers(self, data: dict):
+        self.loading.stop()
+        if data['loader'] is None:
+            self.model.set_rows(data['rows'])
+        else:
+            self.model.reset(data['loader'], first_page=data['rows'])
         
         # Update stat cards
-        self.update_stat_cards()
+        self.update_stat_cards(data['summary'])
+
+    def _on_load_error(self, error):
+        self.loading.stop()
+        logger.error(f"Erreur chargement clients: {error}")
+
+    def on_row_action(self, action, row):
+        """Clic sur un bouton de la colonne Actions"""
+        customer = self.model.row_at(row)
+        if not customer:
+            return
+        if action == 'edit':
+            self.open_edit_dialog(customer)
+        elif action == 'pay':
+            self.open_payment_dialog(customer)
+        elif action == 'history':
+            self.open_history_dialog(customer)
+        elif action == 'delete':
+            self.delete_customer(customer['id'])
 
-    def update_stat_cards(self):
+    def update_stat_cards(self, summary=None):
         """Mettre à jour les valeurs des cartes statistiques"""
         try:
             from PyQt5.QtWidgets import QLabel
-            all_customers = customer_manager.get_all_customers()
-            total_clients = len(all_customers)
-            clients_with_debt = sum(1 for c in all_customers if float(c.get('current_credit', 0) or 0) > 0)
-            total_debt = sum(float(c.get('current_credit', 0) or 0) for c in all_customers)
+            if summary is None:
+                summary = customer_manager.get_customers_summary()
+            total_clients = summary['total_clients']
+            clients_with_debt = summary['clients_with_debt']
+            total_debt = summary['total_debt']
             
             # Update each card's value label (objectName = 'stat_value')
             if hasattr(self, 'stat_card_total'):
@@ -701,22 +708,22 @@ class CustomersPage(QWidget):
         if is_dark:
             # Mode sombre
             table_style = """
-                QTableWidget {
+                QTableView {
                     background-color: #34495e;
                     color: #ecf0f1;
                     gridline-color: #4a6785;
                     border: 1px solid #4a6785;
                     border-radius: 8px;
                 }
-                QTableWidget::item {
+                QTableView::item {
                     padding: 8px;
                     border-bottom: 1px solid #4a6785;
                 }
-                QTableWidget::item:selected {
+                QTableView::item:selected {
                     background-color: #27ae60;
                     color: white;
                 }
-                QTableWidget::item:alternate {
+                QTableView::item:alternate {
                     background-color: #2c3e50;
                 }
                 QHeaderView::section {
@@ -742,22 +749,22 @@ class CustomersPage(QWidget):
         else:
             # Mode clair
             table_style = """
-                QTableWidget {
+                QTableView {
                     background-color: white;
                     color: #2c3e50;
                     gridline-color: #e0e0e0;
                     border: 1px solid #e0e0e0;
                     border-radius: 8px;
                 }
-                QTableWidget::item {
+                QTableView::item {
                     padding: 8px;
                     border-bottom: 1px solid #e0e0e0;
                 }
-                QTableWidget::item:selected {
+                QTableView::item:selected {
                     background-color: #27ae60;
                     color: white;
                 }
-                QTableWidget::item:alternate {
+                QTableView::item:alternate {
                     background-color: #f8f9fa;
                 }
                 QHeaderView::section {
@@ -10,6 +10,8 @@ from PyQt5.QtGui import QFont, QColor
 from datetime import datetime
 from core.i18n import i18n_manager
 from core.data_signals import data_signals
+from core.db_executor import db_executor
+from core.logger import logger
 
 class StatCard(QFrame):
     """Carte de statistique moderne"""
@@ -180,6 +182,7 @@ class HomePage(QWidget):
     
     def __init__(self, parent=None):
         super().__init__(parent)
+        self.last_stats = None
         self.init_ui()
         self.load_stats()
         
@@ -187,8 +190,7 @@ class HomePage(QWidget):
         i18n_manager.language_changed.connect(self.update_ui_text)
         
         # Connect to data signals
-        data_signals.products_changed.connect(self.load_stats)
-        data_signals.sales_changed.connect(self.load_stats)
+        data_signals.subscribe(self, ('products_changed', 'sales_changed'), self.load_stats)
     
     def init_ui(self):
         """Initialiser l'interface"""
@@ -224,17 +226,17 @@ class HomePage(QWidget):
         stats_layout = QHBoxLayout()
         stats_layout.setSpacing(20)
         
-        self.stat_sales = StatCard("💰", _('stats_sales'), "0 DA", _('stats_turnover'), "#8b5cf6")
+        self.stat_sales = StatCard("💰", _('stats_sales'), "…", _('stats_turnover'), "#8b5cf6")
         stats_layout.addWidget(self.stat_sales)
         
-        self.stat_products = StatCard("📦", _('stats_products'), "0", _('stats_in_stock'), "#3b82f6")
+        self.stat_products = StatCard("📦", _('stats_products'), "…", _('stats_in_stock'), "#3b82f6")
         stats_layout.addWidget(self.stat_products)
         
-        self.stat_expiring = StatCard("📅", _('stats_expiration'), "0", _('stats_expiring_soon'), "#ef4444")
+        self.stat_expiring = StatCard("📅", _('stats_expiration'), "…", _('stats_expiring_soon'), "#ef4444")
         self.stat_expiring.clicked.connect(lambda: self.navigate_to.emit("products"))
         stats_layout.addWidget(self.stat_expiring)
         
-        self.stat_alerts = StatCard("⚠️", _('stats_alerts'), "0", _('stats_low_stock'), "#f59e0b")
+        self.stat_alerts = StatCard("⚠️", _('stats_alerts'), "…", _('stats_low_stock'), "#f59e0b")
         self.stat_alerts.clicked.connect(self.go_to_low_stock)
         stats_layout.addWidget(self.stat_alerts)
         
@@ -457,49 +459,54 @@ class HomePage(QWidget):
             self.scan_input.clear()
     
     def load_stats(self):
-        """Charger les statistiques"""
-        # Note: We rely on init_ui to set the static labels. 
-        # Here we only update numeric values which don't need translation.
-        # But wait, date string in StatCard is not dynamically updated here, just the values.
-        try:
-            from database.db_manager import db
-            
-            # Produits en stock
-            products = db.fetch_one("SELECT COUNT(*) as count FROM products WHERE is_active = 1")
-            if products:
-                self.stat_products.update_value(str(products['count']))
-            
-            # Produits expirant bientôt (30 jours)
-            from datetime import timedelta
-            future_date = (datetime.now() + timedelta(days=30)).strftime("%Y-%m-%d")
-            expiring = db.fetch_one(f"""
-                SELECT COUNT(*) as count FROM products 
-                WHERE is_active = 1 AND expiry_date IS NOT NULL 
-                AND expiry_date <= '{future_date}' AND expiry_date >= date('now')
-            """)
-            if expiring:
-                self.stat_expiring.update_value(str(expiring['count']))
-            
-            # Ventes du jour
-            today = datetime.now().strftime("%Y-%m-%d")
-            sales = db.fetch_one(f"""
-                SELECT COALESCE(SUM(total_amount), 0) as total 
-                FROM sales 
-                WHERE DATE(sale_date) = '{today}'
-            """)
-            if sales:
-                self.stat_sales.update_value(f"{float(sales['total']):,.0f} DA")
-            
-            # Alertes stock faible (seuil = 10 par défaut)
-            alerts = db.fetch_one("""
-                SELECT COUNT(*) as count FROM products 
-                WHERE is_active = 1 AND stock_quantity <= min_stock_level AND parent_product_id IS NULL
-            """)
-            if alerts:
-                self.stat_alerts.update_value(str(alerts['count']))
-                
-        except Exception as e:
-            print(f"Erreur chargement stats: {e}")
+        """Charger les statistiques en arrière-plan ("…" jusqu'au premier résultat)"""
+        db_executor.submit("home_stats", self._fetch_stats,
+                           on_result=self._apply_stats,
+                           on_error=lambda e: logger.error(f"Erreur chargement stats: {e}"))
+    
+    @staticmethod
+    def _fetch_stats() -> dict:
+        """Compteurs de la page d'accueil (thread du pool, aucun widget)"""
+        from database.db_manager import db, day_range
+        from datetime import timedelta
+        stats = {}
+        
+        # Produits en stock
+        products = db.fetch_one("SELECT COUNT(*) as count FROM products WHERE is_active = 1")
+        stats['products'] = products['count'] if products else 0
+        
+        # Produits expirant bientôt (30 jours)
+        future_date = (datetime.now() + timedelta(days=30)).strftime("%Y-%m-%d")
+        expiring = db.fetch_one("""
+            SELECT COUNT(*) as count FROM products 
+            WHERE is_active = 1 AND expiry_date IS NOT NULL 
+            AND expiry_date <= ? AND expiry_date >= date('now')
+        """, (future_date,))
+        stats['expiring'] = expiring['count'] if expiring else 0
+        
+        # Ventes du jour
+        sales = db.fetch_one("""
+            SELECT COALESCE(SUM(total_amount), 0) as total 
+            FROM sales 
+            WHERE sale_date >= ? AND sale_date < ?
+        """, day_range(datetime.now()))
+        stats['sales'] = float(sales['total']) if sales else 0.0
+        
+        # Alertes stock faible (seuil = 10 par défaut)
+        alerts = db.fetch_one("""
+            SELECT COUNT(*) as count FROM products 
+            WHERE is_active = 1 AND stock_quantity <= min_stock_level AND parent_product_id IS NULL
+        """)
+        stats['alerts'] = alerts['count'] if alerts else 0
+        return stats
+    
+    def _apply_stats(self, stats: dict):
+        """Afficher les compteurs (thread de l'interface)"""
+        self.last_stats = stats
+        self.stat_products.update_value(str(stats['products']))
+        self.stat_expiring.update_value(str(stats['expiring']))
+        self.stat_sales.update_value(f"{stats['sales']:,.0f} DA")
+        self.stat_alerts.update_value(str(stats['alerts']))
     
     def refresh_stats(self):
         """Rafraîchir les statistiques"""
@@ -521,6 +528,8 @@ class HomePage(QWidget):
         self.container = QWidget()
         self.layout().addWidget(self.container)
         self.build_ui_content(self.container)
+        if self.last_stats:
+            self._apply_stats(self.last_stats)
         self.load_stats()
         
         # Update layout direction for RTL
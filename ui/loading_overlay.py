@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""
+Voile "Chargement..." affiché sur une zone pendant une requête en arrière-plan
+"""
+from PyQt5.QtWidgets import QLabel
+from PyQt5.QtCore import Qt, QEvent
+from core.i18n import i18n_manager
+
+
+class LoadingOverlay(QLabel):
+    """
+    Recouvre son parent d'un voile semi-transparent tant qu'un chargement
+    est en cours. La fenêtre reste réactive : seul le contenu masqué attend.
+    """
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.setAlignment(Qt.AlignCenter)
+        self.setStyleSheet("""
+            QLabel {
+                background-color: rgba(255, 255, 255, 170);
+                color: #475569;
+                font-size: 16px;
+                font-weight: bold;
+            }
+        """)
+        parent.installEventFilter(self)
+        self.hide()
+
+    def start(self):
+        """Afficher le voile"""
+        self.setText(i18n_manager.get('label_loading'))
+        self.setGeometry(self.parentWidget().rect())
+        self.raise_()
+        self.show()
+
+    def stop(self):
+        """Masquer le voile"""
+        self.hide()
+
+    def eventFilter(self, obj, event):
+        if obj is self.parentWidget() and event.type() == QEvent.Resize and self.isVisible():
+            self.setGeometry(obj.rect())
+        return super().eventFilter(obj, event)
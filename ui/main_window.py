@@ -11,6 +11,7 @@ from PyQt5.QtGui import QFont, QIcon, QPalette, QColor, QKeySequence, QPixmap
 from core.auth import auth_manager
 from core.logger import logger
 from core.i18n import i18n_manager
+from core.data_signals import data_signals
 import os
 from ui.home_page import HomePage
 from ui.pos_page import POSPage
@@ -470,6 +471,7 @@ class MainWindow(QMainWindow):
             # Rafraîchir les données si la page le supporte
             if hasattr(target_widget, 'refresh'):
                 target_widget.refresh()
+                data_signals.mark_refreshed(target_widget)
                 
             # Application de filtres spécifiques si fournis dans nav_data
             if nav_data:
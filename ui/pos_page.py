@@ -7,16 +7,29 @@ from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
                              QComboBox, QFrame, QMessageBox, QHeaderView, QSpinBox,
                              QDoubleSpinBox, QGroupBox, QGridLayout, QDialog,
                              QFormLayout, QInputDialog, QAbstractItemView, QShortcut, QTextBrowser,
-                             QCheckBox, QCompleter, QScrollArea, QListView)
-from PyQt5.QtCore import Qt, QTimer, QStringListModel, QSize, QEvent
+                             QCheckBox, QCompleter, QScrollArea, QListView, QTableView)
+from PyQt5.QtCore import Qt, QTimer, QStringListModel, QSize, QEvent, pyqtSignal
 from PyQt5.QtGui import QIcon, QPixmap
 from pathlib import Path
+import time
 # ... imports ...
 from modules.sales.printer import printer_manager
 
 from core.logger import logger
 from core.i18n import i18n_manager
 from core.data_signals import data_signals
+from ui.table_models import CartTableModel, ActionButtonsDelegate
+
+
+class CartTableView(QTableView):
+    """Tableau du panier : signale la fin de chaque dessin (latence scan -> affichage)"""
+    
+    painted = pyqtSignal()
+    
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        self.painted.emit()
+
 
 class ReceiptPreviewDialog(QDialog):
     """Dialogue d'aperçu du ticket"""
@@ -508,14 +521,16 @@ class POSPage(QWidget):
         super().__init__(parent)
         self.cart = pos_manager.get_cart()
         self.current_customer = None
+        # Latence du dernier scan : du code lu au tableau redessiné
+        self._scan_started = None
+        self.last_scan_latency_ms = None
         self.init_ui()
         
         # Connect to language change
         i18n_manager.language_changed.connect(self.update_ui_text)
         # Connect to data changes for auto-refresh
-        data_signals.customers_changed.connect(self.load_customers)
-        data_signals.products_changed.connect(self.load_shortcuts)
-        data_signals.shortcuts_changed.connect(self.load_shortcuts)
+        data_signals.subscribe(self, ('customers_changed',), self.load_customers)
+        data_signals.subscribe(self, ('products_changed', 'shortcuts_changed'), self.load_shortcuts)
         self.update_ui_text()
         
     def showEvent(self, event):
@@ -524,6 +539,8 @@ class POSPage(QWidget):
         # Refresh shortcuts
         if hasattr(self, 'load_shortcuts'):
             self.load_shortcuts()
+        # Paniers en attente : partagés avec les autres caisses
+        self.update_held_cart_overlay()
         # Auto-focus barcode scanner input
         from PyQt5.QtCore import QTimer
         QTimer.singleShot(100, lambda: self.barcode_input.setFocus())
@@ -534,7 +551,7 @@ class POSPage(QWidget):
         
         # Up arrow - select previous cart item
         if key == Qt.Key_Up:
-            current_row = self.cart_table.currentRow()
+            current_row = self.cart_table.currentIndex().row()
             if current_row > 0:
                 self.cart_table.selectRow(current_row - 1)
             event.accept()
@@ -542,8 +559,8 @@ class POSPage(QWidget):
         
         # Down arrow - select next cart item
         if key == Qt.Key_Down:
-            current_row = self.cart_table.currentRow()
-            if current_row < self.cart_table.rowCount() - 1:
+            current_row = self.cart_table.currentIndex().row()
+            if current_row < self.cart_model.rowCount() - 1:
                 self.cart_table.selectRow(current_row + 1)
             event.accept()
             return
@@ -568,7 +585,7 @@ class POSPage(QWidget):
     
     def _update_selected_item_quantity(self, qty):
         """Update quantity of currently selected cart item"""
-        row = self.cart_table.currentRow()
+        row = self.cart_table.currentIndex().row()
         if row < 0 or row >= len(self.cart.items):
             return
         
@@ -580,7 +597,7 @@ class POSPage(QWidget):
     
     def _delete_selected_item(self):
         """Delete currently selected cart item"""
-        row = self.cart_table.currentRow()
+        row = self.cart_table.currentIndex().row()
         if row < 0 or row >= len(self.cart.items):
             return
         
@@ -626,7 +643,7 @@ class POSPage(QWidget):
 
         
         self.cart_label.setText(_("label_cart"))
-        self.cart_table.setHorizontalHeaderLabels(_("table_headers_cart"))
+        self.cart_model.set_headers(_("table_headers_cart"))
         
         self.payment_group.setTitle(_("group_payment"))
         self.print_receipt_cb.setText(_("checkbox_print_ticket"))
@@ -999,15 +1016,27 @@ class POSPage(QWidget):
         self.cart_count_label.setStyleSheet("font-size: 12px; color: #a5b4fc; background: transparent;")
         cart_header_layout.addWidget(self.cart_count_label)
         
+        self.scan_latency_label = QLabel("")
+        self.scan_latency_label.setToolTip("Latence du dernier scan (lecture du code -> panier affiché)")
+        self.scan_latency_label.setStyleSheet("font-size: 11px; color: #818cf8; background: transparent;")
+        cart_header_layout.addWidget(self.scan_latency_label)
+        
         layout.addWidget(cart_header)
         
         # Cart Table (stretch=1 to fill all available space)
-        self.cart_table = QTableWidget()
-        self.cart_table.setColumnCount(5)
-        self.cart_table.setHorizontalHeaderLabels(_("table_headers_cart"))
+        # Modèle observateur du panier : seules les lignes modifiées sont redessinées
+        self.cart_model = CartTableModel(_("table_headers_cart"), self)
+        self.cart_model.set_cart(self.cart)
+        self.cart_model.quantity_edited.connect(self.on_cart_quantity_edited)
+        self.cart_table = CartTableView()
+        self.cart_table.setModel(self.cart_model)
+        self.cart_remove_delegate = ActionButtonsDelegate(
+            [{'key': 'remove', 'text': 'X', 'tooltip': 'Retirer'}], button_size=28, parent=self.cart_table)
+        self.cart_remove_delegate.action_triggered.connect(self.on_cart_action)
+        self.cart_table.setItemDelegateForColumn(CartTableModel.REMOVE_COLUMN, self.cart_remove_delegate)
         self.cart_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
         self.cart_table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 border: none;
                 gridline-color: #f1f5f9;
                 color: #1e293b;
@@ -1026,11 +1055,11 @@ class POSPage(QWidget):
                 border-bottom: 2px solid #e2e8f0;
                 font-size: 12px;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 6px 8px;
                 border-bottom: 1px solid #f1f5f9;
             }
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background-color: #e0e7ff;
                 font-weight: bold;
             }
@@ -1039,7 +1068,7 @@ class POSPage(QWidget):
         self.cart_table.setSelectionBehavior(QAbstractItemView.SelectRows)
         self.cart_table.setSelectionMode(QAbstractItemView.SingleSelection)
         self.cart_table.installEventFilter(self)
-        self.cart_table.cellChanged.connect(self.on_cart_cell_changed)
+        self.cart_table.painted.connect(self.on_cart_painted)
         self.cart_table.verticalHeader().setVisible(False)
         layout.addWidget(self.cart_table, 1)  # stretch=1 — takes ALL available space
         
@@ -1844,7 +1873,7 @@ class POSPage(QWidget):
             
             # Mise à jour des tables
             table_style = f"""
-                QTableWidget {{
+                QTableView {{
                     border: 2px solid #555;
                     border-radius: 8px;
                     background-color: #2c3e50;
@@ -1929,7 +1958,7 @@ class POSPage(QWidget):
             
             # Tables
             table_style = """
-                QTableWidget {
+                QTableView {
                     border: 2px solid #e0e0e0;
                     border-radius: 8px;
                     background-color: white;
@@ -2148,6 +2177,7 @@ class POSPage(QWidget):
         if not barcode:
             return
         
+        self._scan_started = time.perf_counter()
         try:
             product = product_manager.get_product_by_barcode(barcode)
             if product:
@@ -2272,11 +2302,6 @@ class POSPage(QWidget):
             if success:
                 self.update_cart_display()
                 logger.info(f"Produit ajouté au panier: {product['name']} x{qty}")
-                
-                # Auto-select the last row (most recently added item)
-                row_count = self.cart_table.rowCount()
-                if row_count > 0:
-                    self.cart_table.selectRow(row_count - 1)
             else:
                 logger.warning(f"Échec ajout panier ({product['name']}): {message}")
                 QMessageBox.warning(self, _("title_warning"), message)
@@ -2288,36 +2313,15 @@ class POSPage(QWidget):
 
     
     def update_cart_display(self):
-        """Mettre à jour l'affichage du panier"""
-        self.cart_table.blockSignals(True)  # Empêcher les boucles infinies
-        self.cart_table.setRowCount(0)
-        
-        for item in self.cart.items:
-            row = self.cart_table.rowCount()
-            self.cart_table.insertRow(row)
-            
-            self.cart_table.setItem(row, 0, QTableWidgetItem(item.product_name))
-            self.cart_table.setItem(row, 1, QTableWidgetItem(f"{item.unit_price:.2f}"))
-            self.cart_table.setItem(row, 2, QTableWidgetItem(str(item.quantity)))
-            self.cart_table.setItem(row, 3, QTableWidgetItem(f"{item.get_subtotal():.2f}"))
-            
-            # Remove button (clean style)
-            remove_btn = QPushButton("X")
-            remove_btn.setFixedSize(28, 28)
-            remove_btn.setCursor(Qt.PointingHandCursor)
-            remove_btn.setStyleSheet("""
-                QPushButton {
-                    background-color: #fef2f2;
-                    color: #dc2626;
-                    border: 1px solid #fecaca;
-                    border-radius: 6px;
-                    font-weight: bold;
-                    font-size: 12px;
-                }
-                QPushButton:hover { background-color: #fee2e2; }
-            """)
-            remove_btn.clicked.connect(lambda checked, pid=item.product_id: self.remove_from_cart(pid))
-            self.cart_table.setCellWidget(row, 4, remove_btn)
+        """
+        Mettre à jour l'affichage du panier
+        
+        Les lignes suivent le panier via cart_model (insertion, retrait ou
+        modification d'une seule ligne) : ici, seuls les totaux, le compteur
+        et la sélection sont mis à jour.
+        """
+        # Panier remplacé (mise en attente, reprise, vente terminée)
+        self.cart_model.set_cart(self.cart)
         
         # Update totals
         discount = self.cart.get_discount_amount()
@@ -2328,20 +2332,30 @@ class POSPage(QWidget):
         self.header_total_label.setText(_("label_total").format(total))
         
         # Update cart count label
-        item_count = len(self.cart.items)
-        total_qty = sum(item.quantity for item in self.cart.items)
+        item_count = self.cart.get_item_count()
+        total_qty = self.cart.get_total_quantity()
         if hasattr(self, 'cart_count_label'):
             self.cart_count_label.setText(f"{item_count} articles ({total_qty:.0f} unités)")
         
-        self.cart_table.blockSignals(False)
-        
         # Auto-select the last row
-        row_count = self.cart_table.rowCount()
-        if row_count > 0:
-            self.cart_table.selectRow(row_count - 1)
+        if item_count > 0:
+            self.cart_table.selectRow(item_count - 1)
             if not self.barcode_input.hasFocus():
                 self.barcode_input.setFocus()
     
+    def on_cart_painted(self):
+        """Fin du dessin du panier : mesurer la latence du scan en cours"""
+        if self._scan_started is None:
+            return
+        self.last_scan_latency_ms = (time.perf_counter() - self._scan_started) * 1000
+        self._scan_started = None
+        self.scan_latency_label.setText(f"⏱ {self.last_scan_latency_ms:.0f} ms")
+    
+    def on_cart_action(self, key, row):
+        """Bouton de ligne du panier (délégué) : retrait"""
+        if key == 'remove' and 0 <= row < len(self.cart.items):
+            self.remove_from_cart(self.cart.items[row].product_id)
+    
     def remove_from_cart(self, product_id):
         """Retirer un produit du panier"""
         self.cart.remove_item(product_id)
@@ -2563,33 +2577,17 @@ class POSPage(QWidget):
 
 
 
-    def on_cart_cell_changed(self, row, column):
-        """Gérer la modification directe dans le panier (Quantité)"""
-        # ... logic ...
-        # (Content omitted for brevity/safety, verify indentation if inserting)
-        # Assuming we append this new method at end:
-        pass # Placeholder for existing method body if not fully visible
-
     def open_search_dialog(self):
         """Ouvrir le dialogue de recherche produit"""
         dialog = ProductSearchDialog(self)
         dialog.exec_()
         self.barcode_input.setFocus()
     
-    def on_cart_cell_changed(self, row, column):
+    def on_cart_quantity_edited(self, row, text):
         """Gérer la modification directe dans le panier (Quantité)"""
-        # Colonne 2 = Quantité
-        if column != 2:
-            return
-            
         try:
-            qty_item = self.cart_table.item(row, column)
-            if not qty_item:
-                return
-                
-            new_qty_str = qty_item.text()
             try:
-                new_qty = float(new_qty_str)
+                new_qty = float(text)
             except ValueError:
                 return # Ignorer si pas un nombre
             
@@ -2600,14 +2598,10 @@ class POSPage(QWidget):
                 if item.quantity != new_qty:
                     success, msg = self.cart.update_quantity(item.product_id, new_qty)
                     if success:
-                        # Rafraichir l'affichage pour mettre à jour les sous-totaux et totaux
-                        # Note: update_cart_display bloque les signaux, donc pas de boucle
+                        # La ligne est rafraîchie par le modèle ; reste les totaux
                         self.update_cart_display()
                     else:
-                        # Revert value if failed (e.g. stock)
-                        self.cart_table.blockSignals(True)
-                        qty_item.setText(str(item.quantity))
-                        self.cart_table.blockSignals(False)
+                        # La cellule garde la quantité du panier
                         QMessageBox.warning(self, "Attention", msg)
                         
         except Exception as e:
@@ -2895,12 +2889,12 @@ class POSPage(QWidget):
         if hasattr(self, 'cart_table') and source == self.cart_table:
             if event.type() == QEvent.KeyPress:
                 if event.key() == Qt.Key_Delete:
-                    current_row = self.cart_table.currentRow()
+                    current_row = self.cart_table.currentIndex().row()
                     if current_row >= 0 and current_row < len(self.cart.items):
                         product_id = self.cart.items[current_row].product_id
                         self.remove_from_cart(product_id)
                         # Re-select a row after deletion
-                        new_row_count = self.cart_table.rowCount()
+                        new_row_count = self.cart_model.rowCount()
                         if new_row_count > 0:
                             select_row = min(current_row, new_row_count - 1)
                             self.cart_table.selectRow(select_row)
@@ -3,8 +3,7 @@
 Interface de gestion des produits
 """
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
-                             QPushButton, QLineEdit, QTableWidget, QTableWidgetItem,
-                             QComboBox, QFrame, QMessageBox, QHeaderView, QDialog,
+                             QPushButton, QLineEdit, QTableView, QComboBox, QFrame, QMessageBox, QHeaderView, QDialog,
                              QFormLayout, QSpinBox, QDoubleSpinBox, QDateEdit,
                              QCheckBox, QTabWidget, QGroupBox, QMenu, QAbstractItemView, QCompleter)
 
@@ -16,6 +15,7 @@ from modules.reports.reorder_report import generate_reorder_report
 from core.logger import logger
 from core.i18n import i18n_manager
 from core.data_signals import data_signals
+from ui.table_models import PagedTableModel, ActionButtonsDelegate
 
 class ProductFormDialog(QDialog):
     """Dialogue d'ajout/modification de produit"""
@@ -294,20 +294,46 @@ class ProductFormDialog(QDialog):
             _ = i18n_manager.get
             QMessageBox.critical(self, _("title_error"), msg)
 
+class ProductTableModel(PagedTableModel):
+    """Lignes du tableau des produits (la colonne 6 est dessinée par le délégué)"""
+    
+    LOW_STOCK_BG = QColor("#ffebee") # Rouge clair
+    
+    def display(self, p, column):
+        if column == 0:
+            return p.get('barcode') or ''
+        if column == 1:
+            return p['name']
+        if column == 2:
+            return f"{float(p['selling_price']):g} DA"
+        if column == 3:
+            return str(p['stock_quantity'])
+        if column == 4:
+            return str(p.get('expiry_date') or '-')
+        if column == 5:
+            return f"{p.get('discount_percentage', 0):g}%" if p.get('is_on_promotion') else "-"
+        return ""
+    
+    def background(self, p, column):
+        # Alerte de stock
+        if column < 6 and p['stock_quantity'] <= p['min_stock_level']:
+            return self.LOW_STOCK_BG
+        return None
+
 class ProductsPage(QWidget):
     """Page de gestion des produits"""
     
     def __init__(self, parent=None):
         super().__init__(parent)
+        self.product_count = 0
         self.init_ui()
         self.load_products()
         
         i18n_manager.language_changed.connect(self.update_ui_text)
         
         # Connect to real-time signals
-        data_signals.inventory_changed.connect(self.load_products)
-        data_signals.product_changed.connect(self.load_products)
-        data_signals.products_changed.connect(self.load_products)
+        data_signals.subscribe(self, ('inventory_changed', 'product_changed', 'products_changed'),
+                               self.load_products)
         self.update_ui_text()
         
     def init_ui(self):
@@ -397,18 +423,27 @@ class ProductsPage(QWidget):
         
         layout.addLayout(toolbar)
         
-        # Tableau - Style amélioré
-        self.table = QTableWidget()
-        self.table.setColumnCount(7)
-        self.table.setHorizontalHeaderLabels(_("table_headers_products_page"))
+        # Tableau - Modèle paginé, boutons dessinés par un délégué
+        self.table = QTableView()
+        self.model = ProductTableModel(_("table_headers_products_page"), parent=self.table)
+        self.table.setModel(self.model)
         self.table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
-        self.table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
         self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
         self.table.setContextMenuPolicy(Qt.CustomContextMenu)
         self.table.customContextMenuRequested.connect(self.show_context_menu)
         self.table.setAlternatingRowColors(True)
         self.table.verticalHeader().setDefaultSectionSize(45)
         self.table.setStyleSheet(TABLE_STYLE)
+        
+        self.actions_delegate = ActionButtonsDelegate([
+            {'key': 'edit', 'text': "✏️"},
+            {'key': 'delete', 'text': "🗑️"},
+            {'key': 'print', 'text': "🏷️", 'tooltip': _("tooltip_print_barcode")},
+        ], parent=self.table)
+        self.actions_delegate.action_triggered.connect(self.on_row_action)
+        self.table.setItemDelegateForColumn(6, self.actions_delegate)
+        self.table.setColumnWidth(6, 120)
         layout.addWidget(self.table)
         
         self.setLayout(layout)
@@ -439,19 +474,18 @@ class ProductsPage(QWidget):
         
         # Update table headers
         headers = _("table_headers_products_page")
-        self.table.setHorizontalHeaderLabels(headers)
+        self.model.set_headers(headers)
+        self.actions_delegate.set_tooltips({'print': _("tooltip_print_barcode")})
         
         # Update count label if visible
         if hasattr(self, 'count_label') and self.count_label:
-            count = self.table.rowCount()
-            self.count_label.setText(_("products_count").format(count))
+            self.count_label.setText(_("products_count").format(self.product_count))
         
     def load_products(self):
         _ = i18n_manager.get
         search = self.search_input.text()
         filter_idx = self.filter_combo.currentIndex()
         
-        products = []
         if filter_idx == 1: # Low Stock
             products = product_manager.get_low_stock_products()
         elif filter_idx == 2: # Promo
@@ -459,60 +493,32 @@ class ProductsPage(QWidget):
         elif filter_idx == 3: # Expiring
             products = product_manager.get_expiring_products()
         else:
-            products = product_manager.search_products(search) if search else product_manager.get_all_products(limit=100)
-            
-        self.count_label.setText(_("products_count").format(len(products)))
-            
-        self.table.setRowCount(0)
-        for p in products:
-            row = self.table.rowCount()
-            self.table.insertRow(row)
-            
-            # Stock alert color
-            bg_color = None
-            if p['stock_quantity'] <= p['min_stock_level']:
-                bg_color = QColor("#ffebee") # Rouge clair
-            
-            # Items
-            items = [
-                p.get('barcode', ''),
-                p['name'],
-                f"{float(p['selling_price']):g} DA",
-                str(p['stock_quantity']),
-                p.get('expiry_date', '-'),
-                f"{p.get('discount_percentage', 0):g}%" if p.get('is_on_promotion') else "-"
-            ]
-            
-            for i, text in enumerate(items):
-                item = QTableWidgetItem(str(text))
-                if bg_color:
-                    item.setBackground(bg_color)
-                self.table.setItem(row, i, item)
-                
-            # Boutons Actions
-            action_widget = QWidget()
-            action_layout = QHBoxLayout(action_widget)
-            action_layout.setContentsMargins(0, 0, 0, 0)
-            
-            edit_btn = QPushButton("✏️")
-            edit_btn.setFixedSize(30, 30)
-            edit_btn.clicked.connect(lambda checked, x=p: self.open_edit_dialog(x))
-            
-            del_btn = QPushButton("🗑️")
-            del_btn.setFixedSize(30, 30)
-            del_btn.setStyleSheet("color: red;")
-            del_btn.clicked.connect(lambda checked, x=p['id']: self.delete_product(x))
-            
-            # Bouton imprimer code-barres
-            print_btn = QPushButton("🏷️")
-            print_btn.setFixedSize(30, 30)
-            print_btn.setToolTip(_("tooltip_print_barcode"))
-            print_btn.clicked.connect(lambda checked, x=p: self.print_barcode(x))
-            
-            action_layout.addWidget(edit_btn)
-            action_layout.addWidget(del_btn)
-            action_layout.addWidget(print_btn)
-            self.table.setCellWidget(row, 6, action_widget)
+            products = None
+            
+        if products is not None:
+            self.product_count = len(products)
+            self.model.set_rows(products)
+        else:
+            # Catalogue complet : chargé par pages au défilement
+            self.product_count = product_manager.count_products(search)
+            if search:
+                self.model.reset(lambda offset, limit: product_manager.search_products(search, limit=limit, offset=offset))
+            else:
+                self.model.reset(lambda offset, limit: product_manager.get_all_products(limit=limit, offset=offset))
+            
+        self.count_label.setText(_("products_count").format(self.product_count))
+        
+    def on_row_action(self, action, row):
+        """Clic sur un bouton de la colonne Actions"""
+        product = self.model.row_at(row)
+        if not product:
+            return
+        if action == 'edit':
+            self.open_edit_dialog(product)
+        elif action == 'delete':
+            self.delete_product(product['id'])
+        elif action == 'print':
+            self.print_barcode(product)
             
     def open_new_product_dialog(self):
         dialog = ProductFormDialog(parent=self)
@@ -803,7 +809,7 @@ class ProductsPage(QWidget):
         menu = QMenu(self)
         
         # Obtenir le produit sélectionné
-        row = self.table.currentRow()
+        row = self.table.currentIndex().row()
         if row < 0:
             return
             
@@ -818,7 +824,7 @@ class ProductsPage(QWidget):
         if is_dark:
             # Mode sombre
             self.table.setStyleSheet("""
-                QTableWidget {
+                QTableView {
                     border: 2px solid #555;
                     border-radius: 10px;
                     background-color: #34495e;
@@ -826,11 +832,11 @@ class ProductsPage(QWidget):
                     font-size: 14px;
                     color: white;
                 }
-                QTableWidget::item {
+                QTableView::item {
                     padding: 10px;
                     color: white;
                 }
-                QTableWidget::item:selected {
+                QTableView::item:selected {
                     background-color: #3498db;
                     color: white;
                 }
@@ -842,7 +848,7 @@ class ProductsPage(QWidget):
                     font-size: 14px;
                     color: white;
                 }
-                QTableWidget::item:alternate {
+                QTableView::item:alternate {
                     background-color: #3d566e;
                 }
             """)
@@ -874,17 +880,17 @@ class ProductsPage(QWidget):
         else:
             # Mode clair
             self.table.setStyleSheet("""
-                QTableWidget {
+                QTableView {
                     border: 2px solid #e0e0e0;
                     border-radius: 10px;
                     background-color: white;
                     gridline-color: #f0f0f0;
                     font-size: 14px;
                 }
-                QTableWidget::item {
+                QTableView::item {
                     padding: 10px;
                 }
-                QTableWidget::item:selected {
+                QTableView::item:selected {
                     background-color: #3498db;
                     color: white;
                 }
@@ -896,7 +902,7 @@ class ProductsPage(QWidget):
                     font-size: 14px;
                     color: #2c3e50;
                 }
-                QTableWidget::item:alternate {
+                QTableView::item:alternate {
                     background-color: #f8f9fa;
                 }
             """)
@@ -12,6 +12,8 @@ from core.i18n import i18n_manager
 from database.db_manager import db
 from datetime import datetime
 from core.data_signals import data_signals
+from core.db_executor import db_executor
+from ui.loading_overlay import LoadingOverlay
 
 class ReturnsPage(QWidget):
     """Page de gestion des retours"""
@@ -25,8 +27,7 @@ class ReturnsPage(QWidget):
         i18n_manager.language_changed.connect(self.update_ui_text)
         
         # Connect signals
-        data_signals.returns_changed.connect(self.load_history_data)
-        data_signals.sales_changed.connect(self.load_history_data)
+        data_signals.subscribe(self, ('returns_changed', 'sales_changed'), self.load_history_data)
 
     def init_ui(self):
         # Create a main layout if it doesn't exist
@@ -348,6 +349,7 @@ class ReturnsPage(QWidget):
         self.history_table.itemSelectionChanged.connect(self.on_history_selection_changed)
         
         layout.addWidget(self.history_table)
+        self.history_loading = LoadingOverlay(self.history_table)
 
     def on_tab_changed(self, index):
         if index == 1: # History tab
@@ -395,18 +397,32 @@ class ReturnsPage(QWidget):
             self.search_sale()
 
     def load_history_data(self):
+        """Charger l'historique des retours en arrière-plan"""
+        self.history_loading.start()
+        db_executor.submit("returns_history", self._fetch_history_data,
+                           on_result=self._apply_history_data, on_error=self._on_history_error)
+
+    @staticmethod
+    def _fetch_history_data():
+        """50 derniers retours (thread du pool, aucun widget)"""
+        query = """
+            SELECT r.id, r.return_number, s.sale_number, r.return_date, r.return_amount, 
+                   u.full_name, r.reason
+            FROM returns r
+            JOIN sales s ON r.original_sale_id = s.id
+            JOIN users u ON r.processed_by = u.id
+            ORDER BY r.return_date DESC
+            LIMIT 50
+        """
+        return db.execute_query(query)
+
+    def _on_history_error(self, error):
+        self.history_loading.stop()
+        logger.error(f"Erreur chargement historique retours: {error}")
+
+    def _apply_history_data(self, returns):
+        self.history_loading.stop()
         try:
-            query = """
-                SELECT r.id, r.return_number, s.sale_number, r.return_date, r.return_amount, 
-                       u.full_name, r.reason
-                FROM returns r
-                JOIN sales s ON r.original_sale_id = s.id
-                JOIN users u ON r.processed_by = u.id
-                ORDER BY r.return_date DESC
-                LIMIT 50
-            """
-            returns = db.execute_query(query)
-            
             self.history_table.setRowCount(0)
             for row, r in enumerate(returns):
                 self.history_table.insertRow(row)
@@ -468,8 +484,8 @@ class ReturnsPage(QWidget):
             return
             
         try:
-            # Chercher par numéro de ticket ou ID
-            if query.upper().startswith('VNT-'):
+            # Chercher par numéro de ticket (SLE-..., anciens VNT-...) ou ID
+            if not query.isdigit():
                 sql = "SELECT * FROM sales WHERE sale_number = ?"
                 param = (query.upper(),)
             else:
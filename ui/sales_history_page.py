@@ -3,17 +3,19 @@
 Interface de l'historique des ventes
 """
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
-                             QPushButton, QLineEdit, QTableWidget, QTableWidgetItem,
+                             QPushButton, QLineEdit, QTableWidget, QTableWidgetItem, QTableView,
                              QFrame, QMessageBox, QHeaderView, QAbstractItemView,
                              QDateEdit, QComboBox, QDialog, QFormLayout)
 from PyQt5.QtCore import Qt, QDate
 from PyQt5.QtGui import QColor, QFont
 from modules.sales.pos import pos_manager
 from modules.sales.printer import printer_manager
+from modules.reports.sales_report import sales_report_manager
 from core.auth import auth_manager
 from core.logger import logger
 from core.i18n import i18n_manager
 from core.data_signals import data_signals
+from ui.table_models import PagedTableModel
 from core.logger import logger
 from database.db_manager import db
 from PyQt5.QtCore import pyqtSignal
@@ -95,6 +97,38 @@ class SaleDetailsDialog(QDialog):
             
         self.total_label.setText(_("label_dialog_total").format(sale['total_amount']))
 
+class SalesTableModel(PagedTableModel):
+    """Lignes de l'historique des ventes"""
+    
+    STATUS_COLORS = {'completed': "#059669", 'cancelled': "#dc2626"}
+    # Colonne -> clé de tri de SalesReportManager.get_sales_history
+    SORT_KEYS = ['id', 'sale_number', 'sale_date', 'customer_name', 'cashier_name',
+                 'total_amount', 'status', 'profit']
+    
+    def display(self, sale, column):
+        if column == 0:
+            return str(sale['id'])
+        if column == 1:
+            return sale['sale_number']
+        if column == 2:
+            return sale['sale_date']
+        if column == 3:
+            return sale['customer_name'] or "Public"
+        if column == 4:
+            return sale['cashier_name'] or "Système"
+        if column == 5:
+            return f"{sale['total_amount']:.2f}"
+        if column == 6:
+            return sale['status']
+        if column == 7:
+            return f"{sale.get('profit', 0):.2f}"
+        return ""
+    
+    def foreground(self, sale, column):
+        if column == 6:
+            return QColor(self.STATUS_COLORS.get(sale['status'], "#d97706"))
+        return None
+
 class SalesHistoryPage(QWidget):
     """Page d'historique des ventes"""
     navigate_to = pyqtSignal(str, dict) # Pour navigation
@@ -105,7 +139,7 @@ class SalesHistoryPage(QWidget):
         self.load_sales()
         
         i18n_manager.language_changed.connect(self.update_ui_text)
-        data_signals.sales_changed.connect(self.load_sales)
+        data_signals.subscribe(self, ('sales_changed',), self.load_sales)
         self.update_ui_text()
         
     def init_ui(self):
@@ -197,15 +231,10 @@ class SalesHistoryPage(QWidget):
         
         layout.addWidget(filter_card)
         
-        # Tableau
-        self.sales_table = QTableWidget()
-        cols = _("table_headers_sales")
-        # Ensure we only use 7 columns if we don't have permission for profit
-        if not auth_manager.has_permission('view_reports'):
-             cols = cols[:-1] # Remove Profit column
-            
-        self.sales_table.setColumnCount(len(cols))
-        self.sales_table.setHorizontalHeaderLabels(cols)
+        # Tableau - Modèle paginé
+        self.sales_table = QTableView()
+        self.sales_model = SalesTableModel(self._sales_headers(), parent=self.sales_table)
+        self.sales_table.setModel(self.sales_model)
         self.sales_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         self.sales_table.setSelectionBehavior(QAbstractItemView.SelectRows)
         self.sales_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
@@ -213,6 +242,9 @@ class SalesHistoryPage(QWidget):
         self.sales_table.verticalHeader().setDefaultSectionSize(45)
         self.sales_table.setStyleSheet(TABLE_STYLE)
         self.sales_table.doubleClicked.connect(self.view_sale_details)
+        # Tri côté SQL (clic sur l'en-tête), plus récentes d'abord
+        self.sales_table.horizontalHeader().setSortIndicator(2, Qt.DescendingOrder)
+        self.sales_table.setSortingEnabled(True)
         layout.addWidget(self.sales_table)
         
         # Boutons d'actions en bas
@@ -276,100 +308,67 @@ class SalesHistoryPage(QWidget):
         self.return_btn.setText(_("btn_return_action"))
         
         # Headers
-        cols = _("table_headers_sales")
+        self.sales_model.set_headers(self._sales_headers())
+    
+    def _sales_headers(self):
+        cols = i18n_manager.get("table_headers_sales")
+        # Ensure we only use 7 columns if we don't have permission for profit
         if not auth_manager.has_permission('view_reports'):
-             cols = cols[:-1]
-        self.sales_table.setHorizontalHeaderLabels(cols)
+             cols = cols[:-1] # Remove Profit column
+        return cols
+        
+    def _sales_filter(self):
+        """Filtres courants, au format de SalesReportManager.get_sales_history"""
+        status_map = {1: 'completed', 2: 'cancelled', 3: 'returned'}
+        return {
+            'start_date': self.start_date.date().toString("yyyy-MM-dd"),
+            'end_date': self.end_date.date().toString("yyyy-MM-dd"),
+            'search': self.search_input.text().strip() or None,
+            'status': status_map.get(self.status_combo.currentIndex()),
+            'with_profit': auth_manager.has_permission('view_reports'),
+        }
+    
+    def _fetch_sales_page(self, filters, offset, limit):
+        """Une page de l'historique, triée selon l'en-tête (appelée par le modèle)"""
+        column, order = self.sales_model.sort_order()
+        sort_by = SalesTableModel.SORT_KEYS[column] if 0 <= column < len(SalesTableModel.SORT_KEYS) else 'sale_date'
+        return sales_report_manager.get_sales_history(
+            sort_by=sort_by, descending=(column < 0 or order == Qt.DescendingOrder),
+            limit=limit, offset=offset, **filters
+        )
         
     def load_sales(self):
-        search = self.search_input.text().strip()
-        start = self.start_date.date().toString("yyyy-MM-dd")
-        end = self.end_date.date().toString("yyyy-MM-dd")
-        status_idx = self.status_combo.currentIndex()
-        
-        query = """
-            SELECT s.*, u.full_name as cashier_name, c.full_name as customer_name
-            FROM sales s
-            LEFT JOIN users u ON s.cashier_id = u.id
-            LEFT JOIN customers c ON s.customer_id = c.id
-            WHERE DATE(s.sale_date) BETWEEN ? AND ?
-        """
-        params = [start, end]
-        
-        if search:
-            query += " AND (s.sale_number LIKE ? OR c.full_name LIKE ?)"
-            params.extend([f"%{search}%", f"%{search}%"])
-            
-        if status_idx > 0:
-            status_map = {1: 'completed', 2: 'cancelled', 3: 'returned'}
-            query += " AND s.status = ?"
-            params.append(status_map[status_idx])
-            
-        query += " ORDER BY s.sale_date DESC"
-        
-        results = db.execute_query(query, tuple(params))
-        self.sales_table.setRowCount(0)
+        filters = self._sales_filter()
+        self.sales_model.reset(lambda offset, limit: self._fetch_sales_page(filters, offset, limit))
         
-        total_ca = 0
-        total_profit = 0
-        
-        for sale in results:
-            row = self.sales_table.rowCount()
-            self.sales_table.insertRow(row)
-            
-            self.sales_table.setItem(row, 0, QTableWidgetItem(str(sale['id'])))
-            self.sales_table.setItem(row, 1, QTableWidgetItem(sale['sale_number']))
-            self.sales_table.setItem(row, 2, QTableWidgetItem(sale['sale_date']))
-            self.sales_table.setItem(row, 3, QTableWidgetItem(sale['customer_name'] or "Public"))
-            self.sales_table.setItem(row, 4, QTableWidgetItem(sale['cashier_name'] or "Système"))
-            self.sales_table.setItem(row, 5, QTableWidgetItem(f"{sale['total_amount']:.2f}"))
-            
-            status_item = QTableWidgetItem(sale['status'])
-            if sale['status'] == 'completed':
-                status_item.setForeground(QColor("#059669"))
-            elif sale['status'] == 'cancelled':
-                status_item.setForeground(QColor("#dc2626"))
-            else:
-                status_item.setForeground(QColor("#d97706"))
-            self.sales_table.setItem(row, 6, QTableWidgetItem(status_item))
-            
-            total_ca += sale['total_amount'] if sale['status'] == 'completed' else 0
-            
-            # Calculer bénéfice si autorisé
-            if auth_manager.has_permission('view_reports'):
-                # On pourrait faire un JOIN pour optimiser mais on va faire simple pour l'instant
-                profit_query = "SELECT SUM((unit_price - purchase_price) * quantity) as profit FROM sale_items WHERE sale_id = ?"
-                p_res = db.fetch_one(profit_query, (sale['id'],))
-                profit = p_res['profit'] or 0 if sale['status'] == 'completed' else 0
-                total_profit += profit
-                self.sales_table.setItem(row, 7, QTableWidgetItem(f"{profit:.2f}"))
+        # Totaux sur l'ensemble du filtre (indépendants des pages chargées)
+        totals = sales_report_manager.get_sales_history_totals(**filters)
                 
         _ = i18n_manager.get
-        self.summary_label.setText(f"{_('summary_total_ca').format(total_ca)} | {_('summary_total_profit').format(total_profit)}")
+        self.summary_label.setText(f"{_('summary_total_ca').format(totals['total_ca'])} | {_('summary_total_profit').format(totals['total_profit'])}")
+
+    def _selected_sale_id(self):
+        """ID de la vente sélectionnée, ou None"""
+        sale = self.sales_model.row_at(self.sales_table.currentIndex().row())
+        return sale['id'] if sale else None
 
     def view_sale_details(self):
-        row = self.sales_table.currentRow()
-        if row < 0: return
-        sale_id = int(self.sales_table.item(row, 0).text())
-        dialog = SaleDetailsDialog(sale_id, self)
-        dialog.exec_()
-        
+        sale_id = self._selected_sale_id()
+        if sale_id is None: return
         dialog = SaleDetailsDialog(sale_id, self)
         dialog.exec_()
 
     def open_return(self):
         """Ouvrir la page de retour pour cette vente"""
-        row = self.sales_table.currentRow()
-        if row < 0: return
+        sale_id = self._selected_sale_id()
+        if sale_id is None: return
         
-        sale_id = int(self.sales_table.item(row, 0).text())
         # Naviguer vers la page retours
         self.navigate_to.emit("returns", {"load_sale": sale_id})
         
     def reprint_sale(self):
-        row = self.sales_table.currentRow()
-        if row < 0: return
-        sale_id = int(self.sales_table.item(row, 0).text())
+        sale_id = self._selected_sale_id()
+        if sale_id is None: return
         sale = pos_manager.get_sale(sale_id)
         if sale:
             try:
@@ -391,18 +390,16 @@ class SalesHistoryPage(QWidget):
             with open(path, 'w', encoding='utf-8-sig', newline='') as f:
                 writer = csv.writer(f)
                 # Header
+                model = self.sales_model
                 headers = []
-                for i in range(self.sales_table.columnCount()):
-                    headers.append(self.sales_table.horizontalHeaderItem(i).text())
+                for i in range(model.columnCount()):
+                    headers.append(model.headerData(i, Qt.Horizontal))
                 writer.writerow(headers)
                 
-                # Rows
-                for r in range(self.sales_table.rowCount()):
-                    row_data = []
-                    for c in range(self.sales_table.columnCount()):
-                        item = self.sales_table.item(r, c)
-                        row_data.append(item.text() if item else "")
-                    writer.writerow(row_data)
+                # Rows (toutes les pages du filtre courant)
+                model.fetch_all()
+                for sale in model.rows():
+                    writer.writerow([model.display(sale, c) for c in range(model.columnCount())])
                     
             _ = i18n_manager.get
             QMessageBox.information(self, _("title_success"), _("msg_export_success").format(path))
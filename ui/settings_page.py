@@ -5,14 +5,15 @@ Interface des paramètres
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
                              QPushButton, QLineEdit, QTableWidget, QTableWidgetItem,
                              QComboBox, QFrame, QMessageBox, QHeaderView, QTabWidget,
-                             QFormLayout, QGroupBox, QCheckBox, QSpinBox, QFileDialog)
+                             QFormLayout, QGroupBox, QCheckBox, QSpinBox, QFileDialog,
+                             QProgressDialog)
 from PyQt5.QtCore import Qt, pyqtSignal
 from PyQt5.QtGui import QFont, QColor, QPixmap
 from core.auth import auth_manager
 from core.logger import logger
 from database.db_manager import db
+from core.data_signals import data_signals
 import config
-import openpyxl
 import os
 from ui.permission_dialog import PermissionDialog
 
@@ -535,136 +536,108 @@ class SettingsPage(QWidget):
             self.load_backups_table()
             QMessageBox.information(self, "Succès", f"{deleted} sauvegarde(s) supprimée(s)")
 
+    def _run_with_progress(self, key: str, label: str, func, *args, on_done=None, cancel=None):
+        """
+        Lancer `func(*args, progress=...)` sur le pool des travaux longs avec un dialogue de progression
+        
+        Args:
+            key: Clé de la tâche (une seule à la fois)
+            label: Texte du dialogue
+            on_done: Appelée sur le thread de l'interface avec le résultat
+            cancel: Appelée par le bouton Annuler (la tâche s'arrête au prochain lot)
+        """
+        _ = i18n_manager.get
+        from PyQt5.QtCore import QTimer
+        from core.db_executor import background_jobs
+        
+        # Progression écrite par le thread de la tâche, lue par le minuteur de l'interface
+        state = {'done': 0, 'total': 0}
+        
+        def on_progress(done, total):
+            state['done'], state['total'] = done, total
+        
+        dialog = QProgressDialog(label, _('btn_cancel'), 0, 0, self)
+        dialog.setWindowTitle(config.APP_NAME)
+        dialog.setMinimumDuration(0)
+        dialog.setAutoClose(False)
+        dialog.setAutoReset(False)
+        if cancel:
+            dialog.canceled.connect(cancel)
+        else:
+            dialog.setCancelButton(None)
+        
+        timer = QTimer(dialog)
+        
+        def refresh():
+            if state['total']:
+                dialog.setMaximum(state['total'])
+                dialog.setValue(state['done'])
+        
+        timer.timeout.connect(refresh)
+        timer.start(100)
+        
+        def finish():
+            timer.stop()
+            if cancel:
+                dialog.canceled.disconnect()
+            dialog.close()
+            dialog.deleteLater()
+        
+        def deliver(result):
+            finish()
+            if on_done:
+                on_done(result)
+        
+        def on_error(error):
+            finish()
+            QMessageBox.critical(self, _('title_error'), f"{_('title_error')}: {error}")
+        
+        background_jobs.submit(key, func, *args, progress=on_progress, on_result=deliver, on_error=on_error)
+        dialog.show()
+
     def export_data(self):
-        """Exporter les données en Excel (sauvegarde complète)"""
+        """Exporter toutes les données (sauvegarde complète), par lots et hors du thread de l'interface"""
         _ = i18n_manager.get
-        try:
-            from datetime import datetime
-            default_name = f"backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-            filename, selected_filter = QFileDialog.getSaveFileName(self, _('group_export'), 
-                                                    str(config.DATA_DIR / default_name), 
-                                                    "Fichiers Excel (*.xlsx)")
-            if not filename:
+        from datetime import datetime
+        from core.db_executor import background_jobs
+        from core.exporter import EXPORT_FORMATS, data_exporter
+        
+        if background_jobs.is_pending("data_export"):
+            return
+        
+        formats = data_exporter.available_formats()
+        default_name = f"backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+        filename, selected_filter = QFileDialog.getSaveFileName(
+            self, _('group_export'), str(config.DATA_DIR / default_name),
+            ";;".join(EXPORT_FORMATS[fmt][0] for fmt in formats))
+        if not filename:
+            return
+        fmt = next((f for f in formats if EXPORT_FORMATS[f][0] == selected_filter), 'xlsx')
+        extension = EXPORT_FORMATS[fmt][1]
+        if not filename.lower().endswith(extension):
+            filename = os.path.splitext(filename)[0] + extension
+        
+        def on_done(path):
+            if path is None:
+                QMessageBox.information(self, _('group_export'), _('msg_export_cancelled'))
                 return
-            
-            # ... (Rest of logic unchanged, just messages)
-            # Re-implementing core logic with minimal changes
-            
-            wb = openpyxl.Workbook()
-            
-            # 1. Produits
-            ws_prod = wb.active
-            ws_prod.title = "Produits"
-            # 1. Produits
-            ws_prod = wb.active
-            ws_prod.title = "Produits"
-            # Fixed Query: JOIN with categories table to get category name AND use correct min_stock_level column
-            products_query = """
-                SELECT p.barcode, p.name, c.name as category_name, 
-                       p.purchase_price, p.selling_price, p.stock_quantity, p.min_stock_level 
-                FROM products p
-                LEFT JOIN categories c ON p.category_id = c.id
-            """
-            products = db.execute_query(products_query)
-            ws_prod.append(["Code-barres", "Nom", "Catégorie", "PA", "PV", "Stock", "Stock Min"])
-            for p in products:
-                ws_prod.append([
-                    p['barcode'], 
-                    p['name'], 
-                    p['category_name'] or '', # Use category_name alias
-                    p['purchase_price'], 
-                    p['selling_price'], 
-                    p['stock_quantity'], 
-                    p['min_stock_level'] or 0
-                ])
-                
-            # 2. Ventes
-            ws_sales = wb.create_sheet("Ventes")
-            sales = db.execute_query("SELECT sale_number, total_amount, payment_method, sale_date, customer_id, status FROM sales")
-            ws_sales.append(["N° Vente", "Montant Total", "Paiement", "Date", "Client ID", "Statut"])
-            for s in sales:
-                ws_sales.append([s['sale_number'], s['total_amount'], s['payment_method'], s['sale_date'], s['customer_id'] or '', s['status']])
-
-            # 3. Détails Ventes (Fixed: subtotal instead of total)
-            ws_items = wb.create_sheet("Details_Ventes")
-            items = db.execute_query("SELECT sale_id, product_id, product_name, quantity, unit_price, subtotal FROM sale_items")
-            ws_items.append(["ID Vente", "ID Produit", "Nom Produit", "Quantité", "Prix Unitaire", "Sous-Total"])
-            for i in items:
-                ws_items.append([i['sale_id'], i['product_id'] or '', i['product_name'], i['quantity'], i['unit_price'], i['subtotal']])
-
-            # 4. Clients (More columns)
-            ws_cust = wb.create_sheet("Clients")
-            customers = db.execute_query("SELECT code, full_name, phone, email, address, credit_limit, current_credit, total_purchases FROM customers")
-            ws_cust.append(["Code", "Nom", "Téléphone", "Email", "Adresse", "Limite Crédit", "Dette", "Total Achats"])
-            for c in customers:
-                ws_cust.append([c['code'], c['full_name'], c['phone'] or '', c['email'] or '', c['address'] or '', c['credit_limit'], c['current_credit'], c['total_purchases']])
-
-            # 5. Fournisseurs (Fixed: company_name instead of name)
-            ws_sup = wb.create_sheet("Fournisseurs")
-            try:
-                suppliers = db.execute_query("SELECT code, company_name, contact_person, phone, email, address, total_debt, total_purchases FROM suppliers")
-                ws_sup.append(["Code", "Entreprise", "Contact", "Téléphone", "Email", "Adresse", "Dette", "Total Achats"])
-                for sup in suppliers:
-                    ws_sup.append([sup['code'] or '', sup['company_name'], sup['contact_person'] or '', sup['phone'] or '', sup['email'] or '', sup['address'] or '', sup['total_debt'], sup['total_purchases']])
-            except Exception as e:
-                logger.warning(f"Erreur export fournisseurs: {e}")
-                ws_sup.append(["Aucune donnée fournisseur"])
-            
-            # 6. Catégories (NEW)
-            ws_cat = wb.create_sheet("Categories")
-            try:
-                categories = db.execute_query("SELECT id, name, name_ar, description FROM categories WHERE is_active = 1")
-                ws_cat.append(["ID", "Nom", "Nom Arabe", "Description"])
-                for cat in categories:
-                    ws_cat.append([cat['id'], cat['name'], cat['name_ar'] or '', cat['description'] or ''])
-            except Exception as e:
-                logger.warning(f"Erreur export catégories: {e}")
-                ws_cat.append(["Aucune catégorie"])
-
-            # 7. Retours (NEW)
-            ws_ret = wb.create_sheet("Retours")
-            try:
-                returns = db.execute_query("SELECT return_number, original_sale_id, return_amount, refund_method, return_date, reason FROM returns")
-                ws_ret.append(["N° Retour", "ID Vente Originale", "Montant", "Méthode Remboursement", "Date", "Raison"])
-                for r in returns:
-                    ws_ret.append([r['return_number'], r['original_sale_id'], r['return_amount'], r['refund_method'], r['return_date'], r['reason'] or ''])
-            except Exception as e:
-                logger.warning(f"Erreur export retours: {e}")
-                ws_ret.append(["Aucun retour"])
-            
-            # 8. Détails Retours (NEW)
-            ws_ret_items = wb.create_sheet("Details_Retours")
-            try:
-                ret_items = db.execute_query("SELECT return_id, product_id, quantity_returned, unit_price, subtotal FROM return_items")
-                ws_ret_items.append(["ID Retour", "ID Produit", "Qté Retournée", "Prix Unitaire", "Sous-Total"])
-                for ri in ret_items:
-                    ws_ret_items.append([ri['return_id'], ri['product_id'] or '', ri['quantity_returned'], ri['unit_price'], ri['subtotal']])
-            except Exception as e:
-                logger.warning(f"Erreur export détails retours: {e}")
-                ws_ret_items.append(["Aucun détail retour"])
-            
-            # 9. Raccourcis POS (NEW)
-            ws_short = wb.create_sheet("Raccourcis")
-            try:
-                shortcuts = db.execute_query("SELECT id, label, product_id, category_id, price, image_path, position FROM pos_shortcuts ORDER BY position")
-                ws_short.append(["ID", "Libellé", "ID Produit", "ID Catégorie", "Prix", "Chemin Image", "Position"])
-                for sc in shortcuts:
-                    ws_short.append([sc['id'], sc['label'], sc['product_id'] or '', sc['category_id'] or '', sc['price'] or '', sc['image_path'] or '', sc['position']])
-            except Exception as e:
-                logger.warning(f"Erreur export raccourcis: {e}")
-                ws_short.append(["Aucun raccourci"])
-            
-            wb.save(filename)
-            logger.info(f"Sauvegarde créée: {filename}")
-            QMessageBox.information(self, _('title_success'), _('msg_backup_success').format(filename))
-            
-        except Exception as e:
-            logger.error(f"Erreur export excel: {e}")
-            QMessageBox.critical(self, _('title_error'), f"{_('title_error')}: {e}")
+            logger.info(f"Sauvegarde créée: {path}")
+            QMessageBox.information(self, _('title_success'), _('msg_backup_success').format(path))
+        
+        self._run_with_progress("data_export",
+                                _('msg_export_progress').format(os.path.basename(filename)),
+                                data_exporter.export, filename, fmt,
+                                on_done=on_done, cancel=data_exporter.cancel)
 
     def import_data(self):
-        """Importer les données depuis une sauvegarde Excel"""
+        """Restaurer une sauvegarde complète (tables de préparation et fusion ensembliste)"""
         _ = i18n_manager.get
+        from core.db_executor import background_jobs
+        from core.importer import data_importer
+        
+        if background_jobs.is_pending("data_import"):
+            return
+        
         reply = QMessageBox.warning(self, _('title_warning'), 
             _('msg_confirm_import'),
             QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
@@ -672,127 +645,23 @@ class SettingsPage(QWidget):
         if reply != QMessageBox.Yes:
             return
             
-        try:
-            filename, selected_filter = QFileDialog.getOpenFileName(self, _('group_import'),
-                                                     str(config.DATA_DIR),
-                                                     "Fichiers Excel (*.xlsx)")
-            if not filename:
+        filename, selected_filter = QFileDialog.getOpenFileName(
+            self, _('group_import'), str(config.DATA_DIR),
+            "Sauvegardes (*.xlsx *.zip);;Fichiers Excel (*.xlsx);;Archives CSV / Parquet (*.zip)")
+        if not filename:
+            return
+        
+        def on_done(counts):
+            if counts is None:
+                QMessageBox.information(self, _('group_import'), _('msg_import_cancelled'))
                 return
-
-            # ... (Rest logic matches original import mostly)
-            wb = openpyxl.load_workbook(filename)
-            imported_counts = {}
-            
-            # 1. Importer Produits
-            if "Produits" in wb.sheetnames:
-                ws = wb["Produits"]
-                count = 0
-                for row in ws.iter_rows(min_row=2, values_only=True):
-                    if row[0]:  # barcode exists
-                        try:
-                            # Handle Category Lookup/Creation
-                            cat_name = row[2] or ''
-                            cat_id = None
-                            if cat_name:
-                                # Find or Create Category
-                                cat_res = db.fetch_one("SELECT id FROM categories WHERE name = ?", (cat_name,))
-                                if cat_res:
-                                    cat_id = cat_res['id']
-                                else:
-                                    # Create new category if not exists
-                                    db.execute_update("INSERT INTO categories (name) VALUES (?)", (cat_name,))
-                                    cat_res = db.fetch_one("SELECT id FROM categories WHERE name = ?", (cat_name,))
-                                    if cat_res:
-                                        cat_id = cat_res['id']
-
-                            db.execute_update("""
-                                INSERT OR REPLACE INTO products (barcode, name, category_id, purchase_price, selling_price, stock_quantity, min_stock_level)
-                                VALUES (?, ?, ?, ?, ?, ?, ?)
-                            """, (row[0], row[1], cat_id, row[3] or 0, row[4] or 0, row[5] or 0, row[6] or 0))
-                            count += 1
-                        except:
-                            pass
-                imported_counts["Produits"] = count
-
-            # 2. Importer Clients (Updated format: Code, Nom, Tel, Email, Adresse, Limite, Dette, Total)
-            if "Clients" in wb.sheetnames:
-                ws = wb["Clients"]
-                count = 0
-                for row in ws.iter_rows(min_row=2, values_only=True):
-                    if row[1]:  # full_name (column 1) exists
-                        try:
-                            # Handle both old (4 cols) and new (8 cols) format
-                            if len([x for x in row if x is not None]) >= 8:
-                                # New format with all columns
-                                db.execute_update("""
-                                    INSERT OR IGNORE INTO customers (code, full_name, phone, email, address, credit_limit, current_credit, total_purchases)
-                                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                                """, (row[0] or '', row[1], row[2] or '', row[3] or '', row[4] or '', row[5] or 0, row[6] or 0, row[7] or 0))
-                            else:
-                                # Old format (Nom, Tel, Dette, Total)
-                                db.execute_update("""
-                                    INSERT OR IGNORE INTO customers (full_name, phone, current_credit, total_purchases)
-                                    VALUES (?, ?, ?, ?)
-                                """, (row[0], row[1] or '', row[2] or 0, row[3] or 0))
-                            count += 1
-                        except:
-                            pass
-                imported_counts["Clients"] = count
-
-            # 3. Importer Fournisseurs (Updated: Code, Entreprise, Contact, Tel, Email, Adresse, Dette, Total)
-            if "Fournisseurs" in wb.sheetnames:
-                ws = wb["Fournisseurs"]
-                count = 0
-                for row in ws.iter_rows(min_row=2, values_only=True):
-                    if row[1] and row[1] != "Aucune donnée fournisseur":  # company_name
-                        try:
-                            db.execute_update("""
-                                INSERT OR IGNORE INTO suppliers (code, company_name, contact_person, phone, email, address, total_debt, total_purchases)
-                                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                            """, (row[0] or '', row[1], row[2] or '', row[3] or '', row[4] or '', row[5] or '', row[6] or 0, row[7] or 0))
-                            count += 1
-                        except:
-                            pass
-                imported_counts["Fournisseurs"] = count
-            
-            # 4. Importer Catégories (NEW)
-            if "Categories" in wb.sheetnames:
-                ws = wb["Categories"]
-                count = 0
-                for row in ws.iter_rows(min_row=2, values_only=True):
-                    if row[1] and row[1] != "Aucune catégorie":  # name
-                        try:
-                            db.execute_update("""
-                                INSERT OR IGNORE INTO categories (name, name_ar, description)
-                                VALUES (?, ?, ?)
-                            """, (row[1], row[2] or '', row[3] or ''))
-                            count += 1
-                        except:
-                            pass
-                imported_counts["Categories"] = count
-            
-            # 5. Importer Raccourcis (NEW)
-            if "Raccourcis" in wb.sheetnames:
-                ws = wb["Raccourcis"]
-                count = 0
-                for row in ws.iter_rows(min_row=2, values_only=True):
-                    if row[1] and row[1] != "Aucun raccourci":  # label
-                        try:
-                            db.execute_update("""
-                                INSERT OR IGNORE INTO pos_shortcuts (label, product_id, category_id, price, image_path, position)
-                                VALUES (?, ?, ?, ?, ?, ?)
-                            """, (row[1], row[2] or None, row[3] or None, row[4] or None, row[5] or '', row[6] or 0))
-                            count += 1
-                        except:
-                            pass
-                imported_counts["Raccourcis"] = count
-            summary = "\n".join([f"• {k}: {v} enregistrements" for k, v in imported_counts.items()])
-            logger.info(f"Restauration depuis: {filename}")
+            summary = "\n".join([f"• {k}: {v} enregistrements" for k, v in counts.items()])
             QMessageBox.information(self, _('title_success'), _('msg_import_success').format(summary))
-            
-        except Exception as e:
-            logger.error(f"Erreur import excel: {e}")
-            QMessageBox.critical(self, _('title_error'), f"Échec: {e}")
+        
+        self._run_with_progress("data_import",
+                                _('msg_import_progress').format(os.path.basename(filename)),
+                                data_importer.restore, filename,
+                                on_done=on_done, cancel=data_importer.cancel)
 
     def reset_all_data(self):
         """Réinitialiser toutes les données de l'application"""
@@ -837,6 +706,7 @@ class SettingsPage(QWidget):
             
             # Supprimer toutes les données
             tables_to_clear = [
+                'daily_rollup',
                 'sale_items',
                 'sales',
                 'return_items',
@@ -859,6 +729,11 @@ class SettingsPage(QWidget):
                     logger.error(f"Erreur suppression {table}: {e}")
             
             logger.info("⚠️ RÉINITIALISATION COMPLÈTE effectuée par l'utilisateur")
+            data_signals.categories_changed.emit()
+            data_signals.products_changed.emit()
+            data_signals.customers_changed.emit()
+            data_signals.suppliers_changed.emit()
+            data_signals.sales_changed.emit()
             QMessageBox.information(self, _('title_success'), _('msg_reset_success'))
             
         except Exception as e:
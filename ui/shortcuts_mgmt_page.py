@@ -184,9 +184,8 @@ class ShortcutsManagementPage(QWidget):
         i18n_manager.language_changed.connect(self.update_ui_text)
         
         # Connect to data signals for refresh
-        data_signals.products_changed.connect(self.refresh)
-        data_signals.categories_changed.connect(self.refresh)
-        data_signals.shortcuts_changed.connect(self.refresh)
+        data_signals.subscribe(self, ('products_changed', 'categories_changed', 'shortcuts_changed'),
+                               self.refresh)
         
         self.update_ui_text()
         
@@ -187,7 +187,7 @@ class SuppliersPage(QWidget):
         self.load_suppliers()
         
         i18n_manager.language_changed.connect(self.update_ui_text)
-        data_signals.suppliers_changed.connect(self.load_suppliers)
+        data_signals.subscribe(self, ('suppliers_changed',), self.load_suppliers)
         self.update_ui_text()
         
     def init_ui(self):
@@ -0,0 +1,364 @@
+# -*- coding: utf-8 -*-
+"""
+Modèles de tableaux paginés et délégué de boutons d'action
+
+Les pages de liste (produits, clients, historique des ventes) affichent
+leurs lignes via un QTableView adossé à un PagedTableModel : les lignes
+sont chargées par pages à mesure du défilement (canFetchMore/fetchMore)
+et les boutons d'action sont dessinés par un délégué unique au lieu d'un
+QWidget par ligne.
+
+Le panier du POS utilise CartTableModel : le modèle observe le Cart et
+ne signale à la vue que la ligne insérée, retirée ou modifiée.
+"""
+from typing import Callable, Dict, List, Optional
+from PyQt5.QtWidgets import (QStyledItemDelegate, QStyle, QStyleOptionButton,
+                             QApplication, QToolTip)
+from PyQt5.QtCore import (Qt, QAbstractTableModel, QModelIndex, QRect, QEvent,
+                          pyqtSignal)
+from PyQt5.QtGui import QBrush, QColor
+
+# Taille d'une page chargée à chaque fetchMore (~5 écrans de lignes de 45 px)
+DEFAULT_PAGE_SIZE = 200
+
+# Rôle portant le dictionnaire complet de la ligne
+ROW_ROLE = Qt.UserRole
+
+
+class PagedTableModel(QAbstractTableModel):
+    """
+    Modèle de tableau en lecture seule, chargé par pages.
+
+    La source est une fonction `loader(offset, limit) -> List[Dict]`. Une page
+    plus courte que `limit` marque la fin des données. Les sous-classes
+    définissent `display()` et, au besoin, `foreground()` / `background()`.
+
+    Le tri est délégué à la source : `sort()` mémorise (colonne, ordre),
+    que le loader lit via `sort_order()`, puis recharge depuis la première page.
+    """
+
+    def __init__(self, headers: List[str], page_size: int = DEFAULT_PAGE_SIZE, parent=None):
+        super().__init__(parent)
+        self._headers = list(headers)
+        self._page_size = page_size
+        self._rows: List[Dict] = []
+        self._loader: Optional[Callable[[int, int], List[Dict]]] = None
+        self._exhausted = True
+        self._sort = (-1, Qt.AscendingOrder)
+
+    # ----- Chargement -----
+
+    def reset(self, loader: Callable[[int, int], List[Dict]], first_page: Optional[List[Dict]] = None):
+        """
+        Remplacer la source et charger la première page
+
+        `first_page` : première page déjà lue (en arrière-plan, via db_executor) ;
+        les pages suivantes sont demandées au loader au défilement.
+        """
+        self.beginResetModel()
+        self._loader = loader
+        self._rows = []
+        self._exhausted = False
+        self.endResetModel()
+        if first_page is None:
+            self.fetchMore(QModelIndex())
+        else:
+            self._append_page(first_page)
+
+    def set_rows(self, rows: List[Dict]):
+        """Source déjà en mémoire (listes filtrées courtes), paginée de la même façon"""
+        rows = list(rows)
+        self.reset(lambda offset, limit: rows[offset:offset + limit])
+
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        return not parent.isValid() and not self._exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._exhausted or self._loader is None:
+            return
+        self._append_page(self._loader(len(self._rows), self._page_size))
+
+    def _append_page(self, page: List[Dict]):
+        if len(page) < self._page_size:
+            self._exhausted = True
+        if not page:
+            return
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(page) - 1)
+        self._rows.extend(page)
+        self.endInsertRows()
+
+    def fetch_all(self):
+        """Charger toutes les pages restantes (export)"""
+        while self.canFetchMore():
+            self.fetchMore()
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        """Tri côté source : recharger depuis la première page"""
+        if (column, order) == self._sort:
+            return
+        self._sort = (column, order)
+        if self._loader is not None:
+            self.reset(self._loader)
+
+    def page_size(self) -> int:
+        return self._page_size
+
+    def sort_order(self) -> tuple:
+        """(colonne, Qt.SortOrder) demandés par la vue ; colonne -1 = ordre par défaut"""
+        return self._sort
+
+    # ----- Accès -----
+
+    def row_at(self, row: int) -> Optional[Dict]:
+        """Dictionnaire de la ligne `row`, ou None"""
+        if 0 <= row < len(self._rows):
+            return self._rows[row]
+        return None
+
+    def rows(self) -> List[Dict]:
+        """Lignes chargées jusqu'ici"""
+        return self._rows
+
+    def set_headers(self, headers: List[str]):
+        self._headers = list(headers)
+        if self._headers:
+            self.headerDataChanged.emit(Qt.Horizontal, 0, len(self._headers) - 1)
+
+    # ----- À redéfinir -----
+
+    def display(self, row: Dict, column: int) -> str:
+        return ""
+
+    def foreground(self, row: Dict, column: int) -> Optional[QColor]:
+        return None
+
+    def background(self, row: Dict, column: int) -> Optional[QColor]:
+        return None
+
+    # ----- API Qt -----
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._headers)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self._rows[index.row()]
+        if role == Qt.DisplayRole:
+            return self.display(row, index.column())
+        if role == Qt.ForegroundRole:
+            color = self.foreground(row, index.column())
+            return QBrush(color) if color is not None else None
+        if role == Qt.BackgroundRole:
+            color = self.background(row, index.column())
+            return QBrush(color) if color is not None else None
+        if role == ROW_ROLE:
+            return row
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal and 0 <= section < len(self._headers):
+            return self._headers[section]
+        return super().headerData(section, orientation, role)
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+
+class CartTableModel(QAbstractTableModel):
+    """
+    Lignes du panier (modules.sales.cart.Cart), tenues à jour ligne par ligne.
+
+    Le modèle est l'observateur du panier affiché (Cart.set_observer) :
+    un scan ajoute ou modifie une seule ligne au lieu de reconstruire le
+    tableau. Colonnes : produit, prix, quantité (éditable), total, retrait
+    (dessinée par un ActionButtonsDelegate).
+
+    Une quantité saisie n'est pas écrite directement : `quantity_edited(ligne,
+    texte)` laisse la page valider (stock) puis appeler Cart.update_quantity,
+    dont la notification rafraîchit la ligne.
+    """
+
+    QUANTITY_COLUMN = 2
+    REMOVE_COLUMN = 4
+
+    quantity_edited = pyqtSignal(int, str)
+
+    def __init__(self, headers: List[str], parent=None):
+        super().__init__(parent)
+        self._headers = list(headers)
+        self._cart = None
+
+    def set_cart(self, cart):
+        """Afficher un autre panier (mise en attente, reprise, nouvelle vente)"""
+        if cart is self._cart:
+            return
+        self.beginResetModel()
+        if self._cart is not None:
+            self._cart.set_observer(None)
+        self._cart = cart
+        if cart is not None:
+            cart.set_observer(self)
+        self.endResetModel()
+
+    def cart(self):
+        return self._cart
+
+    def set_headers(self, headers: List[str]):
+        self._headers = list(headers)
+        if self._headers:
+            self.headerDataChanged.emit(Qt.Horizontal, 0, len(self._headers) - 1)
+
+    # ----- Observateur du panier -----
+
+    def lines_inserting(self, row: int):
+        self.beginInsertRows(QModelIndex(), row, row)
+
+    def lines_inserted(self):
+        self.endInsertRows()
+
+    def lines_removing(self, row: int):
+        self.beginRemoveRows(QModelIndex(), row, row)
+
+    def lines_removed(self):
+        self.endRemoveRows()
+
+    def line_changed(self, row: int):
+        self.dataChanged.emit(self.index(row, 0), self.index(row, self.REMOVE_COLUMN - 1))
+
+    def lines_resetting(self):
+        self.beginResetModel()
+
+    def lines_reset(self):
+        self.endResetModel()
+
+    # ----- API Qt -----
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        if parent.isValid() or self._cart is None:
+            return 0
+        return len(self._cart.items)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._headers)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role not in (Qt.DisplayRole, Qt.EditRole):
+            return None
+        item = self._cart.items[index.row()]
+        column = index.column()
+        if column == 0:
+            return item.product_name
+        if column == 1:
+            return f"{item.unit_price:.2f}"
+        if column == self.QUANTITY_COLUMN:
+            return str(item.quantity)
+        if column == 3:
+            return f"{item.get_subtotal():.2f}"
+        return ""
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if index.isValid() and role == Qt.EditRole and index.column() == self.QUANTITY_COLUMN:
+            self.quantity_edited.emit(index.row(), str(value))
+        # Le panier notifie la ligne s'il accepte la quantité
+        return False
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal and 0 <= section < len(self._headers):
+            return self._headers[section]
+        return super().headerData(section, orientation, role)
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        flags = Qt.ItemIsEnabled | Qt.ItemIsSelectable
+        if index.column() == self.QUANTITY_COLUMN:
+            flags |= Qt.ItemIsEditable
+        return flags
+
+
+class ActionButtonsDelegate(QStyledItemDelegate):
+    """
+    Dessine une rangée de boutons dans une colonne et émet
+    `action_triggered(clé, ligne)` au clic. Aucun widget n'est créé par ligne.
+
+    `actions` : liste de dicts {'key', 'text', 'tooltip' (optionnel)}.
+    """
+
+    action_triggered = pyqtSignal(str, int)
+
+    def __init__(self, actions: List[Dict], button_size: int = 30, spacing: int = 4, parent=None):
+        super().__init__(parent)
+        self._actions = list(actions)
+        self._size = button_size
+        self._spacing = spacing
+        self._pressed = None  # (ligne, clé) du bouton enfoncé
+
+    def set_tooltips(self, tooltips: Dict[str, str]):
+        """Mettre à jour les infobulles (changement de langue)"""
+        for action in self._actions:
+            if action['key'] in tooltips:
+                action['tooltip'] = tooltips[action['key']]
+
+    def _button_rects(self, cell: QRect) -> List[QRect]:
+        count = len(self._actions)
+        total = count * self._size + (count - 1) * self._spacing
+        x = cell.x() + max(0, (cell.width() - total) // 2)
+        y = cell.y() + max(0, (cell.height() - self._size) // 2)
+        return [QRect(x + i * (self._size + self._spacing), y, self._size, self._size)
+                for i in range(count)]
+
+    def _action_at(self, cell: QRect, pos) -> Optional[str]:
+        for action, rect in zip(self._actions, self._button_rects(cell)):
+            if rect.contains(pos):
+                return action['key']
+        return None
+
+    def paint(self, painter, option, index):
+        # Fond de la cellule (sélection, lignes alternées)
+        super().paint(painter, option, index)
+        style = option.widget.style() if option.widget else QApplication.style()
+        for action, rect in zip(self._actions, self._button_rects(option.rect)):
+            button = QStyleOptionButton()
+            button.rect = rect
+            button.text = action['text']
+            button.state = QStyle.State_Enabled
+            if self._pressed == (index.row(), action['key']):
+                button.state |= QStyle.State_Sunken
+            else:
+                button.state |= QStyle.State_Raised
+            style.drawControl(QStyle.CE_PushButton, button, painter, option.widget)
+
+    def sizeHint(self, option, index):
+        size = super().sizeHint(option, index)
+        count = len(self._actions)
+        size.setWidth(max(size.width(), count * self._size + (count + 1) * self._spacing))
+        return size
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.MouseButtonPress and event.button() == Qt.LeftButton:
+            key = self._action_at(option.rect, event.pos())
+            if key:
+                self._pressed = (index.row(), key)
+                return True
+        elif event.type() == QEvent.MouseButtonRelease and self._pressed:
+            pressed, self._pressed = self._pressed, None
+            if pressed == (index.row(), self._action_at(option.rect, event.pos())):
+                self.action_triggered.emit(pressed[1], index.row())
+            return True
+        return super().editorEvent(event, model, option, index)
+
+    def helpEvent(self, event, view, option, index):
+        if event.type() == QEvent.ToolTip:
+            key = self._action_at(option.rect, event.pos())
+            tooltip = next((a.get('tooltip') for a in self._actions if a['key'] == key), None)
+            if tooltip:
+                QToolTip.showText(event.globalPos(), tooltip, view)
+                return True
+        return super().helpEvent(event, view, option, index)